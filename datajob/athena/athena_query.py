@@ -0,0 +1,145 @@
+from pathlib import Path
+
+from aws_cdk import core
+from stepfunctions.steps import Task
+
+from datajob import logger
+from datajob.datajob_base import DataJobBase
+from datajob.stepfunctions import stepfunctions_workflow
+
+# the prefix in the data bucket where athena writes the results of the queries.
+ATHENA_RESULTS_PREFIX = "athena-results"
+
+
+class AthenaQueryException(Exception):
+    """any exception occuring when creating an athena query."""
+
+
+@stepfunctions_workflow.task
+class AthenaQuery(DataJobBase):
+    """Run a SQL statement from a file in the project on athena and wait until
+    it's finished.
+
+    The results of every execution are written to their own prefix in the data bucket:
+
+        s3://<data bucket>/athena-results/<unique name>/execution=<execution name>/
+
+    so that you can read them with partition projection on the execution column.
+
+    example:
+
+        task = AthenaQuery(datajob_stack, "aggregate", query_path="sql/aggregate.sql", database="my_db")
+    """
+
+    def __init__(
+        self,
+        datajob_stack: core.Construct,
+        name: str,
+        query_path: str,
+        database: str = None,
+        catalog: str = None,
+        workgroup: str = "primary",
+        result_reuse_max_age_minutes: int = None,
+        output_location: str = None,
+        state_id: str = None,
+        wait_for_completion: bool = True,
+        **kwargs,
+    ):
+        """
+        :param datajob_stack: aws cdk core construct object.
+        :param name: a name for this athena query.
+        :param query_path: the path to the file with the SQL statement relative to the project root.
+        :param database: the glue database the query runs in.
+        :param catalog: the data catalog the query runs in.
+        :param workgroup: the athena workgroup the query runs in.
+        :param result_reuse_max_age_minutes: reuse the result of the same query if it ran in the last minutes.
+        reusing results requires a workgroup with athena engine version 3.
+        :param output_location: an s3 url where athena writes the results, the default is a prefix in the data bucket.
+        :param state_id: the name of the task in the stepfunctions workflow.
+        :param wait_for_completion: wait until the query is finished.
+        :param kwargs: any extra kwargs for the stepfunctions Task.
+        """
+        logger.info(f"creating athena query {name}")
+        super().__init__(datajob_stack, name)
+        self.query_path = AthenaQuery._get_query_path(self.project_root, query_path)
+        self.query = AthenaQuery._read_query(self.query_path)
+        self.database = database
+        self.catalog = catalog
+        self.workgroup = workgroup
+        self.result_reuse_max_age_minutes = result_reuse_max_age_minutes
+        self.output_location = self._get_output_location(output_location)
+        self.state_id = self.unique_name if state_id is None else state_id
+        self.wait_for_completion = wait_for_completion
+        self.kwargs = kwargs
+        self.sfn_task = Task(
+            state_id=self.state_id,
+            resource=AthenaQuery._get_resource(self.wait_for_completion),
+            parameters=self._get_parameters(),
+            **self.kwargs,
+        )
+        logger.info(f"athena query {name} created.")
+
+    @staticmethod
+    def _get_query_path(project_root: str, query_path: str) -> str:
+        """get the full path to the file with the SQL statement."""
+        if project_root is not None:
+            return str(Path(project_root, query_path))
+        return query_path
+
+    @staticmethod
+    def _read_query(query_path: str) -> str:
+        """read the SQL statement, it becomes part of the workflow
+        definition."""
+        if not Path(query_path).is_file():
+            raise AthenaQueryException(f"the query file {query_path} does not exist.")
+        return Path(query_path).read_text().strip()
+
+    @staticmethod
+    def _get_resource(wait_for_completion: bool) -> str:
+        """the stepfunctions integration to start a query."""
+        if wait_for_completion:
+            return "arn:aws:states:::athena:startQueryExecution.sync"
+        return "arn:aws:states:::athena:startQueryExecution"
+
+    def _get_output_location(self, output_location: str) -> str:
+        """get the output location of the query, by default a prefix in the
+        data bucket."""
+        if output_location is not None:
+            return output_location.rstrip("/")
+        if self.context is None:
+            raise AthenaQueryException(
+                f"we need a datajob context to write the results of {self.name} to the data bucket. "
+                f"Use the datajob stack as a context manager or pass an output_location."
+            )
+        return f"s3://{self.context.data_bucket_name}/{ATHENA_RESULTS_PREFIX}/{self.unique_name}"
+
+    def _get_parameters(self) -> dict:
+        """the parameters to start the query from stepfunctions."""
+        parameters = {
+            "QueryString": self.query,
+            "WorkGroup": self.workgroup,
+            "ResultConfiguration": {
+                "OutputLocation.$": f"States.Format('{self.output_location}/execution={{}}/', $$.Execution.Name)"
+            },
+        }
+        query_execution_context = {}
+        if self.database:
+            query_execution_context["Database"] = self.database
+        if self.catalog:
+            query_execution_context["Catalog"] = self.catalog
+        if query_execution_context:
+            parameters["QueryExecutionContext"] = query_execution_context
+        if self.result_reuse_max_age_minutes is not None:
+            parameters["ResultReuseConfiguration"] = {
+                "ResultReuseByAgeConfiguration": {
+                    "Enabled": True,
+                    "MaxAgeInMinutes": self.result_reuse_max_age_minutes,
+                }
+            }
+        return parameters
+
+    def create(self):
+        logger.debug(
+            "athena query does not implement the create function "
+            "because the query runs in an existing workgroup."
+        )
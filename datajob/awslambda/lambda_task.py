@@ -0,0 +1,146 @@
+import hashlib
+import shutil
+import tempfile
+from pathlib import Path
+
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_lambda
+from aws_cdk import core
+from stepfunctions.steps import LambdaStep
+
+from datajob import logger
+from datajob.datajob_base import DataJobBase
+from datajob.datajob_context import DataJobContext
+from datajob.stepfunctions import stepfunctions_workflow
+
+
+class LambdaTaskException(Exception):
+    """any exception occuring when creating a lambda task."""
+
+
+@stepfunctions_workflow.task
+class LambdaTask(DataJobBase):
+    """Run a python function of your project as a lambda function. This is
+    meant for short steps, e.g. moving a marker file or validating a manifest,
+    that do not need the start up time of a glue job.
+
+    The wheel of the project is a zip file with the packages of the project at the root,
+    so we deploy it as the code of the lambda function.
+    The dependencies of the project are not in the wheel, add them as lambda layers via kwargs.
+
+    example:
+
+        task = LambdaTask(datajob_stack, "validate-manifest", handler="data_pipeline_pkg.manifest.validate")
+    """
+
+    def __init__(
+        self,
+        datajob_stack: core.Construct,
+        name: str,
+        handler: str,
+        payload: dict = None,
+        runtime: aws_lambda.Runtime = aws_lambda.Runtime.PYTHON_3_9,
+        memory_size: int = 256,
+        timeout: int = 60,
+        reserved_concurrent_executions: int = None,
+        role: iam.Role = None,
+        state_id: str = None,
+        **kwargs,
+    ):
+        """
+        :param datajob_stack: aws cdk core construct object.
+        :param name: a name for this lambda function.
+        :param handler: the path to the function in the wheel of the project, e.g. my_package.my_module.my_function
+        :param payload: the event we pass to the function. if not provided we pass the state input.
+        :param runtime: the python runtime of the lambda function, python 3.9 is the default.
+        :param memory_size: the memory of the lambda function in MB.
+        :param timeout: the time in seconds after which the lambda function is stopped.
+        :param reserved_concurrent_executions: the max number of concurrent executions of the lambda function.
+        :param role: you can provide a cdk iam role object as arg. if not provided this class will instantiate a role.
+        :param state_id: the name of the task in the stepfunctions workflow.
+        :param kwargs: any extra kwargs for the aws_lambda.Function
+        """
+        logger.info(f"creating lambda task {name}")
+        super().__init__(datajob_stack, name)
+        self.role = self.get_role(
+            datajob_stack=datajob_stack,
+            role=role,
+            unique_name=self.unique_name,
+            service_principal="lambda.amazonaws.com",
+        )
+        self.handler = handler
+        self.payload = payload
+        self.runtime = runtime
+        self.memory_size = memory_size
+        self.timeout = timeout
+        self.reserved_concurrent_executions = reserved_concurrent_executions
+        self.state_id = self.unique_name if state_id is None else state_id
+        self.function_name = self.unique_name
+        self.function = None
+        self.kwargs = kwargs
+        self.sfn_task = LambdaStep(
+            state_id=self.state_id,
+            parameters=LambdaTask._get_parameters(
+                function_name=self.function_name, payload=self.payload
+            ),
+        )
+        logger.info(f"lambda task {name} created.")
+
+    @staticmethod
+    def _get_parameters(function_name: str, payload: dict = None) -> dict:
+        """the parameters of the invocation of the lambda function by
+        stepfunctions.
+
+        :param function_name: the name of the lambda function.
+        :param payload: the event we pass to the function, if None we pass the state input.
+        :return: parameters of the LambdaStep
+        """
+        if payload is None:
+            return {"FunctionName": function_name, "Payload.$": "$"}
+        return {"FunctionName": function_name, "Payload": payload}
+
+    def create(self):
+        self._create_lambda_function(context=self.context)
+
+    @staticmethod
+    def _get_wheel_code(context: DataJobContext) -> aws_lambda.Code:
+        """get the wheel of the project as the code of a lambda function.
+
+        A wheel is a zip file, but cdk only deploys a file with a .zip extension as the code
+        of a lambda function. We copy the wheel to <sha256 of the wheel>.zip, cdk deploys it
+        as an asset with a key that changes when the content of the wheel changes,
+        also when we rebuild the wheel without changing its version.
+
+        :param context: DataJobContext that contains the s3 url to the wheel.
+        :return: the code of the lambda function.
+        """
+        if context is None or not context.s3_url_wheel:
+            raise LambdaTaskException(
+                "a lambda task runs the wheel of the project, we did not find one. "
+                "Pass project_root to the datajob stack and build a wheel in the dist/ folder."
+            )
+        wheel_path = next(Path(context.project_root, "dist").glob("*.whl"))
+        wheel_hash = hashlib.sha256(wheel_path.read_bytes()).hexdigest()
+        zip_path = Path(tempfile.gettempdir(), "datajob", f"{wheel_hash}.zip")
+        if not zip_path.exists():
+            zip_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(wheel_path, zip_path)
+        return aws_lambda.Code.from_asset(str(zip_path))
+
+    def _create_lambda_function(self, context: DataJobContext) -> None:
+        """Create a lambda function with the wheel of the project as code."""
+        code = LambdaTask._get_wheel_code(context=context)
+        logger.debug(f"creating lambda function {self.function_name}")
+        self.function = aws_lambda.Function(
+            self,
+            self.function_name,
+            function_name=self.function_name,
+            code=code,
+            handler=self.handler,
+            runtime=self.runtime,
+            memory_size=self.memory_size,
+            timeout=core.Duration.seconds(self.timeout),
+            reserved_concurrent_executions=self.reserved_concurrent_executions,
+            role=self.role,
+            **self.kwargs,
+        )
@@ -0,0 +1,352 @@
+import shlex
+from enum import Enum
+from urllib.parse import urlparse
+
+from aws_cdk import aws_batch as batch
+from aws_cdk import aws_ec2 as ec2
+from aws_cdk import aws_iam as iam
+from aws_cdk import core
+from stepfunctions.steps import BatchSubmitJobStep
+
+from datajob import logger
+from datajob.datajob_base import DataJobBase
+from datajob.datajob_context import DataJobContext
+from datajob.stepfunctions import stepfunctions_workflow
+
+# the image we use to run the wheel of the project when no image is given.
+DEFAULT_PYTHON_IMAGE = "public.ecr.aws/docker/library/python:3.9-slim"
+# the id of the vpc that the batch jobs of a stack share when no vpc is given.
+BATCH_VPC_ID = "datajob-batch-vpc"
+
+
+class BatchJobException(Exception):
+    """any exception occuring when creating a batch job."""
+
+
+class BatchComputeType(Enum):
+    FARGATE = "FARGATE"
+    FARGATE_SPOT = "FARGATE_SPOT"
+
+    @staticmethod
+    def get_values():
+        return [e.value for e in BatchComputeType]
+
+
+class BatchEnvironment(core.Construct):
+    """The security group, the compute environment and the job queue that the
+    batch jobs of a stack share per compute type and vpc."""
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        job_queue_name: str,
+        compute_type: str,
+        vpc: ec2.IVpc,
+    ):
+        """
+        :param scope: the datajob stack.
+        :param id: the id of the batch environment, see BatchEnvironment.get_id.
+        :param job_queue_name: the name of the job queue.
+        :param compute_type: FARGATE or FARGATE_SPOT.
+        :param vpc: the vpc we run the containers in.
+        """
+        super().__init__(scope, id)
+        self.max_vcpus = 0
+        subnets = vpc.private_subnets or vpc.public_subnets
+        security_group = ec2.SecurityGroup(self, "security-group", vpc=vpc)
+        self.compute_environment = batch.CfnComputeEnvironment(
+            self,
+            "compute-environment",
+            type="MANAGED",
+            compute_resources=batch.CfnComputeEnvironment.ComputeResourcesProperty(
+                type=compute_type,
+                maxv_cpus=self.max_vcpus,
+                subnets=[subnet.subnet_id for subnet in subnets],
+                security_group_ids=[security_group.security_group_id],
+            ),
+        )
+        batch.CfnJobQueue(
+            self,
+            "job-queue",
+            job_queue_name=job_queue_name,
+            priority=1,
+            compute_environment_order=[
+                batch.CfnJobQueue.ComputeEnvironmentOrderProperty(
+                    compute_environment=self.compute_environment.ref, order=1
+                )
+            ],
+        )
+
+    def add_max_vcpus(self, max_vcpus: int) -> None:
+        """the compute environment can run as many vcpus as the batch job that
+        asks for the most."""
+        self.max_vcpus = max(self.max_vcpus, max_vcpus)
+        self.compute_environment.add_property_override(
+            "ComputeResources.MaxvCpus", self.max_vcpus
+        )
+
+    @staticmethod
+    def get_id(compute_type: str, vpc: ec2.IVpc = None) -> str:
+        """batch-fargate, batch-fargate-spot, or batch-fargate-<vpc id> for a
+        vpc that is given."""
+        environment_id = f"batch-{compute_type.lower().replace('_', '-')}"
+        if vpc is not None:
+            environment_id = f"{environment_id}-{vpc.node.id}"
+        return environment_id
+
+    @staticmethod
+    def get_batch_environment(
+        datajob_stack: core.Stack, compute_type: str, vpc: ec2.IVpc = None
+    ) -> "BatchEnvironment":
+        """get the batch environment for the compute type and the vpc, we
+        create one the first time a batch job of the stack asks for it.
+
+        :param datajob_stack: the datajob stack.
+        :param compute_type: FARGATE or FARGATE_SPOT.
+        :param vpc: the vpc we run the containers in, if not provided we share a vpc with public subnets.
+        :return: the batch environment.
+        """
+        environment_id = BatchEnvironment.get_id(compute_type, vpc)
+        batch_environment = datajob_stack.node.try_find_child(environment_id)
+        if batch_environment is None:
+            logger.debug(f"creating the batch environment {environment_id}")
+            batch_environment = BatchEnvironment(
+                datajob_stack,
+                environment_id,
+                job_queue_name=BatchEnvironment.get_job_queue_name(
+                    datajob_stack, compute_type, vpc
+                ),
+                compute_type=compute_type,
+                vpc=vpc or BatchEnvironment.get_vpc(datajob_stack),
+            )
+        return batch_environment
+
+    @staticmethod
+    def get_job_queue_name(
+        datajob_stack: core.Stack, compute_type: str, vpc: ec2.IVpc = None
+    ) -> str:
+        """the name of the job queue of the batch environment."""
+        return f"{datajob_stack.unique_stack_name}-{BatchEnvironment.get_id(compute_type, vpc)}-queue"
+
+    @staticmethod
+    def get_vpc(datajob_stack: core.Stack) -> ec2.IVpc:
+        """get the vpc that the batch jobs of the stack share.
+
+        It only has public subnets so that we don't pay for a nat
+        gateway.
+        """
+        vpc = datajob_stack.node.try_find_child(BATCH_VPC_ID)
+        if vpc is None:
+            logger.debug(f"creating the batch vpc of {datajob_stack}")
+            vpc = ec2.Vpc(
+                datajob_stack,
+                BATCH_VPC_ID,
+                max_azs=2,
+                nat_gateways=0,
+                subnet_configuration=[
+                    ec2.SubnetConfiguration(
+                        name="public", subnet_type=ec2.SubnetType.PUBLIC
+                    )
+                ],
+            )
+        return vpc
+
+
+@stepfunctions_workflow.task
+class BatchJob(DataJobBase):
+    """Run a container on AWS Batch with Fargate, for long single node jobs
+    that need more cpu or memory than a pythonshell glue job.
+
+    We create a job definition per batch job. The batch jobs of a stack share a compute
+    environment and a job queue per compute type and vpc.
+    The container is either an image you provide, or a python image that installs the wheel
+    of the project and runs a module of it.
+
+    example:
+
+        task = BatchJob(datajob_stack, "long-job", module="data_pipeline_pkg.long_job", vcpus=4, memory=16384)
+    """
+
+    def __init__(
+        self,
+        datajob_stack: core.Construct,
+        name: str,
+        image: str = None,
+        command: list = None,
+        module: str = None,
+        arguments: list = None,
+        vcpus: float = 1,
+        memory: int = 2048,
+        array_size: int = None,
+        compute_type: str = BatchComputeType.FARGATE.value,
+        max_vcpus: int = 16,
+        vpc: ec2.IVpc = None,
+        role: iam.Role = None,
+        state_id: str = None,
+        wait_for_completion: bool = True,
+        **kwargs,
+    ):
+        """
+        :param datajob_stack: aws cdk core construct object.
+        :param name: a name for this batch job.
+        :param image: the container image we run, if not provided we run the wheel of the project.
+        :param command: the command of the container image.
+        :param module: the python module of the project we run, when we run the wheel of the project.
+        :param arguments: the arguments we pass to the module.
+        :param vcpus: the number of vcpus of the container, a valid fargate value e.g. 0.25, 0.5, 1, 2, 4.
+        :param memory: the memory of the container in MiB, a valid fargate value for the number of vcpus.
+        :param array_size: run the job as an array job of this size. Each child job gets its index
+        in the environment variable AWS_BATCH_JOB_ARRAY_INDEX.
+        :param compute_type: FARGATE is the default, choose FARGATE_SPOT for cheaper but interruptible capacity.
+        :param max_vcpus: the max number of vcpus of the compute environment, the shared compute environment
+        takes the max of its batch jobs.
+        :param vpc: the vpc we run the containers in. if not provided we share a vpc with public subnets.
+        :param role: you can provide a cdk iam role object as arg. if not provided this class will instantiate a role.
+        :param state_id: the name of the task in the stepfunctions workflow.
+        :param wait_for_completion: wait until the batch job is finished.
+        :param kwargs: any extra kwargs for the batch.CfnJobDefinition
+        """
+        logger.info(f"creating batch job {name}")
+        super().__init__(datajob_stack, name)
+        self.role = self.get_role(
+            datajob_stack=datajob_stack,
+            role=role,
+            unique_name=self.unique_name,
+            service_principal="ecs-tasks.amazonaws.com",
+        )
+        if image is None and module is None:
+            raise BatchJobException(
+                f"provide the image or the module of the project we run for batch job {name}."
+            )
+        self.image = image
+        self.command = command
+        self.module = module
+        self.arguments = arguments or []
+        self.vcpus = vcpus
+        self.memory = memory
+        self.array_size = BatchJob._get_array_size(array_size)
+        self.compute_type = BatchJob._get_compute_type(compute_type)
+        self.max_vcpus = max_vcpus
+        self.vpc = vpc
+        self.state_id = self.unique_name if state_id is None else state_id
+        self.wait_for_completion = wait_for_completion
+        self.job_queue_name = BatchEnvironment.get_job_queue_name(
+            datajob_stack, self.compute_type, vpc
+        )
+        self.job_definition_name = self.unique_name
+        self.kwargs = kwargs
+        self.sfn_task = BatchSubmitJobStep(
+            state_id=self.state_id,
+            wait_for_completion=self.wait_for_completion,
+            parameters=self._get_parameters(),
+        )
+        logger.info(f"batch job {name} created.")
+
+    @staticmethod
+    def _get_array_size(array_size: int) -> int:
+        """assert that an array job has between 2 and 10000 child jobs."""
+        if array_size is not None and not 2 <= array_size <= 10000:
+            raise BatchJobException(
+                f"the size of an array job should be between 2 and 10000, got {array_size}"
+            )
+        return array_size
+
+    @staticmethod
+    def _get_compute_type(compute_type: str) -> str:
+        """assert if the compute type is a valid value."""
+        if compute_type not in BatchComputeType.get_values():
+            raise BatchJobException(
+                f"Unknown compute type {compute_type}, choose one of {BatchComputeType.get_values()}"
+            )
+        return compute_type
+
+    def _get_parameters(self) -> dict:
+        """the parameters to submit the batch job from stepfunctions."""
+        parameters = {
+            "JobName": self.unique_name,
+            "JobQueue": self.job_queue_name,
+            "JobDefinition": self.job_definition_name,
+        }
+        if self.array_size is not None:
+            parameters["ArrayProperties"] = {"Size": self.array_size}
+        return parameters
+
+    def create(self):
+        image, command = self._get_image_and_command(context=self.context)
+        BatchEnvironment.get_batch_environment(
+            self.datajob_stack, self.compute_type, self.vpc
+        ).add_max_vcpus(self.max_vcpus)
+        batch.CfnJobDefinition(
+            self,
+            self.job_definition_name,
+            job_definition_name=self.job_definition_name,
+            type="container",
+            platform_capabilities=["FARGATE"],
+            container_properties=batch.CfnJobDefinition.ContainerPropertiesProperty(
+                image=image,
+                command=command,
+                job_role_arn=self.role.role_arn,
+                execution_role_arn=self._create_execution_role().role_arn,
+                resource_requirements=[
+                    batch.CfnJobDefinition.ResourceRequirementProperty(
+                        type="VCPU", value=str(self.vcpus)
+                    ),
+                    batch.CfnJobDefinition.ResourceRequirementProperty(
+                        type="MEMORY", value=str(self.memory)
+                    ),
+                ],
+                # we need a public ip to pull the image when we run in a public subnet.
+                network_configuration=batch.CfnJobDefinition.NetworkConfigurationProperty(
+                    assign_public_ip="ENABLED"
+                ),
+                fargate_platform_configuration=batch.CfnJobDefinition.FargatePlatformConfigurationProperty(
+                    platform_version="LATEST"
+                ),
+            ),
+            **self.kwargs,
+        )
+
+    def _get_image_and_command(self, context: DataJobContext) -> tuple:
+        """get the image and the command of the container. If no image is
+        given, we download the wheel of the project, install it and run the
+        module.
+
+        :param context: DataJobContext that contains the s3 url to the wheel.
+        :return: the image and the command
+        """
+        if self.image is not None:
+            return self.image, self.command
+        if context is None or not context.s3_url_wheel:
+            raise BatchJobException(
+                f"batch job {self.name} runs the wheel of the project, we did not find one. "
+                "Pass project_root to the datajob stack and build a wheel in the dist/ folder."
+            )
+        parsed_url = urlparse(context.s3_url_wheel)
+        bucket, key = parsed_url.netloc, parsed_url.path.lstrip("/")
+        wheel_path = f"/tmp/{key.split('/')[-1]}"
+        download_wheel = f"import boto3; boto3.client('s3').download_file('{bucket}', '{key}', '{wheel_path}')"
+        # the arguments end up in a shell command, we quote them so that they stay one argument each.
+        run_module = " ".join(
+            shlex.quote(str(argument))
+            for argument in ["python", "-m", self.module, *self.arguments]
+        )
+        return DEFAULT_PYTHON_IMAGE, [
+            "sh",
+            "-c",
+            f'pip install --quiet boto3 && python -c "{download_wheel}" '
+            f"&& pip install --quiet {wheel_path} && {run_module}",
+        ]
+
+    def _create_execution_role(self) -> iam.Role:
+        """the role that fargate uses to pull the image and write the logs."""
+        return iam.Role(
+            self,
+            f"{self.unique_name}-execution-role",
+            assumed_by=iam.ServicePrincipal("ecs-tasks.amazonaws.com"),
+            managed_policies=[
+                iam.ManagedPolicy.from_aws_managed_policy_name(
+                    "service-role/AmazonECSTaskExecutionRolePolicy"
+                )
+            ],
+        )
@@ -0,0 +1,295 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Iterable
+from typing import List
+from typing import Union
+from urllib.parse import urlparse
+
+import boto3
+from stepfunctions.steps import Chain
+from stepfunctions.steps import Choice
+from stepfunctions.steps import ChoiceRule
+from stepfunctions.steps import Parallel
+from stepfunctions.steps import Pass
+from stepfunctions.steps import Task
+from stepfunctions.steps.states import State
+
+from datajob import logger
+from datajob.datajob_execution_input import DataJobExecutionInput
+
+TASK_CACHE_PREFIX = "datajob-task-cache"
+# the key in the state under which the cache keeps the cache key and the result of the lookup.
+CACHE_STATE = "DatajobCache"
+# the key of the outputs of a cached task with the run prefix of its results.
+RUN_PREFIX = "RunPrefix"
+
+
+class TaskCacheException(Exception):
+    """any exception occuring when caching the result of a task."""
+
+
+def hash_files(paths: Iterable[str]) -> str:
+    """create a sha256 hash of the contents of the files.
+
+    :param paths: paths to the files we want to hash, for example a glue job script or a wheel.
+    :return: the hash as a hex string.
+    """
+    sha256 = hashlib.sha256()
+    for path in paths:
+        if not Path(path).is_file():
+            raise TaskCacheException(
+                f"cannot compute the cache key, the file {path} does not exist."
+            )
+        sha256.update(Path(path).read_bytes())
+    return sha256.hexdigest()
+
+
+def compute_static_key(name: str, code_hash: str, arguments: dict) -> str:
+    """compute the part of the cache key that we know when we synthesize the
+    stack.
+
+    :param name: the unique name of the task.
+    :param code_hash: a hash of the code the task runs.
+    :param arguments: the arguments we pass to the task.
+    :return: the static key as a hex string.
+    """
+    static_key_input = json.dumps(
+        {"name": name, "code": code_hash, "arguments": arguments},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(static_key_input.encode()).hexdigest()
+
+
+def compute_cache_key(
+    static_key: str, etags: List[str], partition_date: str = ""
+) -> str:
+    """compute the cache key the same way as the stepfunctions workflow does at
+    run time with States.Hash.
+
+    :param static_key: the static key of the task.
+    :param etags: the ETags of the input objects of the task, in the order of the inputs.
+    :param partition_date: the DatajobPartitionDate of the execution input, if any.
+    :return: the cache key as a hex string.
+    """
+    return hashlib.sha256(
+        f"{static_key}{partition_date}{''.join(etags)}".encode()
+    ).hexdigest()
+
+
+def get_run_scope() -> str:
+    """the run id and the partition date that a task sees, as an intrinsic
+    function.
+
+    The DatajobRunId and DatajobPartitionDate of the execution input win
+    over the name of the execution and an empty partition date.
+    """
+    defaults = (
+        "States.StringToJson(States.Format("
+        f'\'\\{{"{DataJobExecutionInput.DATAJOB_RUN_ID}": "{{}}", '
+        f'"{DataJobExecutionInput.DATAJOB_PARTITION_DATE}": ""\\}}\', '
+        "$$.Execution.Name))"
+    )
+    return f"States.JsonMerge({defaults}, $$.Execution.Input, false)"
+
+
+def _split_s3_url(s3_url: str) -> tuple:
+    """split an s3 url in a bucket and a key."""
+    parsed_url = urlparse(s3_url)
+    if parsed_url.scheme != "s3" or not parsed_url.path.lstrip("/"):
+        raise TaskCacheException(
+            f"we expect the cache input to be an s3 url to an object, got {s3_url}"
+        )
+    return parsed_url.netloc, parsed_url.path.lstrip("/")
+
+
+def make_task_cacheable(
+    sfn_task: State,
+    state_id: str,
+    static_key: str,
+    inputs: List[str],
+    bucket_name: str,
+    prefix: str,
+    run_prefix_root: str,
+    outputs_path: str = None,
+) -> Chain:
+    """Wrap a task in the states that skip the task when the ledger already
+    holds a successful run for the same cache key.
+
+    - we get the run id and the partition date of the execution.
+    - we get the ETags of the input objects in parallel.
+    - we compute the cache key using the static key, the partition date and the ETags.
+    - we look for the cache key in the ledger.
+    - if the key is present, we skip the task, else we run the task and record the key in the ledger,
+      with the run prefix the task wrote its results to.
+
+    The states keep the state they get, they add what they need under DatajobCache.
+
+    :param sfn_task: the stepfunctions task we want to cache.
+    :param state_id: the state_id of the task.
+    :param static_key: the part of the cache key that is known at synth time.
+    :param inputs: s3 urls to the objects the task reads.
+    :param bucket_name: the bucket that holds the ledger.
+    :param prefix: the prefix in the bucket under which we record the cache keys.
+    :param run_prefix_root: <stage>/<workflow>, the run prefix without the run id.
+    :param outputs_path: the path in the state where we put the run prefix of the results of the task, for the tasks
+    that use its outputs. On a hit, this is the run prefix of the run that produced them.
+    :return: a chain of states that caches the task.
+    """
+    logger.debug(f"making task {state_id} cacheable with inputs {inputs}")
+    chain = Chain()
+    chain.append(
+        Pass(
+            state_id=f"{state_id}-cache-scope",
+            parameters={"scope.$": get_run_scope()},
+            result_path=f"$.{CACHE_STATE}",
+        )
+    )
+    key_paths = [
+        f"$.{CACHE_STATE}.scope.{DataJobExecutionInput.DATAJOB_PARTITION_DATE}"
+    ]
+    if inputs:
+        get_etags = Parallel(
+            state_id=f"{state_id}-cache-inputs", result_path=f"$.{CACHE_STATE}.etags"
+        )
+        for index, s3_url in enumerate(inputs):
+            bucket, key = _split_s3_url(s3_url)
+            get_etags.add_branch(
+                Task(
+                    state_id=f"{state_id}-cache-input-{index}",
+                    resource="arn:aws:states:::aws-sdk:s3:headObject",
+                    parameters={"Bucket": bucket, "Key": key},
+                )
+            )
+        chain.append(get_etags)
+        key_paths += [
+            f"$.{CACHE_STATE}.etags[{index}].ETag" for index in range(len(inputs))
+        ]
+    placeholders = "{}" * len(key_paths)
+    compute_key = Pass(
+        state_id=f"{state_id}-cache-key",
+        parameters={
+            "key.$": f"States.Hash(States.Format('{static_key}{placeholders}', {', '.join(key_paths)}), 'SHA-256')",
+            "run_prefix.$": f"States.Format('{run_prefix_root}/{{}}', "
+            f"$.{CACHE_STATE}.scope.{DataJobExecutionInput.DATAJOB_RUN_ID})",
+        },
+        result_path=f"$.{CACHE_STATE}",
+    )
+    chain.append(compute_key)
+
+    ledger_key = f"States.Format('{prefix}/{{}}', $.{CACHE_STATE}.key)"
+    lookup = Task(
+        state_id=f"{state_id}-cache-lookup",
+        resource="arn:aws:states:::aws-sdk:s3:listObjectsV2",
+        parameters={"Bucket": bucket_name, "Prefix.$": ledger_key, "MaxKeys": 1},
+        result_path=f"$.{CACHE_STATE}.lookup",
+    )
+    cache_hit = Choice(state_id=f"{state_id}-cache-hit")
+    # the output of the task is discarded, the tasks after it get the state the task got.
+    run_task = Parallel(state_id=f"{state_id}-cache-run", result_path=None)
+    run_task.add_branch(sfn_task)
+    record = Task(
+        state_id=f"{state_id}-cache-record",
+        resource="arn:aws:states:::aws-sdk:s3:putObject",
+        parameters={
+            "Bucket": bucket_name,
+            "Key.$": ledger_key,
+            "Body.$": f"$.{CACHE_STATE}.run_prefix",
+        },
+        result_path=None,
+    )
+    task_done = Pass(state_id=f"{state_id}-cache-done")
+    on_hit = task_done
+    miss_states = [run_task, record, task_done]
+    if outputs_path is not None:
+        # the task writes its results under the run prefix of this run, the ledger knows the run prefix of a hit.
+        read_run_prefix = Task(
+            state_id=f"{state_id}-cache-read",
+            resource="arn:aws:states:::aws-sdk:s3:getObject",
+            parameters={"Bucket": bucket_name, "Key.$": ledger_key},
+            result_path=outputs_path,
+        )
+        read_run_prefix.fields["result_selector"] = {f"{RUN_PREFIX}.$": "$.Body"}
+        run_prefix = Pass(
+            state_id=f"{state_id}-cache-run-prefix",
+            parameters={f"{RUN_PREFIX}.$": f"$.{CACHE_STATE}.run_prefix"},
+            result_path=outputs_path,
+        )
+        read_run_prefix.next(task_done)
+        on_hit = read_run_prefix
+        miss_states = [run_prefix] + miss_states
+    cache_hit.add_choice(
+        rule=ChoiceRule.NumericGreaterThan(
+            variable=f"$.{CACHE_STATE}.lookup.KeyCount", value=0
+        ),
+        next_step=on_hit,
+    )
+    for state in [lookup, cache_hit] + miss_states:
+        chain.append(state)
+    return chain
+
+
+class LocalTaskCacheLedger(object):
+    """in memory ledger that behaves as the ledger of the stepfunctions
+    workflow.
+
+    You can use this to test which tasks would be skipped.
+    """
+
+    def __init__(self, prefix: str = TASK_CACHE_PREFIX):
+        self.prefix = prefix
+        self.records = {}
+
+    def is_cached(self, key: str) -> bool:
+        return f"{self.prefix}/{key}" in self.records
+
+    def get_run_prefix(self, key: str) -> Union[str, None]:
+        """get the run prefix of the run that recorded the key, None when the
+        key is not cached."""
+        return self.records.get(f"{self.prefix}/{key}")
+
+    def record(self, key: str, run_prefix: str) -> None:
+        self.records[f"{self.prefix}/{key}"] = run_prefix
+
+    def clear(self) -> None:
+        self.records = {}
+
+
+class S3TaskCacheLedger(LocalTaskCacheLedger):
+    """ledger of the stepfunctions workflow that lives in an s3 bucket."""
+
+    def __init__(self, bucket_name: str, prefix: str = TASK_CACHE_PREFIX):
+        super().__init__(prefix=prefix)
+        self.bucket_name = bucket_name
+        self.client = boto3.client("s3")
+
+    def is_cached(self, key: str) -> bool:
+        response = self.client.list_objects_v2(
+            Bucket=self.bucket_name, Prefix=f"{self.prefix}/{key}", MaxKeys=1
+        )
+        return response.get("KeyCount", 0) > 0
+
+    def get_run_prefix(self, key: str) -> Union[str, None]:
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket_name, Key=f"{self.prefix}/{key}"
+            )
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read().decode()
+
+    def record(self, key: str, run_prefix: str) -> None:
+        self.client.put_object(
+            Bucket=self.bucket_name, Key=f"{self.prefix}/{key}", Body=run_prefix
+        )
+
+    def clear(self) -> None:
+        """remove all the cache keys so that every task runs again."""
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=self.prefix):
+            objects = [{"Key": item.get("Key")} for item in page.get("Contents", [])]
+            if objects:
+                self.client.delete_objects(
+                    Bucket=self.bucket_name, Delete={"Objects": objects}
+                )
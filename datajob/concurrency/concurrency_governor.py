@@ -0,0 +1,381 @@
+from pathlib import Path
+from typing import Union
+
+from aws_cdk import aws_dynamodb
+from aws_cdk import aws_events
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_lambda
+from aws_cdk import core
+from stepfunctions.steps import Catch
+from stepfunctions.steps import Chain
+from stepfunctions.steps import Fail
+from stepfunctions.steps import Parallel
+from stepfunctions.steps import Pass
+from stepfunctions.steps import Retry
+from stepfunctions.steps.service import DynamoDBUpdateItemStep
+from stepfunctions.steps.states import State
+
+from datajob import logger
+from datajob.datajob_base import DataJobBase
+
+# the name of the partition key of the table, each pool is an item in the table.
+POOL_KEY = "pool"
+# the attribute of the item that holds the number of running tasks for the pool.
+RUNNING_ATTRIBUTE = "running"
+# errors of dynamodb that are worth retrying, they do not mean that the pool is full.
+TRANSIENT_ERRORS = [
+    "DynamoDB.ProvisionedThroughputExceededException",
+    "DynamoDB.RequestLimitExceeded",
+    "DynamoDB.InternalServerErrorException",
+]
+POOL_FULL_ERROR = "DynamoDB.ConditionalCheckFailedException"
+RELEASE_HANDLER_PATH = Path(__file__).parent / "concurrency_governor_handler.py"
+# the executions that end with one of these statuses do not release their slots themselves.
+UNRELEASED_STATUSES = ["ABORTED", "TIMED_OUT", "FAILED"]
+# every attempt to get a slot adds 3 events to the history of the execution, that holds at most 25,000 events.
+MAX_ACQUIRE_ATTEMPTS = 500
+
+
+class ConcurrencyGovernorException(Exception):
+    """any exception occuring when governing the concurrency of tasks."""
+
+
+class FailWithCaughtError(Fail):
+    """A fail state that fails with the error and the cause of an error we
+    caught, the stepfunctions sdk does not know ErrorPath and CausePath."""
+
+    def __init__(self, state_id: str, error_path: str, cause_path: str, **kwargs):
+        """
+        :param state_id: the name of the state.
+        :param error_path: the json path to the name of the error we caught.
+        :param cause_path: the json path to the cause of the error we caught.
+        :param kwargs: any extra kwargs for the Fail state.
+        """
+        super().__init__(state_id, **kwargs)
+        self.fields.update(error_path=error_path, cause_path=cause_path)
+
+
+class ConcurrencyGovernor(DataJobBase):
+    """A semaphore in a dynamodb table that caps the number of tasks that run
+    at the same time per pool, over all the workflows of the stack.
+
+    A workflow releases the slot of a task when the task is done, whether it succeeded or failed.
+    An execution that is aborted or times out cannot do that, a lambda function
+    releases its slots when eventbridge tells us that the execution ended.
+
+    example:
+
+        with DataJobStack(scope=app, id="data-pipeline") as datajob_stack:
+            ConcurrencyGovernor(datajob_stack, "governor", pools={"glue": 3})
+            task1 = GlueJob(datajob_stack, "task1", job_path="task1.py", concurrency_pool="glue")
+    """
+
+    def __init__(
+        self,
+        datajob_stack: core.Construct,
+        name: str,
+        pools: dict,
+        wait_seconds: int = 30,
+        max_wait_seconds: int = 14400,
+        **kwargs,
+    ):
+        """
+        :param datajob_stack: aws cdk core construct object.
+        :param name: a name for the governor, the dynamodb table gets the unique name.
+        :param pools: the name of the pool as key and the max number of tasks that can run at the same time as value.
+        :param wait_seconds: the time a task waits before it tries again to get a slot in a full pool.
+        :param max_wait_seconds: the time after which a task that did not get a slot fails,
+        at most MAX_ACQUIRE_ATTEMPTS times wait_seconds.
+        :param kwargs: any extra kwargs for the dynamodb Table.
+        """
+        super().__init__(datajob_stack, name)
+        self.pools = ConcurrencyGovernor._get_pools(pools)
+        self.wait_seconds = wait_seconds
+        self.max_attempts = ConcurrencyGovernor._get_max_attempts(
+            wait_seconds, max_wait_seconds
+        )
+        self.table_name = self.unique_name
+        self.table = None
+        self.kwargs = kwargs
+        datajob_stack.concurrency_governor = self
+
+    @staticmethod
+    def _get_pools(pools: dict) -> dict:
+        """assert that every pool allows at least one task to run.
+
+        :param pools: the name of the pool as key and the max number of tasks as value.
+        :return: the pools
+        """
+        for pool, limit in pools.items():
+            if not isinstance(limit, int) or limit < 1:
+                raise ConcurrencyGovernorException(
+                    f"pool {pool} should allow at least 1 task to run, got {limit}."
+                )
+        return pools
+
+    @staticmethod
+    def _get_max_attempts(wait_seconds: int, max_wait_seconds: int) -> int:
+        """get the number of times a task tries to get a slot in a full pool.
+
+        a waiting task adds events to the history of its execution, we cap the attempts
+        so that the execution does not fail on the max number of events of its history.
+
+        :param wait_seconds: the time a task waits before it tries again.
+        :param max_wait_seconds: the time after which a task that did not get a slot fails.
+        :return: the max number of attempts.
+        """
+        if wait_seconds < 1 or max_wait_seconds < wait_seconds:
+            raise ConcurrencyGovernorException(
+                f"wait_seconds should be at least 1 and at most max_wait_seconds, "
+                f"got {wait_seconds} and {max_wait_seconds}."
+            )
+        max_attempts = max_wait_seconds // wait_seconds
+        if max_attempts > MAX_ACQUIRE_ATTEMPTS:
+            raise ConcurrencyGovernorException(
+                f"a task would try {max_attempts} times to get a slot, at most {MAX_ACQUIRE_ATTEMPTS} fit in the history "
+                f"of an execution. Raise wait_seconds to at least {-(-max_wait_seconds // MAX_ACQUIRE_ATTEMPTS)} "
+                f"or lower max_wait_seconds."
+            )
+        return max_attempts
+
+    def create(self):
+        logger.debug(f"creating concurrency governor table {self.table_name}")
+        self.table = aws_dynamodb.Table(
+            self,
+            self.table_name,
+            table_name=self.table_name,
+            partition_key=aws_dynamodb.Attribute(
+                name=POOL_KEY, type=aws_dynamodb.AttributeType.STRING
+            ),
+            billing_mode=aws_dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=core.RemovalPolicy.DESTROY,
+            **self.kwargs,
+        )
+        self._create_release_function()
+
+    def _create_release_function(self) -> None:
+        """create the lambda function that releases the slots of the executions
+        of the workflows of the stack that ended with one of
+        UNRELEASED_STATUSES, and the eventbridge rule that calls it."""
+        function = aws_lambda.Function(
+            self,
+            f"{self.unique_name}-release",
+            function_name=f"{self.unique_name}-release",
+            code=aws_lambda.Code.from_inline(RELEASE_HANDLER_PATH.read_text()),
+            handler="index.handler",
+            runtime=aws_lambda.Runtime.PYTHON_3_9,
+            timeout=core.Duration.minutes(1),
+            environment={"TABLE_NAME": self.table_name},
+        )
+        self.table.grant_read_write_data(function)
+        # the state machines of the workflows of the stack start with the unique stack name.
+        state_machine_prefix = (
+            f"arn:{core.Aws.PARTITION}:states:{core.Aws.REGION}:{core.Aws.ACCOUNT_ID}:"
+            f"stateMachine:{self.datajob_stack.unique_stack_name}-"
+        )
+        rule = aws_events.CfnRule(
+            self,
+            f"{self.unique_name}-release-rule",
+            event_pattern={
+                "source": ["aws.states"],
+                "detail-type": ["Step Functions Execution Status Change"],
+                "detail": {
+                    "status": UNRELEASED_STATUSES,
+                    "stateMachineArn": [{"prefix": state_machine_prefix}],
+                },
+            },
+            targets=[
+                aws_events.CfnRule.TargetProperty(
+                    arn=function.function_arn, id=f"{self.unique_name}-release"
+                )
+            ],
+        )
+        function.add_permission(
+            f"{self.unique_name}-release-permission",
+            principal=iam.ServicePrincipal("events.amazonaws.com"),
+            source_arn=rule.attr_arn,
+        )
+
+    def get_limit(self, pool: str) -> int:
+        """get the max number of tasks that can run at the same time in a
+        pool."""
+        if pool not in self.pools:
+            raise ConcurrencyGovernorException(
+                f"unknown concurrency pool {pool}, choose one of {list(self.pools)}"
+            )
+        return self.pools[pool]
+
+    def _update_pool(self, state_id: str, pool: str, owner: str, **parameters) -> State:
+        """create a task that updates the item of the pool for the current
+        execution.
+
+        every task that holds a slot is an attribute of the item, named
+        after the execution and the state_id of the governed task.
+        """
+        return DynamoDBUpdateItemStep(
+            state_id=state_id,
+            parameters={
+                "TableName": self.table_name,
+                "Key": {POOL_KEY: {"S": pool}},
+                "ExpressionAttributeNames": {
+                    "#running": RUNNING_ATTRIBUTE,
+                    "#owner.$": f"States.Format('{{}}/{owner}', $$.Execution.Id)",
+                },
+                **parameters,
+            },
+            result_path=None,
+        )
+
+    def make_task_governed(
+        self, sfn_task: Union[State, Chain], state_id: str, pool: str
+    ) -> Chain:
+        """Wrap a task in the states that take a slot of the pool before the
+        task runs and give the slot back after the task, whether the task
+        succeeded or failed.
+
+        - we increment the number of running tasks if the pool is not full and the task does not hold a slot yet.
+        - if the pool is full, the condition fails and we try again after wait_seconds.
+        - after a transient error we check whether we got the slot, the update may have succeeded.
+        - we run the task. If it fails, we release the slot and fail with the error of the task.
+        - we release the slot.
+
+        if the execution is aborted or times out, the release function of the governor releases the slot.
+
+        :param sfn_task: the stepfunctions task, or chain of states, we want to govern.
+        :param state_id: the state_id of the task.
+        :param pool: the name of the pool the task runs in.
+        :return: a chain of states that governs the task.
+        """
+        limit = self.get_limit(pool)
+        logger.debug(f"governing task {state_id} in pool {pool} with limit {limit}")
+        acquire = self._update_pool(
+            state_id=f"{state_id}-acquire",
+            pool=pool,
+            owner=state_id,
+            UpdateExpression="SET #running = if_not_exists(#running, :zero) + :one, #owner = :entered",
+            # the task does not count twice when we try again after an update that succeeded.
+            ConditionExpression="attribute_not_exists(#owner) AND (attribute_not_exists(#running) OR #running < :limit)",
+            ExpressionAttributeValues={
+                ":zero": {"N": "0"},
+                ":one": {"N": "1"},
+                ":limit": {"N": str(limit)},
+                ":entered": {"S.$": "$$.State.EnteredTime"},
+            },
+        )
+        acquire.add_retry(
+            Retry(
+                error_equals=[POOL_FULL_ERROR],
+                interval_seconds=self.wait_seconds,
+                max_attempts=self.max_attempts,
+                backoff_rate=1.0,
+            )
+        )
+        acquired = self._update_pool(
+            state_id=f"{state_id}-acquired",
+            pool=pool,
+            owner=state_id,
+            UpdateExpression="SET #owner = #owner",
+            ConditionExpression="attribute_exists(#owner)",
+        )
+        acquired.add_retry(Retry(error_equals=TRANSIENT_ERRORS))
+        # we did not get the slot, we try again.
+        acquired.add_catch(
+            Catch(
+                error_equals=[POOL_FULL_ERROR],
+                next_step=acquire,
+                result_path="$.acquire_error",
+            )
+        )
+        acquire.add_catch(
+            Catch(
+                error_equals=TRANSIENT_ERRORS,
+                next_step=acquired,
+                result_path="$.acquire_error",
+            )
+        )
+
+        release_parameters = {
+            "UpdateExpression": "SET #running = #running - :one REMOVE #owner",
+            # if the slot is already released we do not release it twice.
+            "ConditionExpression": "attribute_exists(#owner)",
+            "ExpressionAttributeValues": {":one": {"N": "1"}},
+        }
+        task_done = Pass(state_id=f"{state_id}-governor-done")
+        release = self._update_pool(
+            state_id=f"{state_id}-release",
+            pool=pool,
+            owner=state_id,
+            **release_parameters,
+        )
+        release.add_retry(Retry(error_equals=TRANSIENT_ERRORS))
+        release.add_catch(Catch(error_equals=[POOL_FULL_ERROR], next_step=task_done))
+
+        task_failed = FailWithCaughtError(
+            state_id=f"{state_id}-failed",
+            error_path="$.error.Error",
+            cause_path="$.error.Cause",
+        )
+        release_on_failure = self._update_pool(
+            state_id=f"{state_id}-release-on-failure",
+            pool=pool,
+            owner=state_id,
+            **release_parameters,
+        )
+        release_on_failure.add_retry(Retry(error_equals=TRANSIENT_ERRORS))
+        # we keep the error of the task when the slot is already released.
+        release_on_failure.add_catch(
+            Catch(
+                error_equals=[POOL_FULL_ERROR],
+                next_step=task_failed,
+                result_path="$.release_error",
+            )
+        )
+        release_on_failure.next(task_failed)
+
+        # we run the task in a branch so that we can catch the error of a single task or of a chain of states.
+        run_task = Parallel(state_id=f"{state_id}-governed", result_path=None)
+        run_task.add_branch(sfn_task)
+        run_task.add_catch(
+            Catch(
+                error_equals=["States.ALL"],
+                next_step=release_on_failure,
+                result_path="$.error",
+            )
+        )
+        acquired.next(run_task)
+        return Chain([acquire, run_task, release, task_done])
+
+
+class LocalConcurrencySemaphore(object):
+    """in memory semaphore that behaves as the dynamodb table of the
+    concurrency governor.
+
+    You can use this to test how many tasks would run at the same time.
+    """
+
+    def __init__(self, pools: dict):
+        self.pools = ConcurrencyGovernor._get_pools(pools)
+        self.owners = {pool: set() for pool in pools}
+
+    def running(self, pool: str) -> int:
+        return len(self.owners[pool])
+
+    def acquire(self, pool: str, owner: str) -> bool:
+        """take a slot in the pool, returns False if the pool is full.
+
+        an owner that already holds a slot keeps it.
+        """
+        if owner in self.owners[pool]:
+            return True
+        if self.running(pool) >= self.pools[pool]:
+            return False
+        self.owners[pool].add(owner)
+        return True
+
+    def release(self, pool: str, owner: str) -> bool:
+        """give the slot back, returns False if the owner did not hold a
+        slot."""
+        if owner not in self.owners[pool]:
+            return False
+        self.owners[pool].remove(owner)
+        return True
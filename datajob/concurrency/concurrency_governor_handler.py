@@ -0,0 +1,60 @@
+"""The lambda function that releases the slots of an execution that ended
+without releasing them, e.g. because it was aborted or timed out.
+
+Eventbridge calls this function with a "Step Functions Execution Status
+Change" event. We deploy this file as inline code, it only depends on
+boto3.
+"""
+import os
+
+import boto3
+
+# the name of the partition key of the table, see concurrency_governor.POOL_KEY.
+POOL_KEY = "pool"
+# see concurrency_governor.RUNNING_ATTRIBUTE.
+RUNNING_ATTRIBUTE = "running"
+
+
+def get_owners(item: dict, execution_arn: str) -> list:
+    """get the slots of the item of a pool that the execution still holds.
+
+    :param item: the item of a pool in the table of the concurrency governor.
+    :param execution_arn: the arn of the execution that ended.
+    :return: the names of the attributes of the slots, <execution arn>/<state_id>.
+    """
+    return sorted(owner for owner in item if owner.startswith(f"{execution_arn}/"))
+
+
+def release(table_name: str, pool: str, owner: str) -> bool:
+    """give a slot back, returns False if the slot was already released."""
+    client = boto3.client("dynamodb")
+    try:
+        client.update_item(
+            TableName=table_name,
+            Key={POOL_KEY: {"S": pool}},
+            UpdateExpression="SET #running = #running - :one REMOVE #owner",
+            ConditionExpression="attribute_exists(#owner)",
+            ExpressionAttributeNames={"#running": RUNNING_ATTRIBUTE, "#owner": owner},
+            ExpressionAttributeValues={":one": {"N": "1"}},
+        )
+    except client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+
+def handler(event, context):
+    """release every slot the execution of the event still holds."""
+    table_name = os.environ["TABLE_NAME"]
+    execution_arn = event["detail"]["executionArn"]
+    released = []
+    paginator = boto3.client("dynamodb").get_paginator("scan")
+    for page in paginator.paginate(TableName=table_name):
+        for item in page.get("Items", []):
+            pool = item[POOL_KEY]["S"]
+            for owner in get_owners(item, execution_arn):
+                if release(table_name=table_name, pool=pool, owner=owner):
+                    released.append(owner)
+    print(
+        f"execution {execution_arn} ended with {event['detail'].get('status')}, released {released}"
+    )
+    return {"Released": released}
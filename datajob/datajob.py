@@ -2,13 +2,19 @@ import os
 import pathlib
 import shlex
 import subprocess
+from datetime import datetime
 from pathlib import Path
+from typing import List
 
 import typer
+from rich.table import Table
 from stepfunctions.workflow.widgets.utils import create_sfn_execution_url
 
 from datajob import console
+from datajob.glue import glue_advisor
+from datajob.glue import glue_job_bookmark
 from datajob.package import wheel
+from datajob.stepfunctions import stepfunctions_backfill
 from datajob.stepfunctions import stepfunctions_execute
 
 app = typer.Typer()
@@ -105,21 +111,229 @@ def call_cdk(command: str, args: list = None, extra_args: list = None):
 @app.command()
 def execute(
     state_machine: str = typer.Option(
-        ..., help="the full name of the state machine you want to execute."
-    )
+        None, help="the full name of the state machine you want to execute."
+    ),
+    resume: str = typer.Option(
+        None,
+        help="the arn of a failed execution. The tasks that succeeded in that execution are skipped.",
+    ),
+    only: List[str] = typer.Option(
+        None,
+        help="run only this task, its name or its state id. Repeat to run more than one task. The other tasks are skipped.",
+    ),
+    downstream: bool = typer.Option(
+        False, help="with --only, also run all the tasks after the task."
+    ),
+    upstream: bool = typer.Option(
+        False, help="with --only, also run all the tasks before the task."
+    ),
+    from_execution: str = typer.Option(
+        None,
+        help="with --only, the arn of an execution of which we reuse the run id and the outputs of the tasks.",
+    ),
 ):
-    state_machine_arn = stepfunctions_execute.find_state_machine_arn(state_machine)
-    execution_input = stepfunctions_execute.get_execution_input(
-        sfn_arn=state_machine_arn
-    )
-    console.log(f"executing: {state_machine}")
+    if only and resume:
+        raise typer.BadParameter("provide either --only or --resume, not both.")
+    if (downstream or upstream or from_execution) and not only:
+        raise typer.BadParameter(
+            "--downstream, --upstream and --from-execution go together with --only."
+        )
+    if resume:
+        state_machine_arn = stepfunctions_execute.find_state_machine_arn_for_execution(
+            execution_arn=resume
+        )
+        execution_input = stepfunctions_execute.get_resume_execution_input(
+            execution_arn=resume, state_machine_arn=state_machine_arn
+        )
+    elif state_machine:
+        state_machine_arn = stepfunctions_execute.find_state_machine_arn(state_machine)
+        if only:
+            execution_input = stepfunctions_execute.get_only_execution_input(
+                state_machine_arn=state_machine_arn,
+                only=list(only),
+                downstream=downstream,
+                upstream=upstream,
+                from_execution=from_execution,
+            )
+        else:
+            execution_input = stepfunctions_execute.get_execution_input(
+                sfn_arn=state_machine_arn
+            )
+    else:
+        raise typer.BadParameter("provide either --state-machine or --resume.")
+    console.log(f"executing: {state_machine_arn}")
     execution = stepfunctions_execute.execute(
         state_machine_arn, execution_input=execution_input
     )
     status = stepfunctions_execute.get_status(execution)
     console.log(f"status: {status}")
+    if isinstance(execution, dict):
+        # an express workflow ran synchronously and is not visible on the stepfunctions console.
+        console.log(f"output: {execution.get('output', execution.get('cause'))}")
+        return
     url = create_sfn_execution_url(execution.execution_arn)
     console.log(f"view the execution on the AWS console:")
     console.log(f"")
     console.print(f"{url}", soft_wrap=True)
     console.log(f"")
+
+
+@app.command()
+def backfill(
+    state_machine: str = typer.Option(
+        ..., help="the full name of the state machine you want to backfill."
+    ),
+    start: str = typer.Option(
+        ..., help="the first partition date, e.g. 2026-01-01 or 2026-01-01T00:00."
+    ),
+    end: str = typer.Option(
+        ..., help="the last partition date, we include it in the backfill."
+    ),
+    step: str = typer.Option(
+        "1d", help="the time between two partition dates, e.g. 12h, 1d or 1w."
+    ),
+    concurrency: int = typer.Option(
+        4, help="the max number of executions that run at the same time."
+    ),
+    progress_file: str = typer.Option(
+        None,
+        help="the json file where we keep the progress, by default .datajob/backfill/<state machine>.json",
+    ),
+):
+    try:
+        partition_dates = stepfunctions_backfill.get_partition_dates(
+            start=datetime.fromisoformat(start),
+            end=datetime.fromisoformat(end),
+            step=stepfunctions_backfill.parse_step(step),
+        )
+    except (ValueError, stepfunctions_backfill.BackfillException) as e:
+        raise typer.BadParameter(str(e))
+    state_machine_arn = stepfunctions_execute.find_state_machine_arn(state_machine)
+    a_backfill = stepfunctions_backfill.Backfill(
+        state_machine_arn=state_machine_arn,
+        partition_dates=partition_dates,
+        concurrency=concurrency,
+        progress_path=progress_file,
+        execution_input_keys=stepfunctions_execute.get_execution_input_keys(
+            sfn_arn=state_machine_arn
+        ),
+        express=stepfunctions_execute.is_express(state_machine_arn),
+    )
+    console.log(
+        f"backfilling {len(partition_dates)} partition dates of {state_machine}, "
+        f"progress in {a_backfill.progress_path}"
+    )
+    summary = a_backfill.run(
+        on_done=lambda partition_date, status, execution_arn: console.log(
+            f"{partition_date}: {status}"
+        )
+    )
+    table = Table("status", "partition dates")
+    table.add_row("succeeded", str(len(summary["succeeded"])))
+    table.add_row("skipped, succeeded before", str(len(summary["skipped"])))
+    table.add_row("failed", str(len(summary["failed"])))
+    console.print(table)
+    if summary["failed"]:
+        console.log(f"failed: \n{summary['failed']}")
+        console.log(
+            "run the same command again to retry the partition dates that failed."
+        )
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def reset_bookmarks(
+    stack: str = typer.Option(
+        ...,
+        help="the name of the data pipeline stack, the id you gave the DataJobStack.",
+    ),
+    stage: str = typer.Option(
+        None,
+        help="the stage of the data pipeline stack for which we reset the bookmarks (dev/stg/prd/ ...)",
+    ),
+    job: str = typer.Option(
+        None, help="the name of one glue job, by default we reset all the glue jobs."
+    ),
+):
+    stack_name = f"{stack}-{stage}" if stage else stack
+    job_names = glue_job_bookmark.get_job_names_with_bookmarks(stack_name=stack_name)
+    if job is not None:
+        if job not in job_names:
+            raise typer.BadParameter(
+                f"glue job {job} has no bookmark in {stack_name}, choose one of {job_names}."
+            )
+        job_names = [job]
+    reset_job_names = glue_job_bookmark.reset_job_bookmarks(job_names=job_names)
+    console.log(f"reset the bookmarks of: \n{reset_job_names}")
+
+
+@app.command()
+def advise(
+    stack: str = typer.Option(
+        None,
+        help="the name of the data pipeline stack, the id you gave the DataJobStack.",
+    ),
+    stage: str = typer.Option(
+        None,
+        help="the stage of the data pipeline stack we advise on (dev/stg/prd/ ...)",
+    ),
+    history: str = typer.Option(
+        None,
+        help="the path to a json file with exported job runs. We advise offline, without calling AWS.",
+    ),
+    export: str = typer.Option(
+        None, help="the path to a json file to which we export the job runs."
+    ),
+    max_slowdown: float = typer.Option(
+        0.1, help="how much slower a run can get, 0.1 is 10% slower."
+    ),
+    dpu_hour_price: float = typer.Option(
+        glue_advisor.DEFAULT_DPU_HOUR_PRICE, help="the price of a DPU hour."
+    ),
+):
+    if history:
+        job_runs_history = glue_advisor.load_history(path=history)
+    elif stack:
+        stack_name = f"{stack}-{stage}" if stage else stack
+        job_runs_history = glue_advisor.get_history(stack_name=stack_name)
+    else:
+        raise typer.BadParameter("provide either --stack or --history.")
+    if export:
+        glue_advisor.export_history(history=job_runs_history, path=export)
+        console.log(f"exported the job runs to {export}")
+    recommendations = glue_advisor.advise(
+        history=job_runs_history,
+        dpu_hour_price=dpu_hour_price,
+        max_slowdown=max_slowdown,
+    )
+    table = Table(
+        "job",
+        "worker type",
+        "workers",
+        "duration (s)",
+        "cost ($)",
+        "recommended workers",
+        "projected duration (s)",
+        "projected cost ($)",
+        "savings per run ($)",
+        "reason",
+    )
+    for recommendation in recommendations:
+        table.add_row(
+            *[
+                str(recommendation.get(key, ""))
+                for key in [
+                    "job_name",
+                    "worker_type",
+                    "current_workers",
+                    "current_duration",
+                    "current_cost",
+                    "recommended_workers",
+                    "projected_duration",
+                    "projected_cost",
+                    "savings_per_run",
+                    "reason",
+                ]
+            ]
+        )
+    console.print(table)
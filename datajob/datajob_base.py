@@ -6,6 +6,8 @@ from aws_cdk import core
 
 from datajob import logger
 from datajob.datajob_stack import DataJobStack
+from datajob.datajob_task_output import TaskOutput
+from datajob.datajob_task_output import TaskOutputException
 
 
 class DataJobBase(core.Construct):
@@ -22,6 +24,13 @@ class DataJobBase(core.Construct):
         self.context = self.datajob_stack.context
         self.datajob_stack.update_datajob_stack_resources(resource=self)
         self._sfn_task = None
+        self.cache = False
+        self.cache_inputs = []
+        self.concurrency_pool = None
+        self.estimated_cost = 1
+        self.task_outputs = {}
+        # a task that runs continuously, e.g. a streaming job, cannot be part of a workflow.
+        self.can_be_orchestrated = True
 
     @property
     def sfn_task(self) -> stepfunctions.steps.Task:
@@ -50,6 +59,56 @@ class DataJobBase(core.Construct):
         """
         self._sfn_task = task
 
+    def add_output(self, name: str, path: str = None, type: type = str) -> TaskOutput:
+        """Declare an output of this task, so that the tasks after it can use
+        it as a parameter or an argument.
+
+        example:
+
+            train.add_output("model", path="$.ModelArtifacts.S3ModelArtifacts")
+            prepare.add_output("features")  # a folder in the data bucket
+            evaluate = GlueJob(djs, "evaluate", "evaluate.py", arguments={"--model": train.output("model")})
+
+        Args:
+            name: the name of the output.
+            path: a json path in the result of the task.
+                without a path, the output is the folder <run prefix>/<task name>/<name>/ in the data bucket.
+            type: the type of the output, one of str, int, float, bool, dict or list.
+
+        Returns: a reference to the output.
+        """
+        if name in self.task_outputs:
+            raise TaskOutputException(f"{self} already has an output {name}.")
+        self.task_outputs[name] = TaskOutput(
+            state_id=self.sfn_task.state_id,
+            task_name=self.name,
+            name=name,
+            path=path,
+            type=type,
+            data_bucket_name=self.context.data_bucket_name if self.context else None,
+        )
+        return self.task_outputs[name]
+
+    def output(self, name: str) -> TaskOutput:
+        """get a reference to an output of this task we declared with
+        add_output."""
+        if name not in self.task_outputs:
+            raise TaskOutputException(
+                f"{self} has no output {name}, choose one of {list(self.task_outputs)}"
+            )
+        return self.task_outputs[name]
+
+    def get_cache_static_key(self) -> str:
+        """Get the part of the cache key of this task that is known when we
+        synthesize the stack, i.e. a hash of the code and the arguments.
+
+        If it's not implemented it throws an error.
+        """
+        raise NotImplementedError(
+            f"Implement get_cache_static_key for your class {self} so "
+            "that the result of the task can be cached."
+        )
+
     @abstractmethod
     def create(self):
         """create the resource using IAC techology like AWS CDK."""
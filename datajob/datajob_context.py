@@ -1,3 +1,4 @@
+import tempfile
 import uuid
 from pathlib import Path
 
@@ -6,6 +7,8 @@ from aws_cdk import aws_s3_deployment
 from aws_cdk import core
 
 from datajob import logger
+from datajob.cache import task_cache
+from datajob.package import runtime
 
 
 class DataJobContextError(Exception):
@@ -16,6 +19,94 @@ class DataJobContextWheelError(Exception):
     """any exception occuring when constructing wheel in data job context."""
 
 
+class DataBucketLifecycle(object):
+    """The lifecycle rules of the data bucket, we only add them when you pass a
+    DataBucketLifecycle to the datajob stack.
+
+    - the results of a run live under <stage>/<workflow>/<run id>/, we expire them per workflow after some days.
+    - the task cache points at the results of earlier runs, we expire its ledger a day before the results.
+    - the final outputs live under the final prefix, we move them to intelligent-tiering.
+    - we abort multipart uploads that did not complete, e.g. of a job that crashed.
+    """
+
+    def __init__(
+        self,
+        intermediate_expiration_days: int = 30,
+        final_prefix: str = "final/",
+        final_transition_days: int = 0,
+        abort_incomplete_multipart_upload_days: int = 7,
+    ):
+        """
+        :param intermediate_expiration_days: the days after which we delete the results of a run, None keeps them.
+        :param final_prefix: the prefix of the final outputs, None does not move them.
+        :param final_transition_days: the days after which we move the final outputs to intelligent-tiering.
+        :param abort_incomplete_multipart_upload_days: the days after which we abort a multipart upload, None does not abort them.
+        """
+        self.intermediate_expiration_days = intermediate_expiration_days
+        self.final_prefix = final_prefix
+        self.final_transition_days = final_transition_days
+        self.abort_incomplete_multipart_upload_days = (
+            abort_incomplete_multipart_upload_days
+        )
+
+    def get_lifecycle_rules(self) -> list:
+        """get the lifecycle rules for the bucket that do not depend on the
+        workflows of the stack.
+
+        :return: a list of aws_s3.LifecycleRule
+        """
+        lifecycle_rules = []
+        if self.final_prefix is not None:
+            lifecycle_rules.append(
+                aws_s3.LifecycleRule(
+                    id="tier-final-outputs",
+                    prefix=self.final_prefix,
+                    transitions=[
+                        aws_s3.Transition(
+                            storage_class=aws_s3.StorageClass.INTELLIGENT_TIERING,
+                            transition_after=core.Duration.days(
+                                self.final_transition_days
+                            ),
+                        )
+                    ],
+                )
+            )
+        if self.abort_incomplete_multipart_upload_days is not None:
+            lifecycle_rules.append(
+                aws_s3.LifecycleRule(
+                    id="abort-incomplete-multipart-uploads",
+                    abort_incomplete_multipart_upload_after=core.Duration.days(
+                        self.abort_incomplete_multipart_upload_days
+                    ),
+                )
+            )
+        if self.intermediate_expiration_days is not None:
+            lifecycle_rules.append(
+                aws_s3.LifecycleRule(
+                    id="expire-task-cache",
+                    prefix=f"{task_cache.TASK_CACHE_PREFIX}/",
+                    expiration=core.Duration.days(
+                        max(1, self.intermediate_expiration_days - 1)
+                    ),
+                )
+            )
+        return lifecycle_rules
+
+    def get_run_lifecycle_rule(self, run_prefix_root: str) -> aws_s3.LifecycleRule:
+        """get the rule that expires the results of the runs of a workflow.
+
+        :param run_prefix_root: <stage>/<workflow>, the run prefix without the run id.
+        :return: an aws_s3.LifecycleRule, None when we keep the results.
+        """
+        if self.intermediate_expiration_days is None:
+            return None
+        return aws_s3.LifecycleRule(
+            id=f"expire-runs-{run_prefix_root.replace('/', '-')}",
+            prefix=f"{run_prefix_root}/",
+            expiration=core.Duration.days(self.intermediate_expiration_days),
+        )
+
+
 class DataJobContext(core.Construct):
     """DataJobContext is a class that creates context in order to deploy and
     run our pipeline. You have to instantiate this class once per DatajobStack.
@@ -30,6 +121,7 @@ class DataJobContext(core.Construct):
         scope: core.Construct,
         project_root: str = None,
         include_folder: str = None,
+        data_bucket_lifecycle: DataBucketLifecycle = None,
         **kwargs,
     ) -> None:
         """
@@ -37,6 +129,7 @@ class DataJobContext(core.Construct):
         :param stage: stage from DataJobStack.
         :param project_root: the path to the root of this project
         :param include_folder: specify the name of the folder we would like to include in the deployment bucket.
+        :param data_bucket_lifecycle: the lifecycle rules of the data bucket, None adds no rules.
         """
         logger.info("creating datajob context.")
         self.unique_stack_name = scope.unique_stack_name
@@ -44,12 +137,15 @@ class DataJobContext(core.Construct):
         self.stage = scope.stage
         self.bucket_suffix = None
         self.project_root = project_root
+        self.data_bucket_lifecycle = data_bucket_lifecycle
         (
             self.deployment_bucket,
             self.deployment_bucket_name,
         ) = self._create_deployment_bucket()
         (self.data_bucket, self.data_bucket_name) = self._create_data_bucket()
         self.s3_url_wheel = None
+        self.wheel_deployment = None
+        self.runtime_deployment = None
         if self.project_root:
             self.s3_url_wheel = self._deploy_wheel(
                 self.unique_stack_name,
@@ -83,9 +179,34 @@ class DataJobContext(core.Construct):
             #  Might not be wise to destroy it after we destroy the stack.
             auto_delete_objects=True,
             removal_policy=core.RemovalPolicy.DESTROY,
+            lifecycle_rules=(
+                self.data_bucket_lifecycle.get_lifecycle_rules()
+                if self.data_bucket_lifecycle is not None
+                else None
+            ),
         )
         return data_bucket, data_bucket_name
 
+    def add_run_lifecycle_rule(self, run_prefix_root: str) -> None:
+        """expire the results of the runs of a workflow, when the data bucket
+        has a lifecycle.
+
+        :param run_prefix_root: <stage>/<workflow>, the run prefix without the run id.
+        :return: None
+        """
+        if self.data_bucket_lifecycle is None:
+            return
+        lifecycle_rule = self.data_bucket_lifecycle.get_run_lifecycle_rule(
+            run_prefix_root
+        )
+        if lifecycle_rule is not None:
+            logger.debug(f"expiring the runs under {run_prefix_root}/")
+            self.data_bucket.add_lifecycle_rule(
+                id=lifecycle_rule.id,
+                prefix=lifecycle_rule.prefix,
+                expiration=lifecycle_rule.expiration,
+            )
+
     def _create_deployment_bucket(self) -> tuple:
         """use the unique stack name to create an s3 bucket for deployment
         purposes. We take an EmptyS3Bucket so that we can remove the stack
@@ -142,7 +263,7 @@ class DataJobContext(core.Construct):
         try:
             wheel_deployment_name = f"{unique_stack_name}-wheel"
             logger.debug(f"deploying wheel {wheel_deployment_name}")
-            aws_s3_deployment.BucketDeployment(
+            self.wheel_deployment = aws_s3_deployment.BucketDeployment(
                 self,
                 wheel_deployment_name,
                 sources=[
@@ -202,3 +323,23 @@ class DataJobContext(core.Construct):
             destination_bucket=self.deployment_bucket,
             destination_key_prefix=include_folder,
         )
+
+    def get_s3_url_runtime(self) -> str:
+        """Deploy a wheel with the datajob.runtime package to the deployment
+        bucket, the first time a job asks for it.
+
+        :return: s3 url to the runtime wheel in the deployment bucket.
+        """
+        runtime_deployment_name = f"{self.unique_stack_name}-runtime"
+        if self.runtime_deployment is None:
+            logger.debug(f"deploying the datajob runtime {runtime_deployment_name}")
+            runtime_dir = tempfile.mkdtemp()
+            runtime.create_runtime_wheel(target_dir=runtime_dir)
+            self.runtime_deployment = aws_s3_deployment.BucketDeployment(
+                self,
+                runtime_deployment_name,
+                sources=[aws_s3_deployment.Source.asset(runtime_dir)],
+                destination_bucket=self.deployment_bucket,
+                destination_key_prefix=runtime_deployment_name,
+            )
+        return f"s3://{self.deployment_bucket_name}/{runtime_deployment_name}/{runtime.RUNTIME_WHEEL}"
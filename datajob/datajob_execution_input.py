@@ -1,9 +1,11 @@
 import json
+from typing import Iterable
 from typing import Union
 
 from stepfunctions.inputs import ExecutionInput
 
 from datajob import logger
+from datajob.runtime import s3 as s3_runtime
 
 
 class DataJobSagemakerException(Exception):
@@ -14,6 +16,14 @@ class DataJobExecutionInput(object):
     """singleton class that holds configuration on the execution input."""
 
     DATAJOB_EXECUTION_INPUT = "DatajobExecutionInput"
+    DATAJOB_SKIP_TASKS = "DatajobSkipTasks"
+    DATAJOB_JOB_BOOKMARKS = "DatajobJobBookmarks"
+    DATAJOB_RUN_ID = s3_runtime.RUN_ID_INPUT
+    DATAJOB_OUTPUTS = "DatajobOutputs"
+    DATAJOB_UPSTREAM_TASKS = "DatajobUpstreamTasks"
+    DATAJOB_PARTITION_DATE = s3_runtime.PARTITION_DATE_INPUT
+    # the first part of the run prefix when the stack has no stage.
+    DEFAULT_RUN_STAGE = "default"
 
     def __init__(self):
         self.execution_input_schema = {}
@@ -28,6 +38,148 @@ class DataJobExecutionInput(object):
         self.execution_input_schema[unique_name] = str
         self.execution_input = ExecutionInput(schema=self.execution_input_schema)
 
+    @staticmethod
+    def get_skip_flag_path(state_id: str) -> str:
+        """Get the path to the flag in the execution input that tells the
+        workflow to skip the task with this state_id.
+
+        Args:
+            state_id: the state_id of the task in the stepfunctions workflow.
+
+        Returns: json path to the skip flag of the task.
+        """
+        return (
+            f"$$.Execution.Input['{DataJobExecutionInput.DATAJOB_SKIP_TASKS}']"
+            f"['{state_id}']"
+        )
+
+    @staticmethod
+    def get_skip_tasks_input(state_ids: Iterable[str]) -> dict:
+        """Construct the part of the execution input that skips the tasks with
+        the given state_ids.
+
+        Args:
+            state_ids: the state_ids of the tasks we want to skip.
+
+        Returns: dict that can be merged into the execution input.
+        """
+        return {
+            DataJobExecutionInput.DATAJOB_SKIP_TASKS: {
+                state_id: True for state_id in sorted(state_ids)
+            }
+        }
+
+    @staticmethod
+    def get_upstream_tasks_comment(state_ids: Iterable[str]) -> str:
+        """Construct the comment of the choice that skips a task. The comment
+        holds the state_ids of the tasks the task depends on, so that we find
+        the graph of the workflow in its definition, e.g. to run a task and the
+        tasks after it.
+
+        Args:
+            state_ids: the state_ids of the tasks that run before the task.
+
+        Returns: the comment as a json string.
+        """
+        return json.dumps(
+            {DataJobExecutionInput.DATAJOB_UPSTREAM_TASKS: sorted(state_ids)}
+        )
+
+    @staticmethod
+    def get_job_bookmark_path(state_id: str) -> str:
+        """Get the path to the bookmark option in the execution input of the
+        glue job with this state_id.
+
+        Args:
+            state_id: the state_id of the glue job in the stepfunctions workflow.
+
+        Returns: json path to the bookmark option of the glue job.
+        """
+        return (
+            f"$$.Execution.Input['{DataJobExecutionInput.DATAJOB_JOB_BOOKMARKS}']"
+            f"['{state_id}']"
+        )
+
+    @staticmethod
+    def get_job_bookmarks_input(job_bookmarks: dict) -> dict:
+        """Construct the part of the execution input that sets the bookmark
+        option of glue jobs.
+
+        Args:
+            job_bookmarks: the state_id of a glue job as key and enable / pause / disable / reset as value.
+
+        Returns: dict that can be merged into the execution input.
+        """
+        return {DataJobExecutionInput.DATAJOB_JOB_BOOKMARKS: dict(job_bookmarks)}
+
+    @staticmethod
+    def get_run_prefix_root(stage: Union[str, None], workflow_name: str) -> str:
+        """Get the part of the run prefix that is the same for every run of a
+        workflow.
+
+        Args:
+            stage: the stage of the datajob stack.
+            workflow_name: the name of the workflow.
+
+        Returns: <stage>/<workflow>
+        """
+        return f"{stage or DataJobExecutionInput.DEFAULT_RUN_STAGE}/{workflow_name}"
+
+    @staticmethod
+    def get_run_prefix_arguments(run_prefix_root: str) -> dict:
+        """Construct the arguments of a glue task from which the datajob
+        runtime gets the run prefix <stage>/<workflow>/<run id>. The run id is
+        the name of the execution, unless the execution input has a
+        DatajobRunId.
+
+        Args:
+            run_prefix_root: the run prefix without the run id.
+
+        Returns: the arguments of the glue task.
+        """
+        return {
+            s3_runtime.RUN_PREFIX_ROOT_ARGUMENT: run_prefix_root,
+            f"{s3_runtime.RUN_ID_ARGUMENT}.$": "$$.Execution.Name",
+            f"{s3_runtime.EXECUTION_INPUT_ARGUMENT}.$": "States.JsonToString($$.Execution.Input)",
+        }
+
+    @staticmethod
+    def get_run_id_input(run_id: str) -> dict:
+        """Construct the part of the execution input that makes the tasks use
+        the run prefix of another execution.
+
+        Args:
+            run_id: the run id, by default the name of the execution.
+
+        Returns: dict that can be merged into the execution input.
+        """
+        return {DataJobExecutionInput.DATAJOB_RUN_ID: run_id}
+
+    @staticmethod
+    def get_partition_date_input(partition_date: str) -> dict:
+        """Construct the part of the execution input that gives the tasks the
+        partition date of a backfill execution.
+
+        Args:
+            partition_date: the partition date as an iso formatted string.
+
+        Returns: dict that can be merged into the execution input.
+        """
+        return {DataJobExecutionInput.DATAJOB_PARTITION_DATE: partition_date}
+
+    @staticmethod
+    def get_outputs_input(outputs: dict) -> dict:
+        """Construct the part of the execution input that gives the tasks the
+        outputs of tasks that do not run, e.g. the tasks we skip when we resume
+        a failed execution.
+
+        Args:
+            outputs: the state_id of a task as key and its outputs as value.
+
+        Returns: dict that can be merged into the execution input.
+        """
+        return {DataJobExecutionInput.DATAJOB_OUTPUTS: dict(outputs)}
+
     def update_execution_input_for_stack(self, datajob_stack) -> None:
         """Add the keys of the execution input schema as a json string to the
         output variable `of the datajob stack.
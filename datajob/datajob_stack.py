@@ -5,6 +5,7 @@ from aws_cdk import core
 from aws_cdk.core import CfnOutput
 
 from datajob import logger
+from datajob.datajob_context import DataBucketLifecycle
 from datajob.datajob_context import DataJobContext
 from datajob.datajob_execution_input import DataJobExecutionInput
 
@@ -21,6 +22,7 @@ class DataJobStack(core.Stack):
         include_folder: str = None,
         account: str = None,
         region: str = None,
+        data_bucket_lifecycle: DataBucketLifecycle = None,
         **kwargs,
     ) -> None:
         """
@@ -31,6 +33,7 @@ class DataJobStack(core.Stack):
         :param include_folder:  specify the path to the folder we would like to include in the deployment bucket.
         :param account: AWS account number
         :param region: AWS region where we want to deploy our datajob to
+        :param data_bucket_lifecycle: the lifecycle rules of the data bucket, see DataBucketLifecycle. None adds no rules.
         :param kwargs: any extra kwargs for the core.Construct
         """
         self.scope = scope
@@ -42,10 +45,12 @@ class DataJobStack(core.Stack):
         super().__init__(scope=scope, id=self.unique_stack_name, env=self.env, **kwargs)
         self.project_root = project_root
         self.include_folder = include_folder
+        self.data_bucket_lifecycle = data_bucket_lifecycle
         self.resources = []
         self.outputs = {}
         self.execution_input = DataJobExecutionInput()
         self.context = None
+        self.concurrency_governor = None
 
     def __enter__(self):
         """As soon as we enter the contextmanager, we create the datajob
@@ -172,5 +177,8 @@ class DataJobStack(core.Stack):
     def init_datajob_context(self) -> None:
         """Initializes a datajob context."""
         self.context = DataJobContext(
-            self, project_root=self.project_root, include_folder=self.include_folder
+            self,
+            project_root=self.project_root,
+            include_folder=self.include_folder,
+            data_bucket_lifecycle=self.data_bucket_lifecycle,
         )
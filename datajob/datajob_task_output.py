@@ -0,0 +1,275 @@
+"""Pass the outputs of a task to the tasks that run after it.
+
+A task declares an output, either:
+
+- a json path in the result of the task, e.g. the model artifact of a sagemaker training job.
+- a folder in the data bucket under the run prefix, e.g. the folder a glue job writes to.
+
+When a workflow passes outputs, we keep them in the state of the execution:
+
+    {"Datajob": {"RunId": "<run id>", "Outputs": {"<state_id>": {"<name>": "<value>"}}}}
+
+every task writes its result to this state instead of replacing the state, and a task that uses an output
+reads it from the state via its parameters.
+"""
+import json
+from typing import Union
+
+from stepfunctions.inputs import Placeholder
+from stepfunctions.steps import Chain
+from stepfunctions.steps import Choice
+from stepfunctions.steps import ChoiceRule
+from stepfunctions.steps import Parallel
+from stepfunctions.steps import Pass
+from stepfunctions.steps.states import State
+
+from datajob import logger
+from datajob.cache import task_cache
+from datajob.datajob_execution_input import DataJobExecutionInput
+
+DATAJOB_STATE = "Datajob"
+RUN_ID = "RunId"
+OUTPUTS = "Outputs"
+OUTPUT_TYPES = (str, int, float, bool, dict, list)
+
+
+class TaskOutputException(Exception):
+    """any exception occuring when passing the output of a task."""
+
+
+class TaskOutput(Placeholder):
+    """A reference to an output of a task.
+
+    Use it as the value of a parameter or an argument of another task,
+    the workflow replaces it with the value of the output.
+    """
+
+    def __init__(
+        self,
+        state_id: str,
+        task_name: str,
+        name: str,
+        path: str = None,
+        type: type = str,
+        data_bucket_name: str = None,
+    ):
+        """
+        :param state_id: the state_id of the task that has the output.
+        :param task_name: the name of the task that has the output.
+        :param name: the name of the output.
+        :param path: a json path in the result of the task, e.g. $.ModelArtifacts.S3ModelArtifacts.
+        without a path, the output is the folder <run prefix>/<task name>/<name>/ in the data bucket.
+        :param type: the type of the output, one of str, int, float, bool, dict or list.
+        :param data_bucket_name: the name of the data bucket, for an output without a path.
+        """
+        if type not in OUTPUT_TYPES:
+            raise TaskOutputException(
+                f"the type of output {name} should be one of {OUTPUT_TYPES}, got {type}"
+            )
+        if path is None and type is not str:
+            raise TaskOutputException(
+                f"output {name} is a folder in the data bucket, its type is str."
+            )
+        if path is None and data_bucket_name is None:
+            raise TaskOutputException(
+                f"we need the data bucket for output {name}, initialize the datajob context first."
+            )
+        super().__init__(name=name, type=type)
+        self.state_id = state_id
+        self.task_name = task_name
+        self.path = path
+        self.data_bucket_name = data_bucket_name
+        # the workflow sets the run prefix root when we add the task to it.
+        self.run_prefix_root = None
+        # the workflow sets this for the outputs of a cached task, a hit reads them from an earlier run.
+        self.cached = False
+
+    def is_location(self) -> bool:
+        return self.path is None
+
+    def to_jsonpath(self) -> str:
+        """the json path or the intrinsic function that gives the value of the
+        output."""
+        if not self.is_location():
+            return f"$.{DATAJOB_STATE}.{OUTPUTS}['{self.state_id}']['{self.name}']"
+        if self.run_prefix_root is None:
+            raise TaskOutputException(
+                f"add {self.state_id} to a workflow to know the location of output {self.name}."
+            )
+        if self.cached:
+            return (
+                f"States.Format('s3://{self.data_bucket_name}/{{}}/{self.task_name}/{self.name}/', "
+                f"{get_outputs_path(self.state_id)}['{task_cache.RUN_PREFIX}'])"
+            )
+        return (
+            f"States.Format('s3://{self.data_bucket_name}/{self.run_prefix_root}/{{}}/{self.task_name}/{self.name}/', "
+            f"$.{DATAJOB_STATE}.{RUN_ID})"
+        )
+
+    def __repr__(self):
+        return f"TaskOutput({self.state_id}, {self.name})"
+
+
+def get_task_outputs(parameters: Union[dict, list, object]) -> list:
+    """find the outputs of other tasks in the parameters of a task.
+
+    :param parameters: the parameters of a stepfunctions task.
+    :return: a list of TaskOutput.
+    """
+    if isinstance(parameters, TaskOutput):
+        return [parameters]
+    if isinstance(parameters, dict):
+        parameters = list(parameters.values())
+    if isinstance(parameters, list):
+        return [
+            task_output
+            for value in parameters
+            for task_output in get_task_outputs(value)
+        ]
+    return []
+
+
+def get_outputs_path(state_id: str) -> str:
+    """the json path in the state where we keep the outputs of a task."""
+    return f"$.{DATAJOB_STATE}.{OUTPUTS}['{state_id}']"
+
+
+def pass_result(sfn_task: State, outputs: list) -> None:
+    """Select the outputs of a task from its result and add them to the state,
+    the task keeps the state it got as input. A task without outputs discards
+    its result.
+
+    The stepfunctions sdk does not know ResultSelector, we add it to the
+    fields of the state.
+
+    :param sfn_task: the stepfunctions task.
+    :param outputs: the outputs of the task.
+    :return: None
+    """
+    result_outputs = [output for output in outputs if not output.is_location()]
+    if "result_path" in sfn_task.fields:
+        if result_outputs:
+            raise TaskOutputException(
+                f"{sfn_task.state_id} has a result_path, we cannot add its outputs to the state."
+            )
+        return
+    if result_outputs:
+        sfn_task.fields["result_selector"] = {
+            f"{output.name}.$": output.path for output in result_outputs
+        }
+        sfn_task.fields["result_path"] = get_outputs_path(sfn_task.state_id)
+    else:
+        sfn_task.fields["result_path"] = None
+
+
+def merge_json(paths: list) -> str:
+    """Merge the json objects at these paths with States.JsonMerge. We merge
+    pairwise in a balanced tree, so that the intrinsic functions of a wide
+    parallel state are nested log2(number of paths) deep instead of once per
+    path.
+
+    :param paths: the json paths of the objects.
+    :return: the intrinsic function, or the path when there is only one.
+    """
+    if len(paths) == 1:
+        return paths[0]
+    middle = len(paths) // 2
+    return (
+        f"States.JsonMerge({merge_json(paths[:middle])}, "
+        f"{merge_json(paths[middle:])}, false)"
+    )
+
+
+def pass_branches(parallel: Parallel) -> None:
+    """Merge the outputs of the branches of a parallel state into the state,
+    the parallel state keeps the state it got as input.
+
+    :param parallel: the parallel state.
+    :return: None
+    """
+    branch_outputs = [
+        f"$[{index}].{DATAJOB_STATE}.{OUTPUTS}"
+        for index in range(len(parallel.branches))
+    ]
+    parallel.fields["result_selector"] = {
+        f"{RUN_ID}.$": f"$[0].{DATAJOB_STATE}.{RUN_ID}",
+        f"{OUTPUTS}.$": merge_json(branch_outputs),
+    }
+    parallel.fields["result_path"] = f"$.{DATAJOB_STATE}"
+
+
+def keep_state(sfn_task: Union[State, Chain], state_id: str) -> Parallel:
+    """run a task, or a chain of states, in a branch so that it does not change
+    the state."""
+    keep_state_parallel = Parallel(state_id=f"{state_id}-keep-state", result_path=None)
+    keep_state_parallel.add_branch(sfn_task)
+    return keep_state_parallel
+
+
+def get_run_states(next_state: State) -> Chain:
+    """Get the states that start a workflow that passes outputs. They put the
+    run id and the outputs in the state.
+
+    - a resumed execution takes the run id and the outputs of the execution it resumes from the execution input.
+    - otherwise the run id is the name of the execution.
+
+    :param next_state: the first state of the tasks of the workflow.
+    :return: a chain of the choice and the state we choose by default, append the tasks to this chain.
+    """
+    run_id_input = f"$$.Execution.Input.{DataJobExecutionInput.DATAJOB_RUN_ID}"
+    outputs_input = f"$$.Execution.Input.{DataJobExecutionInput.DATAJOB_OUTPUTS}"
+    logger.debug(f"reading the run id from {run_id_input}")
+    run_choice = Choice(state_id="datajob-run")
+    from_input = Pass(
+        state_id="datajob-run-from-input",
+        parameters={f"{RUN_ID}.$": run_id_input, f"{OUTPUTS}.$": outputs_input},
+        result_path=f"$.{DATAJOB_STATE}",
+    )
+    run_id_from_input = Pass(
+        state_id="datajob-run-id-from-input",
+        parameters={f"{RUN_ID}.$": run_id_input, OUTPUTS: {}},
+        result_path=f"$.{DATAJOB_STATE}",
+    )
+    from_execution = Pass(
+        state_id="datajob-run-from-execution",
+        parameters={f"{RUN_ID}.$": "$$.Execution.Name", OUTPUTS: {}},
+        result_path=f"$.{DATAJOB_STATE}",
+    )
+    run_choice.add_choice(
+        rule=ChoiceRule.And(
+            [
+                ChoiceRule.IsPresent(variable=run_id_input, value=True),
+                ChoiceRule.IsPresent(variable=outputs_input, value=True),
+            ]
+        ),
+        next_step=from_input,
+    )
+    run_choice.add_choice(
+        rule=ChoiceRule.IsPresent(variable=run_id_input, value=True),
+        next_step=run_id_from_input,
+    )
+    from_input.next(next_state)
+    run_id_from_input.next(next_state)
+    # chaining the choice makes the run id of the execution the default choice.
+    return Chain([run_choice, from_execution])
+
+
+def get_outputs_from_history(events: list) -> dict:
+    """Collect the outputs that the states of an execution passed, e.g. to
+    resume a failed execution with the outputs of the tasks that succeeded.
+
+    :param events: the events of the execution history.
+    :return: the state_id of a task as key and its outputs as value.
+    """
+    outputs = {}
+    for event in events:
+        output = (event.get("stateExitedEventDetails") or {}).get("output")
+        if not output:
+            continue
+        try:
+            output = json.loads(output)
+        except ValueError:
+            continue
+        if isinstance(output, dict) and isinstance(output.get(DATAJOB_STATE), dict):
+            outputs.update(output[DATAJOB_STATE].get(OUTPUTS) or {})
+    return outputs
@@ -0,0 +1,210 @@
+from pathlib import Path
+
+from aws_cdk import aws_emrserverless as emrserverless
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_s3_deployment
+from aws_cdk import core
+from stepfunctions.steps import Task
+
+from datajob import logger
+from datajob.datajob_base import DataJobBase
+from datajob.stepfunctions import stepfunctions_workflow
+
+# the prefix in the data bucket where emr serverless writes the logs of the job runs.
+EMR_SERVERLESS_LOGS_PREFIX = "emr-serverless-logs"
+
+
+class EmrServerlessJobException(Exception):
+    """any exception occuring when creating an emr serverless job."""
+
+
+@stepfunctions_workflow.task
+class EmrServerlessJob(DataJobBase):
+    """Run a pyspark script on an EMR Serverless application.
+
+    We create an application per job, with pre-initialized capacity if you pass initial_capacity,
+    and run the script as a job run that stepfunctions waits for.
+
+    example:
+
+        task = EmrServerlessJob(
+            datajob_stack,
+            "big-spark-job",
+            job_path="data_pipeline_pkg/big_spark_job.py",
+            initial_capacity={
+                "Driver": {"worker_count": 1, "cpu": "4vCPU", "memory": "16GB"},
+                "Executor": {"worker_count": 10, "cpu": "4vCPU", "memory": "16GB"},
+            },
+        )
+    """
+
+    def __init__(
+        self,
+        datajob_stack: core.Construct,
+        name: str,
+        job_path: str,
+        arguments: list = None,
+        spark_submit_parameters: str = None,
+        release_label: str = "emr-6.15.0",
+        initial_capacity: dict = None,
+        maximum_capacity: dict = None,
+        idle_timeout_minutes: int = 15,
+        role: iam.Role = None,
+        state_id: str = None,
+        wait_for_completion: bool = True,
+        **kwargs,
+    ):
+        """
+        :param datajob_stack: aws cdk core construct object.
+        :param name: a name for this emr serverless job.
+        :param job_path: the path to the pyspark script relative to the project root.
+        :param arguments: the arguments we pass to the script.
+        :param spark_submit_parameters: extra spark submit parameters, e.g. "--conf spark.executor.cores=4".
+        the executors only use the pre-initialized workers if their size fits in the size of the workers.
+        :param release_label: the emr release of the application.
+        :param initial_capacity: the pre-initialized capacity per worker type, Driver and/or Executor.
+        e.g. {"Executor": {"worker_count": 10, "cpu": "4vCPU", "memory": "16GB", "disk": "20GB"}}
+        :param maximum_capacity: the max capacity of the application, e.g. {"cpu": "200vCPU", "memory": "800GB"}
+        :param idle_timeout_minutes: the application stops after it is idle for this number of minutes.
+        :param role: you can provide a cdk iam role object as arg. if not provided this class will instantiate a role.
+        :param state_id: the name of the task in the stepfunctions workflow.
+        :param wait_for_completion: wait until the job run is finished.
+        :param kwargs: any extra kwargs for the emrserverless.CfnApplication
+        """
+        logger.info(f"creating emr serverless job {name}")
+        super().__init__(datajob_stack, name)
+        if self.context is None:
+            raise EmrServerlessJobException(
+                f"we need a datajob context to know where the script of {name} is deployed. "
+                f"Use the datajob stack as a context manager or call init_datajob_context."
+            )
+        self.role = self.get_role(
+            datajob_stack=datajob_stack,
+            role=role,
+            unique_name=self.unique_name,
+            service_principal="emr-serverless.amazonaws.com",
+        )
+        self.job_path = EmrServerlessJob._get_job_path(self.project_root, job_path)
+        self.arguments = arguments or []
+        self.spark_submit_parameters = spark_submit_parameters
+        self.release_label = release_label
+        self.initial_capacity = initial_capacity or {}
+        self.maximum_capacity = maximum_capacity
+        self.idle_timeout_minutes = idle_timeout_minutes
+        self.state_id = self.unique_name if state_id is None else state_id
+        self.wait_for_completion = wait_for_completion
+        self.kwargs = kwargs
+        # the job run needs the id of the application, that's why we create the application here and not in create.
+        self.application = self._create_application()
+        self.sfn_task = Task(
+            state_id=self.state_id,
+            resource=EmrServerlessJob._get_resource(self.wait_for_completion),
+            parameters=self._get_parameters(),
+        )
+        logger.info(f"emr serverless job {name} created.")
+
+    @staticmethod
+    def _get_job_path(project_root: str, job_path: str) -> str:
+        """get the full path to the pyspark script."""
+        if project_root is not None:
+            return str(Path(project_root, job_path))
+        return job_path
+
+    @staticmethod
+    def _get_resource(wait_for_completion: bool) -> str:
+        """the stepfunctions integration to start a job run."""
+        if wait_for_completion:
+            return "arn:aws:states:::emr-serverless:startJobRun.sync"
+        return "arn:aws:states:::emr-serverless:startJobRun"
+
+    def _get_script_s3_url(self) -> str:
+        """the script is deployed to the deployment bucket under the unique
+        name of the job, the same layout as a glue job."""
+        return f"s3://{self.context.deployment_bucket_name}/{self.unique_name}/{Path(self.job_path).name}"
+
+    def _get_spark_submit_parameters(self) -> str:
+        """add the wheel of the project to the python path of spark."""
+        spark_submit_parameters = []
+        if self.context.s3_url_wheel:
+            spark_submit_parameters.append(
+                f"--conf spark.submit.pyFiles={self.context.s3_url_wheel}"
+            )
+        if self.spark_submit_parameters:
+            spark_submit_parameters.append(self.spark_submit_parameters)
+        return " ".join(spark_submit_parameters)
+
+    def _get_parameters(self) -> dict:
+        """the parameters to start the job run from stepfunctions."""
+        spark_submit = {
+            "EntryPoint": self._get_script_s3_url(),
+            "EntryPointArguments": self.arguments,
+        }
+        spark_submit_parameters = self._get_spark_submit_parameters()
+        if spark_submit_parameters:
+            spark_submit["SparkSubmitParameters"] = spark_submit_parameters
+        return {
+            "ApplicationId": self.application.attr_application_id,
+            "ExecutionRoleArn": self.role.role_arn,
+            "Name": self.unique_name,
+            "JobDriver": {"SparkSubmit": spark_submit},
+            "ConfigurationOverrides": {
+                "MonitoringConfiguration": {
+                    "S3MonitoringConfiguration": {
+                        "LogUri": f"s3://{self.context.data_bucket_name}/{EMR_SERVERLESS_LOGS_PREFIX}/{self.unique_name}/"
+                    }
+                }
+            },
+        }
+
+    def _create_application(self) -> emrserverless.CfnApplication:
+        """create a spark application with the pre-initialized capacity."""
+        logger.debug(f"creating emr serverless application {self.unique_name}")
+        initial_capacity = [
+            emrserverless.CfnApplication.InitialCapacityConfigKeyValuePairProperty(
+                key=worker_type,
+                value=emrserverless.CfnApplication.InitialCapacityConfigProperty(
+                    worker_count=config["worker_count"],
+                    worker_configuration=emrserverless.CfnApplication.WorkerConfigurationProperty(
+                        cpu=config["cpu"],
+                        memory=config["memory"],
+                        disk=config.get("disk"),
+                    ),
+                ),
+            )
+            for worker_type, config in self.initial_capacity.items()
+        ]
+        maximum_capacity = (
+            emrserverless.CfnApplication.MaximumAllowedResourcesProperty(
+                **self.maximum_capacity
+            )
+            if self.maximum_capacity
+            else None
+        )
+        return emrserverless.CfnApplication(
+            self,
+            f"{self.unique_name}-application",
+            name=self.unique_name,
+            release_label=self.release_label,
+            type="SPARK",
+            initial_capacity=initial_capacity or None,
+            maximum_capacity=maximum_capacity,
+            auto_start_configuration=emrserverless.CfnApplication.AutoStartConfigurationProperty(
+                enabled=True
+            ),
+            auto_stop_configuration=emrserverless.CfnApplication.AutoStopConfigurationProperty(
+                enabled=True, idle_timeout_minutes=self.idle_timeout_minutes
+            ),
+            **self.kwargs,
+        )
+
+    def create(self):
+        """deploy the directory of the script to the deployment bucket."""
+        job_dir = str(Path(self.job_path).parent)
+        logger.debug(f"deploying emr serverless job folder {job_dir}")
+        aws_s3_deployment.BucketDeployment(
+            self,
+            f"{self.unique_name}-CodeDeploy",
+            sources=[aws_s3_deployment.Source.asset(job_dir)],
+            destination_bucket=self.context.deployment_bucket,
+            destination_key_prefix=self.unique_name,
+        )
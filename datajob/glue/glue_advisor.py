@@ -0,0 +1,260 @@
+import json
+import math
+import statistics
+from typing import Union
+
+import boto3
+
+from datajob import logger
+
+# the on demand price of a DPU hour in most regions at the time of writing.
+DEFAULT_DPU_HOUR_PRICE = 0.44
+# the number of DPUs of a worker.
+WORKER_TYPE_DPUS = {
+    "Standard": 1,
+    "G.025X": 0.25,
+    "G.1X": 1,
+    "G.2X": 2,
+    "G.4X": 4,
+    "G.8X": 8,
+    "Z.2X": 2,
+}
+MIN_NUMBER_OF_WORKERS = 2
+# the fields of a job run we keep in the history.
+JOB_RUN_FIELDS = [
+    "Id",
+    "JobRunState",
+    "StartedOn",
+    "ExecutionTime",
+    "DPUSeconds",
+    "WorkerType",
+    "NumberOfWorkers",
+    "MaxCapacity",
+    "MaxWorkersUsed",
+]
+
+
+class GlueAdvisorException(Exception):
+    """any exception occuring when advising the capacity of glue jobs."""
+
+
+def _describe_stack_resources(stack_name: str) -> dict:
+    return boto3.client("cloudformation").describe_stack_resources(StackName=stack_name)
+
+
+def _get_job_runs_pages(job_name: str) -> list:
+    paginator = boto3.client("glue").get_paginator("get_job_runs")
+    return list(paginator.paginate(JobName=job_name))
+
+
+def get_job_names(stack_name: str) -> list:
+    """get the names of the glue jobs of a stack. The name of a glue job is the
+    unique_name of the GlueJob.
+
+    :param stack_name: the name of the cloudformation stack.
+    :return: the names of the glue jobs.
+    """
+    stack_resources = _describe_stack_resources(stack_name=stack_name)
+    return sorted(
+        resource.get("PhysicalResourceId")
+        for resource in stack_resources.get("StackResources")
+        if resource.get("ResourceType") == "AWS::Glue::Job"
+    )
+
+
+def get_job_runs(job_name: str, max_runs: int = 50) -> list:
+    """get the most recent succeeded runs of a glue job.
+
+    :param job_name: the name of the glue job.
+    :param max_runs: the max number of runs we keep.
+    :return: the runs with the fields in JOB_RUN_FIELDS.
+    """
+    job_runs = []
+    for page in _get_job_runs_pages(job_name=job_name):
+        for job_run in page.get("JobRuns", []):
+            if job_run.get("JobRunState") != "SUCCEEDED":
+                continue
+            job_runs.append(
+                {
+                    field: str(job_run[field])
+                    if field == "StartedOn"
+                    else job_run[field]
+                    for field in JOB_RUN_FIELDS
+                    if field in job_run
+                }
+            )
+    return job_runs[:max_runs]
+
+
+def get_history(stack_name: str, max_runs: int = 50) -> dict:
+    """get the run history of every glue job of a stack.
+
+    :param stack_name: the name of the cloudformation stack.
+    :param max_runs: the max number of runs we keep per job.
+    :return: the name of the glue job as key and its runs as value.
+    """
+    return {
+        job_name: get_job_runs(job_name=job_name, max_runs=max_runs)
+        for job_name in get_job_names(stack_name=stack_name)
+    }
+
+
+def export_history(history: dict, path: str) -> None:
+    """write the run history to a json file, so that we can advise offline."""
+    with open(path, "w") as f:
+        json.dump(history, f, indent=2)
+
+
+def load_history(path: str) -> dict:
+    """read the run history from a json file."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def fit_duration_curve(job_runs: list) -> Union[tuple, None]:
+    """Fit duration = serial + parallel / number_of_workers with least squares.
+    The serial part does not get faster with more workers, the parallel part
+    does.
+
+    :param job_runs: runs with ExecutionTime and NumberOfWorkers.
+    :return: the serial and the parallel seconds, or None when all the runs have the same number of workers.
+    """
+    points = [(1 / run["NumberOfWorkers"], run["ExecutionTime"]) for run in job_runs]
+    if len({x for x, _ in points}) < 2:
+        return None
+    mean_x = statistics.mean(x for x, _ in points)
+    mean_y = statistics.mean(y for _, y in points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    parallel = sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+    # more workers never make a job slower, noise can make the fit say otherwise.
+    parallel = max(parallel, 0)
+    serial = max(mean_y - parallel * mean_x, 0)
+    return serial, parallel
+
+
+def get_cost(
+    worker_type: str, number_of_workers: int, duration: float, dpu_hour_price: float
+) -> float:
+    """the cost of a run in dollar."""
+    dpus = WORKER_TYPE_DPUS.get(worker_type, 1) * number_of_workers
+    return dpus * duration / 3600 * dpu_hour_price
+
+
+def get_max_workers_used(job_runs: list) -> Union[int, None]:
+    """the max number of workers a job used.
+
+    An exported history can have MaxWorkersUsed, e.g. from the
+    cloudwatch metrics of the job. Otherwise we derive it from the DPU
+    seconds of auto-scaling runs.
+    """
+    workers_used = []
+    for run in job_runs:
+        if run.get("MaxWorkersUsed"):
+            workers_used.append(run["MaxWorkersUsed"])
+        elif run.get("DPUSeconds") and run.get("ExecutionTime"):
+            dpus = run["DPUSeconds"] / run["ExecutionTime"]
+            workers_used.append(
+                math.ceil(dpus / WORKER_TYPE_DPUS.get(run.get("WorkerType"), 1))
+            )
+    return max(workers_used) if workers_used else None
+
+
+def recommend(
+    job_name: str,
+    job_runs: list,
+    dpu_hour_price: float = DEFAULT_DPU_HOUR_PRICE,
+    max_slowdown: float = 0.1,
+) -> dict:
+    """recommend the number of workers of a glue job. We take the cheapest
+    number of workers for which the projected duration is at most max_slowdown
+    slower than the current duration.
+
+    :param job_name: the name of the glue job.
+    :param job_runs: the succeeded runs of the glue job, the most recent first.
+    :param dpu_hour_price: the price of a DPU hour.
+    :param max_slowdown: how much slower a run can get, 0.1 is 10% slower.
+    :return: the current and the recommended config with the projected savings per run.
+    """
+    job_runs = [
+        run
+        for run in job_runs
+        if run.get("NumberOfWorkers") and run.get("ExecutionTime")
+    ]
+    if not job_runs:
+        return {"job_name": job_name, "reason": "no runs with workers to learn from."}
+    worker_type = job_runs[0].get("WorkerType")
+    current_workers = job_runs[0]["NumberOfWorkers"]
+    current_duration = statistics.median(
+        run["ExecutionTime"]
+        for run in job_runs
+        if run["NumberOfWorkers"] == current_workers
+    )
+    curve = fit_duration_curve(job_runs)
+    max_workers_used = get_max_workers_used(job_runs)
+    if curve is not None:
+        serial, parallel = curve
+        current_duration = serial + parallel / current_workers
+        max_duration = current_duration * (1 + max_slowdown)
+        # the cost grows with the number of workers, the first that is fast enough is the cheapest.
+        recommended_workers = next(
+            workers
+            for workers in range(MIN_NUMBER_OF_WORKERS, current_workers + 1)
+            if serial + parallel / workers <= max_duration
+        )
+        projected_duration = serial + parallel / recommended_workers
+        reason = f"fitted duration = {serial:.0f}s + {parallel:.0f}s / workers."
+    elif max_workers_used is not None and max_workers_used < current_workers:
+        recommended_workers = max(max_workers_used, MIN_NUMBER_OF_WORKERS)
+        projected_duration = current_duration
+        reason = f"the job used at most {max_workers_used} workers."
+    else:
+        recommended_workers = current_workers
+        projected_duration = current_duration
+        reason = "all runs have the same number of workers, run with another number of workers to fit a curve."
+    current_cost = get_cost(
+        worker_type, current_workers, current_duration, dpu_hour_price
+    )
+    projected_cost = get_cost(
+        worker_type, recommended_workers, projected_duration, dpu_hour_price
+    )
+    logger.debug(f"recommendation for {job_name}: {reason}")
+    return {
+        "job_name": job_name,
+        "runs": len(job_runs),
+        "worker_type": worker_type,
+        "current_workers": current_workers,
+        "current_duration": round(current_duration),
+        "current_cost": round(current_cost, 4),
+        "recommended_workers": recommended_workers,
+        "projected_duration": round(projected_duration),
+        "projected_cost": round(projected_cost, 4),
+        "savings_per_run": round(current_cost - projected_cost, 4),
+        "reason": reason,
+    }
+
+
+def advise(
+    history: dict,
+    dpu_hour_price: float = DEFAULT_DPU_HOUR_PRICE,
+    max_slowdown: float = 0.1,
+) -> list:
+    """recommend a config for every glue job in the history.
+
+    :param history: the name of the glue job as key and its runs as value.
+    :param dpu_hour_price: the price of a DPU hour.
+    :param max_slowdown: how much slower a run can get, 0.1 is 10% slower.
+    :return: a recommendation per glue job.
+    """
+    if max_slowdown < 0:
+        raise GlueAdvisorException(
+            f"max_slowdown should be 0 or more, got {max_slowdown}"
+        )
+    return [
+        recommend(
+            job_name=job_name,
+            job_runs=job_runs,
+            dpu_hour_price=dpu_hour_price,
+            max_slowdown=max_slowdown,
+        )
+        for job_name, job_runs in sorted(history.items())
+    ]
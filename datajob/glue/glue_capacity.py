@@ -0,0 +1,168 @@
+import re
+from pathlib import Path
+from typing import Union
+from urllib.parse import urlparse
+
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_lambda
+from aws_cdk import core
+from stepfunctions.steps import Chain
+from stepfunctions.steps import LambdaStep
+from stepfunctions.steps import Retry
+from stepfunctions.steps.states import State
+
+from datajob import logger
+
+CAPACITY_FUNCTION_ID = "datajob-glue-capacity"
+CAPACITY_HANDLER_PATH = Path(__file__).parent / "glue_capacity_handler.py"
+SIZE_UNITS = {"b": 1, "kb": 1024, "mb": 1024**2, "gb": 1024**3, "tb": 1024**4}
+TRANSIENT_LAMBDA_ERRORS = [
+    "Lambda.ServiceException",
+    "Lambda.TooManyRequestsException",
+    "Lambda.SdkClientException",
+]
+
+
+class GlueCapacityException(Exception):
+    """any exception occuring when choosing the capacity of a glue job."""
+
+
+def parse_size(size: Union[int, str, None]) -> Union[int, None]:
+    """get the number of bytes of a size like 10GB.
+
+    :param size: a number of bytes, a size like 500MB / 10GB / 2TB, or None for no limit.
+    :return: the number of bytes or None.
+    """
+    if size is None or isinstance(size, int):
+        return size
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(b|kb|mb|gb|tb)", str(size).lower())
+    if match is None:
+        raise GlueCapacityException(
+            f"size should be a number of bytes or a size like 10GB, got {size}"
+        )
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def get_capacity_table(capacity_table: list) -> list:
+    """validate the capacity table and sort the rows from small to large.
+
+    example:
+
+        [("10GB", "G.1X", 2), ("500GB", "G.1X", 20), (None, "G.2X", 50)]
+
+    :param capacity_table: rows of (max size of the input, worker type, number of workers).
+    the max size None matches any size.
+    :return: rows as dicts with MaxSizeBytes, WorkerType and NumberOfWorkers.
+    """
+    rows = []
+    for max_size, worker_type, number_of_workers in capacity_table:
+        if not isinstance(number_of_workers, int) or number_of_workers < 2:
+            raise GlueCapacityException(
+                f"a glueetl job needs at least 2 workers, got {number_of_workers}"
+            )
+        rows.append(
+            {
+                "MaxSizeBytes": parse_size(max_size),
+                "WorkerType": worker_type,
+                "NumberOfWorkers": number_of_workers,
+            }
+        )
+    if not any(row["MaxSizeBytes"] is not None for row in rows):
+        raise GlueCapacityException(
+            "the capacity table needs at least one row with a max size."
+        )
+    # the rows without a max size come last.
+    return sorted(
+        rows,
+        key=lambda row: (row["MaxSizeBytes"] is None, row["MaxSizeBytes"] or 0),
+    )
+
+
+def get_capacity_input(capacity_input: str, data_bucket_name: str = None) -> tuple:
+    """get the bucket and the prefix of the input we measure.
+
+    :param capacity_input: an s3 url, or a prefix in the data bucket.
+    a prefix that starts with $ is a path in the state, e.g. $$.Execution.Input.prefix
+    :param data_bucket_name: the name of the data bucket of the stack.
+    :return: the bucket and the prefix.
+    """
+    if capacity_input.startswith("s3://"):
+        url = urlparse(capacity_input)
+        return url.netloc, url.path.lstrip("/")
+    if data_bucket_name is None:
+        raise GlueCapacityException(
+            f"we need a datajob context to measure {capacity_input} in the data bucket. "
+            f"Use the datajob stack as a context manager or call init_datajob_context."
+        )
+    return data_bucket_name, capacity_input
+
+
+def get_capacity_function(datajob_stack: core.Stack) -> aws_lambda.Function:
+    """get the lambda function that chooses the capacity of the glue jobs. We
+    create one function per stack.
+
+    :param datajob_stack: the datajob stack.
+    :return: the lambda function.
+    """
+    function = datajob_stack.node.try_find_child(CAPACITY_FUNCTION_ID)
+    if function is None:
+        logger.debug(f"creating the glue capacity function of {datajob_stack}")
+        function = aws_lambda.Function(
+            datajob_stack,
+            CAPACITY_FUNCTION_ID,
+            function_name=f"{datajob_stack.unique_stack_name}-glue-capacity",
+            code=aws_lambda.Code.from_inline(CAPACITY_HANDLER_PATH.read_text()),
+            handler="index.handler",
+            runtime=aws_lambda.Runtime.PYTHON_3_9,
+            memory_size=256,
+            timeout=core.Duration.minutes(5),
+        )
+    return function
+
+
+def grant_list_bucket(function: aws_lambda.Function, bucket: str) -> None:
+    """let the capacity function list the objects of the bucket."""
+    function.add_to_role_policy(
+        iam.PolicyStatement(
+            actions=["s3:ListBucket"], resources=[f"arn:aws:s3:::{bucket}"]
+        )
+    )
+
+
+def make_task_sized(
+    sfn_task: Union[State, Chain],
+    state_id: str,
+    function_name: str,
+    bucket: str,
+    prefix: str,
+    capacity_table: list,
+) -> Chain:
+    """Measure the input of a glue job before it runs and add the WorkerType
+    and NumberOfWorkers that fit the size to the state input. The glue task
+    reads them via $.WorkerType and $.NumberOfWorkers.
+
+    :param sfn_task: the stepfunctions task of a glue job.
+    :param state_id: the state_id of the task.
+    :param function_name: the name of the lambda function that chooses the capacity.
+    :param bucket: the bucket of the input.
+    :param prefix: the prefix of the input, or a path in the state that starts with $.
+    :param capacity_table: the rows of the capacity table.
+    :return: a chain of the lambda step and the glue task.
+    """
+    payload = {"Bucket": bucket, "CapacityTable": capacity_table, "State.$": "$"}
+    prefix_key = "Prefix.$" if prefix.startswith("$") else "Prefix"
+    payload[prefix_key] = prefix
+    capacity_step = LambdaStep(
+        state_id=f"{state_id}-capacity",
+        parameters={"FunctionName": function_name, "Payload": payload},
+        output_path="$.Payload",
+    )
+    capacity_step.add_retry(
+        Retry(
+            error_equals=TRANSIENT_LAMBDA_ERRORS,
+            interval_seconds=2,
+            max_attempts=3,
+            backoff_rate=2,
+        )
+    )
+    return Chain([capacity_step, sfn_task])
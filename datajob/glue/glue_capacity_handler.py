@@ -0,0 +1,60 @@
+"""The lambda function that measures the input of a glue job and chooses its
+capacity.
+
+We deploy this file as inline code, it only depends on boto3.
+"""
+import boto3
+
+
+def get_input_size(bucket: str, prefix: str, limit: int) -> int:
+    """sum the size of the objects under the prefix. We stop listing as soon as
+    the size exceeds the limit, a bigger size does not change the capacity.
+
+    :param bucket: the name of the bucket.
+    :param prefix: the prefix of the input of the glue job.
+    :param limit: the largest size in the capacity table.
+    :return: the size in bytes.
+    """
+    size = 0
+    paginator = boto3.client("s3").get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        size += sum(content["Size"] for content in page.get("Contents", []))
+        if size > limit:
+            break
+    return size
+
+
+def choose_capacity(capacity_table: list, size: int) -> dict:
+    """choose the first row of the capacity table that fits the size. When the
+    size exceeds every row we choose the last row.
+
+    :param capacity_table: rows with MaxSizeBytes, WorkerType and NumberOfWorkers sorted by MaxSizeBytes.
+    :param size: the size of the input in bytes.
+    :return: the row of the capacity table.
+    """
+    for row in capacity_table:
+        if row["MaxSizeBytes"] is None or size <= row["MaxSizeBytes"]:
+            return row
+    return capacity_table[-1]
+
+
+def handler(event, context):
+    """measure the input and return the state input with the capacity of the
+    glue job added to it."""
+    capacity_table = event["CapacityTable"]
+    limit = max(
+        row["MaxSizeBytes"] for row in capacity_table if row["MaxSizeBytes"] is not None
+    )
+    size = get_input_size(bucket=event["Bucket"], prefix=event["Prefix"], limit=limit)
+    row = choose_capacity(capacity_table=capacity_table, size=size)
+    print(f"input s3://{event['Bucket']}/{event['Prefix']} has {size} bytes: {row}")
+    state = event.get("State")
+    output = dict(state) if isinstance(state, dict) else {}
+    output.update(
+        {
+            "InputSizeBytes": size,
+            "WorkerType": row["WorkerType"],
+            "NumberOfWorkers": row["NumberOfWorkers"],
+        }
+    )
+    return output
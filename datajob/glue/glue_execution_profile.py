@@ -0,0 +1,119 @@
+from enum import Enum
+from typing import Union
+
+
+class GlueExecutionClass(Enum):
+    STANDARD = "STANDARD"
+    FLEX = "FLEX"
+
+    @staticmethod
+    def get_values():
+        return [e.value for e in GlueExecutionClass]
+
+
+class GlueExecutionProfileException(Exception):
+    """any exception occuring when resolving a glue execution profile."""
+
+
+class GlueExecutionProfile(object):
+    """How a spark glue job runs: the glue version, the workers, auto-scaling,
+    the execution class and the timeout.
+
+    example:
+
+        profile = GlueExecutionProfile(glue_version="4.0", worker_type="G.1X", number_of_workers=20, auto_scaling=True)
+    """
+
+    def __init__(
+        self,
+        glue_version: str = "4.0",
+        worker_type: str = "G.1X",
+        number_of_workers: int = 10,
+        auto_scaling: bool = False,
+        execution_class: str = GlueExecutionClass.STANDARD.value,
+        timeout: int = None,
+    ):
+        """
+        :param glue_version: the version of glue, versions 3.0 and up start in seconds instead of minutes.
+        :param worker_type: G.1X / G.2X / G.4X / G.8X
+        :param number_of_workers: the number of workers, with auto_scaling this is the max number of workers.
+        :param auto_scaling: let glue add and remove workers, between 2 and number_of_workers, depending on the load.
+        :param execution_class: STANDARD or FLEX. FLEX runs on spare capacity, it's cheaper but can start later.
+        :param timeout: the time in minutes after which glue stops the job.
+        """
+        if execution_class not in GlueExecutionClass.get_values():
+            raise GlueExecutionProfileException(
+                f"Unknown execution class {execution_class}, choose one of {GlueExecutionClass.get_values()}"
+            )
+        if auto_scaling and float(glue_version) < 3.0:
+            raise GlueExecutionProfileException(
+                f"auto scaling needs glue version 3.0 or higher, got {glue_version}"
+            )
+        self.glue_version = glue_version
+        self.worker_type = worker_type
+        self.number_of_workers = number_of_workers
+        self.auto_scaling = auto_scaling
+        self.execution_class = execution_class
+        self.timeout = timeout
+
+    def get_arguments(self) -> dict:
+        """the default arguments of the glue job that this profile needs."""
+        if self.auto_scaling:
+            return {"--enable-auto-scaling": "true"}
+        return {}
+
+    def __repr__(self):
+        return f"{self}"
+
+    def __str__(self):
+        return (
+            f"glue {self.glue_version}, {self.number_of_workers} x {self.worker_type}, "
+            f"auto scaling {self.auto_scaling}, {self.execution_class}, timeout {self.timeout}"
+        )
+
+
+# named profiles you can refer to by name, add your own profiles to this dict.
+GLUE_EXECUTION_PROFILES = {
+    "flex": GlueExecutionProfile(
+        glue_version="4.0",
+        worker_type="G.1X",
+        number_of_workers=10,
+        execution_class=GlueExecutionClass.FLEX.value,
+        timeout=120,
+    ),
+    "standard": GlueExecutionProfile(
+        glue_version="4.0", worker_type="G.1X", number_of_workers=10, timeout=60
+    ),
+    "auto-scaling": GlueExecutionProfile(
+        glue_version="4.0",
+        worker_type="G.2X",
+        number_of_workers=40,
+        auto_scaling=True,
+        timeout=60,
+    ),
+}
+
+
+def get_execution_profile(
+    execution_profile: Union[str, GlueExecutionProfile, None],
+    stage_execution_profiles: dict = None,
+    stage: str = None,
+) -> Union[GlueExecutionProfile, None]:
+    """get the execution profile of a glue job for a stage. The profile of the
+    stage wins over the execution_profile.
+
+    :param execution_profile: the name of a profile in GLUE_EXECUTION_PROFILES or a profile.
+    :param stage_execution_profiles: the stage as key and the name of a profile or a profile as value.
+    :param stage: the stage we deploy to.
+    :return: the execution profile or None if no profile is given.
+    """
+    stage_execution_profiles = stage_execution_profiles or {}
+    if stage in stage_execution_profiles:
+        execution_profile = stage_execution_profiles[stage]
+    if execution_profile is None or isinstance(execution_profile, GlueExecutionProfile):
+        return execution_profile
+    if execution_profile not in GLUE_EXECUTION_PROFILES:
+        raise GlueExecutionProfileException(
+            f"Unknown execution profile {execution_profile}, choose one of {list(GLUE_EXECUTION_PROFILES)}"
+        )
+    return GLUE_EXECUTION_PROFILES[execution_profile]
@@ -1,21 +1,41 @@
 from enum import Enum
 from pathlib import Path
+from typing import Union
 
 from aws_cdk import aws_glue as glue
 from aws_cdk import aws_iam as iam
 from aws_cdk import aws_s3_deployment
 from aws_cdk import core
+from aws_cdk import custom_resources
 from stepfunctions.steps import GlueStartJobRunStep
 
 from datajob import logger
+from datajob.cache import task_cache
 from datajob.datajob_base import DataJobBase
 from datajob.datajob_context import DataJobContext
+from datajob.datajob_execution_input import DataJobExecutionInput
+from datajob.datajob_task_output import TaskOutput
+from datajob.glue import glue_capacity
+from datajob.glue import glue_execution_profile
+from datajob.glue import glue_job_bookmark
+from datajob.glue import spark_config as glue_spark_config
+from datajob.glue.glue_execution_profile import GlueExecutionProfile
+from datajob.glue.spark_config import SparkConfig
+from datajob.runtime import s3 as s3_runtime
 from datajob.stepfunctions import stepfunctions_workflow
 
+# the prefix in the data bucket where streaming jobs keep their checkpoints.
+STREAMING_CHECKPOINTS_PREFIX = "glue-streaming-checkpoints"
+
+# the newest glue version of a pythonshell job, a profile with a newer version runs pythonshell on this one.
+PYTHONSHELL_GLUE_VERSION = "3.0"
+
 
 class GlueJobType(Enum):
     PYTHONSHELL = "pythonshell"
     GLUEETL = "glueetl"
+    GLUERAY = "glueray"
+    GLUESTREAMING = "gluestreaming"
 
     @staticmethod
     def get_values():
@@ -33,27 +53,70 @@ class GlueJob(DataJobBase):
         glue_version: str = None,
         max_capacity: int = None,
         arguments: dict = None,
-        python_version: str = "3",
+        python_version: str = None,
         role: iam.Role = None,
         worker_type: str = None,
         number_of_workers: int = None,
+        min_workers: int = None,
+        runtime: str = None,
+        checkpoint_location: str = None,
+        window_size: str = "100 seconds",
+        execution_profile: Union[str, GlueExecutionProfile] = None,
+        stage_execution_profiles: dict = None,
+        spark_config: Union[str, SparkConfig] = None,
+        job_bookmark: str = None,
+        capacity_input: str = None,
+        capacity_table: list = None,
         state_id: str = None,
         job_name: str = None,
         wait_for_completion=True,
+        cache: bool = False,
+        cache_inputs: list = None,
+        concurrency_pool: str = None,
+        estimated_cost: float = 1,
         **kwargs,
     ):
         """
         :param datajob_stack: aws cdk core construct object.
         :param name: a name for this glue job (will appear on the glue console).
         :param job_path: the path to the glue job relative to the project root.
-        :param job_type: choose pythonshell for plain python / glueetl for a spark cluster. pythonshell is the default.
-        :param glue_version: at the time of writing choose 1.0 for pythonshell / 2.0 for spark.
+        :param job_type: choose pythonshell for plain python / glueetl for a spark cluster / glueray for a ray cluster /
+        gluestreaming for a spark streaming job. pythonshell is the default.
+        a streaming job is started when we deploy the stack and keeps running, it cannot be orchestrated with >>.
+        :param glue_version: at the time of writing choose 1.0 for pythonshell / 2.0 for spark / 4.0 for ray.
         :param max_capacity: max nodes we want to run.
         :param arguments: the arguments as a dict for this glue job.
-        :param python_version: 3 is the default
+        :param python_version: 3 is the default, 3.9 for ray.
         :param role: you can provide a cdk iam role object as arg. if not provided this class will instantiate a role,
-        :param worker_type: you can provide a worker type Standard / G.1X / G.2X
+        :param worker_type: you can provide a worker type Standard / G.1X / G.2X. Z.2X is the default for ray.
         :param number_of_workers: for pythonshell is this 0.0625 or 1. for glueetl is this minimum 2.
+        for glueray this is the max number of workers.
+        :param min_workers: the min number of workers of a ray job, ray scales between min_workers and number_of_workers.
+        :param runtime: the runtime of a ray job, Ray2.4 is the default.
+        :param checkpoint_location: the s3 url where a streaming job keeps its checkpoints.
+        the default is a prefix in the data bucket, it's passed to the job as --checkpoint_location.
+        :param window_size: the size of the window of a streaming job, it's passed to the job as --window_size.
+        :param execution_profile: the name of a profile in GLUE_EXECUTION_PROFILES or a GlueExecutionProfile,
+        for a glueetl, gluestreaming or pythonshell job. A pythonshell job only takes the glue version (1.0 or 3.0) and the timeout.
+        The glue_version, worker_type and number_of_workers you pass win over the profile.
+        :param stage_execution_profiles: the stage as key and a profile as value, to override the execution_profile per stage.
+        e.g. {"dev": "flex", "prd": "auto-scaling"}
+        :param spark_config: the name of a preset in SPARK_CONFIG_PRESETS or a SparkConfig, for a glueetl or gluestreaming job.
+        the spark settings are merged in the --conf argument.
+        :param job_bookmark: enable / pause / disable the job bookmark of a glueetl job, so that a run only processes
+        the data that is new since the previous run. The option can be overridden, or the bookmark reset, per execution
+        via the execution input e.g. {"DatajobJobBookmarks": {"<state_id>": "reset"}}.
+        :param capacity_input: the input we measure before a glueetl job runs, an s3 url or a prefix in the data bucket.
+        a value that starts with $ is a path in the execution, e.g. $$.Execution.Input.prefix
+        :param capacity_table: rows of (max size of the input, worker type, number of workers), e.g.
+        [("10GB", "G.1X", 2), ("500GB", "G.1X", 20), (None, "G.2X", 50)]. Each run gets the first row that fits the size
+        of capacity_input.
+        :param cache: skip the glue job when it already succeeded for the same code, arguments, inputs and partition date.
+        the tasks after it read its outputs from the run that produced them.
+        :param cache_inputs: s3 urls to the objects the glue job reads. Their ETags are part of the cache key.
+        :param concurrency_pool: the name of a pool of the concurrency governor of the stack.
+        the glue job waits for a free slot in the pool before it starts.
+        :param estimated_cost: the relative duration of the glue job, used to balance the lanes of a workflow with max_parallelism.
         :param kwargs: any extra kwargs for the glue.CfnJob
         """
         logger.info(f"creating glue job {name}")
@@ -67,44 +130,269 @@ class GlueJob(DataJobBase):
         self.job_path = GlueJob._get_job_path(self.project_root, job_path)
         self.arguments = arguments or {}
         self.job_type = GlueJob._get_job_type(job_type=job_type)
-        self.python_version = python_version
+        self.execution_profile = GlueJob._get_execution_profile(
+            execution_profile=execution_profile,
+            stage_execution_profiles=stage_execution_profiles,
+            stage=self.stage,
+            job_type=job_type,
+        )
+        self.spark_config = GlueJob._get_spark_config(
+            spark_config=spark_config, job_type=job_type
+        )
+        self.job_bookmark = GlueJob._get_job_bookmark(
+            job_bookmark=job_bookmark, job_type=job_type
+        )
+        self.capacity_table = GlueJob._get_capacity_table(
+            capacity_input=capacity_input,
+            capacity_table=capacity_table,
+            job_type=job_type,
+        )
+        self.execution_class = None
+        self.timeout = None
+        if self.execution_profile is not None and job_type == "pythonshell":
+            logger.debug(f"glue job {name} runs with profile {self.execution_profile}")
+            # a pythonshell job has no workers, it only takes the glue version and the timeout.
+            glue_version = glue_version or GlueJob._get_pythonshell_glue_version(
+                self.execution_profile.glue_version
+            )
+            self.timeout = self.execution_profile.timeout
+        elif self.execution_profile is not None:
+            logger.debug(f"glue job {name} runs with profile {self.execution_profile}")
+            glue_version = glue_version or self.execution_profile.glue_version
+            worker_type = worker_type or self.execution_profile.worker_type
+            number_of_workers = (
+                number_of_workers or self.execution_profile.number_of_workers
+            )
+            self.execution_class = self.execution_profile.execution_class
+            self.timeout = self.execution_profile.timeout
+            self.arguments = {
+                **self.execution_profile.get_arguments(),
+                **self.arguments,
+            }
         self.glue_version = GlueJob._get_glue_version(
             glue_version=glue_version, job_type=job_type
         )
+        self.python_version = GlueJob._get_python_version(
+            python_version=python_version,
+            job_type=job_type,
+            glue_version=self.glue_version,
+        )
         self.max_capacity = max_capacity
-        self.worker_type = worker_type
+        self.worker_type = GlueJob._get_worker_type(
+            worker_type=worker_type, job_type=job_type
+        )
         self.number_of_workers = number_of_workers
+        self.runtime = GlueJob._get_runtime(runtime=runtime, job_type=job_type)
+        self.checkpoint_location = checkpoint_location
+        self.window_size = window_size
+        self.can_be_orchestrated = job_type != GlueJobType.GLUESTREAMING.value
+        if min_workers is not None:
+            self.arguments = {"--min-workers": str(min_workers), **self.arguments}
         self.state_id = self.unique_name if state_id is None else state_id
         self.wait_for_completion = wait_for_completion
         self.job_name = self.unique_name if job_name is None else job_name
+        self.cache = cache
+        self.cache_inputs = cache_inputs or []
+        self.concurrency_pool = concurrency_pool
+        self.estimated_cost = estimated_cost
         self.kwargs = kwargs
+        if self.capacity_table is not None:
+            self._setup_capacity_function(capacity_input=capacity_input)
         self.sfn_task = GlueStartJobRunStep(
             state_id=self.state_id,
             wait_for_completion=self.wait_for_completion,
-            parameters={"JobName": self.job_name},
+            parameters=self._get_parameters(),
             **self.kwargs,
         )
         logger.info(f"glue job {name} created.")
 
+    def _get_parameters(self) -> dict:
+        """the parameters of the glue task.
+
+        With bookmarks or a capacity table the states in front of the
+        glue task put the values in the state input.
+        """
+        parameters = {"JobName": self.job_name}
+        # the outputs of other tasks are only known when the glue job runs.
+        task_output_arguments = self._get_task_output_arguments(self.arguments)
+        if task_output_arguments:
+            parameters["Arguments"] = task_output_arguments
+        if self.job_bookmark is not None:
+            parameters["Arguments"] = {
+                **parameters.get("Arguments", {}),
+                "--job-bookmark-option.$": f"$.{glue_job_bookmark.JOB_BOOKMARK_OPTION}",
+            }
+        if self.capacity_table is not None:
+            parameters["WorkerType.$"] = "$.WorkerType"
+            parameters["NumberOfWorkers.$"] = "$.NumberOfWorkers"
+        return parameters
+
+    def set_run_prefix_root(self, run_prefix_root: str) -> None:
+        """pass the run prefix and the locations of the outputs of the glue job
+        via the arguments of the task, the workflow calls this when we add the
+        glue job to it.
+
+        :param run_prefix_root: <stage>/<workflow>, the run prefix without the run id.
+        """
+        parameters = dict(self.sfn_task.parameters)
+        parameters["Arguments"] = {
+            **parameters.get("Arguments", {}),
+            **DataJobExecutionInput.get_run_prefix_arguments(run_prefix_root),
+            **{
+                f"{s3_runtime.OUTPUT_ARGUMENT_PREFIX}{name}": output
+                for name, output in self.task_outputs.items()
+                if output.is_location()
+            },
+        }
+        self.sfn_task.update_parameters(parameters)
+
+    @staticmethod
+    def _get_task_output_arguments(arguments: dict) -> dict:
+        """get the arguments that are an output of another task, glue only
+        accepts arguments of type str."""
+        task_output_arguments = {
+            key: value
+            for key, value in arguments.items()
+            if isinstance(value, TaskOutput)
+        }
+        for key, value in task_output_arguments.items():
+            if value.type is not str:
+                raise ValueError(
+                    f"argument {key} gets output {value.name} of type {value.type.__name__}, "
+                    f"the arguments of a glue job are of type str."
+                )
+        return task_output_arguments
+
+    def _setup_capacity_function(self, capacity_input: str) -> None:
+        """get the function that measures the input of the glue job and let it
+        list the bucket of the input."""
+        (
+            self.capacity_bucket,
+            self.capacity_prefix,
+        ) = glue_capacity.get_capacity_input(
+            capacity_input=capacity_input,
+            data_bucket_name=self.context.data_bucket_name if self.context else None,
+        )
+        self.capacity_function = glue_capacity.get_capacity_function(self.datajob_stack)
+        glue_capacity.grant_list_bucket(self.capacity_function, self.capacity_bucket)
+
     def create(self):
         s3_url_glue_job = self._deploy_glue_job_code(
             context=self.context,
             glue_job_name=self.unique_name,
             path_to_glue_job=self.job_path,
         )
-        self._create_glue_job(
+        # the datajob.runtime helpers find the data bucket of the stack via this argument.
+        arguments = {
+            s3_runtime.DATA_BUCKET_ARGUMENT: self.context.data_bucket_name,
+            **{
+                key: value
+                for key, value in self.arguments.items()
+                if not isinstance(value, TaskOutput)
+            },
+        }
+        if self.job_type == GlueJobType.GLUESTREAMING.value:
+            arguments = {**self._get_streaming_arguments(self.context), **arguments}
+        if self.spark_config is not None:
+            arguments = glue_spark_config.merge_arguments(
+                arguments=arguments,
+                spark_arguments=self.spark_config.get_arguments(
+                    shuffle_location=f"s3://{self.context.data_bucket_name}/{glue_spark_config.SHUFFLE_PREFIX}/{self.unique_name}/"
+                ),
+            )
+        if self.job_bookmark is not None:
+            arguments = {
+                "--job-bookmark-option": glue_job_bookmark.get_job_bookmark_option(
+                    self.job_bookmark
+                ),
+                **arguments,
+            }
+            glue_job_bookmark.update_job_bookmarks_output(
+                datajob_stack=self.datajob_stack, job_name=self.job_name
+            )
+        glue_job = self._create_glue_job(
             context=self.context,
             glue_job_name=self.unique_name,
             s3_url_glue_job=s3_url_glue_job,
-            arguments=self.arguments,
+            arguments=arguments,
             job_type=self.job_type,
             python_version=self.python_version,
             glue_version=self.glue_version,
             max_capacity=self.max_capacity,
             worker_type=self.worker_type,
             number_of_workers=self.number_of_workers,
+            runtime=self.runtime,
+            execution_class=self.execution_class,
+            timeout=self.timeout,
             **self.kwargs,
         )
+        if self.job_type == GlueJobType.GLUESTREAMING.value:
+            self._start_streaming_job(glue_job)
+
+    def _get_streaming_arguments(self, context: DataJobContext) -> dict:
+        """the checkpoint location and the window size of a streaming job.
+
+        :param context: DataJobContext that contains the name of the data bucket.
+        :return: the arguments of the streaming job.
+        """
+        checkpoint_location = self.checkpoint_location
+        if checkpoint_location is None:
+            checkpoint_location = f"s3://{context.data_bucket_name}/{STREAMING_CHECKPOINTS_PREFIX}/{self.unique_name}/"
+        return {
+            "--checkpoint_location": checkpoint_location,
+            "--window_size": self.window_size,
+        }
+
+    def _start_streaming_job(self, glue_job: glue.CfnJob) -> None:
+        """start the streaming job when we create the stack and stop it when we
+        delete the stack. After an update the running job keeps the old code,
+        stop the job run to restart it with the new code.
+
+        :param glue_job: the glue job we want to start.
+        :return: None
+        """
+        logger.debug(f"starting streaming glue job {self.unique_name} on deploy")
+        start_job_run = custom_resources.AwsCustomResource(
+            self,
+            f"{self.unique_name}-start",
+            on_create=custom_resources.AwsSdkCall(
+                service="Glue",
+                action="startJobRun",
+                parameters={"JobName": self.job_name},
+                physical_resource_id=custom_resources.PhysicalResourceId.from_response(
+                    "JobRunId"
+                ),
+            ),
+            on_delete=custom_resources.AwsSdkCall(
+                service="Glue",
+                action="batchStopJobRun",
+                parameters={
+                    "JobName": self.job_name,
+                    "JobRunIds": [custom_resources.PhysicalResourceIdReference()],
+                },
+            ),
+            policy=custom_resources.AwsCustomResourcePolicy.from_sdk_calls(
+                resources=custom_resources.AwsCustomResourcePolicy.ANY_RESOURCE
+            ),
+        )
+        # we can only start the job when it exists and its code is deployed.
+        start_job_run.node.add_dependency(glue_job)
+        start_job_run.node.add_dependency(
+            self.node.find_child(f"{self.unique_name}-CodeDeploy")
+        )
+
+    def get_cache_static_key(self) -> str:
+        """hash the script of the glue job, the wheel of the project and the
+        arguments."""
+        code_paths = [self.job_path]
+        if self.context.s3_url_wheel:
+            wheel_name = self.context.s3_url_wheel.split("/")[-1]
+            code_paths.append(str(Path(self.project_root, "dist", wheel_name)))
+        return task_cache.compute_static_key(
+            name=self.unique_name,
+            code_hash=task_cache.hash_files(code_paths),
+            arguments=self.arguments,
+        )
 
     @staticmethod
     def _get_job_path(project_root: str, job_path: str) -> str:
@@ -143,8 +431,164 @@ class GlueJob(DataJobBase):
                 return "1.0"
             elif job_type == "glueetl":
                 return "2.0"
+            elif job_type in ("glueray", "gluestreaming"):
+                return "4.0"
         return glue_version
 
+    @staticmethod
+    def _get_execution_profile(
+        execution_profile: Union[str, GlueExecutionProfile],
+        stage_execution_profiles: dict,
+        stage: str,
+        job_type: str,
+    ) -> Union[GlueExecutionProfile, None]:
+        """get the execution profile for the stage and check that the job type
+        supports it.
+
+        :param execution_profile: the name of a profile or a profile.
+        :param stage_execution_profiles: the stage as key and a profile as value.
+        :param stage: the stage we deploy to.
+        :param job_type: the name of the type of glue job.
+        :return: the execution profile or None if no profile is given.
+        """
+        profile = glue_execution_profile.get_execution_profile(
+            execution_profile=execution_profile,
+            stage_execution_profiles=stage_execution_profiles,
+            stage=stage,
+        )
+        if profile is None:
+            return None
+        if job_type == "glueray":
+            raise ValueError(
+                f"an execution profile is only supported for glueetl, gluestreaming and pythonshell jobs, got {job_type}"
+            )
+        if profile.auto_scaling and job_type == "pythonshell":
+            raise ValueError(
+                f"auto scaling is only supported for spark jobs, got {job_type}"
+            )
+        if profile.execution_class == "FLEX" and job_type != "glueetl":
+            raise ValueError(
+                f"the FLEX execution class is only supported for glueetl jobs, got {job_type}"
+            )
+        return profile
+
+    @staticmethod
+    def _get_pythonshell_glue_version(glue_version: str) -> str:
+        """pythonshell runs on glue 1.0 or 3.0, a profile with glue 3.0 or
+        newer runs it on 3.0.
+
+        :param glue_version: the glue version of the execution profile.
+        :return: the glue version of the pythonshell job.
+        """
+        if float(glue_version) >= float(PYTHONSHELL_GLUE_VERSION):
+            return PYTHONSHELL_GLUE_VERSION
+        return "1.0"
+
+    @staticmethod
+    def _get_spark_config(
+        spark_config: Union[str, SparkConfig], job_type: str
+    ) -> Union[SparkConfig, None]:
+        """get the spark config and check that the job runs spark.
+
+        :param spark_config: the name of a preset or a spark config.
+        :param job_type: the name of the type of glue job.
+        :return: the spark config or None if no spark config is given.
+        """
+        spark_config = glue_spark_config.get_spark_config(spark_config)
+        if spark_config is not None and job_type not in ("glueetl", "gluestreaming"):
+            raise ValueError(
+                f"a spark config is only supported for glueetl and gluestreaming jobs, got {job_type}"
+            )
+        return spark_config
+
+    @staticmethod
+    def _get_job_bookmark(job_bookmark: str, job_type: str) -> Union[str, None]:
+        """check the job bookmark and that the job type supports bookmarks.
+
+        :param job_bookmark: enable / pause / disable.
+        :param job_type: the name of the type of glue job.
+        :return: the job bookmark or None if no job bookmark is given.
+        """
+        job_bookmark = glue_job_bookmark.get_job_bookmark(job_bookmark)
+        if job_bookmark is not None and job_type != "glueetl":
+            raise ValueError(
+                f"job bookmarks are only supported for glueetl jobs, got {job_type}"
+            )
+        return job_bookmark
+
+    @staticmethod
+    def _get_capacity_table(
+        capacity_input: str, capacity_table: list, job_type: str
+    ) -> Union[list, None]:
+        """check the capacity table and that the job type supports it.
+
+        :param capacity_input: the input we measure.
+        :param capacity_table: rows of (max size of the input, worker type, number of workers).
+        :param job_type: the name of the type of glue job.
+        :return: the rows of the capacity table or None if no capacity table is given.
+        """
+        if capacity_table is None and capacity_input is None:
+            return None
+        if capacity_table is None or capacity_input is None:
+            raise ValueError(
+                "provide both capacity_input and capacity_table to choose the capacity per run."
+            )
+        if job_type != "glueetl":
+            raise ValueError(
+                f"choosing the capacity per run is only supported for glueetl jobs, got {job_type}"
+            )
+        return glue_capacity.get_capacity_table(capacity_table)
+
+    @staticmethod
+    def _get_python_version(
+        python_version: str, job_type: str, glue_version: str = None
+    ) -> str:
+        """Specify a default python version, when none is given. A ray job and
+        a pythonshell job on glue 3.0 need the minor version.
+
+        :param python_version: the python version of the glue job.
+        :param job_type: the name of the type of glue job.
+        :param glue_version: the glue version of the glue job.
+        :return: the python version of the glue job.
+        """
+        if python_version is None:
+            if job_type == "glueray":
+                return "3.9"
+            if job_type == "pythonshell" and glue_version == PYTHONSHELL_GLUE_VERSION:
+                return "3.9"
+            return "3"
+        return python_version
+
+    @staticmethod
+    def _get_worker_type(worker_type: str, job_type: str) -> str:
+        """Specify a default worker type for a ray job, a ray job only runs on
+        Z.2X workers.
+
+        :param worker_type: the worker type of the glue job.
+        :param job_type: the name of the type of glue job.
+        :return: the worker type of the glue job.
+        """
+        if job_type == "glueray":
+            if worker_type not in (None, "Z.2X"):
+                raise ValueError(
+                    f"a ray job only runs on Z.2X workers, got {worker_type}"
+                )
+            return "Z.2X"
+        return worker_type
+
+    @staticmethod
+    def _get_runtime(runtime: str, job_type: str) -> str:
+        """Specify a default runtime for a ray job. The other job types don't
+        have a runtime.
+
+        :param runtime: the runtime of the glue job.
+        :param job_type: the name of the type of glue job.
+        :return: the runtime of the glue job.
+        """
+        if runtime is None and job_type == "glueray":
+            return "Ray2.4"
+        return runtime
+
     @staticmethod
     def _create_s3_url_for_job(
         context: DataJobContext, glue_job_id: str, glue_job_file_name: str
@@ -216,18 +660,24 @@ class GlueJob(DataJobBase):
         max_capacity: int = None,
         worker_type: str = None,
         number_of_workers: str = None,
+        runtime: str = None,
+        execution_class: str = None,
+        timeout: int = None,
         **kwargs,
-    ) -> None:
+    ) -> glue.CfnJob:
         """Create a glue job with the necessary configuration like, paths to
         wheel and business logic and arguments."""
         logger.debug(f"creating Glue Job {glue_job_name}")
-        if context.s3_url_wheel:
-            extra_py_files = {
-                # path to the wheel of this project
-                "--extra-py-files": context.s3_url_wheel
-            }
-            arguments = {**extra_py_files, **arguments}
-        glue.CfnJob(
+        # the wheel of this project and the wheel with the datajob.runtime helpers.
+        wheels = ",".join(
+            filter(None, [context.s3_url_wheel, context.get_s3_url_runtime()])
+        )
+        # a ray job gets the python modules via --s3-py-modules.
+        wheels_argument = (
+            "--s3-py-modules" if job_type == "glueray" else "--extra-py-files"
+        )
+        arguments = {wheels_argument: wheels, **arguments}
+        return glue.CfnJob(
             self,
             id=glue_job_name,
             name=glue_job_name,
@@ -236,11 +686,14 @@ class GlueJob(DataJobBase):
                 name=job_type,
                 python_version=python_version,
                 script_location=s3_url_glue_job,
+                runtime=runtime,
             ),
             glue_version=glue_version,
             max_capacity=max_capacity,
             default_arguments=arguments,
             worker_type=worker_type,
             number_of_workers=number_of_workers,
+            execution_class=execution_class,
+            timeout=timeout,
             **kwargs,
         )
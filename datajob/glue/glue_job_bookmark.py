@@ -0,0 +1,181 @@
+import json
+from enum import Enum
+from typing import Union
+
+import boto3
+from stepfunctions.steps import Catch
+from stepfunctions.steps import Chain
+from stepfunctions.steps import Choice
+from stepfunctions.steps import ChoiceRule
+from stepfunctions.steps import Pass
+from stepfunctions.steps import Task
+from stepfunctions.steps.states import State
+
+from datajob import logger
+from datajob.datajob_execution_input import DataJobExecutionInput
+
+# the key of the stack output that holds the names of the glue jobs that use bookmarks.
+JOB_BOOKMARKS_OUTPUT = "DatajobJobBookmarkJobs"
+# the key in the state input that holds the bookmark option for the glue job.
+JOB_BOOKMARK_OPTION = "JobBookmarkOption"
+RESET_JOB_BOOKMARK_RESOURCE = "arn:aws:states:::aws-sdk:glue:resetJobBookmark"
+JOB_NOT_FOUND_ERROR = "Glue.EntityNotFoundException"
+
+
+class GlueJobBookmark(Enum):
+    ENABLE = "enable"
+    PAUSE = "pause"
+    DISABLE = "disable"
+
+    @staticmethod
+    def get_values():
+        return [e.value for e in GlueJobBookmark]
+
+
+# reset is not an option of a glue job, we can only request it via the execution input.
+RESET = "reset"
+
+
+class GlueJobBookmarkException(Exception):
+    """any exception occuring when handling the bookmarks of a glue job."""
+
+
+def get_job_bookmark(job_bookmark: Union[str, None]) -> Union[str, None]:
+    """check that the job bookmark is a valid value.
+
+    :param job_bookmark: enable / pause / disable or None.
+    :return: the job bookmark.
+    """
+    if job_bookmark is not None and job_bookmark not in GlueJobBookmark.get_values():
+        raise GlueJobBookmarkException(
+            f"Unknown job bookmark {job_bookmark}, choose one of {GlueJobBookmark.get_values()}"
+        )
+    return job_bookmark
+
+
+def get_job_bookmark_option(job_bookmark: str) -> str:
+    """get the value of the --job-bookmark-option argument of a glue job.
+
+    :param job_bookmark: enable / pause / disable.
+    :return: e.g. job-bookmark-enable
+    """
+    return f"job-bookmark-{job_bookmark}"
+
+
+def make_task_bookmarked(
+    sfn_task: Union[State, Chain], state_id: str, job_name: str, job_bookmark: str
+) -> Chain:
+    """Put a choice in front of a glue task that reads the bookmark option of
+    the task from the execution input. When the execution input has no option
+    for the task we use the job_bookmark of the glue job. The glue task reads
+    the option via $.JobBookmarkOption.
+
+    example of the execution input to reset the bookmark of task1 and pause the bookmark of task2:
+
+        {"DatajobJobBookmarks": {"task1": "reset", "task2": "pause"}}
+
+    reset removes the bookmark before the glue job runs, so that the glue job processes all the data again.
+
+    :param sfn_task: the stepfunctions task of a glue job, or the chain of states that sizes it.
+    :param state_id: the state_id of the task.
+    :param job_name: the name of the glue job.
+    :param job_bookmark: the default bookmark option, enable / pause / disable.
+    :return: a chain of the choice, the states that set the bookmark option and the glue task.
+    """
+    job_bookmark_path = DataJobExecutionInput.get_job_bookmark_path(state_id)
+    logger.debug(f"reading the bookmark option of {state_id} from {job_bookmark_path}")
+    bookmark_choice = Choice(state_id=f"{state_id}-bookmark")
+    set_options = {}
+    for option in GlueJobBookmark.get_values():
+        set_options[option] = Pass(
+            state_id=f"{state_id}-bookmark-{option}",
+            result=get_job_bookmark_option(option),
+            result_path=f"$.{JOB_BOOKMARK_OPTION}",
+        )
+        set_options[option].next(
+            sfn_task.steps[0] if isinstance(sfn_task, Chain) else sfn_task
+        )
+        bookmark_choice.add_choice(
+            rule=_get_option_rule(job_bookmark_path, option),
+            next_step=set_options[option],
+        )
+    reset_job_bookmark = Task(
+        state_id=f"{state_id}-bookmark-reset",
+        resource=RESET_JOB_BOOKMARK_RESOURCE,
+        parameters={"JobName": job_name},
+        result_path=None,
+    )
+    # a glue job that never ran has no bookmark to reset.
+    reset_job_bookmark.add_catch(
+        Catch(
+            error_equals=[JOB_NOT_FOUND_ERROR],
+            next_step=set_options[GlueJobBookmark.ENABLE.value],
+        )
+    )
+    reset_job_bookmark.next(set_options[GlueJobBookmark.ENABLE.value])
+    bookmark_choice.add_choice(
+        rule=_get_option_rule(job_bookmark_path, RESET),
+        next_step=reset_job_bookmark,
+    )
+    # chaining the choice makes the option of the glue job the default choice.
+    return Chain([bookmark_choice, set_options[job_bookmark], sfn_task])
+
+
+def _get_option_rule(job_bookmark_path: str, option: str) -> ChoiceRule:
+    return ChoiceRule.And(
+        [
+            ChoiceRule.IsPresent(variable=job_bookmark_path, value=True),
+            ChoiceRule.StringEquals(variable=job_bookmark_path, value=option),
+        ]
+    )
+
+
+def update_job_bookmarks_output(datajob_stack, job_name: str) -> None:
+    """Add the name of a glue job that uses bookmarks to the outputs of the
+    stack, so that we can find the glue jobs when we reset the bookmarks of a
+    stage.
+
+    :param datajob_stack: DataJob Stack instance
+    :param job_name: the name of the glue job.
+    :return: None
+    """
+    job_names = json.loads(datajob_stack.outputs.get(JOB_BOOKMARKS_OUTPUT, "[]"))
+    datajob_stack.update_datajob_stack_outputs(
+        key=JOB_BOOKMARKS_OUTPUT, value=json.dumps(job_names + [job_name])
+    )
+
+
+def _describe_stacks(stack_name: str) -> dict:
+    return boto3.client("cloudformation").describe_stacks(StackName=stack_name)
+
+
+def get_job_names_with_bookmarks(stack_name: str) -> list:
+    """Look in the outputs of the stack for the glue jobs that use bookmarks.
+
+    :param stack_name: the name of the cloudformation stack.
+    :return: the names of the glue jobs.
+    """
+    stack = _describe_stacks(stack_name=stack_name)
+    for output in stack.get("Stacks")[0].get("Outputs") or []:
+        if output.get("OutputKey") == JOB_BOOKMARKS_OUTPUT:
+            return json.loads(output.get("OutputValue"))
+    return []
+
+
+def reset_job_bookmarks(job_names: list) -> list:
+    """Reset the bookmarks of the glue jobs. A glue job that never ran has no
+    bookmark, we skip it.
+
+    :param job_names: the names of the glue jobs.
+    :return: the names of the glue jobs we have reset.
+    """
+    client = boto3.client("glue")
+    reset_job_names = []
+    for job_name in job_names:
+        try:
+            client.reset_job_bookmark(JobName=job_name)
+        except client.exceptions.EntityNotFoundException:
+            logger.debug(f"glue job {job_name} has no bookmark to reset.")
+            continue
+        reset_job_names.append(job_name)
+    return reset_job_names
@@ -0,0 +1,191 @@
+import re
+from typing import Union
+
+# the prefix in the data bucket where glue writes the shuffle files when we shuffle to s3.
+SHUFFLE_PREFIX = "glue-shuffle"
+
+
+class SparkConfigException(Exception):
+    """any exception occuring when validating a spark config."""
+
+
+class SparkConfig(object):
+    """Typed spark tuning for a glueetl job.
+
+    Glue accepts only one --conf argument, we merge all the spark settings into
+    that argument as "key=value --conf key=value ...".
+
+    example:
+
+        spark_config = SparkConfig(shuffle_partitions=400, adaptive_query_execution=True, broadcast_threshold="50MB")
+    """
+
+    def __init__(
+        self,
+        shuffle_partitions: int = None,
+        adaptive_query_execution: bool = None,
+        broadcast_threshold: Union[int, str] = None,
+        s3_committer: bool = None,
+        executor_memory_overhead: str = None,
+        s3_shuffle: bool = False,
+        extra_conf: dict = None,
+    ):
+        """
+        :param shuffle_partitions: the number of partitions after a shuffle, spark.sql.shuffle.partitions.
+        :param adaptive_query_execution: let spark optimize the plan at run time, spark.sql.adaptive.enabled.
+        :param broadcast_threshold: the max size of a table we broadcast in a join, in bytes or e.g. "50MB".
+        -1 disables broadcast joins.
+        :param s3_committer: use the s3 optimized committer to write parquet, it avoids renames on s3.
+        :param executor_memory_overhead: the memory of an executor outside of the jvm heap, e.g. "1g".
+        :param s3_shuffle: write the shuffle files to s3 with the glue shuffle manager instead of the local disk.
+        this helps skewed jobs that run out of disk.
+        :param extra_conf: any other spark setting as key and value, the key starts with spark.
+        """
+        self.shuffle_partitions = shuffle_partitions
+        self.adaptive_query_execution = adaptive_query_execution
+        self.broadcast_threshold = broadcast_threshold
+        self.s3_committer = s3_committer
+        self.executor_memory_overhead = executor_memory_overhead
+        self.s3_shuffle = s3_shuffle
+        self.extra_conf = extra_conf or {}
+        self.validate()
+
+    def validate(self) -> None:
+        """raise an error for a setting that spark would reject at run time."""
+        if self.shuffle_partitions is not None and (
+            not isinstance(self.shuffle_partitions, int) or self.shuffle_partitions < 1
+        ):
+            raise SparkConfigException(
+                f"shuffle_partitions should be a positive integer, got {self.shuffle_partitions}"
+            )
+        if self.broadcast_threshold is not None:
+            if isinstance(self.broadcast_threshold, int):
+                if self.broadcast_threshold < -1:
+                    raise SparkConfigException(
+                        f"broadcast_threshold should be -1 or more bytes, got {self.broadcast_threshold}"
+                    )
+            elif not re.fullmatch(
+                r"\d+(b|k|kb|m|mb|g|gb)", str(self.broadcast_threshold).lower()
+            ):
+                raise SparkConfigException(
+                    f"broadcast_threshold should be a number of bytes or a size like 50MB, got {self.broadcast_threshold}"
+                )
+        if self.executor_memory_overhead is not None and not re.fullmatch(
+            r"\d+(k|m|g|t)?", str(self.executor_memory_overhead).lower()
+        ):
+            raise SparkConfigException(
+                f"executor_memory_overhead should be a size like 1g or 512m, got {self.executor_memory_overhead}"
+            )
+        for key in self.extra_conf:
+            if not key.startswith("spark."):
+                raise SparkConfigException(
+                    f"the keys of extra_conf should start with spark., got {key}"
+                )
+
+    def get_conf(self, shuffle_location: str = None) -> dict:
+        """get the spark settings as key and value.
+
+        :param shuffle_location: the s3 url where glue writes the shuffle files, when s3_shuffle is enabled.
+        :return: the spark settings.
+        """
+        conf = {}
+        if self.shuffle_partitions is not None:
+            conf["spark.sql.shuffle.partitions"] = str(self.shuffle_partitions)
+        if self.adaptive_query_execution is not None:
+            conf["spark.sql.adaptive.enabled"] = str(
+                self.adaptive_query_execution
+            ).lower()
+        if self.broadcast_threshold is not None:
+            conf["spark.sql.autoBroadcastJoinThreshold"] = str(self.broadcast_threshold)
+        if self.executor_memory_overhead is not None:
+            conf["spark.executor.memoryOverhead"] = str(self.executor_memory_overhead)
+        if self.s3_shuffle:
+            if shuffle_location is None:
+                raise SparkConfigException(
+                    "we need an s3 location to write the shuffle files to."
+                )
+            conf["spark.shuffle.glue.s3ShuffleBucket"] = shuffle_location
+        return {**conf, **self.extra_conf}
+
+    def get_arguments(self, shuffle_location: str = None) -> dict:
+        """get the default arguments of the glue job, with all the spark
+        settings in one --conf argument.
+
+        :param shuffle_location: the s3 url where glue writes the shuffle files, when s3_shuffle is enabled.
+        :return: the arguments of the glue job.
+        """
+        arguments = {}
+        if self.s3_committer is not None:
+            arguments["--enable-s3-parquet-optimized-committer"] = str(
+                self.s3_committer
+            ).lower()
+        if self.s3_shuffle:
+            arguments["--write-shuffle-files-to-s3"] = "true"
+            arguments["--write-shuffle-spills-to-s3"] = "true"
+        conf = self.get_conf(shuffle_location=shuffle_location)
+        if conf:
+            arguments["--conf"] = " --conf ".join(
+                f"{key}={value}" for key, value in conf.items()
+            )
+        return arguments
+
+
+# vetted spark configs you can refer to by name.
+SPARK_CONFIG_PRESETS = {
+    "large-join": SparkConfig(
+        shuffle_partitions=1000,
+        adaptive_query_execution=True,
+        broadcast_threshold="100MB",
+        executor_memory_overhead="2g",
+        s3_committer=True,
+    ),
+    "skewed-aggregation": SparkConfig(
+        adaptive_query_execution=True,
+        s3_shuffle=True,
+        s3_committer=True,
+        extra_conf={
+            "spark.sql.adaptive.skewJoin.enabled": "true",
+            "spark.sql.adaptive.coalescePartitions.enabled": "true",
+        },
+    ),
+    "small-files": SparkConfig(
+        adaptive_query_execution=True,
+        s3_committer=True,
+        extra_conf={
+            "spark.sql.adaptive.coalescePartitions.enabled": "true",
+            "spark.sql.files.maxPartitionBytes": "256MB",
+            "spark.sql.files.openCostInBytes": "8MB",
+        },
+    ),
+}
+
+
+def get_spark_config(
+    spark_config: Union[str, SparkConfig, None]
+) -> Union[SparkConfig, None]:
+    """get a spark config by the name of a preset or return the spark config as
+    it is."""
+    if spark_config is None or isinstance(spark_config, SparkConfig):
+        return spark_config
+    if spark_config not in SPARK_CONFIG_PRESETS:
+        raise SparkConfigException(
+            f"Unknown spark config {spark_config}, choose one of {list(SPARK_CONFIG_PRESETS)}"
+        )
+    return SPARK_CONFIG_PRESETS[spark_config]
+
+
+def merge_arguments(arguments: dict, spark_arguments: dict) -> dict:
+    """merge the arguments of the spark config with the arguments of the glue
+    job. The arguments of the glue job win, except for --conf where we keep
+    both because glue only accepts one --conf argument.
+
+    :param arguments: the arguments of the glue job.
+    :param spark_arguments: the arguments of the spark config.
+    :return: the merged arguments.
+    """
+    merged_arguments = {**spark_arguments, **arguments}
+    if "--conf" in spark_arguments and "--conf" in arguments:
+        merged_arguments[
+            "--conf"
+        ] = f"{spark_arguments['--conf']} --conf {arguments['--conf']}"
+    return merged_arguments
@@ -0,0 +1,64 @@
+import base64
+import hashlib
+import zipfile
+from pathlib import Path
+
+from datajob import logger
+from datajob import ROOT_DIR
+
+RUNTIME_NAME = "datajob_runtime"
+RUNTIME_VERSION = "1.0"
+RUNTIME_WHEEL = f"{RUNTIME_NAME}-{RUNTIME_VERSION}-py3-none-any.whl"
+# a fixed timestamp keeps the wheel, and so the cdk asset, the same for the same code.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def _get_runtime_files() -> dict:
+    """the files of the datajob.runtime package as path in the wheel and
+    content.
+
+    We add an empty datajob/__init__.py, the runtime does not depend on
+    the rest of datajob.
+    """
+    files = {"datajob/__init__.py": b""}
+    for path in sorted(Path(ROOT_DIR, "runtime").glob("*.py")):
+        files[f"datajob/runtime/{path.name}"] = path.read_bytes()
+    return files
+
+
+def _get_record_line(path: str, content: bytes) -> str:
+    digest = base64.urlsafe_b64encode(hashlib.sha256(content).digest()).rstrip(b"=")
+    return f"{path},sha256={digest.decode()},{len(content)}"
+
+
+def create_runtime_wheel(target_dir: str) -> Path:
+    """Create a wheel with the datajob.runtime package, so that the scripts of
+    our jobs can import it. Glue accepts a wheel in --extra-py-files for both
+    pythonshell and spark jobs.
+
+    :param target_dir: the folder where we create the wheel.
+    :return: the path to the wheel.
+    """
+    files = _get_runtime_files()
+    dist_info = f"{RUNTIME_NAME}-{RUNTIME_VERSION}.dist-info"
+    files[f"{dist_info}/METADATA"] = (
+        f"Metadata-Version: 2.1\nName: {RUNTIME_NAME}\nVersion: {RUNTIME_VERSION}\n"
+    ).encode()
+    files[f"{dist_info}/WHEEL"] = (
+        "Wheel-Version: 1.0\nGenerator: datajob\nRoot-Is-Purelib: true\nTag: py3-none-any\n"
+    ).encode()
+    record = [_get_record_line(path, content) for path, content in files.items()]
+    files[f"{dist_info}/RECORD"] = "\n".join(
+        record + [f"{dist_info}/RECORD,,"]
+    ).encode()
+    wheel_path = Path(target_dir, RUNTIME_WHEEL)
+    logger.debug(f"creating the runtime wheel {wheel_path}")
+    with zipfile.ZipFile(wheel_path, "w", compression=zipfile.ZIP_DEFLATED) as wheel:
+        for path, content in files.items():
+            # a ZipInfo does not take the compression of the zip file, we pass it.
+            wheel.writestr(
+                zipfile.ZipInfo(path, date_time=ZIP_DATE_TIME),
+                content,
+                compress_type=zipfile.ZIP_DEFLATED,
+            )
+    return wheel_path
@@ -0,0 +1,195 @@
+"""Partitioned datasets to hand data from one task to the next.
+
+We write hive-partitioned parquet or arrow files under the prefix of the run in
+the data bucket, or another prefix, and the schema in _schema.json next to the data. A downstream task only
+reads the columns and the partitions it asks for.
+
+We need pyarrow 10.0 or later, glue 4.0 provides it. Glue 3.0 ships an older
+pyarrow, add --additional-python-modules pyarrow==10.0.1 to its arguments. We
+import pyarrow when we need it.
+
+example:
+
+    from datajob.runtime.dataset import Dataset
+
+    Dataset("events", partition_cols=["date"]).write(events)
+    # in a downstream task
+    table = Dataset("events").read(
+        columns=["user_id", "amount"], filters=[("date", ">=", "2024-01-01")]
+    )
+"""
+import base64
+import json
+from enum import Enum
+from typing import Union
+
+from datajob.runtime.s3 import get_data_bucket
+from datajob.runtime.s3 import get_run_prefix
+
+SCHEMA_FILE = "_schema.json"
+# write_dataset needs 6.0 for existing_data_behavior, filters_to_expression needs 10.0.
+MIN_PYARROW_VERSION = (10, 0)
+
+
+class DatasetFormat(Enum):
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+    @staticmethod
+    def get_values():
+        return [e.value for e in DatasetFormat]
+
+
+class DatasetException(Exception):
+    """any exception occuring when writing or reading a dataset."""
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.fs
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise DatasetException(
+            "we need pyarrow to write and read datasets, install it with 'pip install pyarrow'."
+        ) from e
+    version = tuple(int(part) for part in pyarrow.__version__.split(".")[:2])
+    if version < MIN_PYARROW_VERSION:
+        raise DatasetException(
+            f"we need pyarrow {'.'.join(map(str, MIN_PYARROW_VERSION))} or later to write and read datasets, "
+            f"got {pyarrow.__version__}. Use glue 4.0 or install a newer pyarrow."
+        )
+    return pyarrow
+
+
+def get_dataset_location(name: str, prefix: str = None, bucket: str = None) -> str:
+    """get the s3 url of a dataset in the data bucket.
+
+    :param name: the name of the dataset.
+    :param prefix: the prefix in the bucket under which we keep the dataset, the prefix of the run is the default.
+    :param bucket: the name of the bucket, the data bucket of the stack is the default.
+    :return: s3://<bucket>/<prefix>/<name>
+    """
+    prefix = get_run_prefix() if prefix is None else prefix
+    parts = [bucket or get_data_bucket(), prefix.strip("/"), name.strip("/")]
+    return "s3://" + "/".join(part for part in parts if part)
+
+
+class Dataset(object):
+    """a hive-partitioned dataset with its schema."""
+
+    def __init__(
+        self,
+        name: str,
+        partition_cols: list = None,
+        format: str = DatasetFormat.PARQUET.value,
+        prefix: str = None,
+        bucket: str = None,
+        location: str = None,
+    ):
+        """
+        :param name: the name of the dataset.
+        :param partition_cols: the columns we partition on when writing, e.g. ["date"].
+        :param format: parquet or arrow, the format of the files when writing.
+        :param prefix: the prefix in the bucket under which we keep the dataset, the prefix of the run is the default.
+        :param bucket: the name of the bucket, the data bucket of the stack is the default.
+        :param location: the url or absolute path of the dataset, overrides the name, prefix and bucket.
+        """
+        if format not in DatasetFormat.get_values():
+            raise DatasetException(
+                f"format should be one of {DatasetFormat.get_values()}, got {format}"
+            )
+        self.name = name
+        self.partition_cols = partition_cols or []
+        self.format = format
+        self.location = location or get_dataset_location(
+            name=name, prefix=prefix, bucket=bucket
+        )
+
+    def _get_filesystem(self) -> tuple:
+        pyarrow = _import_pyarrow()
+        return pyarrow.fs.FileSystem.from_uri(self.location)
+
+    def write(self, data) -> None:
+        """write the data, we replace the partitions that already exist.
+
+        :param data: a pyarrow Table, a pyarrow RecordBatch or a pandas DataFrame.
+        """
+        pyarrow = _import_pyarrow()
+        if not isinstance(data, (pyarrow.Table, pyarrow.RecordBatch)):
+            data = pyarrow.Table.from_pandas(data, preserve_index=False)
+        filesystem, path = self._get_filesystem()
+        pyarrow.dataset.write_dataset(
+            data,
+            base_dir=path,
+            filesystem=filesystem,
+            format=self.format,
+            partitioning=self.partition_cols or None,
+            partitioning_flavor="hive" if self.partition_cols else None,
+            basename_template=f"part-{{i}}.{self.format}",
+            existing_data_behavior="delete_matching",
+        )
+        schema_info = {
+            "format": self.format,
+            "partition_cols": self.partition_cols,
+            "columns": {field.name: str(field.type) for field in data.schema},
+            "arrow_schema": base64.b64encode(
+                data.schema.serialize().to_pybytes()
+            ).decode(),
+        }
+        with filesystem.open_output_stream(f"{path}/{SCHEMA_FILE}") as f:
+            f.write(json.dumps(schema_info, indent=2).encode())
+
+    def read_schema_info(self) -> dict:
+        """read the format, the partition columns and the schema we recorded
+        next to the data."""
+        filesystem, path = self._get_filesystem()
+        try:
+            with filesystem.open_input_stream(f"{path}/{SCHEMA_FILE}") as f:
+                return json.loads(f.read())
+        except FileNotFoundError as e:
+            raise DatasetException(
+                f"we did not find {SCHEMA_FILE} in {self.location}, is the dataset written?"
+            ) from e
+
+    def get_schema(self):
+        """get the pyarrow schema of the dataset, including the partition
+        columns."""
+        pyarrow = _import_pyarrow()
+        schema_info = self.read_schema_info()
+        return pyarrow.ipc.read_schema(
+            pyarrow.py_buffer(base64.b64decode(schema_info["arrow_schema"]))
+        )
+
+    def read(self, columns: list = None, filters: Union[list, object] = None):
+        """Read the dataset. We only read the files of the partitions that
+        match the filters and only the columns we ask for.
+
+        :param columns: the columns we read, all columns is the default.
+        :param filters: a pyarrow expression or a list of (column, operator, value) tuples, e.g. [("date", "=", "2024-01-01")].
+        :return: a pyarrow Table, use .to_pandas() to get a DataFrame.
+        """
+        pyarrow = _import_pyarrow()
+        schema_info = self.read_schema_info()
+        schema = self.get_schema()
+        filesystem, path = self._get_filesystem()
+        partitioning = None
+        if schema_info["partition_cols"]:
+            partitioning = pyarrow.dataset.partitioning(
+                pyarrow.schema(
+                    [schema.field(column) for column in schema_info["partition_cols"]]
+                ),
+                flavor="hive",
+            )
+        dataset = pyarrow.dataset.dataset(
+            path,
+            schema=schema,
+            format=schema_info["format"],
+            filesystem=filesystem,
+            partitioning=partitioning,
+        )
+        if isinstance(filters, list):
+            filters = pyarrow.parquet.filters_to_expression(filters)
+        return dataset.to_table(columns=columns, filter=filters)
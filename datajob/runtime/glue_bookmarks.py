@@ -0,0 +1,125 @@
+"""Helpers to use job bookmarks inside the script of a glueetl job.
+
+The awsglue and pyspark libraries only exist on a glue worker, we import them
+when we need them.
+
+example:
+
+    from datajob.runtime.glue_bookmarks import BookmarkedJob
+
+    with BookmarkedJob() as job:
+        events = job.read_from_s3("s3://some-bucket/events/", format="parquet")
+        job.write_to_s3(events, "s3://some-bucket/events-cleaned/", format="parquet")
+"""
+import re
+import sys
+
+
+def get_transformation_ctx(name: str) -> str:
+    """Get a stable transformation context for a source or a sink. Glue keeps
+    the state of a bookmark per transformation context, the context should not
+    change between runs.
+
+    :param name: a name for the source or sink, e.g. the s3 url.
+    :return: the name with only letters, digits and underscores.
+    """
+    return re.sub(r"[^0-9a-zA-Z_]+", "_", name).strip("_")
+
+
+class BookmarkedJob(object):
+    """Initialize a glue job so that glue keeps its bookmark and commit the
+    bookmark when the job succeeds."""
+
+    def __init__(self, argv: list = None):
+        """
+        :param argv: the arguments of the glue job, sys.argv is the default.
+        """
+        self.argv = sys.argv if argv is None else argv
+        self.glue_context = None
+        self.job = None
+        self.args = None
+
+    def __enter__(self):
+        from awsglue.context import GlueContext
+        from awsglue.job import Job
+        from awsglue.utils import getResolvedOptions
+        from pyspark.context import SparkContext
+
+        self.args = getResolvedOptions(self.argv, ["JOB_NAME"])
+        self.glue_context = GlueContext(SparkContext.getOrCreate())
+        self.job = Job(self.glue_context)
+        self.job.init(self.args["JOB_NAME"], self.args)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """commit the bookmark only when the job succeeds, so that a failed run
+        processes the same data again."""
+        if exc_type is None and exc_value is None and traceback is None:
+            self.job.commit()
+
+    def read_from_s3(
+        self,
+        path: str,
+        format: str = "parquet",
+        transformation_ctx: str = None,
+        **format_options,
+    ):
+        """Read the objects under an s3 prefix that are new since the previous
+        run.
+
+        :param path: the s3 url of the prefix.
+        :param format: parquet / json / csv / ...
+        :param transformation_ctx: the name of the bookmark state, the default is derived from the path.
+        :param format_options: any extra format options of glue.
+        :return: a DynamicFrame.
+        """
+        return self.glue_context.create_dynamic_frame.from_options(
+            connection_type="s3",
+            connection_options={"paths": [path], "recurse": True},
+            format=format,
+            format_options=format_options,
+            transformation_ctx=transformation_ctx or get_transformation_ctx(path),
+        )
+
+    def read_from_catalog(
+        self, database: str, table_name: str, transformation_ctx: str = None
+    ):
+        """Read the partitions of a table of the glue data catalog that are new
+        since the previous run.
+
+        :param database: the name of the database.
+        :param table_name: the name of the table.
+        :param transformation_ctx: the name of the bookmark state, the default is derived from the table.
+        :return: a DynamicFrame.
+        """
+        return self.glue_context.create_dynamic_frame.from_catalog(
+            database=database,
+            table_name=table_name,
+            transformation_ctx=transformation_ctx
+            or get_transformation_ctx(f"{database}.{table_name}"),
+        )
+
+    def write_to_s3(
+        self,
+        frame,
+        path: str,
+        format: str = "parquet",
+        partition_keys: list = None,
+        transformation_ctx: str = None,
+    ):
+        """Append a DynamicFrame to an s3 prefix.
+
+        :param frame: the DynamicFrame we want to write.
+        :param path: the s3 url of the prefix.
+        :param format: parquet / json / csv / ...
+        :param partition_keys: the columns we partition the data by.
+        :param transformation_ctx: the name of the sink, the default is derived from the path.
+        :return: the DynamicFrame that glue returns.
+        """
+        return self.glue_context.write_dynamic_frame.from_options(
+            frame=frame,
+            connection_type="s3",
+            connection_options={"path": path, "partitionKeys": partition_keys or []},
+            format=format,
+            transformation_ctx=transformation_ctx or get_transformation_ctx(path),
+        )
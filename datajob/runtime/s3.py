@@ -0,0 +1,261 @@
+"""S3 helpers for the scripts of our jobs.
+
+Datajob passes the data bucket of the stack to every glue job via the
+--datajob_data_bucket argument, we read it from sys.argv. A workflow also
+passes the prefix of its run, so that the tasks of a run share their
+intermediate results under <stage>/<workflow>/<run id>/.
+
+example:
+
+    from datajob.runtime.s3 import S3
+    from datajob.runtime.s3 import get_run_prefix
+
+    s3 = S3()
+    s3.upload_file("/tmp/result.parquet", "results/result.parquet")
+    for key in s3.list("raw/events/"):
+        ...
+    s3.write(f"{get_run_prefix()}/counts.json", b"{}")
+"""
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterator
+from typing import Union
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+DATA_BUCKET_ARGUMENT = "--datajob_data_bucket"
+DATA_BUCKET_ENVIRONMENT_VARIABLE = "DATAJOB_DATA_BUCKET"
+# a workflow passes these arguments to its glue jobs, see DataJobExecutionInput.
+RUN_PREFIX_ROOT_ARGUMENT = "--datajob_run_prefix_root"
+RUN_ID_ARGUMENT = "--datajob_run_id"
+EXECUTION_INPUT_ARGUMENT = "--datajob_execution_input"
+RUN_ID_INPUT = "DatajobRunId"
+# datajob backfill passes the partition date of each execution via the execution input.
+PARTITION_DATE_INPUT = "DatajobPartitionDate"
+RUN_PREFIX_ENVIRONMENT_VARIABLE = "DATAJOB_RUN_PREFIX"
+# a glue job gets the location of an output it declared via --datajob_output_<name>.
+OUTPUT_ARGUMENT_PREFIX = "--datajob_output_"
+MAX_WORKERS = 16
+MB = 1024**2
+# s3 deletes at most 1000 keys per request.
+DELETE_BATCH_SIZE = 1000
+
+
+class S3Exception(Exception):
+    """any exception occuring when accessing s3 from a job."""
+
+
+def _get_argument(name: str, argv: list = None) -> Union[str, None]:
+    """get the value of an argument of the job, sys.argv is the default."""
+    argv = sys.argv if argv is None else argv
+    for i, argument in enumerate(argv):
+        if argument == name and i + 1 < len(argv):
+            return argv[i + 1]
+        if argument.startswith(f"{name}="):
+            return argument.split("=", 1)[1]
+    return None
+
+
+def get_data_bucket(argv: list = None) -> str:
+    """get the name of the data bucket of the stack from the arguments of the
+    job or from the DATAJOB_DATA_BUCKET environment variable.
+
+    :param argv: the arguments of the job, sys.argv is the default.
+    :return: the name of the data bucket.
+    """
+    data_bucket = _get_argument(DATA_BUCKET_ARGUMENT, argv=argv)
+    if data_bucket is not None:
+        return data_bucket
+    if DATA_BUCKET_ENVIRONMENT_VARIABLE in os.environ:
+        return os.environ[DATA_BUCKET_ENVIRONMENT_VARIABLE]
+    raise S3Exception(
+        f"we did not find the data bucket in {DATA_BUCKET_ARGUMENT} or {DATA_BUCKET_ENVIRONMENT_VARIABLE}."
+    )
+
+
+def get_run_prefix(argv: list = None) -> str:
+    """Get the prefix of this run of the workflow in the data bucket.
+
+    The prefix is <stage>/<workflow>/<run id>. The run id is the name of the
+    execution, unless the execution input has a DatajobRunId, e.g. when we
+    resume a failed execution and want to read what it wrote.
+
+    :param argv: the arguments of the job, sys.argv is the default.
+    :return: the run prefix, without a trailing slash.
+    """
+    run_prefix_root = _get_argument(RUN_PREFIX_ROOT_ARGUMENT, argv=argv)
+    run_id = _get_argument(RUN_ID_ARGUMENT, argv=argv)
+    if run_prefix_root is None or run_id is None:
+        if RUN_PREFIX_ENVIRONMENT_VARIABLE in os.environ:
+            return os.environ[RUN_PREFIX_ENVIRONMENT_VARIABLE].strip("/")
+        raise S3Exception(
+            f"we did not find the run prefix in {RUN_PREFIX_ROOT_ARGUMENT} and {RUN_ID_ARGUMENT} "
+            f"or {RUN_PREFIX_ENVIRONMENT_VARIABLE}, is the job orchestrated by a workflow?"
+        )
+    execution_input = json.loads(
+        _get_argument(EXECUTION_INPUT_ARGUMENT, argv=argv) or "{}"
+    )
+    run_id = execution_input.get(RUN_ID_INPUT) or run_id
+    return f"{run_prefix_root}/{run_id}"
+
+
+def get_partition_date(argv: list = None) -> Union[str, None]:
+    """get the partition date of this run, when datajob backfill started the
+    execution.
+
+    :param argv: the arguments of the job, sys.argv is the default.
+    :return: the partition date as an iso formatted string, e.g. 2026-01-01, or None.
+    """
+    execution_input = json.loads(
+        _get_argument(EXECUTION_INPUT_ARGUMENT, argv=argv) or "{}"
+    )
+    return execution_input.get(PARTITION_DATE_INPUT)
+
+
+def get_output_location(name: str, argv: list = None) -> str:
+    """get the s3 url of the folder where the job writes an output it declared
+    with add_output, the tasks after it get the same url.
+
+    :param name: the name of the output.
+    :param argv: the arguments of the job, sys.argv is the default.
+    :return: s3://<data bucket>/<run prefix>/<task name>/<name>/
+    """
+    location = _get_argument(f"{OUTPUT_ARGUMENT_PREFIX}{name}", argv=argv)
+    if location is None:
+        raise S3Exception(
+            f"we did not find {OUTPUT_ARGUMENT_PREFIX}{name}, did you declare output {name} on the task?"
+        )
+    return location
+
+
+@lru_cache(maxsize=None)
+def get_client(max_pool_connections: int = MAX_WORKERS):
+    """get one s3 client per process, with a connection pool large enough for
+    our threads.
+
+    A boto3 client is thread safe, a session is not.
+    """
+    return boto3.client(
+        "s3",
+        config=Config(
+            max_pool_connections=max_pool_connections,
+            retries={"max_attempts": 10, "mode": "adaptive"},
+        ),
+    )
+
+
+class S3(object):
+    """parallel reads and writes on a bucket with a pooled client."""
+
+    def __init__(
+        self,
+        bucket: str = None,
+        max_workers: int = MAX_WORKERS,
+        multipart_chunksize: int = 16 * MB,
+        client=None,
+    ):
+        """
+        :param bucket: the name of the bucket, the data bucket of the stack is the default.
+        :param max_workers: the number of threads, also for the parts of one multipart upload or download.
+        :param multipart_chunksize: the size of a part of a multipart upload or download.
+        :param client: a boto3 s3 client, a pooled client is the default.
+        """
+        self.bucket = bucket or get_data_bucket()
+        self.max_workers = max_workers
+        self.client = client or get_client(max_pool_connections=max_workers)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_chunksize,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_workers,
+        )
+
+    def upload_file(self, path: str, key: str) -> None:
+        """upload a file, in parallel parts when it's large."""
+        self.client.upload_file(path, self.bucket, key, Config=self.transfer_config)
+
+    def download_file(self, key: str, path: str) -> None:
+        """download an object, in parallel parts when it's large."""
+        self.client.download_file(self.bucket, key, path, Config=self.transfer_config)
+
+    def upload_files(self, paths_and_keys: dict) -> None:
+        """upload many files at the same time.
+
+        :param paths_and_keys: the path of a local file as key and the s3 key as value.
+        """
+        self._map(lambda item: self.upload_file(*item), paths_and_keys.items())
+
+    def download_files(self, keys_and_paths: dict) -> None:
+        """download many objects at the same time.
+
+        :param keys_and_paths: the s3 key as key and the path of a local file as value.
+        """
+        self._map(lambda item: self.download_file(*item), keys_and_paths.items())
+
+    def read(self, key: str, start: int = None, end: int = None) -> bytes:
+        """read an object, or the bytes from start up to and including end.
+
+        :param key: the s3 key.
+        :param start: the first byte we read.
+        :param end: the last byte we read, the end of the object is the default.
+        :return: the content.
+        """
+        kwargs = {}
+        if start is not None or end is not None:
+            kwargs["Range"] = f"bytes={start or 0}-{'' if end is None else end}"
+        return self.client.get_object(Bucket=self.bucket, Key=key, **kwargs)[
+            "Body"
+        ].read()
+
+    def read_many(self, keys: list) -> dict:
+        """read many objects at the same time.
+
+        :param keys: the s3 keys.
+        :return: the s3 key as key and the content as value.
+        """
+        return dict(zip(keys, self._map(self.read, keys)))
+
+    def stream(self, key: str, chunk_size: int = MB) -> Iterator[bytes]:
+        """read an object chunk by chunk, without keeping it in memory."""
+        body = self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        for chunk in body.iter_chunks(chunk_size=chunk_size):
+            yield chunk
+
+    def write(self, key: str, content: bytes) -> None:
+        """write the content to an object."""
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=content)
+
+    def list(self, prefix: str = "") -> Iterator[str]:
+        """list the keys under a prefix, page by page."""
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for content in page.get("Contents", []):
+                yield content["Key"]
+
+    def delete(self, keys: list) -> None:
+        """delete the keys in batches of 1000, the batches at the same time."""
+        batches = [
+            keys[i : i + DELETE_BATCH_SIZE]
+            for i in range(0, len(keys), DELETE_BATCH_SIZE)
+        ]
+        self._map(self._delete_batch, batches)
+
+    def delete_prefix(self, prefix: str) -> None:
+        """delete all the keys under a prefix."""
+        self.delete(list(self.list(prefix)))
+
+    def _delete_batch(self, keys: list) -> None:
+        response = self.client.delete_objects(
+            Bucket=self.bucket,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+        if response.get("Errors"):
+            raise S3Exception(f"we could not delete {response['Errors']}")
+
+    def _map(self, function, items) -> list:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(function, items))
@@ -10,6 +10,7 @@ from stepfunctions.steps import TrainingStep as SagemakerTrainingStep
 from stepfunctions.steps import TransformStep as SagemakerTransformStep
 from stepfunctions.steps import TuningStep as SagemakerTuningStep
 
+from datajob.cache import task_cache
 from datajob.datajob_stack import DataJobStack
 from datajob.sagemaker import DataJobSagemakerBase
 from datajob.stepfunctions import stepfunctions_workflow
@@ -83,6 +84,8 @@ class ProcessingStep(DataJobSagemakerBase):
         kms_key_id=None,
         wait_for_completion=True,
         tags=None,
+        cache=False,
+        cache_inputs=None,
         **kwargs,
     ):
         DataJobSagemakerBase.__init__(
@@ -106,6 +109,8 @@ class ProcessingStep(DataJobSagemakerBase):
         self.kms_key_id = kms_key_id
         self.wait_for_completion = wait_for_completion
         self.tags = tags
+        self.cache = cache
+        self.cache_inputs = cache_inputs or []
 
         self.sfn_task = SagemakerProcessingStep(
             state_id=self.state_id,
@@ -122,6 +127,20 @@ class ProcessingStep(DataJobSagemakerBase):
             **kwargs,
         )
 
+    def get_cache_static_key(self) -> str:
+        """hash the configuration of the processing job, the job name is left
+        out because it is unique for every execution."""
+        parameters = {
+            key: value
+            for key, value in self.sfn_task.parameters.items()
+            if key != "ProcessingJobName"
+        }
+        return task_cache.compute_static_key(
+            name=self.unique_name,
+            code_hash=self.processor.image_uri,
+            arguments=parameters,
+        )
+
 
 @stepfunctions_workflow.task
 class TransformStep(DataJobSagemakerBase):
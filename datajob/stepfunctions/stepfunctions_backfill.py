@@ -0,0 +1,321 @@
+"""Run a workflow once for every partition date between a start and an end
+date, with a bounded number of executions in flight.
+
+We keep the progress in a local json file, so that we can stop a backfill and
+start it again. The dates that succeeded are not executed again, the
+executions that were still running are followed instead of started again.
+
+example of the progress file:
+
+    {
+      "succeeded": {"2026-01-01": "arn:aws:states:...:execution:...:backfill-20260101-..."},
+      "running": {"2026-01-02": "arn:aws:states:...:execution:...:backfill-20260102-..."}
+    }
+"""
+import json
+import re
+import threading
+import time
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable
+from typing import Union
+
+import boto3
+from botocore.exceptions import BotoCoreError
+from botocore.exceptions import ClientError
+
+from datajob import logger
+from datajob.datajob_execution_input import DataJobExecutionInput
+from datajob.stepfunctions import stepfunctions_execute
+
+STEP_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+# the error codes of the requests that aws throttled.
+THROTTLING_ERRORS = (
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+)
+MAX_ATTEMPTS = 8
+MAX_BACKOFF_SECONDS = 60
+POLL_SECONDS = 30
+# the name of an execution has at most 80 characters.
+MAX_EXECUTION_NAME_CHARS = 80
+SUCCEEDED = "SUCCEEDED"
+RUNNING = "RUNNING"
+
+
+class BackfillException(Exception):
+    """any exception occuring when backfilling a stepfunctions workflow."""
+
+
+def parse_step(step: str) -> timedelta:
+    """parse the step between two partition dates, e.g. 1d, 12h or 1w.
+
+    :param step: a number followed by h, d or w.
+    :return: the step as a timedelta.
+    """
+    match = re.fullmatch(r"(\d+)([hdw])", step.strip())
+    if match is None or int(match.group(1)) == 0:
+        raise BackfillException(
+            f"a step is a number followed by one of {list(STEP_UNITS)}, e.g. 1d, got {step}"
+        )
+    return timedelta(**{STEP_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def get_partition_dates(start: datetime, end: datetime, step: timedelta) -> list:
+    """get the partition dates from start up to and including end.
+
+    :param start: the first partition date.
+    :param end: the last partition date.
+    :param step: the time between two partition dates.
+    :return: the partition dates as iso formatted strings, a date when the step is a number of days.
+    """
+    if end < start:
+        raise BackfillException(f"the end {end} is before the start {start}.")
+    partition_dates = []
+    partition_date = start
+    while partition_date <= end:
+        partition_dates.append(format_partition_date(partition_date, step))
+        partition_date += step
+    return partition_dates
+
+
+def format_partition_date(partition_date: datetime, step: timedelta) -> str:
+    """format a partition date as 2026-01-01, or as 2026-01-01T12:00:00 when
+    the partitions are smaller than a day."""
+    if step % timedelta(days=1) or partition_date.time() != datetime.min.time():
+        return partition_date.isoformat()
+    return partition_date.date().isoformat()
+
+
+def load_progress(path: Union[str, Path]) -> dict:
+    """read the progress of a backfill, an empty progress when the file does
+    not exist."""
+    path = Path(path)
+    if not path.exists():
+        return {"succeeded": {}, "running": {}}
+    progress = json.loads(path.read_text())
+    return {
+        "succeeded": progress.get("succeeded", {}),
+        "running": progress.get("running", {}),
+    }
+
+
+def save_progress(progress: dict, path: Union[str, Path]) -> None:
+    """write the progress of a backfill, we replace the file at once so that we
+    do not lose the progress when we stop halfway."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f"{path.suffix}.tmp")
+    tmp_path.write_text(json.dumps(progress, indent=2, sort_keys=True))
+    tmp_path.replace(path)
+
+
+def get_default_progress_path(state_machine_arn: str) -> Path:
+    """the file where we keep the progress of a backfill of the state machine.
+
+    we keep it in the current directory, under .datajob/backfill/ and
+    named after the state machine.
+    """
+    name = state_machine_arn.split(":")[-1]
+    return Path.cwd() / ".datajob" / "backfill" / f"{name}.json"
+
+
+def call_with_retry(
+    function: Callable,
+    max_attempts: int = MAX_ATTEMPTS,
+    sleep: Callable = time.sleep,
+    **kwargs,
+):
+    """call an aws api and retry with exponential backoff when aws throttles
+    the request.
+
+    :param function: the method of the boto3 client.
+    :param max_attempts: the max number of times we call the method.
+    :param sleep: the function we wait with.
+    :return: the response of the method.
+    """
+    for attempt in range(max_attempts):
+        try:
+            return function(**kwargs)
+        except ClientError as e:
+            error_code = e.response.get("Error", {}).get("Code")
+            if error_code not in THROTTLING_ERRORS or attempt == max_attempts - 1:
+                raise
+            backoff = min(MAX_BACKOFF_SECONDS, 2**attempt)
+            logger.debug(f"{error_code}, retrying in {backoff}s")
+            sleep(backoff)
+
+
+class Backfill(object):
+    """Start one execution of a workflow for every partition date and follow
+    them until they are done."""
+
+    def __init__(
+        self,
+        state_machine_arn: str,
+        partition_dates: list,
+        concurrency: int = 4,
+        progress_path: Union[str, Path] = None,
+        execution_input_keys: list = None,
+        express: bool = False,
+        client=None,
+        poll_seconds: int = POLL_SECONDS,
+        sleep: Callable = time.sleep,
+    ):
+        """
+        :param state_machine_arn: the arn of the state machine.
+        :param partition_dates: the partition dates as iso formatted strings.
+        :param concurrency: the max number of executions in flight.
+        :param progress_path: the json file where we keep the progress, see get_default_progress_path.
+        :param execution_input_keys: the keys of the execution input of the workflow,
+        we generate unique names for them per execution.
+        :param express: an express workflow runs synchronously, we wait for the response.
+        :param client: the stepfunctions client.
+        :param poll_seconds: the time between two checks of the status of an execution.
+        :param sleep: the function we wait with.
+        """
+        if concurrency < 1:
+            raise BackfillException(f"concurrency is at least 1, got {concurrency}.")
+        self.state_machine_arn = state_machine_arn
+        self.partition_dates = partition_dates
+        self.concurrency = concurrency
+        self.progress_path = progress_path or get_default_progress_path(
+            state_machine_arn
+        )
+        self.execution_input_keys = execution_input_keys or []
+        self.express = express
+        self.client = client or boto3.client("stepfunctions")
+        self.poll_seconds = poll_seconds
+        self.sleep = sleep
+        self.started = datetime.utcnow()
+        self.progress = load_progress(self.progress_path)
+        self._lock = threading.Lock()
+
+    def _update_progress(self, partition_date: str, status: str, arn: str) -> None:
+        """record the status of the execution of a partition date, we only keep
+        the dates that succeeded or are running."""
+        with self._lock:
+            self.progress["running"].pop(partition_date, None)
+            if status in (SUCCEEDED, RUNNING):
+                self.progress[status.lower()][partition_date] = arn
+            save_progress(self.progress, self.progress_path)
+
+    def _get_unique_name(self, name: str, partition_date: str, max_chars: int) -> str:
+        """name-<partition date>-<start of the backfill>, so that we can run
+        the backfill of a date again."""
+        compact_date = re.sub(r"[-:]", "", partition_date)
+        return stepfunctions_execute._generate_unique_name(
+            name,
+            max_chars=max_chars,
+            unique_identifier=self.started,
+            datetime_format=f"{compact_date}-%Y%m%dT%H%M%S",
+        )
+
+    def get_execution_input(self, partition_date: str) -> dict:
+        """generate unique names for the execution input and add the partition
+        date."""
+        execution_input = {
+            key: self._get_unique_name(
+                key, partition_date, max_chars=stepfunctions_execute.MAX_CHARS
+            )
+            for key in self.execution_input_keys
+        }
+        execution_input.update(
+            DataJobExecutionInput.get_partition_date_input(partition_date)
+        )
+        return execution_input
+
+    def _wait_for_execution(self, execution_arn: str) -> str:
+        """poll the status of a standard execution until it is done."""
+        while True:
+            status = call_with_retry(
+                self.client.describe_execution,
+                sleep=self.sleep,
+                executionArn=execution_arn,
+            ).get("status")
+            if status != RUNNING:
+                return status
+            self.sleep(self.poll_seconds)
+
+    def run_partition(self, partition_date: str) -> tuple:
+        """run the workflow for one partition date, or follow the execution
+        that was still running when the backfill stopped.
+
+        :param partition_date: the partition date as an iso formatted string.
+        :return: (partition date, status, execution arn)
+        """
+        execution_arn = self.progress["running"].get(partition_date)
+        if execution_arn is None:
+            name = self._get_unique_name(
+                "backfill", partition_date, max_chars=MAX_EXECUTION_NAME_CHARS
+            )
+            kwargs = dict(
+                stateMachineArn=self.state_machine_arn,
+                name=name,
+                input=json.dumps(self.get_execution_input(partition_date)),
+            )
+            if self.express:
+                response = call_with_retry(
+                    self.client.start_sync_execution, sleep=self.sleep, **kwargs
+                )
+                execution_arn = response.get("executionArn")
+                status = response.get("status")
+                self._update_progress(partition_date, status, execution_arn)
+                return partition_date, status, execution_arn
+            execution_arn = call_with_retry(
+                self.client.start_execution, sleep=self.sleep, **kwargs
+            ).get("executionArn")
+            self._update_progress(partition_date, RUNNING, execution_arn)
+            logger.debug(f"started {execution_arn} for {partition_date}")
+        status = self._wait_for_execution(execution_arn)
+        self._update_progress(partition_date, status, execution_arn)
+        return partition_date, status, execution_arn
+
+    def run(self, on_done: Callable = None) -> dict:
+        """run the workflow for all the partition dates that did not succeed
+        yet, with at most concurrency executions in flight.
+
+        :param on_done: called with (partition date, status, execution arn) when an execution is done.
+        :return: a summary with the succeeded, failed and skipped partition dates.
+        """
+        skipped = [
+            partition_date
+            for partition_date in self.partition_dates
+            if partition_date in self.progress["succeeded"]
+        ]
+        todo = [
+            partition_date
+            for partition_date in self.partition_dates
+            if partition_date not in self.progress["succeeded"]
+        ]
+        summary = {"succeeded": [], "failed": {}, "skipped": skipped}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {
+                executor.submit(self.run_partition, partition_date): partition_date
+                for partition_date in todo
+            }
+            for future in as_completed(futures):
+                try:
+                    partition_date, status, execution_arn = future.result()
+                except (ClientError, BotoCoreError) as e:
+                    # we could not start or follow the execution, we try again the next time.
+                    partition_date, execution_arn = futures[future], None
+                    status = (
+                        e.response.get("Error", {}).get("Code")
+                        if isinstance(e, ClientError)
+                        else type(e).__name__
+                    )
+                if status == SUCCEEDED:
+                    summary["succeeded"].append(partition_date)
+                else:
+                    summary["failed"][partition_date] = status
+                if on_done is not None:
+                    on_done(partition_date, status, execution_arn)
+        summary["succeeded"].sort()
+        return summary
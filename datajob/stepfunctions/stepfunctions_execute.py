@@ -8,6 +8,7 @@ from stepfunctions.workflow import Execution
 from stepfunctions.workflow import Workflow
 
 from datajob import console
+from datajob import datajob_task_output
 from datajob import logger
 from datajob.datajob_execution_input import DataJobExecutionInput
 
@@ -15,6 +16,10 @@ CURRENT_DATE = datetime.utcnow()
 MAX_CHARS = 63
 
 
+class StepfunctionsExecuteException(Exception):
+    """any exception occuring when executing a stepfunctions workflow."""
+
+
 def find_state_machine_arn(state_machine: str) -> str:
     """lookup the state machine arn based on the state machine name."""
     workflows = Workflow.list_workflows()
@@ -93,15 +98,13 @@ def _generate_unique_name(
     return unique_name
 
 
-def _get_execution_input_from_stack(stack_name: str) -> Union[dict, None]:
-    """Look for the execution input in the outputs of this stack. If present
-    generate unique names for the ExecutionInput and return the dict. If not
-    present return None.
+def _get_execution_input_keys_from_stack(stack_name: str) -> Union[list, None]:
+    """Look for the keys of the execution input in the outputs of this stack.
 
     Args:
         stack_name: name of the cloudformation stack.
 
-    Returns: ExecutionInput as a dict or None
+    Returns: the keys of the ExecutionInput or None
     """
     logger.debug(f"looking for execution input in {stack_name}")
     stack = _describe_stacks(stack_name=stack_name)
@@ -112,16 +115,42 @@ def _get_execution_input_from_stack(stack_name: str) -> Union[dict, None]:
                 output.get("OutputKey")
                 == DataJobExecutionInput().DATAJOB_EXECUTION_INPUT
             ):
-                execution_inputs = json.loads(output.get("OutputValue"))
+                return json.loads(output.get("OutputValue"))
+    logger.debug("no execution input found.")
 
-                return_value = {
-                    execution_input: _generate_unique_name(execution_input)
-                    for execution_input in execution_inputs
-                }
 
-                console.log("execution input found: \n" f"{return_value}")
-                return return_value
-    logger.debug("no execution input found.")
+def _get_execution_input_from_stack(stack_name: str) -> Union[dict, None]:
+    """Look for the execution input in the outputs of this stack. If present
+    generate unique names for the ExecutionInput and return the dict. If not
+    present return None.
+
+    Args:
+        stack_name: name of the cloudformation stack.
+
+    Returns: ExecutionInput as a dict or None
+    """
+    execution_inputs = _get_execution_input_keys_from_stack(stack_name=stack_name)
+    if execution_inputs is None:
+        return None
+    return_value = {
+        execution_input: _generate_unique_name(execution_input)
+        for execution_input in execution_inputs
+    }
+    console.log("execution input found: \n" f"{return_value}")
+    return return_value
+
+
+def get_execution_input_keys(sfn_arn: str) -> Union[list, None]:
+    """Get the keys of the execution input of a workflow, e.g. to generate
+    unique names for more than one execution.
+
+    Args:
+        sfn_arn: arn of the stepfunctions workflow
+
+    Returns: the keys of the ExecutionInput or None
+    """
+    stack_name = _find_cloudformation_stack_name_for_sfn_workflow(sfn_arn=sfn_arn)
+    return _get_execution_input_keys_from_stack(stack_name=stack_name)
 
 
 def get_execution_input(sfn_arn: str) -> Union[dict, None]:
@@ -139,14 +168,302 @@ def get_execution_input(sfn_arn: str) -> Union[dict, None]:
     return _get_execution_input_from_stack(stack_name=stack_name)
 
 
-def get_status(execution: Execution):
-    """get the status of a stepfunctions workflow execution."""
+def get_status(execution: Union[Execution, dict]):
+    """get the status of a stepfunctions workflow execution.
+
+    An express workflow that ran synchronously returns its status in the
+    response of start_sync_execution.
+    """
+    if isinstance(execution, dict):
+        return execution.get("status")
     time.sleep(1)
     description = execution.describe()
     return description.get("status")
 
 
-def execute(state_machine_arn: str, execution_input: Union[dict, None]):
-    """execute statemachine based on the name."""
+def execute(
+    state_machine_arn: str, execution_input: Union[dict, None]
+) -> Union[Execution, dict]:
+    """execute statemachine based on the name.
+
+    - a STANDARD workflow is started asynchronously and we return the Execution object.
+    - an EXPRESS workflow is started synchronously, we wait for the result and return the response.
+    """
     workflow = Workflow.attach(state_machine_arn)
+    if is_express(state_machine_arn):
+        logger.debug(f"starting express workflow {state_machine_arn} synchronously.")
+        return workflow.client.start_sync_execution(
+            stateMachineArn=state_machine_arn,
+            input=json.dumps(execution_input or {}),
+        )
     return workflow.execute(inputs=execution_input)
+
+
+def _describe_execution(execution_arn: str) -> dict:
+    return boto3.client("stepfunctions").describe_execution(executionArn=execution_arn)
+
+
+def _describe_state_machine(state_machine_arn: str) -> dict:
+    return boto3.client("stepfunctions").describe_state_machine(
+        stateMachineArn=state_machine_arn
+    )
+
+
+def is_express(state_machine_arn: str) -> bool:
+    """check if the state machine is an express workflow."""
+    return _describe_state_machine(state_machine_arn).get("type") == "EXPRESS"
+
+
+def _get_execution_history(execution_arn: str) -> list:
+    """Get all the events of the history of an execution."""
+    paginator = boto3.client("stepfunctions").get_paginator("get_execution_history")
+    events = []
+    for page in paginator.paginate(executionArn=execution_arn):
+        events.extend(page.get("events"))
+    return events
+
+
+def find_state_machine_arn_for_execution(execution_arn: str) -> str:
+    """lookup the state machine arn of an execution."""
+    return _describe_execution(execution_arn=execution_arn).get("stateMachineArn")
+
+
+def get_succeeded_state_ids(execution_arn: str) -> set:
+    """Look in the history of an execution for the tasks that exited
+    successfully.
+
+    Args:
+        execution_arn: the arn of a stepfunctions workflow execution.
+
+    Returns: set of the state_ids of the tasks that succeeded.
+    """
+    events = _get_execution_history(execution_arn=execution_arn)
+    succeeded_state_ids = {
+        event.get("stateExitedEventDetails").get("name")
+        for event in events
+        if event.get("type") == "TaskStateExited"
+    }
+    logger.debug(f"tasks that succeeded in {execution_arn}: {succeeded_state_ids}")
+    return succeeded_state_ids
+
+
+def _get_skippable_state_machine(state_machine_arn: str, action: str) -> dict:
+    """describe the state machine and check that we can skip its tasks.
+
+    Args:
+        state_machine_arn: the arn of the state machine.
+        action: what we want to do, for the error message.
+
+    Returns: the description of the state machine.
+    """
+    state_machine = _describe_state_machine(state_machine_arn=state_machine_arn)
+    if DataJobExecutionInput.DATAJOB_SKIP_TASKS not in state_machine.get("definition"):
+        raise StepfunctionsExecuteException(
+            f"the tasks of {state_machine.get('name')} cannot be skipped. "
+            f"Set skippable=True on the StepfunctionsWorkflow and redeploy to be able to {action}."
+        )
+    return state_machine
+
+
+def _get_run_input_of_execution(execution_arn: str, execution: dict = None) -> dict:
+    """Get the part of the execution input that makes a new execution use the
+    run id and the outputs of another execution.
+
+    - we reuse the run id, so that the tasks read and write under the same run prefix in the data bucket.
+    - we pass the outputs of the tasks that succeeded, the tasks we skip do not run
+      and the tasks after them get the outputs via the execution input.
+
+    Args:
+        execution_arn: the arn of the other execution.
+        execution: the description of the other execution, if we already have it.
+
+    Returns: dict that can be merged into the execution input.
+    """
+    execution = execution or _describe_execution(execution_arn=execution_arn)
+    previous_execution_input = json.loads(execution.get("input") or "{}")
+    run_input = {}
+    run_id = previous_execution_input.get(
+        DataJobExecutionInput.DATAJOB_RUN_ID
+    ) or execution.get("name")
+    if run_id:
+        run_input.update(DataJobExecutionInput.get_run_id_input(run_id))
+    outputs = datajob_task_output.get_outputs_from_history(
+        _get_execution_history(execution_arn=execution_arn)
+    )
+    if outputs:
+        run_input.update(DataJobExecutionInput.get_outputs_input(outputs))
+    return run_input
+
+
+def get_resume_execution_input(
+    execution_arn: str, state_machine_arn: str
+) -> Union[dict, None]:
+    """Get the execution input to resume a failed execution from the first task
+    that failed.
+
+    - we generate a fresh execution input for the workflow.
+    - we skip the tasks that succeeded in the failed execution,
+      as well as the tasks that were already skipped by the failed execution.
+    - we reuse the run id of the failed execution, so that the tasks read and write
+      under the same run prefix in the data bucket.
+    - we pass the outputs of the tasks that succeeded, so that the tasks after them can use them.
+
+    Args:
+        execution_arn: the arn of the execution we want to resume.
+        state_machine_arn: the arn of the state machine of the execution.
+
+    Returns: ExecutionInput as a dict
+    """
+    _get_skippable_state_machine(
+        state_machine_arn=state_machine_arn, action="resume an execution"
+    )
+    execution = _describe_execution(execution_arn=execution_arn)
+    previous_execution_input = json.loads(execution.get("input") or "{}")
+    skipped_state_ids = set(
+        previous_execution_input.get(DataJobExecutionInput.DATAJOB_SKIP_TASKS, {})
+    )
+    succeeded_state_ids = get_succeeded_state_ids(execution_arn=execution_arn)
+    execution_input = get_execution_input(sfn_arn=state_machine_arn) or {}
+    execution_input.update(
+        DataJobExecutionInput.get_skip_tasks_input(
+            skipped_state_ids | succeeded_state_ids
+        )
+    )
+    execution_input.update(
+        _get_run_input_of_execution(execution_arn=execution_arn, execution=execution)
+    )
+    console.log(
+        f"resuming {execution_arn} skipping tasks: \n"
+        f"{sorted(skipped_state_ids | succeeded_state_ids)}"
+    )
+    return execution_input
+
+
+def _get_states(states: dict):
+    """yield the name and the definition of the states, including the states in
+    the branches of a parallel state and the iterator of a map state."""
+    for name, state in states.items():
+        yield name, state
+        for branch in state.get("Branches", []):
+            yield from _get_states(branch.get("States", {}))
+        for key in ("Iterator", "ItemProcessor"):
+            if key in state:
+                yield from _get_states(state[key].get("States", {}))
+
+
+def get_task_graph(definition: dict) -> dict:
+    """Find the graph of the tasks in the definition of a skippable workflow.
+    The choice that skips a task keeps the tasks the task depends on in its
+    comment.
+
+    Args:
+        definition: the definition of the state machine.
+
+    Returns: the state_id of a task as key and the state_ids of the tasks it depends on as value.
+    """
+    graph = {}
+    for name, state in _get_states(definition.get("States", {})):
+        if state.get("Type") != "Choice" or not name.endswith("-skip"):
+            continue
+        try:
+            comment = json.loads(state.get("Comment") or "{}")
+        except ValueError:
+            continue
+        if isinstance(comment, dict) and (
+            DataJobExecutionInput.DATAJOB_UPSTREAM_TASKS in comment
+        ):
+            graph[name[: -len("-skip")]] = comment[
+                DataJobExecutionInput.DATAJOB_UPSTREAM_TASKS
+            ]
+    return graph
+
+
+def _find_state_id(graph: dict, task: str) -> str:
+    """find the state_id of a task by its state_id or by its name.
+
+    the name is the state_id without the <stack>-<stage>- prefix.
+    """
+    if task in graph:
+        return task
+    state_ids = [state_id for state_id in graph if state_id.endswith(f"-{task}")]
+    if len(state_ids) == 1:
+        return state_ids[0]
+    raise StepfunctionsExecuteException(
+        f"{'more than one' if state_ids else 'no'} task matches {task}, "
+        f"choose one of {sorted(graph)}."
+    )
+
+
+def get_subgraph_state_ids(
+    graph: dict, only: list, downstream: bool = False, upstream: bool = False
+) -> set:
+    """Get the state_ids of the tasks we want to run.
+
+    Args:
+        graph: the state_id of a task as key and the state_ids of the tasks it depends on as value.
+        only: the tasks we want to run.
+        downstream: also run all the tasks that depend on these tasks.
+        upstream: also run all the tasks these tasks depend on.
+
+    Returns: set of state_ids.
+    """
+    selected = {_find_state_id(graph, task) for task in only}
+    downstream_graph = {}
+    for state_id, upstream_state_ids in graph.items():
+        for upstream_state_id in upstream_state_ids:
+            downstream_graph.setdefault(upstream_state_id, []).append(state_id)
+    for include, edges in ((downstream, downstream_graph), (upstream, graph)):
+        if not include:
+            continue
+        to_visit = list(selected)
+        while to_visit:
+            for state_id in edges.get(to_visit.pop(), []):
+                if state_id not in selected:
+                    selected.add(state_id)
+                    to_visit.append(state_id)
+    return selected
+
+
+def get_only_execution_input(
+    state_machine_arn: str,
+    only: list,
+    downstream: bool = False,
+    upstream: bool = False,
+    from_execution: str = None,
+) -> dict:
+    """Get the execution input to run some tasks of a workflow, and optionally
+    the tasks after or before them. We skip all the other tasks.
+
+    Args:
+        state_machine_arn: the arn of the state machine.
+        only: the tasks we want to run, their state_id or their name.
+        downstream: also run all the tasks that depend on these tasks.
+        upstream: also run all the tasks these tasks depend on.
+        from_execution: the arn of an execution of which we reuse the run id and the outputs,
+            so that the tasks find the data of the tasks we skip.
+
+    Returns: ExecutionInput as a dict
+    """
+    state_machine = _get_skippable_state_machine(
+        state_machine_arn=state_machine_arn, action="run only some tasks"
+    )
+    graph = get_task_graph(json.loads(state_machine.get("definition")))
+    if not graph:
+        raise StepfunctionsExecuteException(
+            f"we did not find the tasks of {state_machine.get('name')} in its definition. "
+            f"Redeploy the workflow to be able to run only some tasks."
+        )
+    selected_state_ids = get_subgraph_state_ids(
+        graph, only=only, downstream=downstream, upstream=upstream
+    )
+    skipped_state_ids = set(graph) - selected_state_ids
+    execution_input = get_execution_input(sfn_arn=state_machine_arn) or {}
+    execution_input.update(
+        DataJobExecutionInput.get_skip_tasks_input(skipped_state_ids)
+    )
+    if from_execution:
+        execution_input.update(
+            _get_run_input_of_execution(execution_arn=from_execution)
+        )
+    console.log(f"running tasks: \n{sorted(selected_state_ids)}")
+    return execution_input
@@ -0,0 +1,282 @@
+"""Define a workflow and its tasks in a yaml or json file, e.g. a pipeline we
+generate from a metadata catalog.
+
+example:
+
+    name: data-pipeline
+    workflow:
+      skippable: true
+    tasks:
+      prepare:
+        type: glue
+        job_path: jobs/prepare.py
+        outputs:
+          features: null
+      train:
+        type: sagemaker_training
+        depends_on: [prepare]
+        estimator:
+          class: sagemaker.estimator.Estimator
+          arguments:
+            image_uri: 123456789012.dkr.ecr.eu-west-1.amazonaws.com/train:latest
+            role: arn:aws:iam::123456789012:role/sagemaker
+            instance_count: 1
+            instance_type: ml.m5.xlarge
+        data:
+          output: prepare.features
+    edges:
+      - [prepare, train]
+
+- the type of a task is one of TASK_TYPES, or the dotted path of a datajob task class, e.g. my_pkg.tasks:MyTask.
+- the other keys of a task are the arguments of its class.
+- {class: ..., arguments: ...} creates an object, e.g. the estimator of a sagemaker task.
+  the class is one of OBJECT_CLASSES, or one of the classes we pass to the pipeline.
+- {output: <task>.<name>} is an output of a task that we declared under outputs.
+- depends_on of a task and edges of the pipeline both add dependencies.
+"""
+import importlib
+import json
+from pathlib import Path
+from typing import Iterable
+from typing import Union
+
+from aws_cdk import core
+
+from datajob import logger
+from datajob.datajob_base import DataJobBase
+from datajob.datajob_execution_input import DataJobExecutionInput
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+
+TASK_TYPES = {
+    "glue": "datajob.glue.glue_job:GlueJob",
+    "lambda": "datajob.awslambda.lambda_task:LambdaTask",
+    "athena": "datajob.athena.athena_query:AthenaQuery",
+    "sagemaker_training": "datajob.sagemaker.sagemaker_job:TrainingStep",
+    "sagemaker_processing": "datajob.sagemaker.sagemaker_job:ProcessingStep",
+    "sagemaker_transform": "datajob.sagemaker.sagemaker_job:TransformStep",
+    "sagemaker_tuning": "datajob.sagemaker.sagemaker_job:TuningStep",
+}
+# the classes a pipeline can create with {class: ..., arguments: ...}, a pipeline
+# file cannot call any other callable.
+OBJECT_CLASSES = (
+    "sagemaker.LocalSession",
+    "sagemaker.session.Session",
+    "sagemaker.estimator.Estimator",
+    "sagemaker.inputs.TrainingInput",
+    "sagemaker.inputs.TransformInput",
+    "sagemaker.processing.Processor",
+    "sagemaker.processing.ScriptProcessor",
+    "sagemaker.processing.ProcessingInput",
+    "sagemaker.processing.ProcessingOutput",
+    "sagemaker.transformer.Transformer",
+    "sagemaker.tuner.HyperparameterTuner",
+    "sagemaker.tuner.CategoricalParameter",
+    "sagemaker.tuner.ContinuousParameter",
+    "sagemaker.tuner.IntegerParameter",
+)
+# the keys of a task that are not arguments of its class.
+TASK_KEYS = ("type", "depends_on", "outputs")
+
+
+class PipelineException(Exception):
+    """any exception occuring when creating a workflow from a pipeline
+    definition."""
+
+
+def _get_dotted_path(path: str) -> str:
+    """my_pkg.module:MyClass becomes my_pkg.module.MyClass."""
+    return path.replace(":", ".")
+
+
+def _import(path: str) -> type:
+    """import a class from its path, my_pkg.module:MyClass or
+    my_pkg.module.MyClass."""
+    module_name, _, class_name = (
+        path.partition(":") if ":" in path else path.rpartition(".")
+    )
+    try:
+        return getattr(importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise PipelineException(f"we could not import {path}: {e}") from e
+
+
+def load_definition(path: Union[str, Path]) -> dict:
+    """read a pipeline definition from a .yaml, .yml or .json file.
+
+    :param path: the path to the file.
+    :return: the pipeline definition.
+    """
+    path = Path(path)
+    if path.suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise PipelineException(
+                "we need pyyaml to read a yaml pipeline, install it with 'pip install datajob[pipeline]'."
+            ) from e
+        return yaml.safe_load(path.read_text())
+    if path.suffix == ".json":
+        return json.loads(path.read_text())
+    raise PipelineException(
+        f"a pipeline is a .yaml, .yml or .json file, got {path.name}"
+    )
+
+
+class Pipeline(object):
+    """Create the tasks and the workflow of a pipeline definition."""
+
+    def __init__(
+        self,
+        datajob_stack: core.Construct,
+        definition: dict,
+        classes: Iterable[str] = (),
+    ):
+        """
+        :param datajob_stack: aws cdk core construct object.
+        :param definition: the pipeline definition, see the docstring of this module.
+        :param classes: the paths of the classes the pipeline can create next to OBJECT_CLASSES.
+        """
+        if not isinstance(definition, dict) or not definition.get("name"):
+            raise PipelineException("a pipeline definition needs a name.")
+        if not definition.get("tasks"):
+            raise PipelineException(f"pipeline {definition['name']} has no tasks.")
+        self.datajob_stack = datajob_stack
+        self.definition = definition
+        self.object_classes = {
+            _get_dotted_path(path) for path in (*OBJECT_CLASSES, *classes)
+        }
+        self.tasks = {}
+
+    @classmethod
+    def from_file(
+        cls,
+        datajob_stack: core.Construct,
+        path: Union[str, Path],
+        classes: Iterable[str] = (),
+    ) -> "Pipeline":
+        return cls(datajob_stack, load_definition(path), classes=classes)
+
+    def _create_object(self, path: str, arguments: dict, task_name: str):
+        """create an object of one of the classes the pipeline can create."""
+        if _get_dotted_path(path) not in self.object_classes:
+            raise PipelineException(
+                f"task {task_name} creates a {path}, a pipeline can only create one of "
+                f"{sorted(self.object_classes)}. Pass the class to the pipeline to allow it."
+            )
+        return _import(path)(**arguments)
+
+    @staticmethod
+    def _import_task_class(task_type: str) -> type:
+        """import the class of a task, a datajob task."""
+        task_class = _import(TASK_TYPES.get(task_type, task_type))
+        if not (isinstance(task_class, type) and issubclass(task_class, DataJobBase)):
+            raise PipelineException(
+                f"the type of a task is one of {list(TASK_TYPES)} or a datajob task class, got {task_type}."
+            )
+        return task_class
+
+    def _resolve(self, value, task_name: str):
+        """create the objects and find the outputs the arguments of a task
+        refer to."""
+        if isinstance(value, list):
+            return [self._resolve(item, task_name) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if set(value) == {"output"}:
+            producer, _, output = value["output"].partition(".")
+            if producer not in self.tasks:
+                raise PipelineException(
+                    f"task {task_name} uses output {value['output']}, "
+                    f"but task {producer} is not defined before {task_name}."
+                )
+            return self.tasks[producer].output(output)
+        if "class" in value and set(value) <= {"class", "arguments"}:
+            arguments = self._resolve(value.get("arguments") or {}, task_name)
+            return self._create_object(value["class"], arguments, task_name)
+        return {key: self._resolve(item, task_name) for key, item in value.items()}
+
+    def create_task(self, name: str, task_definition: dict):
+        """create a task of the pipeline and declare its outputs.
+
+        :param name: the name of the task.
+        :param task_definition: the type, the arguments and the outputs of the task.
+        :return: the datajob task.
+        """
+        task_type = task_definition.get("type")
+        if task_type is None:
+            raise PipelineException(
+                f"task {name} needs a type, one of {list(TASK_TYPES)} or the path of a class."
+            )
+        task_class = self._import_task_class(task_type)
+        arguments = {
+            key: self._resolve(value, name)
+            for key, value in task_definition.items()
+            if key not in TASK_KEYS
+        }
+        logger.debug(f"creating task {name} of type {task_type}")
+        a_task = task_class(self.datajob_stack, name, **arguments)
+        for output_name, output_path in (task_definition.get("outputs") or {}).items():
+            output = a_task.add_output(output_name, path=output_path)
+            # we know the workflow already, so that a task that resolves the output
+            # when we create it, e.g. a sagemaker task, knows its location.
+            output.run_prefix_root = DataJobExecutionInput.get_run_prefix_root(
+                stage=self.datajob_stack.stage, workflow_name=self.definition["name"]
+            )
+        return a_task
+
+    def get_edges(self) -> list:
+        """get the (upstream, downstream) pairs of the depends_on of the tasks
+        and of the edges of the pipeline."""
+        names = [
+            (upstream, name)
+            for name, task_definition in self.definition["tasks"].items()
+            for upstream in task_definition.get("depends_on") or []
+        ]
+        names += [tuple(edge) for edge in self.definition.get("edges") or []]
+        for edge in names:
+            if len(edge) != 2:
+                raise PipelineException(
+                    f"an edge is a pair of [upstream, downstream], got {list(edge)}"
+                )
+            for name in edge:
+                if name not in self.tasks:
+                    raise PipelineException(
+                        f"edge {list(edge)} refers to task {name}, which is not a task of the pipeline."
+                    )
+        return [
+            (self.tasks[upstream], self.tasks[downstream])
+            for upstream, downstream in names
+        ]
+
+    def create(self) -> StepfunctionsWorkflow:
+        """create the tasks and the workflow.
+
+        :return: the stepfunctions workflow.
+        """
+        for name, task_definition in self.definition["tasks"].items():
+            self.tasks[name] = self.create_task(name, task_definition or {})
+        with StepfunctionsWorkflow(
+            self.datajob_stack,
+            self.definition["name"],
+            **(self.definition.get("workflow") or {}),
+        ) as workflow:
+            workflow.add_graph({a_task: [] for a_task in self.tasks.values()})
+            workflow.add_edges(self.get_edges())
+        return workflow
+
+
+def create_workflow(
+    datajob_stack: core.Construct,
+    definition: Union[dict, str, Path],
+    classes: Iterable[str] = (),
+) -> StepfunctionsWorkflow:
+    """create the tasks and the workflow of a pipeline.
+
+    :param datajob_stack: aws cdk core construct object.
+    :param definition: a pipeline definition, or the path to a .yaml, .yml or .json file.
+    :param classes: the paths of the classes the pipeline can create next to OBJECT_CLASSES.
+    :return: the stepfunctions workflow.
+    """
+    if isinstance(definition, dict):
+        return Pipeline(datajob_stack, definition, classes=classes).create()
+    return Pipeline.from_file(datajob_stack, definition, classes=classes).create()
@@ -0,0 +1,447 @@
+"""Start a workflow when something happens, instead of calling `datajob
+execute` from a cron.
+
+- Schedule: an eventbridge schedule, e.g. rate(1 hour) or cron(0 6 * * ? *).
+- S3ObjectCreated: objects that land in the data bucket. The events go to an sqs queue,
+  a lambda function takes them in batches and starts one execution per batch, or with
+  a debounce time one execution per burst, so that a burst of small files coalesces into one run.
+- WorkflowSucceeded: the success of another workflow.
+
+Every trigger passes what triggered the execution via the DatajobTrigger key of the execution input.
+The lambda function of S3ObjectCreated generates a unique name for every key of the execution input
+of the workflow, e.g. the job name of a sagemaker task. Eventbridge cannot, a Schedule or a
+WorkflowSucceeded raises a TriggerException for a workflow with such keys.
+
+example:
+
+    with StepfunctionsWorkflow(
+        datajob_stack,
+        "workflow",
+        triggers=[S3ObjectCreated(prefix="raw/events/", debounce_seconds=120)],
+    ) as sfn:
+        task1 >> task2
+"""
+import json
+import shutil
+import tempfile
+from abc import abstractmethod
+from pathlib import Path
+from typing import Union
+
+from aws_cdk import aws_dynamodb
+from aws_cdk import aws_events
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_lambda
+from aws_cdk import aws_sqs
+from aws_cdk import core
+
+from datajob import logger
+from datajob.cache import task_cache
+from datajob.datajob_execution_input import DataJobExecutionInput
+from datajob.glue import spark_config as glue_spark_config
+
+DATAJOB_TRIGGER = "DatajobTrigger"
+TRIGGER_HANDLER_PATH = Path(__file__).parent / "stepfunctions_trigger_handler.py"
+# an sqs event source takes at most 10 messages per batch without a batching window.
+MAX_BATCH_SIZE_WITHOUT_WINDOW = 10
+MAX_BATCH_SIZE = 10000
+MAX_BATCHING_WINDOW_SECONDS = 300
+# sqs hides a message at most 12 hours.
+MAX_DEBOUNCE_SECONDS = 43200
+TRIGGER_FUNCTION_TIMEOUT_SECONDS = 60
+# sqs polls the queue with at least 5 concurrent batches, aws recommends a reserved concurrency of at least 5
+# for a function with an sqs event source, else the batches are throttled.
+TRIGGER_FUNCTION_CONCURRENCY = 5
+# the name of the partition key of the table with the debounce marker of a trigger.
+DEBOUNCE_MARKER_KEY = "trigger"
+
+
+class TriggerException(Exception):
+    """any exception occuring when configuring the trigger of a workflow."""
+
+
+def get_input_template(source: str, input: dict = None, **paths) -> tuple:
+    """Construct the input transformer of an eventbridge target, that puts what
+    triggered the execution under the DatajobTrigger key of the execution
+    input.
+
+    :param source: what triggered the execution, e.g. schedule.
+    :param input: extra keys for the execution input.
+    :param paths: the name of a key in DatajobTrigger as key and the json path in the event as value.
+    :return: the input paths map and the input template.
+    """
+    placeholders = {name: f"__{name}__" for name in paths}
+    execution_input = dict(input or {})
+    execution_input[DATAJOB_TRIGGER] = {"Source": source, **placeholders}
+    input_template = json.dumps(execution_input)
+    for name, placeholder in placeholders.items():
+        input_template = input_template.replace(f'"{placeholder}"', f'"<{name}>"')
+    return dict(paths), input_template
+
+
+class Trigger(object):
+    """the base class of the triggers of a workflow."""
+
+    def __init__(self, input: dict = None):
+        """
+        :param input: extra keys for the execution input, e.g. the parameters of the tasks.
+        """
+        if input is not None and DATAJOB_TRIGGER in input:
+            raise TriggerException(
+                f"{DATAJOB_TRIGGER} is reserved, we put what triggered the execution under this key."
+            )
+        self.input = input
+
+    @abstractmethod
+    def create(
+        self, workflow: core.Construct, state_machine_arn: str, role: iam.Role
+    ) -> None:
+        """create the resources that start the workflow.
+
+        :param workflow: the stepfunctions workflow we trigger.
+        :param state_machine_arn: the arn of the state machine of the workflow.
+        :param role: the role with which eventbridge starts an execution.
+        :return: None
+        """
+
+    @staticmethod
+    def _assert_no_execution_input_keys(workflow: core.Construct, trigger: str) -> None:
+        """eventbridge starts the execution with a fixed input, it cannot
+        generate the unique names that the execution input of the workflow
+        needs."""
+        execution_input_keys = workflow.get_execution_input_keys()
+        if execution_input_keys:
+            raise TriggerException(
+                f"{trigger} cannot start {workflow.unique_name}, its execution input needs a unique name "
+                f"per execution for {execution_input_keys}. Pass the names to the tasks, or start the "
+                f"workflow with datajob execute or an S3ObjectCreated trigger."
+            )
+
+    @staticmethod
+    def _create_rule(
+        workflow: core.Construct,
+        id: str,
+        target_arn: str,
+        role: iam.Role = None,
+        input_transformer: aws_events.CfnRule.InputTransformerProperty = None,
+        **kwargs,
+    ) -> aws_events.CfnRule:
+        logger.debug(f"creating trigger {id} of {workflow.unique_name}")
+        return aws_events.CfnRule(
+            workflow,
+            id,
+            name=id,
+            state="ENABLED",
+            targets=[
+                aws_events.CfnRule.TargetProperty(
+                    id=id,
+                    arn=target_arn,
+                    role_arn=role.role_arn if role is not None else None,
+                    input_transformer=input_transformer,
+                )
+            ],
+            **kwargs,
+        )
+
+
+class Schedule(Trigger):
+    """start the workflow on a schedule."""
+
+    def __init__(self, expression: str, input: dict = None):
+        """
+        :param expression: a rate or cron expression, e.g. rate(1 hour) or cron(0 6 * * ? *).
+        :param input: extra keys for the execution input.
+        """
+        super().__init__(input=input)
+        if not expression.startswith(("rate(", "cron(")):
+            raise TriggerException(
+                f"the expression of a schedule should be rate(...) or cron(...), got {expression}"
+            )
+        self.expression = expression
+
+    def create(
+        self, workflow: core.Construct, state_machine_arn: str, role: iam.Role
+    ) -> None:
+        Trigger._assert_no_execution_input_keys(workflow, "a schedule")
+        input_paths_map, input_template = get_input_template(
+            "schedule", input=self.input, Time="$.time"
+        )
+        Trigger._create_rule(
+            workflow,
+            f"{workflow.unique_name}-schedule-{_get_index(workflow, self)}",
+            target_arn=state_machine_arn,
+            role=role,
+            input_transformer=aws_events.CfnRule.InputTransformerProperty(
+                input_paths_map=input_paths_map, input_template=input_template
+            ),
+            schedule_expression=self.expression,
+        )
+
+
+class WorkflowSucceeded(Trigger):
+    """start the workflow when another workflow succeeds."""
+
+    def __init__(self, workflow: Union[core.Construct, str], input: dict = None):
+        """
+        :param workflow: a StepfunctionsWorkflow, or the name of a state machine of another stack.
+        :param input: extra keys for the execution input.
+        """
+        super().__init__(input=input)
+        self.state_machine_name = getattr(workflow, "unique_name", workflow)
+
+    def create(
+        self, workflow: core.Construct, state_machine_arn: str, role: iam.Role
+    ) -> None:
+        Trigger._assert_no_execution_input_keys(
+            workflow, f"the success of {self.state_machine_name}"
+        )
+        upstream_arn = (
+            f"arn:{core.Aws.PARTITION}:states:{core.Aws.REGION}:{core.Aws.ACCOUNT_ID}"
+            f":stateMachine:{self.state_machine_name}"
+        )
+        input_paths_map, input_template = get_input_template(
+            "workflow", input=self.input, ExecutionArn="$.detail.executionArn"
+        )
+        Trigger._create_rule(
+            workflow,
+            f"{workflow.unique_name}-after-workflow-{_get_index(workflow, self)}",
+            target_arn=state_machine_arn,
+            role=role,
+            input_transformer=aws_events.CfnRule.InputTransformerProperty(
+                input_paths_map=input_paths_map, input_template=input_template
+            ),
+            event_pattern={
+                "source": ["aws.states"],
+                "detail-type": ["Step Functions Execution Status Change"],
+                "detail": {
+                    "status": ["SUCCEEDED"],
+                    "stateMachineArn": [upstream_arn],
+                },
+            },
+        )
+
+
+class S3ObjectCreated(Trigger):
+    """Start the workflow when objects land in a bucket.
+
+    We send the events to a queue. A lambda function takes up to
+    batch_size events, waiting at most batching_window_seconds to fill a
+    batch, and starts one execution for the batch. With
+    debounce_seconds, the function adds the objects of every batch to a
+    dynamodb item per trigger and puts the batch back in the queue until
+    no object landed for debounce_seconds. The first batch that finds
+    the burst quiet starts one execution for all the objects in the
+    item, so that one run picks up the whole burst.
+    """
+
+    def __init__(
+        self,
+        prefix: str = None,
+        suffix: str = None,
+        bucket: str = None,
+        batch_size: int = 100,
+        batching_window_seconds: int = 60,
+        debounce_seconds: int = 0,
+        input: dict = None,
+    ):
+        """
+        :param prefix: the prefix of the objects, e.g. raw/events/. It's required for the data bucket,
+        and cannot overlap the prefixes datajob writes to, else the workflow triggers itself.
+        :param suffix: the suffix of the objects, e.g. .parquet
+        :param bucket: the name of the bucket, the data bucket of the stack is the default.
+        another bucket should send its events to eventbridge.
+        :param batch_size: the max number of objects of one execution.
+        :param batching_window_seconds: the max time we wait to fill a batch, at most 300.
+        :param debounce_seconds: we start the execution once no object landed for this time.
+        :param input: extra keys for the execution input.
+        """
+        super().__init__(input=input)
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise TriggerException(
+                f"batch_size should be between 1 and {MAX_BATCH_SIZE}, got {batch_size}"
+            )
+        if not 0 <= batching_window_seconds <= MAX_BATCHING_WINDOW_SECONDS:
+            raise TriggerException(
+                f"batching_window_seconds should be between 0 and {MAX_BATCHING_WINDOW_SECONDS}, "
+                f"got {batching_window_seconds}"
+            )
+        if batch_size > MAX_BATCH_SIZE_WITHOUT_WINDOW and batching_window_seconds < 1:
+            raise TriggerException(
+                f"a batch_size above {MAX_BATCH_SIZE_WITHOUT_WINDOW} needs a batching window of at least 1 second."
+            )
+        if not 0 <= debounce_seconds <= MAX_DEBOUNCE_SECONDS:
+            raise TriggerException(
+                f"debounce_seconds should be between 0 and {MAX_DEBOUNCE_SECONDS}, got {debounce_seconds}"
+            )
+        if bucket is None and not prefix:
+            raise TriggerException(
+                "pass the prefix of the objects that trigger the workflow, "
+                "the workflows write to the data bucket themselves."
+            )
+        self.prefix = prefix or ""
+        self.suffix = suffix
+        self.bucket = bucket
+        self.batch_size = batch_size
+        self.batching_window_seconds = batching_window_seconds
+        self.debounce_seconds = debounce_seconds
+
+    def _get_bucket_name(self, workflow: core.Construct) -> str:
+        """get the name of the bucket, the data bucket sends its events to
+        eventbridge."""
+        if self.bucket is not None:
+            return self.bucket
+        if workflow.context is None:
+            raise TriggerException(
+                f"we need a datajob context to trigger {workflow.unique_name} on the data bucket. "
+                f"Use the datajob stack as a context manager or call init_datajob_context."
+            )
+        self._assert_no_datajob_prefix(workflow)
+        workflow.context.data_bucket.node.default_child.add_property_override(
+            "NotificationConfiguration.EventBridgeConfiguration.EventBridgeEnabled",
+            True,
+        )
+        return workflow.context.data_bucket_name
+
+    def _assert_no_datajob_prefix(self, workflow: core.Construct) -> None:
+        """the workflows write their results, the cache ledger, query results
+        and logs to the data bucket, an object there should not trigger a
+        workflow."""
+        for datajob_prefix in _get_datajob_prefixes(workflow):
+            if self.prefix.startswith(datajob_prefix) or datajob_prefix.startswith(
+                self.prefix
+            ):
+                raise TriggerException(
+                    f"the prefix {self.prefix} of the trigger of {workflow.unique_name} overlaps {datajob_prefix}, "
+                    f"datajob writes there. Land the objects under another prefix."
+                )
+
+    def _get_key_filter(self) -> dict:
+        if self.suffix is None:
+            return {"prefix": self.prefix}
+        return {"wildcard": f"{self.prefix}*{self.suffix}"}
+
+    def create(
+        self, workflow: core.Construct, state_machine_arn: str, role: iam.Role
+    ) -> None:
+        index = _get_index(workflow, self)
+        name = f"{workflow.unique_name}-s3-{index}"
+        queue = aws_sqs.Queue(
+            workflow,
+            f"{name}-queue",
+            queue_name=name,
+            # the function hides the messages it puts back for the rest of the debounce time.
+            visibility_timeout=core.Duration.seconds(
+                max(6 * TRIGGER_FUNCTION_TIMEOUT_SECONDS, self.debounce_seconds)
+            ),
+            removal_policy=core.RemovalPolicy.DESTROY,
+        )
+        rule = Trigger._create_rule(
+            workflow,
+            name,
+            target_arn=queue.queue_arn,
+            event_pattern={
+                "source": ["aws.s3"],
+                "detail-type": ["Object Created"],
+                "detail": {
+                    "bucket": {"name": [self._get_bucket_name(workflow)]},
+                    "object": {"key": [self._get_key_filter()]},
+                },
+            },
+        )
+        queue.add_to_resource_policy(
+            iam.PolicyStatement(
+                principals=[iam.ServicePrincipal("events.amazonaws.com")],
+                actions=["sqs:SendMessage"],
+                resources=[queue.queue_arn],
+                conditions={"ArnEquals": {"aws:SourceArn": rule.attr_arn}},
+            )
+        )
+        environment = {
+            "STATE_MACHINE_ARN": state_machine_arn,
+            "QUEUE_URL": queue.queue_url,
+            "DEBOUNCE_SECONDS": str(self.debounce_seconds),
+            "EXECUTION_INPUT": json.dumps(self.input or {}),
+            "EXECUTION_INPUT_KEYS": json.dumps(workflow.get_execution_input_keys()),
+        }
+        debounce_table = None
+        if self.debounce_seconds:
+            debounce_table = aws_dynamodb.Table(
+                workflow,
+                f"{name}-debounce",
+                table_name=f"{name}-debounce",
+                partition_key=aws_dynamodb.Attribute(
+                    name=DEBOUNCE_MARKER_KEY, type=aws_dynamodb.AttributeType.STRING
+                ),
+                billing_mode=aws_dynamodb.BillingMode.PAY_PER_REQUEST,
+                removal_policy=core.RemovalPolicy.DESTROY,
+            )
+            environment["DEBOUNCE_TABLE"] = debounce_table.table_name
+            environment["TRIGGER_NAME"] = name
+        function = aws_lambda.Function(
+            workflow,
+            f"{name}-function",
+            function_name=name,
+            code=_get_handler_code(),
+            handler="index.handler",
+            runtime=aws_lambda.Runtime.PYTHON_3_9,
+            timeout=core.Duration.seconds(TRIGGER_FUNCTION_TIMEOUT_SECONDS),
+            reserved_concurrent_executions=TRIGGER_FUNCTION_CONCURRENCY,
+            environment=environment,
+        )
+        queue.grant_consume_messages(function)
+        if debounce_table is not None:
+            debounce_table.grant_read_write_data(function)
+        function.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["states:StartExecution"], resources=[state_machine_arn]
+            )
+        )
+        aws_lambda.EventSourceMapping(
+            workflow,
+            f"{name}-event-source",
+            target=function,
+            event_source_arn=queue.queue_arn,
+            batch_size=self.batch_size,
+            max_batching_window=core.Duration.seconds(self.batching_window_seconds)
+            if self.batching_window_seconds
+            else None,
+            report_batch_item_failures=True,
+        )
+
+
+def _get_handler_code() -> aws_lambda.Code:
+    """get the handler of the s3 trigger as the code of a lambda function.
+
+    The handler is too large for inline code, we deploy a folder with
+    the handler as index.py.
+    """
+    handler_dir = Path(tempfile.mkdtemp())
+    shutil.copyfile(TRIGGER_HANDLER_PATH, handler_dir / "index.py")
+    return aws_lambda.Code.from_asset(str(handler_dir))
+
+
+def _get_datajob_prefixes(workflow: core.Construct) -> list:
+    """get the prefixes in the data bucket that datajob writes to."""
+    # these modules import the workflow, that imports the triggers.
+    from datajob.athena import athena_query
+    from datajob.emr import emr_serverless_job
+    from datajob.glue import glue_job
+
+    return [
+        f"{workflow.stage or DataJobExecutionInput.DEFAULT_RUN_STAGE}/",
+        f"{task_cache.TASK_CACHE_PREFIX}/",
+        f"{athena_query.ATHENA_RESULTS_PREFIX}/",
+        f"{emr_serverless_job.EMR_SERVERLESS_LOGS_PREFIX}/",
+        f"{glue_spark_config.SHUFFLE_PREFIX}/",
+        f"{glue_job.STREAMING_CHECKPOINTS_PREFIX}/",
+    ]
+
+
+def _get_index(workflow: core.Construct, trigger: Trigger) -> int:
+    """the position of the trigger among the triggers of the workflow, to give
+    its resources a unique name."""
+    return next(
+        index
+        for index, a_trigger in enumerate(workflow.triggers)
+        if a_trigger is trigger
+    )
@@ -0,0 +1,361 @@
+"""The lambda function that starts a workflow for a batch of s3 events.
+
+With a debounce table, every batch adds its objects to the debounce record of
+the trigger and waits until no object landed for the debounce time. The first
+batch that finds the burst quiet starts one execution for all the objects in
+the record and removes them from it, the other batches of the burst find them
+gone and stop.
+
+We deploy this file as inline code, it only depends on boto3.
+"""
+import hashlib
+import json
+import math
+import os
+from datetime import datetime
+from datetime import timezone
+from typing import Union
+
+import boto3
+
+DATAJOB_TRIGGER = "DatajobTrigger"
+# see stepfunctions_trigger.DEBOUNCE_MARKER_KEY.
+DEBOUNCE_MARKER_KEY = "trigger"
+# the attribute of the debounce marker with the time the last object landed, in seconds since the epoch.
+LAST_LANDED_ATTRIBUTE = "last_landed"
+# the attributes of the debounce marker with the s3 urls and the number of objects of the burst.
+OBJECTS_ATTRIBUTE = "objects"
+OBJECT_COUNT_ATTRIBUTE = "object_count"
+# the attribute of the debounce marker with the name of the last execution we started.
+STARTED_ATTRIBUTE = "started"
+# the max number of characters of a unique name, see stepfunctions_execute.MAX_CHARS.
+MAX_CHARS = 63
+# the max number of characters of the name of an execution.
+MAX_EXECUTION_NAME_CHARS = 80
+# the execution input is at most 256KB, we pass at most this number of objects.
+MAX_OBJECTS = 1000
+# sqs changes the visibility of at most 10 messages per request.
+VISIBILITY_BATCH_SIZE = 10
+
+
+def get_objects(records: list) -> list:
+    """get the s3 url and the time of the objects in the eventbridge events of
+    the sqs messages.
+
+    :param records: the sqs messages of the batch.
+    :return: a list of (s3 url, time the object was created).
+    """
+    objects = []
+    for record in records:
+        event = json.loads(record["body"])
+        detail = event["detail"]
+        created = datetime.strptime(event["time"], "%Y-%m-%dT%H:%M:%SZ").replace(
+            tzinfo=timezone.utc
+        )
+        objects.append(
+            (f"s3://{detail['bucket']['name']}/{detail['object']['key']}", created)
+        )
+    return objects
+
+
+def is_first_receive(record: dict) -> bool:
+    """a message we put back comes back with a higher receive count, we only
+    record its object the first time."""
+    return record.get("attributes", {}).get("ApproximateReceiveCount", "1") == "1"
+
+
+def record_objects(
+    dynamodb_client, table_name: str, trigger: str, records: list, objects: list
+) -> None:
+    """Add the objects of the batch that we see for the first time to the
+    debounce marker of the trigger.
+
+    The marker keeps the s3 urls of at most MAX_OBJECTS objects, and counts
+    all of them.
+
+    :param dynamodb_client: the dynamodb client.
+    :param table_name: the table with the debounce marker.
+    :param trigger: the name of the trigger.
+    :param records: the sqs messages of the batch.
+    :param objects: a list of (s3 url, time the object was created) of the messages.
+    :return: None
+    """
+    urls = sorted(
+        {url for record, (url, _) in zip(records, objects) if is_first_receive(record)}
+    )
+    if not urls:
+        return
+    key = {DEBOUNCE_MARKER_KEY: {"S": trigger}}
+    try:
+        dynamodb_client.update_item(
+            TableName=table_name,
+            Key=key,
+            UpdateExpression="ADD #objects :urls",
+            ConditionExpression="attribute_not_exists(#objects) OR size(#objects) < :max",
+            ExpressionAttributeNames={"#objects": OBJECTS_ATTRIBUTE},
+            ExpressionAttributeValues={
+                ":urls": {"SS": urls},
+                ":max": {"N": str(MAX_OBJECTS)},
+            },
+        )
+    except dynamodb_client.exceptions.ConditionalCheckFailedException:
+        print(f"the burst has more than {MAX_OBJECTS} objects, we only count them")
+    dynamodb_client.update_item(
+        TableName=table_name,
+        Key=key,
+        UpdateExpression="ADD #count :count",
+        ExpressionAttributeNames={"#count": OBJECT_COUNT_ATTRIBUTE},
+        ExpressionAttributeValues={":count": {"N": str(len(urls))}},
+    )
+
+
+def get_last_landed(
+    dynamodb_client, table_name: str, trigger: str, newest: datetime
+) -> datetime:
+    """Record the time the newest object of the batch landed in the debounce
+    marker of the trigger, and get the time the newest object of all the
+    batches landed.
+
+    :param dynamodb_client: the dynamodb client.
+    :param table_name: the table with the debounce marker.
+    :param trigger: the name of the trigger.
+    :param newest: the time the newest object of the batch landed.
+    :return: the time the last object landed.
+    """
+    key = {DEBOUNCE_MARKER_KEY: {"S": trigger}}
+    try:
+        dynamodb_client.update_item(
+            TableName=table_name,
+            Key=key,
+            UpdateExpression="SET #landed = :landed",
+            ConditionExpression="attribute_not_exists(#landed) OR #landed < :landed",
+            ExpressionAttributeNames={"#landed": LAST_LANDED_ATTRIBUTE},
+            ExpressionAttributeValues={":landed": {"N": str(int(newest.timestamp()))}},
+        )
+        return newest
+    except dynamodb_client.exceptions.ConditionalCheckFailedException:
+        item = dynamodb_client.get_item(
+            TableName=table_name, Key=key, ConsistentRead=True
+        )["Item"]
+        return datetime.fromtimestamp(
+            int(item[LAST_LANDED_ATTRIBUTE]["N"]), tz=timezone.utc
+        )
+
+
+def get_debounce_delay(
+    objects: list, debounce_seconds: int, now: datetime, last_landed: datetime = None
+) -> int:
+    """get the seconds we still have to wait until no object landed for
+    debounce_seconds, 0 when we can start the execution.
+
+    :param objects: a list of (s3 url, time the object was created).
+    :param debounce_seconds: the quiet time we wait for.
+    :param now: the current time.
+    :param last_landed: the time the last object of any batch landed, see get_last_landed.
+    :return: the number of seconds.
+    """
+    if not debounce_seconds or not objects:
+        return 0
+    newest = max(created for _, created in objects)
+    if last_landed is not None:
+        newest = max(newest, last_landed)
+    return max(0, math.ceil(debounce_seconds - (now - newest).total_seconds()))
+
+
+def postpone(sqs_client, queue_url: str, records: list, delay: int) -> dict:
+    """Hide the messages of the batch for the delay and report them as failed,
+    so that the event source puts them back in the queue."""
+    for i in range(0, len(records), VISIBILITY_BATCH_SIZE):
+        sqs_client.change_message_visibility_batch(
+            QueueUrl=queue_url,
+            Entries=[
+                {
+                    "Id": str(j),
+                    "ReceiptHandle": record["receiptHandle"],
+                    "VisibilityTimeout": delay,
+                }
+                for j, record in enumerate(records[i : i + VISIBILITY_BATCH_SIZE])
+            ],
+        )
+    return {
+        "batchItemFailures": [
+            {"itemIdentifier": record["messageId"]} for record in records
+        ]
+    }
+
+
+def get_unique_name(name: str, now: datetime) -> str:
+    """add the current time behind the name, as datajob execute does."""
+    suffix = now.strftime("%Y%m%dT%H%M%S%f")
+    return f"{name[: MAX_CHARS - len(suffix) - 1]}-{suffix}"
+
+
+def get_execution_name(trigger: str, execution_input: dict) -> str:
+    """name the execution after the trigger and its input, so that two batches
+    that start the same burst start the same execution."""
+    digest = hashlib.sha256(
+        json.dumps(execution_input, sort_keys=True).encode()
+    ).hexdigest()[:16]
+    return f"{trigger[: MAX_EXECUTION_NAME_CHARS - len(digest) - 1]}-{digest}"
+
+
+def get_execution_input(
+    urls: list,
+    object_count: int,
+    execution_input: dict,
+    execution_input_keys: list,
+    now: datetime,
+) -> dict:
+    """add the objects and a unique name for every key of the execution input
+    of the workflow."""
+    return {
+        **execution_input,
+        **{key: get_unique_name(key, now) for key in execution_input_keys},
+        DATAJOB_TRIGGER: {
+            "Source": "s3",
+            "ObjectCount": object_count,
+            "Objects": sorted(urls)[:MAX_OBJECTS],
+        },
+    }
+
+
+def start_burst(
+    dynamodb_client, sfn_client, table_name: str, trigger: str
+) -> Union[str, None]:
+    """Start one execution for the objects in the debounce marker of the
+    trigger and remove them from the marker.
+
+    Batches of the same burst can find it quiet at the same time. They
+    read the same objects and start an execution with the same name and
+    input, which step functions starts once. Only the batch that records
+    the name removes the objects, objects that land meanwhile stay for
+    the next burst.
+
+    :param dynamodb_client: the dynamodb client.
+    :param sfn_client: the stepfunctions client.
+    :param table_name: the table with the debounce marker.
+    :param trigger: the name of the trigger.
+    :return: the name of the execution, None if another batch started the objects already.
+    """
+    key = {DEBOUNCE_MARKER_KEY: {"S": trigger}}
+    item = dynamodb_client.get_item(
+        TableName=table_name, Key=key, ConsistentRead=True
+    ).get("Item", {})
+    object_count = int(item.get(OBJECT_COUNT_ATTRIBUTE, {}).get("N", "0"))
+    if not object_count:
+        return None
+    urls = item.get(OBJECTS_ATTRIBUTE, {}).get("SS", [])
+    last_landed = datetime.fromtimestamp(
+        int(item[LAST_LANDED_ATTRIBUTE]["N"]), tz=timezone.utc
+    )
+    execution_input = get_execution_input(
+        urls,
+        object_count=object_count,
+        execution_input=json.loads(os.environ.get("EXECUTION_INPUT") or "{}"),
+        execution_input_keys=json.loads(os.environ.get("EXECUTION_INPUT_KEYS") or "[]"),
+        now=last_landed,
+    )
+    name = get_execution_name(trigger, execution_input)
+    try:
+        sfn_client.start_execution(
+            stateMachineArn=os.environ["STATE_MACHINE_ARN"],
+            name=name,
+            input=json.dumps(execution_input),
+        )
+    except sfn_client.exceptions.ExecutionAlreadyExists:
+        print(f"{name} started already")
+    update_expression = "ADD #count :count SET #started = :name"
+    expression_attribute_names = {
+        "#count": OBJECT_COUNT_ATTRIBUTE,
+        "#started": STARTED_ATTRIBUTE,
+    }
+    expression_attribute_values = {
+        ":count": {"N": str(-object_count)},
+        ":name": {"S": name},
+    }
+    if urls:
+        update_expression = f"DELETE #objects :urls {update_expression}"
+        expression_attribute_names["#objects"] = OBJECTS_ATTRIBUTE
+        expression_attribute_values[":urls"] = {"SS": urls}
+    try:
+        dynamodb_client.update_item(
+            TableName=table_name,
+            Key=key,
+            UpdateExpression=update_expression,
+            ConditionExpression="attribute_not_exists(#started) OR #started <> :name",
+            ExpressionAttributeNames=expression_attribute_names,
+            ExpressionAttributeValues=expression_attribute_values,
+        )
+    except dynamodb_client.exceptions.ConditionalCheckFailedException:
+        return None
+    return name
+
+
+def handler(
+    event, context, sqs_client=None, sfn_client=None, dynamodb_client=None, now=None
+):
+    """start one execution for the burst, or put the batch back in the queue
+    while objects keep landing."""
+    records = event["Records"]
+    objects = get_objects(records)
+    now = now or datetime.now(timezone.utc)
+    sfn_client = sfn_client or boto3.client("stepfunctions")
+    table_name = os.environ.get("DEBOUNCE_TABLE")
+    last_landed = None
+    if table_name and objects:
+        dynamodb_client = dynamodb_client or boto3.client("dynamodb")
+        # we move the last landed time before we add the objects, so that no batch starts them before the burst is quiet.
+        last_landed = get_last_landed(
+            dynamodb_client,
+            table_name=table_name,
+            trigger=os.environ["TRIGGER_NAME"],
+            newest=max(created for _, created in objects),
+        )
+        record_objects(
+            dynamodb_client,
+            table_name=table_name,
+            trigger=os.environ["TRIGGER_NAME"],
+            records=records,
+            objects=objects,
+        )
+    delay = get_debounce_delay(
+        objects,
+        debounce_seconds=int(os.environ["DEBOUNCE_SECONDS"]),
+        now=now,
+        last_landed=last_landed,
+    )
+    if delay:
+        print(f"{len(objects)} objects, the last one landed recently, waiting {delay}s")
+        return postpone(
+            sqs_client or boto3.client("sqs"),
+            queue_url=os.environ["QUEUE_URL"],
+            records=records,
+            delay=delay,
+        )
+    if table_name and objects:
+        name = start_burst(
+            dynamodb_client,
+            sfn_client,
+            table_name=table_name,
+            trigger=os.environ["TRIGGER_NAME"],
+        )
+        if name is None:
+            print(
+                f"another batch started the execution of these {len(objects)} objects"
+            )
+        else:
+            print(f"started {name} for the burst")
+        return {"batchItemFailures": []}
+    execution_input = get_execution_input(
+        [url for url, _ in objects],
+        object_count=len(objects),
+        execution_input=json.loads(os.environ.get("EXECUTION_INPUT") or "{}"),
+        execution_input_keys=json.loads(os.environ.get("EXECUTION_INPUT_KEYS") or "[]"),
+        now=now,
+    )
+    response = sfn_client.start_execution(
+        stateMachineArn=os.environ["STATE_MACHINE_ARN"],
+        input=json.dumps(execution_input),
+    )
+    print(f"started {response['executionArn']} for {len(objects)} objects")
+    return {"batchItemFailures": []}
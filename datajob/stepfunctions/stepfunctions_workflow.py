@@ -1,25 +1,44 @@
+import contextvars
 import os
 import uuid
 from collections import defaultdict
+from enum import Enum
+from functools import lru_cache
+from typing import Iterable
 from typing import Iterator
 from typing import Union
 
 import boto3
-import contextvars
 import toposort
 from aws_cdk import aws_iam as iam
+from aws_cdk import aws_logs
 from aws_cdk import core
 from aws_cdk.aws_stepfunctions import CfnStateMachine
+from aws_cdk.core import Arn
+from aws_cdk.core import ArnComponents
 from stepfunctions.steps import Catch
 from stepfunctions.steps import Chain
+from stepfunctions.steps import Choice
+from stepfunctions.steps import ChoiceRule
+from stepfunctions.steps import Pass
 from stepfunctions.steps.compute import GlueStartJobRunStep
 from stepfunctions.steps.service import SnsPublishStep
+from stepfunctions.steps.service import StepFunctionsStartExecutionStep
+from stepfunctions.steps.states import Graph
 from stepfunctions.steps.states import Parallel
+from stepfunctions.steps.states import State
 from stepfunctions.workflow import Workflow
 
+from datajob import datajob_task_output
 from datajob import logger
+from datajob.cache import task_cache
 from datajob.datajob_base import DataJobBase
+from datajob.datajob_execution_input import DataJobExecutionInput
+from datajob.glue import glue_capacity
+from datajob.glue import glue_job_bookmark
 from datajob.sns.sns import SnsTopic
+from datajob.stepfunctions.stepfunctions_trigger import Trigger
+from datajob.stepfunctions.stepfunctions_trigger import TriggerException
 
 __workflow = contextvars.ContextVar("workflow")
 
@@ -28,6 +47,21 @@ class StepfunctionsWorkflowException(Exception):
     pass
 
 
+class StepfunctionsWorkflowType(Enum):
+    STANDARD = "STANDARD"
+    EXPRESS = "EXPRESS"
+
+    @staticmethod
+    def get_values():
+        return [e.value for e in StepfunctionsWorkflowType]
+
+
+# express workflows cannot wait for a job to complete or for a callback.
+EXPRESS_UNSUPPORTED_INTEGRATIONS = (".sync", ".sync:2", ".waitForTaskToken")
+# the number of graphs for which we keep the toposorted levels.
+TOPOSORT_CACHE_SIZE = 128
+
+
 class StepfunctionsWorkflow(DataJobBase):
     """Class that defines the methods to create and execute an orchestration
     using the step functions sdk.
@@ -39,6 +73,15 @@ class StepfunctionsWorkflow(DataJobBase):
             some-glue-job-1 >> [some-glue-job-2,some-glue-job-3] >> some-glue-job-4
 
         tech_skills_parser_orchestration.execute()
+
+    a workflow is also a task of another workflow, the other workflow starts an execution
+    of it and waits until it completes:
+
+        with StepfunctionsWorkflow(datajob_stack, "ingest") as ingest:
+            task1 >> task2
+
+        with StepfunctionsWorkflow(datajob_stack, "main") as main:
+            ingest >> task3
     """
 
     def __init__(
@@ -48,8 +91,29 @@ class StepfunctionsWorkflow(DataJobBase):
         notification: Union[str, list] = None,
         role: iam.Role = None,
         region: str = None,
+        skippable: bool = False,
+        workflow_type: str = StepfunctionsWorkflowType.STANDARD.value,
+        log_level: str = None,
+        max_parallelism: int = None,
+        triggers: list = None,
         **kwargs,
     ):
+        """
+        :param datajob_stack: aws cdk core construct object.
+        :param name: a name for this stepfunctions workflow.
+        :param notification: email address as string or list of email addresses to be subscribed.
+        :param role: you can provide a cdk iam role object as arg. if not provided this class will instantiate a role.
+        :param region: AWS region where we want to deploy our workflow to.
+        :param skippable: wrap each task in a choice so that it can be skipped via the execution input.
+        this is what `datajob execute --resume` uses to skip the tasks that already succeeded.
+        :param workflow_type: STANDARD is the default. choose EXPRESS for short workflows that run at a high frequency.
+        :param log_level: ALL / ERROR / FATAL / OFF. the level of the execution history we log to cloudwatch.
+        the default is ERROR for an EXPRESS workflow and no logging for a STANDARD workflow.
+        :param max_parallelism: the max number of tasks that run at the same time.
+        tasks that can run in parallel are divided over this number of lanes, each lane runs its tasks one after the other.
+        :param triggers: a list of Schedule, S3ObjectCreated or WorkflowSucceeded that start the workflow.
+        :param kwargs: any extra kwargs for the stepfunctions Workflow.
+        """
         super().__init__(datajob_stack, name, **kwargs)
         self.workflow = None
         self.chain_of_tasks = None
@@ -63,75 +127,584 @@ class StepfunctionsWorkflow(DataJobBase):
             region if region is not None else os.environ.get("AWS_DEFAULT_REGION")
         )
         self.notification = self._setup_notification(notification)
+        self.skippable = skippable
+        self.workflow_type = StepfunctionsWorkflow._get_workflow_type(workflow_type)
+        self.log_level = StepfunctionsWorkflow._get_log_level(
+            log_level=log_level, workflow_type=self.workflow_type
+        )
+        self.max_parallelism = StepfunctionsWorkflow._get_max_parallelism(
+            max_parallelism
+        )
         self.kwargs = kwargs
+        self.state_machine = None
+        self.triggers = []
+        for trigger in triggers or []:
+            self.add_trigger(trigger)
         # init directed graph dict where values are a set.
         # we do it like this so that we can use toposort.
         self.directed_graph = defaultdict(set)
+        # when a task of the workflow has outputs, we keep the outputs in the state.
+        self.passes_outputs = False
+
+    def get_state_machine_arn(self) -> str:
+        """the arn of the state machine of this workflow."""
+        return Arn.format(
+            components=ArnComponents(
+                partition="aws",
+                service="states",
+                resource="stateMachine",
+                resource_name=self.unique_name,
+                arn_format=core.ArnFormat.COLON_RESOURCE_NAME,
+            ),
+            stack=self.datajob_stack,
+        )
+
+    @property
+    def sfn_task(self) -> StepFunctionsStartExecutionStep:
+        """the task that runs this workflow from another workflow, we only
+        create it when this workflow is a task of another workflow."""
+        if self._sfn_task is None:
+            self._sfn_task = self._create_start_execution_task()
+        return self._sfn_task
+
+    @sfn_task.setter
+    def sfn_task(self, task: State) -> None:
+        self._sfn_task = task
+
+    def _create_start_execution_task(self) -> StepFunctionsStartExecutionStep:
+        """Create the task that runs this workflow from another workflow. The
+        task starts an execution with the execution input of the other
+        workflow, so that skip flags and bookmark options pass through, and
+        waits until the execution completes.
+
+        We add the run id of the other workflow to the execution input, the
+        DatajobRunId of its execution input or else the name of its execution,
+        so that this workflow writes its outputs under the same run id.
+
+        :return: a startExecution.sync:2 task.
+        """
+        run_id_input = (
+            "States.StringToJson(States.Format("
+            f'\'\\{{"{DataJobExecutionInput.DATAJOB_RUN_ID}": "{{}}"\\}}\', '
+            "$$.Execution.Name))"
+        )
+        return StepFunctionsStartExecutionStep(
+            state_id=self.unique_name,
+            parameters={
+                "StateMachineArn": self.get_state_machine_arn(),
+                # the keys of the execution input win, a resumed execution keeps its run id.
+                "Input.$": f"States.JsonMerge({run_id_input}, $$.Execution.Input, false)",
+            },
+        )
+
+    @classmethod
+    def from_graph(
+        cls, datajob_stack: core.Construct, name: str, graph: dict, **kwargs
+    ) -> "StepfunctionsWorkflow":
+        """Create a workflow from a graph instead of with >>.
+
+        example:
+
+            StepfunctionsWorkflow.from_graph(
+                datajob_stack, "workflow", {task1: [task2, task3], task2: [task4], task3: [task4]}
+            )
+
+        :param datajob_stack: aws cdk core construct object.
+        :param name: a name for this stepfunctions workflow.
+        :param graph: a task as key and the tasks that run after it as value.
+        :param kwargs: any extra kwargs for the StepfunctionsWorkflow.
+        :return: the stepfunctions workflow.
+        """
+        with cls(datajob_stack, name, **kwargs) as workflow:
+            workflow.add_graph(graph)
+        return workflow
+
+    def add_edges(self, edges: Iterable[tuple]) -> None:
+        """add many dependencies at once, it's the same as upstream >>
+        downstream for every edge.
+
+        :param edges: (upstream task, downstream task) pairs.
+        :return: None
+        """
+        for upstream, downstream in edges:
+            _validate_can_be_orchestrated(upstream, downstream)
+            self.directed_graph[downstream].add(upstream)
+
+    def add_graph(self, graph: dict) -> None:
+        """add the tasks of a graph, a task without tasks after it is added on
+        its own.
+
+        :param graph: a task as key and the tasks that run after it as value.
+        :return: None
+        """
+        for upstream, downstreams in graph.items():
+            _validate_can_be_orchestrated(upstream)
+            self.directed_graph[upstream]
+            self.add_edges((upstream, downstream) for downstream in downstreams or [])
+
+    def add_trigger(self, trigger: Trigger) -> None:
+        """start the workflow on a schedule, when objects land in s3 or when
+        another workflow succeeds.
+
+        :param trigger: a Schedule, S3ObjectCreated or WorkflowSucceeded.
+        :return: None
+        """
+        if not isinstance(trigger, Trigger):
+            raise TriggerException(
+                f"a trigger should be a Schedule, S3ObjectCreated or WorkflowSucceeded, got {trigger}"
+            )
+        self.triggers.append(trigger)
+
+    @staticmethod
+    def _get_workflow_type(workflow_type: str) -> str:
+        """assert if the workflow type is a valid value.
+
+        :param workflow_type: STANDARD or EXPRESS
+        :return: the workflow type
+        """
+        if workflow_type not in StepfunctionsWorkflowType.get_values():
+            raise StepfunctionsWorkflowException(
+                f"Unknown workflow type {workflow_type}, "
+                f"choose one of {StepfunctionsWorkflowType.get_values()}"
+            )
+        return workflow_type
+
+    @staticmethod
+    def _get_max_parallelism(max_parallelism: int) -> Union[int, None]:
+        """assert that at least one task can run at the same time.
+
+        :param max_parallelism: the max number of tasks that run at the same time.
+        :return: the max parallelism or None if there is no limit.
+        """
+        if max_parallelism is not None and max_parallelism < 1:
+            raise StepfunctionsWorkflowException(
+                f"max_parallelism should be at least 1, got {max_parallelism}"
+            )
+        return max_parallelism
+
+    @staticmethod
+    def _get_log_level(log_level: str, workflow_type: str) -> Union[str, None]:
+        """Specify a default log level when none is given. An express workflow
+        only keeps its execution history in cloudwatch logs, therefore we log
+        errors by default.
 
-    def add_task(self, some_task: DataJobBase) -> object:
+        :param log_level: the level of the execution history we want to log.
+        :param workflow_type: STANDARD or EXPRESS
+        :return: the log level or None if we don't log.
+        """
+        if (
+            log_level is None
+            and workflow_type == StepfunctionsWorkflowType.EXPRESS.value
+        ):
+            return "ERROR"
+        return log_level
+
+    def add_task(self, some_task: DataJobBase) -> Union[State, Chain]:
         """get the stepfunctions  task,  sfn_task, we would like to
         orchestrate."""
-        return some_task.sfn_task
+        if some_task is self:
+            raise StepfunctionsWorkflowException(
+                f"workflow {self.name} cannot be a task of itself."
+            )
+        run_prefix_root = DataJobExecutionInput.get_run_prefix_root(
+            stage=self.stage, workflow_name=self.name
+        )
+        for output in getattr(some_task, "task_outputs", {}).values():
+            output.run_prefix_root = run_prefix_root
+            output.cached = getattr(some_task, "cache", False)
+        if hasattr(some_task, "set_run_prefix_root"):
+            some_task.set_run_prefix_root(run_prefix_root)
+        sfn_task = some_task.sfn_task
+        state_id = sfn_task.state_id
+        if self.passes_outputs:
+            self._pass_task_result(some_task, sfn_task)
+        if getattr(some_task, "capacity_table", None):
+            sfn_task = self._make_task_sized(some_task, sfn_task, state_id)
+        if getattr(some_task, "job_bookmark", None):
+            sfn_task = self._make_task_bookmarked(some_task, sfn_task, state_id)
+        if getattr(some_task, "concurrency_pool", None):
+            sfn_task = self._make_task_governed(some_task, sfn_task, state_id)
+        if getattr(some_task, "cache", False):
+            sfn_task = self._make_task_cacheable(
+                some_task, sfn_task, state_id, run_prefix_root=run_prefix_root
+            )
+            if self.passes_outputs:
+                # the states that look up the cache add to the state, we only keep the outputs.
+                sfn_task = datajob_task_output.keep_state(sfn_task, state_id)
+                datajob_task_output.pass_branches(sfn_task)
+        if self.skippable:
+            upstream_state_ids = [
+                a_task.sfn_task.state_id
+                for a_task in self.directed_graph.get(some_task, ())
+                if a_task is not Ellipsis
+            ]
+            sfn_task = self._make_task_skippable(
+                sfn_task, state_id, upstream_state_ids=upstream_state_ids
+            )
+        return sfn_task
+
+    @staticmethod
+    def _pass_task_result(some_task: DataJobBase, sfn_task: State) -> None:
+        """add the outputs of the task to the state instead of replacing the
+        state with the result of the task.
+
+        :param some_task: the datajob task.
+        :param sfn_task: the stepfunctions task of some_task.
+        :return: None
+        """
+        outputs = list(getattr(some_task, "task_outputs", {}).values())
+        upstream_outputs = [
+            output
+            for output in datajob_task_output.get_task_outputs(sfn_task.parameters)
+            if output.state_id != sfn_task.state_id
+        ]
+        if getattr(some_task, "cache", False) and (
+            upstream_outputs or any(not output.is_location() for output in outputs)
+        ):
+            raise StepfunctionsWorkflowException(
+                f"{some_task} is cached, a cached task can only have outputs that are folders in the data bucket, "
+                f"and cannot use the outputs of other tasks. When the cache skips the task, there is no result to pass."
+            )
+        datajob_task_output.pass_result(sfn_task, outputs)
+
+    @staticmethod
+    def _make_task_sized(
+        some_task: DataJobBase, sfn_task: State, state_id: str
+    ) -> Chain:
+        """Measure the input of a glue job before it runs and choose the
+        capacity of the run from the capacity table of the glue job.
+
+        :param some_task: the glue job that has a capacity table.
+        :param sfn_task: the stepfunctions task of some_task.
+        :param state_id: the state_id of the task.
+        :return: a chain of states that sizes the task.
+        """
+        return glue_capacity.make_task_sized(
+            sfn_task=sfn_task,
+            state_id=state_id,
+            function_name=some_task.capacity_function.function_name,
+            bucket=some_task.capacity_bucket,
+            prefix=some_task.capacity_prefix,
+            capacity_table=some_task.capacity_table,
+        )
+
+    @staticmethod
+    def _make_task_bookmarked(
+        some_task: DataJobBase, sfn_task: Union[State, Chain], state_id: str
+    ) -> Chain:
+        """Read the bookmark option of a glue job from the execution input, so
+        that we can enable, pause, disable or reset the bookmark per execution.
+
+        :param some_task: the glue job that uses bookmarks.
+        :param sfn_task: the stepfunctions task of some_task, or the chain of states that sizes it.
+        :param state_id: the state_id of the task.
+        :return: a chain of states that sets the bookmark option of the task.
+        """
+        return glue_job_bookmark.make_task_bookmarked(
+            sfn_task=sfn_task,
+            state_id=state_id,
+            job_name=some_task.job_name,
+            job_bookmark=some_task.job_bookmark,
+        )
+
+    def _make_task_governed(
+        self, some_task: DataJobBase, sfn_task: Union[State, Chain], state_id: str
+    ) -> Chain:
+        """Wait for a free slot in the concurrency pool of the task before
+        running the task, so that the workflows of the stack together do not
+        run more tasks than the pool allows.
+
+        :param some_task: the datajob task that runs in a concurrency pool.
+        :param sfn_task: the stepfunctions task of some_task, or the chain of states that sets its bookmark option.
+        :param state_id: the state_id of the task.
+        :return: a chain of states that governs the task.
+        """
+        governor = self.datajob_stack.concurrency_governor
+        if governor is None:
+            raise StepfunctionsWorkflowException(
+                f"{some_task} runs in concurrency pool {some_task.concurrency_pool}, "
+                f"but the stack has no ConcurrencyGovernor. Add one to the stack before the task."
+            )
+        governed_task = governor.make_task_governed(
+            sfn_task=sfn_task,
+            state_id=state_id,
+            pool=some_task.concurrency_pool,
+        )
+        if self.passes_outputs:
+            # the task runs in a branch, we take the outputs of the task from the branch.
+            for state in governed_task.steps:
+                if isinstance(state, Parallel):
+                    datajob_task_output.pass_branches(state)
+        return governed_task
+
+    def _make_task_cacheable(
+        self,
+        some_task: DataJobBase,
+        sfn_task: Union[State, Chain],
+        state_id: str,
+        run_prefix_root: str,
+    ) -> Chain:
+        """Check the ledger in the data bucket before running the task and skip
+        the task if it already succeeded with the same code, arguments and
+        inputs, for the same partition date. The tasks after it read the
+        outputs of the task from the run that produced them.
+
+        :param some_task: the datajob task that has caching enabled.
+        :param sfn_task: the stepfunctions task of some_task, or the chain of states that governs it.
+        :param state_id: the state_id of the task.
+        :param run_prefix_root: <stage>/<workflow>, the run prefix without the run id.
+        :return: a chain of states that caches the task.
+        """
+        if self.context is None:
+            raise StepfunctionsWorkflowException(
+                f"we need a datajob context to cache the result of {some_task}. "
+                f"Use the datajob stack as a context manager or call init_datajob_context."
+            )
+        return task_cache.make_task_cacheable(
+            sfn_task=sfn_task,
+            state_id=state_id,
+            static_key=some_task.get_cache_static_key(),
+            inputs=some_task.cache_inputs,
+            bucket_name=self.context.data_bucket_name,
+            prefix=task_cache.TASK_CACHE_PREFIX,
+            run_prefix_root=run_prefix_root,
+            outputs_path=datajob_task_output.get_outputs_path(state_id)
+            if getattr(some_task, "task_outputs", None)
+            else None,
+        )
+
+    @staticmethod
+    def _make_task_skippable(
+        sfn_task: Union[State, Chain],
+        state_id: str,
+        upstream_state_ids: Iterable[str] = (),
+    ) -> Chain:
+        """Put a choice in front of a task that jumps over the task when the
+        skip flag for its state_id is set to true in the execution input.
+
+        example of the execution input to skip task1:
+
+            {"DatajobSkipTasks": {"task1": true}}
+
+        :param sfn_task: the stepfunctions task, or chain of states, we want to be able to skip.
+        :param state_id: the state_id of the task.
+        :param upstream_state_ids: the state_ids of the tasks the task depends on,
+        we keep them in the comment of the choice for `datajob execute --only`.
+        :return: a chain of a choice, the task and a pass state where both paths meet.
+        """
+        skip_flag = DataJobExecutionInput.get_skip_flag_path(state_id)
+        logger.debug(f"making task {state_id} skippable using {skip_flag}")
+        skip_choice = Choice(
+            state_id=f"{state_id}-skip",
+            comment=DataJobExecutionInput.get_upstream_tasks_comment(
+                upstream_state_ids
+            ),
+        )
+        task_done = Pass(state_id=f"{state_id}-done")
+        skip_choice.add_choice(
+            rule=ChoiceRule.And(
+                [
+                    ChoiceRule.IsPresent(variable=skip_flag, value=True),
+                    ChoiceRule.BooleanEquals(variable=skip_flag, value=True),
+                ]
+            ),
+            next_step=task_done,
+        )
+        chain = Chain([skip_choice])
+        StepfunctionsWorkflow._append_to_chain(chain, sfn_task)
+        chain.append(task_done)
+        return chain
+
+    @staticmethod
+    def _append_to_chain(chain: Chain, sfn_task: Union[State, Chain]) -> None:
+        """append a state or all the states of a chain to the tail of a chain.
+
+        :param chain: the chain we want to extend.
+        :param sfn_task: a single state or a chain of states.
+        :return: None
+        """
+        if isinstance(sfn_task, Chain):
+            # the states of the chain are already linked to each other,
+            # we only have to link the tail of our chain to the head of the new states.
+            if chain.steps:
+                chain.steps[-1].next(sfn_task.steps[0])
+            chain.steps.extend(sfn_task.steps)
+        else:
+            chain.append(sfn_task)
 
     def add_parallel_tasks(self, parallel_tasks: Iterator[DataJobBase]) -> Parallel:
         """add tasks in parallel (wrapped in a list) to the workflow we would
         like to orchestrate."""
         parallel_pipelines = Parallel(state_id=uuid.uuid4().hex)
-        for a_task in parallel_tasks:
-            logger.debug(f"adding parallel task {a_task}")
-            sfn_task = self.add_task(a_task)
-            parallel_pipelines.add_branch(sfn_task)
+        if self.max_parallelism is None:
+            for a_task in parallel_tasks:
+                logger.debug(f"adding parallel task {a_task}")
+                sfn_task = self.add_task(a_task)
+                parallel_pipelines.add_branch(sfn_task)
+            if self.passes_outputs:
+                datajob_task_output.pass_branches(parallel_pipelines)
+            return parallel_pipelines
+        for lane in self._split_in_lanes(parallel_tasks, self.max_parallelism):
+            logger.debug(f"adding lane of parallel tasks {lane}")
+            chain_of_lane = Chain()
+            for a_task in lane:
+                self._append_to_chain(chain_of_lane, self.add_task(a_task))
+            parallel_pipelines.add_branch(chain_of_lane)
+        if self.passes_outputs:
+            datajob_task_output.pass_branches(parallel_pipelines)
         return parallel_pipelines
 
-    def _is_one_task(self, directed_graph_toposorted):
-        """If we have length of 2 and the second is an Ellipsis object we have
-        scheduled 1 task.
-
-        example:
-            some_task >> ...
-
-        :param directed_graph_toposorted: a toposorted graph, a graph with all the sorted tasks
-        :return: boolean
+    @staticmethod
+    def _split_in_lanes(
+        parallel_tasks: Iterator[DataJobBase], max_parallelism: int
+    ) -> list:
+        """Divide the tasks over at most max_parallelism lanes so that the
+        estimated cost of the lanes is balanced. We assign the most expensive
+        task first to the lane with the lowest cost so far (longest processing
+        time first). A task without an estimated_cost has a cost of 1.
+
+        :param parallel_tasks: the tasks that can run in parallel.
+        :param max_parallelism: the max number of lanes.
+        :return: a list of lanes, each lane is a list of tasks.
         """
-        return len(directed_graph_toposorted) == 2 and isinstance(
-            list(directed_graph_toposorted[1])[0], type(Ellipsis)
+        sorted_tasks = sorted(
+            parallel_tasks,
+            key=lambda a_task: (
+                -getattr(a_task, "estimated_cost", 1),
+                a_task.unique_name,
+            ),
         )
+        lanes = [[] for _ in range(min(max_parallelism, len(sorted_tasks)))]
+        costs = [0] * len(lanes)
+        for a_task in sorted_tasks:
+            cheapest_lane = costs.index(min(costs))
+            lanes[cheapest_lane].append(a_task)
+            costs[cheapest_lane] += getattr(a_task, "estimated_cost", 1)
+        return lanes
+
+    def _get_levels(self) -> list:
+        """Toposort the directed graph in levels, the tasks of a level only
+        depend on the tasks of the levels before it and run at the same time.
+
+        We toposort the names of the tasks, so that we reuse the result for a
+        graph we already sorted and the order of the tasks does not change
+        between deployments.
+
+        :return: a list of levels, a level is a list of tasks sorted by name.
+        """
+        tasks_by_name = {}
+        names = {}
+        for downstream, upstreams in self.directed_graph.items():
+            # some_task >> ... adds a task without tasks after it.
+            for a_task in (downstream, *upstreams):
+                if a_task is not Ellipsis and a_task not in names:
+                    names[a_task] = _get_unique_key(a_task.unique_name, tasks_by_name)
+                    tasks_by_name[names[a_task]] = a_task
+        dependencies = [
+            (names[downstream], tuple(sorted(names[a_task] for a_task in upstreams)))
+            for downstream, upstreams in self.directed_graph.items()
+            if downstream is not Ellipsis
+        ]
+        levels = _toposort_names(
+            names=tuple(sorted(tasks_by_name)), dependencies=tuple(sorted(dependencies))
+        )
+        if levels is None:
+            cycle = _find_cycle(dict(dependencies))
+            raise StepfunctionsWorkflowException(
+                f"workflow {self.name} has a cycle, it cannot run {' >> '.join(cycle)}"
+            )
+        return [[tasks_by_name[name] for name in level] for level in levels]
 
     def _construct_toposorted_chain_of_tasks(self) -> Chain:
         """Take the directed graph and toposort so that we can efficiently
         organize our workflow, i.e. parallelize where possible.
 
-        if we have 2 elements where one of both is an Ellipsis object we need to orchestrate just 1 job.
-        In the other case we will loop over the toposorted dag and assign a stepfunctions task
+        We loop over the toposorted dag and assign a stepfunctions task
         or assign multiple tasks in parallel.
 
         Returns: toposorted chain of tasks
         """
         self.chain_of_tasks = Chain()
-        directed_graph_toposorted = list(toposort.toposort(self.directed_graph))
-        if self._is_one_task(directed_graph_toposorted=directed_graph_toposorted):
-            sfn_task = self.add_task(next(iter(directed_graph_toposorted[0])))
-            self.chain_of_tasks.append(sfn_task)
-        else:
-            for element in directed_graph_toposorted:
-                if len(element) == 1:
-                    sfn_task = self.add_task(next(iter(element)))
-                elif len(element) > 1:
-                    sfn_task = self.add_parallel_tasks(element)
-                else:
+        for level in self._get_levels():
+            if len(level) == 1:
+                sfn_task = self.add_task(level[0])
+            else:
+                sfn_task = self.add_parallel_tasks(level)
+            self._append_to_chain(self.chain_of_tasks, sfn_task)
+        return self.chain_of_tasks
+
+    def _get_tasks(self) -> list:
+        """get the tasks of the directed graph."""
+        tasks = set(self.directed_graph)
+        for upstream_tasks in self.directed_graph.values():
+            tasks |= upstream_tasks
+        return [a_task for a_task in tasks if isinstance(a_task, DataJobBase)]
+
+    def get_execution_input_keys(self) -> list:
+        """get the keys of the execution input that need a unique name per
+        execution, of the tasks of this workflow and of the workflows it runs.
+
+        :return: the sorted keys.
+        """
+        execution_input_schema = (
+            self.datajob_stack.execution_input.execution_input_schema
+        )
+        keys = set()
+        for a_task in self._get_tasks():
+            if a_task.unique_name in execution_input_schema:
+                keys.add(a_task.unique_name)
+            if isinstance(a_task, StepfunctionsWorkflow):
+                # a workflow passes its execution input to the workflows it runs.
+                keys |= set(a_task.get_execution_input_keys())
+        return sorted(keys)
+
+    def _validate_task_outputs(self) -> None:
+        """a task can only use the outputs of a task of this workflow that runs
+        before it."""
+        levels = {
+            a_task: index
+            for index, level in enumerate(self._get_levels())
+            for a_task in level
+        }
+        tasks_by_state_id = {
+            a_task.sfn_task.state_id: a_task for a_task in self._get_tasks()
+        }
+        for a_task in self._get_tasks():
+            for output in datajob_task_output.get_task_outputs(
+                a_task.sfn_task.parameters
+            ):
+                producer = tasks_by_state_id.get(output.state_id)
+                if producer is None:
                     raise StepfunctionsWorkflowException(
-                        "cannot have an index in the directed graph with 0 elements"
+                        f"{a_task} uses output {output.name} of {output.state_id}, "
+                        f"which is not a task of workflow {self.name}."
+                    )
+                if levels[producer] >= levels[a_task]:
+                    raise StepfunctionsWorkflowException(
+                        f"{a_task} uses output {output.name} of {producer}, "
+                        f"but does not run after it. Add {producer.name} >> {a_task.name} to the workflow."
                     )
-                self.chain_of_tasks.append(sfn_task)
-        return self.chain_of_tasks
 
     def build_workflow(self):
         """create a step functions workflow from the chain_of_tasks."""
+        self.passes_outputs = any(
+            getattr(a_task, "task_outputs", None) for a_task in self._get_tasks()
+        )
+        if self.passes_outputs:
+            self._validate_task_outputs()
         self.chain_of_tasks = self._construct_toposorted_chain_of_tasks()
+        if self.passes_outputs:
+            chain_with_run_states = datajob_task_output.get_run_states(
+                next_state=self.chain_of_tasks.steps[0]
+            )
+            self._append_to_chain(chain_with_run_states, self.chain_of_tasks)
+            self.chain_of_tasks = chain_with_run_states
         logger.debug("creating a chain from all the different steps.")
         self.chain_of_tasks = self._integrate_notification_in_workflow(
             chain_of_tasks=self.chain_of_tasks
         )
+        if self.workflow_type == StepfunctionsWorkflowType.EXPRESS.value:
+            self._validate_express_workflow(Graph(self.chain_of_tasks).to_dict())
         logger.debug(f"creating a workflow with name {self.unique_name}")
         sfn_client = boto3.client("stepfunctions")
         self.workflow = Workflow(
@@ -142,19 +715,110 @@ class StepfunctionsWorkflow(DataJobBase):
             **self.kwargs,
         )
 
+    def _validate_express_workflow(self, definition: dict) -> None:
+        """An express workflow cannot run activities and cannot wait for a job
+        to complete (.sync) or for a callback (.waitForTaskToken). We go
+        through all the states, including the states in parallel branches, and
+        raise an error if we find a task that express cannot run.
+
+        :param definition: the definition of the workflow or of a branch as a dict.
+        :return: None
+        """
+        for state_id, state in definition.get("States", {}).items():
+            resource = state.get("Resource", "")
+            if resource.endswith(EXPRESS_UNSUPPORTED_INTEGRATIONS) or (
+                ":activity:" in resource
+            ):
+                raise StepfunctionsWorkflowException(
+                    f"task {state_id} with resource {resource} is not supported by an express workflow. "
+                    f"Set wait_for_completion=False on the task or use a STANDARD workflow."
+                )
+            for branch in state.get("Branches", []):
+                self._validate_express_workflow(branch)
+            if state.get("Iterator"):
+                self._validate_express_workflow(state.get("Iterator"))
+
+    def _create_logging_configuration(
+        self,
+    ) -> Union[CfnStateMachine.LoggingConfigurationProperty, None]:
+        """Create a cloudwatch log group and log the execution history of the
+        workflow if a log level is set.
+
+        :return: the logging configuration of the state machine or None if we don't log.
+        """
+        if self.log_level is None:
+            return None
+        logger.debug(f"logging {self.unique_name} with level {self.log_level}")
+        log_group = aws_logs.LogGroup(
+            self,
+            f"{self.unique_name}-logs",
+            log_group_name=f"/aws/vendedlogs/states/{self.unique_name}",
+            retention=aws_logs.RetentionDays.ONE_MONTH,
+            removal_policy=core.RemovalPolicy.DESTROY,
+        )
+        return CfnStateMachine.LoggingConfigurationProperty(
+            destinations=[
+                CfnStateMachine.LogDestinationProperty(
+                    cloud_watch_logs_log_group=CfnStateMachine.CloudWatchLogsLogGroupProperty(
+                        log_group_arn=log_group.log_group_arn
+                    )
+                )
+            ],
+            include_execution_data=True,
+            level=self.log_level,
+        )
+
     def create(self):
         """create sfn stack."""
         import json
 
         cfn_template = json.dumps(self.workflow.definition.to_dict())
-        CfnStateMachine(
+        self.state_machine = CfnStateMachine(
             scope=self.datajob_stack,
             id=self.unique_name,
             state_machine_name=self.unique_name,
+            state_machine_type=self.workflow_type,
             role_arn=self.role.role_arn,
             definition_string=cfn_template,
+            logging_configuration=self._create_logging_configuration(),
             **self.kwargs,
         )
+        for a_task in self._get_tasks():
+            if (
+                isinstance(a_task, StepfunctionsWorkflow)
+                and a_task.state_machine is not None
+            ):
+                # deploy the workflows we run before the workflow that runs them.
+                self.state_machine.add_depends_on(a_task.state_machine)
+        if self.datajob_stack.context is not None:
+            self.datajob_stack.context.add_run_lifecycle_rule(
+                DataJobExecutionInput.get_run_prefix_root(
+                    stage=self.stage, workflow_name=self.name
+                )
+            )
+        self._create_triggers()
+
+    def _create_triggers(self) -> None:
+        """create the resources that start the workflow, eventbridge starts an
+        execution with its own role."""
+        if not self.triggers:
+            return
+        # the ref of a state machine is its arn.
+        state_machine_arn = self.state_machine.ref
+        trigger_role = iam.Role(
+            self,
+            f"{self.unique_name}-trigger-role",
+            assumed_by=iam.ServicePrincipal("events.amazonaws.com"),
+        )
+        trigger_role.add_to_policy(
+            iam.PolicyStatement(
+                actions=["states:StartExecution"], resources=[state_machine_arn]
+            )
+        )
+        for trigger in self.triggers:
+            trigger.create(
+                workflow=self, state_machine_arn=state_machine_arn, role=trigger_role
+            )
 
     def _setup_notification(
         self, notification: Union[str, list]
@@ -213,13 +877,16 @@ class StepfunctionsWorkflow(DataJobBase):
     def __enter__(self):
         """first steps we have to do when entering the context manager."""
         logger.info(f"creating step functions workflow for {self.unique_name}")
-        _set_workflow(self)
+        # we restore the workflow we are in when we leave this one, a workflow can be defined in another.
+        self._outer_workflow_token = _set_workflow(self)
         return self
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
         """steps we have to do when exiting the context manager."""
-        self.build_workflow()
-        _set_workflow(None)
+        try:
+            self.build_workflow()
+        finally:
+            _reset_workflow(self._outer_workflow_token)
         logger.info(f"step functions workflow {self.unique_name} created")
 
 
@@ -257,8 +924,12 @@ def task(self):
     return self
 
 
-def _set_workflow(workflow: Workflow):
-    __workflow.set(workflow)
+def _set_workflow(workflow: Workflow) -> contextvars.Token:
+    return __workflow.set(workflow)
+
+
+def _reset_workflow(token: contextvars.Token) -> None:
+    __workflow.reset(token)
 
 
 def _get_workflow():
@@ -268,6 +939,78 @@ def _get_workflow():
         return None
 
 
+def _get_unique_key(name: str, keys: dict) -> str:
+    """the name of the task, with a suffix when another task has the same
+    name."""
+    key = name
+    while key in keys:
+        key = f"{key}'"
+    return key
+
+
+def _validate_can_be_orchestrated(*tasks: DataJobBase) -> None:
+    for a_task in tasks:
+        if not getattr(a_task, "can_be_orchestrated", True):
+            raise StepfunctionsWorkflowException(
+                f"{a_task} runs continuously and cannot be orchestrated in a workflow."
+            )
+
+
+@lru_cache(maxsize=TOPOSORT_CACHE_SIZE)
+def _toposort_names(names: tuple, dependencies: tuple) -> Union[tuple, None]:
+    """toposort the names of the tasks of a graph.
+
+    :param names: the sorted names of all the tasks.
+    :param dependencies: sorted (name of a task, names of the tasks it depends on) pairs.
+    :return: a tuple of levels, a level is a sorted tuple of names. None if the graph has a cycle.
+    """
+    graph = {name: set() for name in names}
+    for name, upstream_names in dependencies:
+        graph[name].update(upstream_names)
+    try:
+        return tuple(tuple(sorted(level)) for level in toposort.toposort(graph))
+    except toposort.CircularDependencyError:
+        return None
+
+
+def _find_cycle(dependencies: dict) -> list:
+    """find a cycle in the graph, to tell which tasks depend on each other.
+
+    :param dependencies: the name of a task as key and the names of the tasks it depends on as value.
+    :return: the names of the tasks of the cycle, in the order they would run, the first task is also the last.
+    """
+    visited = set()
+    for start in sorted(dependencies):
+        if start in visited:
+            continue
+        path = [start]
+        on_path = {start}
+        stack = [iter(sorted(dependencies.get(start, ())))]
+        while stack:
+            name = next(stack[-1], None)
+            if name is None:
+                done = path.pop()
+                on_path.discard(done)
+                visited.add(done)
+                stack.pop()
+                continue
+            if name in on_path:
+                cycle = path[path.index(name) :] + [name]
+                # we walked from a task to the tasks it depends on, reverse it to get the order they run.
+                return list(reversed(cycle))
+            if name in visited:
+                continue
+            path.append(name)
+            on_path.add(name)
+            stack.append(iter(sorted(dependencies.get(name, ()))))
+    return []
+
+
 def connect(self, other: DataJobBase) -> None:
+    _validate_can_be_orchestrated(self, other)
     work_flow = _get_workflow()
     work_flow.directed_graph[other].add(self)
+
+
+# a workflow can be a task of another workflow.
+task(StepfunctionsWorkflow)
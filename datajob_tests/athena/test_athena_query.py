@@ -0,0 +1,80 @@
+import pathlib
+import tempfile
+import unittest
+
+from aws_cdk import core
+
+from datajob.athena.athena_query import AthenaQuery
+from datajob.athena.athena_query import AthenaQueryException
+from datajob.datajob_stack import DataJobStack
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+
+
+class TestAthenaQuery(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = core.App()
+
+    def test_create_athena_query_successfully(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "query.sql").write_text(
+                "select count(*) from some_table;\n"
+            )
+            djs = DataJobStack(
+                scope=self.app, id="some-stack", stage="stg", project_root=project_root
+            )
+            djs.init_datajob_context()
+            task1 = AthenaQuery(
+                djs,
+                "task1",
+                query_path="query.sql",
+                database="some_database",
+                workgroup="some-workgroup",
+                result_reuse_max_age_minutes=60,
+            )
+            task2 = AthenaQuery(
+                djs,
+                "task2",
+                query_path="query.sql",
+                output_location="s3://some-bucket/some/prefix/",
+            )
+            with StepfunctionsWorkflow(djs, "some-workflow") as sfn:
+                task1 >> task2
+
+        states = sfn.workflow.definition.to_dict()["States"]
+        self.assertEqual(
+            states[task1.unique_name]["Resource"],
+            "arn:aws:states:::athena:startQueryExecution.sync",
+        )
+        self.assertEqual(
+            states[task1.unique_name]["Parameters"],
+            {
+                "QueryString": "select count(*) from some_table;",
+                "WorkGroup": "some-workgroup",
+                "ResultConfiguration": {
+                    "OutputLocation.$": f"States.Format('s3://{djs.context.data_bucket_name}/athena-results/"
+                    f"{task1.unique_name}/execution={{}}/', $$.Execution.Name)"
+                },
+                "QueryExecutionContext": {"Database": "some_database"},
+                "ResultReuseConfiguration": {
+                    "ResultReuseByAgeConfiguration": {
+                        "Enabled": True,
+                        "MaxAgeInMinutes": 60,
+                    }
+                },
+            },
+        )
+        self.assertEqual(
+            states[task2.unique_name]["Parameters"]["ResultConfiguration"],
+            {
+                "OutputLocation.$": "States.Format('s3://some-bucket/some/prefix/execution={}/', $$.Execution.Name)"
+            },
+        )
+
+    def test_create_athena_query_with_missing_file(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        with self.assertRaises(AthenaQueryException):
+            AthenaQuery(djs, "task1", query_path="some/path/query.sql")
+
+
+if __name__ == "__main__":
+    unittest.main()
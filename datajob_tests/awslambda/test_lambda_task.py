@@ -0,0 +1,109 @@
+import json
+import pathlib
+import tempfile
+import unittest
+
+from aws_cdk import core
+
+from datajob.awslambda.lambda_task import LambdaTask
+from datajob.awslambda.lambda_task import LambdaTaskException
+from datajob.datajob_stack import DataJobStack
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+
+
+class TestLambdaTask(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = core.App()
+
+    def test_create_lambda_task_successfully(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "dist").mkdir()
+            pathlib.Path(
+                project_root, "dist", "some_pkg-0.1.0-py3-none-any.whl"
+            ).write_bytes(b"")
+
+            djs = DataJobStack(
+                scope=self.app,
+                id="some-stack",
+                stage="stg",
+                project_root=project_root,
+            )
+            djs.init_datajob_context()
+            task1 = LambdaTask(
+                djs,
+                "task1",
+                handler="some_pkg.some_module.handler",
+                memory_size=128,
+                timeout=30,
+                reserved_concurrent_executions=2,
+            )
+            task2 = LambdaTask(
+                djs,
+                "task2",
+                handler="some_pkg.some_module.handler",
+                payload={"some": "value"},
+            )
+            with StepfunctionsWorkflow(djs, "some-workflow") as sfn:
+                task1 >> task2
+            djs.create_resources()
+            template = self.app.synth().get_stack_by_name(djs.stack_name).template
+
+        function = template["Resources"][
+            djs.get_logical_id(task1.function.node.default_child)
+        ]
+        # the wheel is an asset of the stack.
+        self.assertIn("AssetParameters", json.dumps(function["Properties"]["Code"]))
+        self.assertEqual(
+            function["Properties"]["Handler"], "some_pkg.some_module.handler"
+        )
+        self.assertEqual(function["Properties"]["MemorySize"], 128)
+        self.assertEqual(function["Properties"]["Timeout"], 30)
+        self.assertEqual(function["Properties"]["ReservedConcurrentExecutions"], 2)
+
+        states = sfn.workflow.definition.to_dict()["States"]
+        self.assertEqual(
+            states[task1.unique_name]["Resource"], "arn:aws:states:::lambda:invoke"
+        )
+        self.assertEqual(
+            states[task1.unique_name]["Parameters"],
+            {"FunctionName": task1.function_name, "Payload.$": "$"},
+        )
+        self.assertEqual(
+            states[task2.unique_name]["Parameters"]["Payload"], {"some": "value"}
+        )
+
+    def test_lambda_code_changes_when_the_wheel_changes(self):
+        def get_code(wheel_content: bytes) -> dict:
+            app = core.App()
+            with tempfile.TemporaryDirectory() as project_root:
+                pathlib.Path(project_root, "dist").mkdir()
+                # we rebuild the wheel without changing its version.
+                pathlib.Path(
+                    project_root, "dist", "some_pkg-0.1.0-py3-none-any.whl"
+                ).write_bytes(wheel_content)
+                djs = DataJobStack(
+                    scope=app, id="some-stack", stage="stg", project_root=project_root
+                )
+                djs.init_datajob_context()
+                task1 = LambdaTask(djs, "task1", handler="some_pkg.some_module.handler")
+                with StepfunctionsWorkflow(djs, "some-workflow"):
+                    task1 >> ...
+                djs.create_resources()
+                template = app.synth().get_stack_by_name(djs.stack_name).template
+            return template["Resources"][
+                djs.get_logical_id(task1.function.node.default_child)
+            ]["Properties"]["Code"]
+
+        self.assertEqual(get_code(b"version 1"), get_code(b"version 1"))
+        self.assertNotEqual(get_code(b"version 1"), get_code(b"version 2"))
+
+    def test_create_lambda_task_without_wheel(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        djs.init_datajob_context()
+        LambdaTask(djs, "task1", handler="some_pkg.some_module.handler")
+        with self.assertRaises(LambdaTaskException):
+            djs.create_resources()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import pathlib
+import tempfile
+import unittest
+
+from aws_cdk import core
+
+from datajob.batch.batch_job import BatchJob
+from datajob.batch.batch_job import BatchJobException
+from datajob.batch.batch_job import DEFAULT_PYTHON_IMAGE
+from datajob.datajob_stack import DataJobStack
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+
+
+class TestBatchJob(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = core.App()
+
+    def _get_resources(self, djs: DataJobStack, resource_type: str) -> list:
+        template = self.app.synth().get_stack_by_name(djs.stack_name).template
+        return [
+            resource
+            for resource in template["Resources"].values()
+            if resource["Type"] == resource_type
+        ]
+
+    def test_create_batch_job_from_image_successfully(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        task1 = BatchJob(
+            djs,
+            "task1",
+            image="some-account.dkr.ecr.eu-west-1.amazonaws.com/some-image:latest",
+            command=["python", "main.py"],
+            vcpus=4,
+            memory=16384,
+            array_size=10,
+        )
+        task2 = BatchJob(djs, "task2", image="some-image", wait_for_completion=False)
+        with StepfunctionsWorkflow(djs, "some-workflow") as sfn:
+            task1 >> task2
+        djs.create_resources()
+
+        job_definitions = self._get_resources(djs, "AWS::Batch::JobDefinition")
+        self.assertEqual(len(job_definitions), 2)
+        container_properties = job_definitions[0]["Properties"]["ContainerProperties"]
+        self.assertEqual(container_properties["Command"], ["python", "main.py"])
+        self.assertEqual(
+            container_properties["ResourceRequirements"],
+            [{"Type": "VCPU", "Value": "4"}, {"Type": "MEMORY", "Value": "16384"}],
+        )
+        # the batch jobs share the vpc, the compute environment and the job queue.
+        self.assertEqual(len(self._get_resources(djs, "AWS::Batch::JobQueue")), 1)
+        self.assertEqual(len(self._get_resources(djs, "AWS::EC2::VPC")), 1)
+        self.assertEqual(len(self._get_resources(djs, "AWS::EC2::SecurityGroup")), 1)
+        compute_environments = self._get_resources(
+            djs, "AWS::Batch::ComputeEnvironment"
+        )
+        self.assertEqual(len(compute_environments), 1)
+        self.assertEqual(
+            compute_environments[0]["Properties"]["ComputeResources"]["Type"],
+            "FARGATE",
+        )
+        self.assertEqual(task1.job_queue_name, task2.job_queue_name)
+
+        states = sfn.workflow.definition.to_dict()["States"]
+        self.assertEqual(
+            states[task1.unique_name]["Resource"],
+            "arn:aws:states:::batch:submitJob.sync",
+        )
+        self.assertEqual(
+            states[task1.unique_name]["Parameters"],
+            {
+                "JobName": task1.unique_name,
+                "JobQueue": task1.job_queue_name,
+                "JobDefinition": task1.job_definition_name,
+                "ArrayProperties": {"Size": 10},
+            },
+        )
+        self.assertEqual(
+            states[task2.unique_name]["Resource"], "arn:aws:states:::batch:submitJob"
+        )
+
+    def test_create_batch_job_from_wheel_successfully(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "dist").mkdir()
+            pathlib.Path(
+                project_root, "dist", "some_pkg-0.1.0-py3-none-any.whl"
+            ).write_bytes(b"")
+            djs = DataJobStack(
+                scope=self.app,
+                id="some-stack",
+                stage="stg",
+                project_root=project_root,
+            )
+            djs.init_datajob_context()
+            task1 = BatchJob(
+                djs, "task1", module="some_pkg.some_module", arguments=["--a", "1"]
+            )
+            image, command = task1._get_image_and_command(djs.context)
+
+        self.assertEqual(image, DEFAULT_PYTHON_IMAGE)
+        self.assertIn(
+            "some-stack-stg-wheel/some_pkg-0.1.0-py3-none-any.whl", command[2]
+        )
+        self.assertTrue(command[2].endswith("python -m some_pkg.some_module --a 1"))
+
+    def test_batch_jobs_share_an_environment_per_compute_type(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        task1 = BatchJob(djs, "task1", image="some-image", max_vcpus=8)
+        task2 = BatchJob(djs, "task2", image="some-image", max_vcpus=32)
+        task3 = BatchJob(djs, "task3", image="some-image", compute_type="FARGATE_SPOT")
+        with StepfunctionsWorkflow(djs, "some-workflow"):
+            task1 >> task2 >> task3
+        djs.create_resources()
+
+        self.assertEqual(task1.job_queue_name, "some-stack-stg-batch-fargate-queue")
+        self.assertEqual(
+            task3.job_queue_name, "some-stack-stg-batch-fargate-spot-queue"
+        )
+        self.assertEqual(len(self._get_resources(djs, "AWS::EC2::VPC")), 1)
+        compute_resources = {
+            resource["Properties"]["ComputeResources"]["Type"]: resource["Properties"][
+                "ComputeResources"
+            ]
+            for resource in self._get_resources(djs, "AWS::Batch::ComputeEnvironment")
+        }
+        self.assertEqual(compute_resources["FARGATE"]["MaxvCpus"], 32)
+        self.assertEqual(compute_resources["FARGATE_SPOT"]["MaxvCpus"], 16)
+
+    def test_batch_job_quotes_the_arguments_of_the_module(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "dist").mkdir()
+            pathlib.Path(
+                project_root, "dist", "some_pkg-0.1.0-py3-none-any.whl"
+            ).write_bytes(b"")
+            djs = DataJobStack(
+                scope=self.app,
+                id="some-stack",
+                stage="stg",
+                project_root=project_root,
+            )
+            djs.init_datajob_context()
+            task1 = BatchJob(
+                djs,
+                "task1",
+                module="some_pkg.some_module",
+                arguments=["--query", "select 1; rm -rf /", "--limit", 10],
+            )
+            image, command = task1._get_image_and_command(djs.context)
+
+        self.assertTrue(
+            command[2].endswith(
+                "python -m some_pkg.some_module --query 'select 1; rm -rf /' --limit 10"
+            )
+        )
+
+    def test_create_batch_job_with_invalid_arguments(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        with self.assertRaises(BatchJobException):
+            BatchJob(djs, "task1")
+        with self.assertRaises(BatchJobException):
+            BatchJob(djs, "task2", image="some-image", array_size=1)
+        with self.assertRaises(BatchJobException):
+            BatchJob(djs, "task3", image="some-image", compute_type="EC2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import pathlib
+import tempfile
+import unittest
+
+from aws_cdk import core
+from stepfunctions.steps import Task
+
+from datajob.cache import task_cache
+from datajob.datajob_stack import DataJobStack
+from datajob.glue.glue_job import GlueJob
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+
+
+class TestTaskCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = core.App()
+
+    def test_compute_cache_key_depends_on_code_arguments_and_inputs(self):
+        static_key = task_cache.compute_static_key(
+            name="some-task", code_hash="abc", arguments={"--a": "1"}
+        )
+        self.assertEqual(
+            static_key,
+            task_cache.compute_static_key(
+                name="some-task", code_hash="abc", arguments={"--a": "1"}
+            ),
+        )
+        self.assertNotEqual(
+            static_key,
+            task_cache.compute_static_key(
+                name="some-task", code_hash="abc", arguments={"--a": "2"}
+            ),
+        )
+        self.assertNotEqual(
+            static_key,
+            task_cache.compute_static_key(
+                name="some-task", code_hash="def", arguments={"--a": "1"}
+            ),
+        )
+        self.assertNotEqual(
+            task_cache.compute_cache_key(static_key, ['"etag-1"']),
+            task_cache.compute_cache_key(static_key, ['"etag-2"']),
+        )
+
+    def test_compute_cache_key_depends_on_partition_date(self):
+        key = task_cache.compute_cache_key(
+            "some-static-key", [], partition_date="2026-01-01"
+        )
+        self.assertEqual(
+            key,
+            task_cache.compute_cache_key(
+                "some-static-key", [], partition_date="2026-01-01"
+            ),
+        )
+        self.assertNotEqual(
+            key,
+            task_cache.compute_cache_key(
+                "some-static-key", [], partition_date="2026-01-02"
+            ),
+        )
+
+    def test_local_ledger_records_cache_keys(self):
+        ledger = task_cache.LocalTaskCacheLedger()
+        key = task_cache.compute_cache_key("some-static-key", ['"etag-1"'])
+        self.assertFalse(ledger.is_cached(key))
+        self.assertIsNone(ledger.get_run_prefix(key))
+        ledger.record(key, run_prefix="stg/some-workflow/run-1")
+        self.assertTrue(ledger.is_cached(key))
+        self.assertEqual(ledger.get_run_prefix(key), "stg/some-workflow/run-1")
+        ledger.clear()
+        self.assertFalse(ledger.is_cached(key))
+
+    def test_make_task_cacheable_successfully(self):
+        chain = task_cache.make_task_cacheable(
+            sfn_task=Task(state_id="task1"),
+            state_id="task1",
+            static_key="some-static-key",
+            inputs=["s3://some-bucket/some/key.csv", "s3://some-bucket/other.csv"],
+            bucket_name="some-data-bucket",
+            prefix=task_cache.TASK_CACHE_PREFIX,
+            run_prefix_root="stg/some-workflow",
+        )
+        states = {state.state_id: state.to_dict() for state in chain.steps}
+        self.assertEqual(
+            list(states.keys()),
+            [
+                "task1-cache-scope",
+                "task1-cache-inputs",
+                "task1-cache-key",
+                "task1-cache-lookup",
+                "task1-cache-hit",
+                "task1-cache-run",
+                "task1-cache-record",
+                "task1-cache-done",
+            ],
+        )
+        self.assertEqual(
+            states["task1-cache-scope"]["Parameters"]["scope.$"],
+            "States.JsonMerge(States.StringToJson(States.Format("
+            '\'\\{"DatajobRunId": "{}", "DatajobPartitionDate": ""\\}\', '
+            "$$.Execution.Name)), $$.Execution.Input, false)",
+        )
+        self.assertEqual(len(states["task1-cache-inputs"]["Branches"]), 2)
+        self.assertEqual(
+            states["task1-cache-inputs"]["ResultPath"], "$.DatajobCache.etags"
+        )
+        # a new run has the same key, only the run prefix differs.
+        self.assertEqual(
+            states["task1-cache-key"]["Parameters"],
+            {
+                "key.$": "States.Hash(States.Format('some-static-key{}{}{}', "
+                "$.DatajobCache.scope.DatajobPartitionDate, "
+                "$.DatajobCache.etags[0].ETag, $.DatajobCache.etags[1].ETag), 'SHA-256')",
+                "run_prefix.$": "States.Format('stg/some-workflow/{}', "
+                "$.DatajobCache.scope.DatajobRunId)",
+            },
+        )
+        self.assertEqual(states["task1-cache-key"]["ResultPath"], "$.DatajobCache")
+        self.assertEqual(states["task1-cache-hit"]["Default"], "task1-cache-run")
+        self.assertEqual(
+            states["task1-cache-hit"]["Choices"][0]["Next"], "task1-cache-done"
+        )
+        self.assertIsNone(states["task1-cache-run"]["ResultPath"])
+        self.assertEqual(
+            states["task1-cache-record"]["Parameters"],
+            {
+                "Bucket": "some-data-bucket",
+                "Key.$": "States.Format('datajob-task-cache/{}', $.DatajobCache.key)",
+                "Body.$": "$.DatajobCache.run_prefix",
+            },
+        )
+
+    def test_make_task_cacheable_with_invalid_input(self):
+        with self.assertRaises(task_cache.TaskCacheException):
+            task_cache.make_task_cacheable(
+                sfn_task=Task(state_id="task1"),
+                state_id="task1",
+                static_key="some-static-key",
+                inputs=["some/local/path.csv"],
+                bucket_name="some-data-bucket",
+                prefix=task_cache.TASK_CACHE_PREFIX,
+                run_prefix_root="stg/some-workflow",
+            )
+
+    def test_workflow_with_cached_glue_job_successfully(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            job_path = pathlib.Path(tmp_dir, "task.py")
+            job_path.write_text("print('hello')")
+
+            djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+            djs.init_datajob_context()
+            task1 = GlueJob(djs, "task1", str(job_path), cache=True)
+            task2 = GlueJob(djs, "task2", str(job_path))
+            with StepfunctionsWorkflow(djs, "some-workflow") as sfn:
+                task1 >> task2
+            static_key = task1.get_cache_static_key()
+
+        definition = sfn.workflow.definition.to_dict()
+        self.assertEqual(definition["StartAt"], f"{task1.unique_name}-cache-scope")
+        self.assertEqual(
+            definition["States"][f"{task1.unique_name}-cache-done"]["Next"],
+            task2.unique_name,
+        )
+        # the key of a task without inputs still depends on the partition date.
+        self.assertEqual(
+            definition["States"][f"{task1.unique_name}-cache-key"]["Parameters"][
+                "key.$"
+            ],
+            f"States.Hash(States.Format('{static_key}{{}}', "
+            "$.DatajobCache.scope.DatajobPartitionDate), 'SHA-256')",
+        )
+        self.assertEqual(
+            definition["States"][f"{task1.unique_name}-cache-key"]["Parameters"][
+                "run_prefix.$"
+            ],
+            "States.Format('stg/some-workflow/{}', $.DatajobCache.scope.DatajobRunId)",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+import os
+import unittest
+from unittest import mock
+
+import boto3
+from aws_cdk import core
+from moto import mock_dynamodb2
+
+from datajob.concurrency import concurrency_governor_handler
+from datajob.concurrency.concurrency_governor import ConcurrencyGovernor
+from datajob.concurrency.concurrency_governor import ConcurrencyGovernorException
+from datajob.concurrency.concurrency_governor import LocalConcurrencySemaphore
+from datajob.datajob_stack import DataJobStack
+from datajob.glue.glue_job import GlueJob
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflowException
+
+
+class TestConcurrencyGovernor(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = core.App()
+
+    def test_local_semaphore_caps_running_tasks(self):
+        semaphore = LocalConcurrencySemaphore(pools={"glue": 2})
+        self.assertTrue(semaphore.acquire("glue", "execution-1/task1"))
+        self.assertTrue(semaphore.acquire("glue", "execution-2/task1"))
+        self.assertFalse(semaphore.acquire("glue", "execution-3/task1"))
+        self.assertEqual(semaphore.running("glue"), 2)
+        self.assertTrue(semaphore.release("glue", "execution-1/task1"))
+        # releasing twice does not free an extra slot.
+        self.assertFalse(semaphore.release("glue", "execution-1/task1"))
+        self.assertTrue(semaphore.acquire("glue", "execution-3/task1"))
+        # trying again after we got the slot does not take a second slot.
+        self.assertTrue(semaphore.acquire("glue", "execution-3/task1"))
+        self.assertEqual(semaphore.running("glue"), 2)
+
+    def test_governor_with_invalid_pool(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        with self.assertRaises(ConcurrencyGovernorException):
+            ConcurrencyGovernor(djs, "governor", pools={"glue": 0})
+
+    def test_governor_with_invalid_wait(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        # a task would try 8640 times, its execution would run out of history events.
+        with self.assertRaises(ConcurrencyGovernorException):
+            ConcurrencyGovernor(
+                djs,
+                "governor1",
+                pools={"glue": 1},
+                wait_seconds=10,
+                max_wait_seconds=86400,
+            )
+        with self.assertRaises(ConcurrencyGovernorException):
+            ConcurrencyGovernor(djs, "governor2", pools={"glue": 1}, wait_seconds=0)
+        governor = ConcurrencyGovernor(
+            djs, "governor", pools={"glue": 1}, wait_seconds=180, max_wait_seconds=86400
+        )
+        self.assertEqual(governor.max_attempts, 480)
+
+    def test_workflow_with_governed_glue_jobs_successfully(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        governor = ConcurrencyGovernor(djs, "governor", pools={"glue": 3})
+        task1 = GlueJob(djs, "task1", "some/path", concurrency_pool="glue")
+        task2 = GlueJob(djs, "task2", "some/path")
+        with StepfunctionsWorkflow(djs, "some-workflow") as sfn:
+            task1 >> task2
+
+        states = sfn.workflow.definition.to_dict()["States"]
+        acquire = states[f"{task1.unique_name}-acquire"]
+        self.assertEqual(acquire["Parameters"]["TableName"], governor.table_name)
+        self.assertEqual(
+            acquire["Parameters"]["ExpressionAttributeValues"][":limit"], {"N": "3"}
+        )
+        self.assertEqual(
+            acquire["Retry"],
+            [
+                {
+                    "ErrorEquals": ["DynamoDB.ConditionalCheckFailedException"],
+                    "IntervalSeconds": 30,
+                    "MaxAttempts": 480,
+                    "BackoffRate": 1.0,
+                }
+            ],
+        )
+        self.assertEqual(
+            acquire["Parameters"]["ConditionExpression"],
+            "attribute_not_exists(#owner) AND (attribute_not_exists(#running) OR #running < :limit)",
+        )
+        # after a transient error we check whether the update took the slot.
+        self.assertEqual(acquire["Catch"][0]["Next"], f"{task1.unique_name}-acquired")
+        acquired = states[f"{task1.unique_name}-acquired"]
+        self.assertEqual(
+            acquired["Parameters"]["ConditionExpression"], "attribute_exists(#owner)"
+        )
+        self.assertEqual(acquired["Next"], f"{task1.unique_name}-governed")
+        self.assertEqual(acquired["Catch"][0]["Next"], f"{task1.unique_name}-acquire")
+        release = states[f"{task1.unique_name}-release"]
+        self.assertEqual(
+            acquire["Parameters"]["ExpressionAttributeNames"],
+            release["Parameters"]["ExpressionAttributeNames"],
+        )
+        governed = states[f"{task1.unique_name}-governed"]
+        self.assertEqual(
+            governed["Catch"][0]["Next"], f"{task1.unique_name}-release-on-failure"
+        )
+        self.assertEqual(
+            states[f"{task1.unique_name}-release-on-failure"]["Next"],
+            f"{task1.unique_name}-failed",
+        )
+        # the workflow fails with the error of the task, not with a generic error.
+        self.assertEqual(
+            states[f"{task1.unique_name}-failed"],
+            {
+                "Type": "Fail",
+                "ErrorPath": "$.error.Error",
+                "CausePath": "$.error.Cause",
+            },
+        )
+        self.assertEqual(
+            states[f"{task1.unique_name}-release-on-failure"]["Catch"][0]["ResultPath"],
+            "$.release_error",
+        )
+        self.assertEqual(
+            states[f"{task1.unique_name}-governor-done"]["Next"], task2.unique_name
+        )
+
+    def test_governor_creates_table(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        ConcurrencyGovernor(djs, "governor", pools={"glue": 3})
+        djs.create_resources()
+        template = self.app.synth().get_stack_by_name(djs.stack_name).template
+        tables = [
+            resource
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::DynamoDB::Table"
+        ]
+        self.assertEqual(len(tables), 1)
+        self.assertEqual(
+            tables[0]["Properties"]["TableName"], "some-stack-stg-governor"
+        )
+        rules = [
+            resource
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::Events::Rule"
+        ]
+        self.assertEqual(len(rules), 1)
+        self.assertEqual(
+            rules[0]["Properties"]["EventPattern"]["detail"]["status"],
+            ["ABORTED", "TIMED_OUT", "FAILED"],
+        )
+        functions = [
+            resource
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::Lambda::Function"
+        ]
+        self.assertEqual(
+            functions[0]["Properties"]["Environment"]["Variables"],
+            {"TABLE_NAME": "some-stack-stg-governor"},
+        )
+
+    @mock_dynamodb2
+    def test_release_handler_releases_the_slots_of_an_aborted_execution(self):
+        dynamodb = boto3.client("dynamodb", region_name="us-east-1")
+        dynamodb.create_table(
+            TableName="some-table",
+            KeySchema=[{"AttributeName": "pool", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "pool", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        dynamodb.put_item(
+            TableName="some-table",
+            Item={
+                "pool": {"S": "glue"},
+                "running": {"N": "3"},
+                "arn:execution-1/task1": {"S": "2026-01-01T00:00:00Z"},
+                "arn:execution-1/task2": {"S": "2026-01-01T00:00:00Z"},
+                "arn:execution-10/task1": {"S": "2026-01-01T00:00:00Z"},
+            },
+        )
+        event = {"detail": {"executionArn": "arn:execution-1", "status": "ABORTED"}}
+        with mock.patch.dict(
+            os.environ, {"TABLE_NAME": "some-table", "AWS_DEFAULT_REGION": "us-east-1"}
+        ):
+            self.assertEqual(
+                concurrency_governor_handler.handler(event, None),
+                {"Released": ["arn:execution-1/task1", "arn:execution-1/task2"]},
+            )
+            # an execution that released its slots itself has nothing left to release.
+            self.assertEqual(
+                concurrency_governor_handler.handler(event, None), {"Released": []}
+            )
+        item = dynamodb.get_item(TableName="some-table", Key={"pool": {"S": "glue"}})[
+            "Item"
+        ]
+        self.assertEqual(item["running"], {"N": "1"})
+        self.assertIn("arn:execution-10/task1", item)
+
+    def test_governed_task_without_governor(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        task1 = GlueJob(djs, "task1", "some/path", concurrency_pool="glue")
+        task2 = GlueJob(djs, "task2", "some/path")
+        with self.assertRaises(StepfunctionsWorkflowException):
+            with StepfunctionsWorkflow(djs, "some-workflow"):
+                task1 >> task2
+
+    def test_governed_task_with_unknown_pool(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        ConcurrencyGovernor(djs, "governor", pools={"glue": 3})
+        task1 = GlueJob(djs, "task1", "some/path", concurrency_pool="spark")
+        task2 = GlueJob(djs, "task2", "some/path")
+        with self.assertRaises(ConcurrencyGovernorException):
+            with StepfunctionsWorkflow(djs, "some-workflow"):
+                task1 >> task2
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -65,6 +65,95 @@ class TestDatajobExecute(unittest.TestCase):
 
         self.assertEqual(result.exit_code, 0)
 
+    @patch("datajob.stepfunctions.stepfunctions_execute.get_resume_execution_input")
+    @patch(
+        "datajob.stepfunctions.stepfunctions_execute.find_state_machine_arn_for_execution"
+    )
+    @patch("datajob.stepfunctions.stepfunctions_execute.execute")
+    def test_datajob_cli_execute_resume_with_no_errors(
+        self, m_execute, m_find_state_machine_arn, m_get_resume_execution_input
+    ):
+        some_state_machine_arn = (
+            "arn:aws:states:eu-west-1:123456789012:stateMachine:some-statemachine-1"
+        )
+        m_find_state_machine_arn.return_value = some_state_machine_arn
+        m_get_resume_execution_input.return_value = {
+            "DatajobSkipTasks": {"task1": True}
+        }
+        m_execute.return_value = self.get_execution()
+
+        result = self.runner.invoke(
+            datajob.app, ["execute", "--resume", "some-execution-arn"]
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        m_execute.assert_called_once_with(
+            some_state_machine_arn,
+            execution_input={"DatajobSkipTasks": {"task1": True}},
+        )
+
+    @patch("datajob.stepfunctions.stepfunctions_execute.get_only_execution_input")
+    @patch("datajob.stepfunctions.stepfunctions_execute.find_state_machine_arn")
+    @patch("datajob.stepfunctions.stepfunctions_execute.execute")
+    def test_datajob_cli_execute_only_with_no_errors(
+        self, m_execute, m_find_state_machine_arn, m_get_only_execution_input
+    ):
+        some_state_machine_arn = (
+            "arn:aws:states:eu-west-1:123456789012:stateMachine:some-statemachine-1"
+        )
+        m_find_state_machine_arn.return_value = some_state_machine_arn
+        m_get_only_execution_input.return_value = {"DatajobSkipTasks": {"task1": True}}
+        m_execute.return_value = self.get_execution()
+
+        result = self.runner.invoke(
+            datajob.app,
+            [
+                "execute",
+                "--state-machine",
+                "some-statemachine-1",
+                "--only",
+                "task2",
+                "--downstream",
+            ],
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        m_get_only_execution_input.assert_called_once_with(
+            state_machine_arn=some_state_machine_arn,
+            only=["task2"],
+            downstream=True,
+            upstream=False,
+            from_execution=None,
+        )
+
+    def test_datajob_cli_execute_downstream_without_only(self):
+        result = self.runner.invoke(
+            datajob.app,
+            ["execute", "--state-machine", "some-statemachine-1", "--downstream"],
+        )
+        self.assertNotEqual(result.exit_code, 0)
+
+    def test_datajob_cli_backfill_with_an_invalid_step(self):
+        result = self.runner.invoke(
+            datajob.app,
+            [
+                "backfill",
+                "--state-machine",
+                "some-statemachine-1",
+                "--start",
+                "2026-01-01",
+                "--end",
+                "2026-03-31",
+                "--step",
+                "1 day",
+            ],
+        )
+        self.assertNotEqual(result.exit_code, 0)
+
+    def test_datajob_cli_execute_without_state_machine_or_resume(self):
+        result = self.runner.invoke(datajob.app, ["execute"])
+        self.assertNotEqual(result.exit_code, 0)
+
     def get_execution(
         self,
         status=ExecutionStatus.Running,
@@ -0,0 +1,89 @@
+import json
+import pathlib
+import tempfile
+import unittest
+
+from aws_cdk import core
+
+from datajob.datajob_stack import DataJobStack
+from datajob.emr.emr_serverless_job import EmrServerlessJob
+from datajob.emr.emr_serverless_job import EmrServerlessJobException
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+
+
+class TestEmrServerlessJob(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = core.App()
+
+    def test_create_emr_serverless_job_successfully(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "jobs").mkdir()
+            pathlib.Path(project_root, "jobs", "task.py").write_text("print('hello')")
+            djs = DataJobStack(
+                scope=self.app,
+                id="some-stack",
+                stage="stg",
+                project_root=project_root,
+            )
+            djs.init_datajob_context()
+            task1 = EmrServerlessJob(
+                djs,
+                "task1",
+                job_path="jobs/task.py",
+                arguments=["--a", "1"],
+                spark_submit_parameters="--conf spark.executor.cores=4",
+                initial_capacity={
+                    "Executor": {"worker_count": 10, "cpu": "4vCPU", "memory": "16GB"}
+                },
+                maximum_capacity={"cpu": "200vCPU", "memory": "800GB"},
+            )
+            with StepfunctionsWorkflow(djs, "some-workflow") as sfn:
+                task1 >> ...
+            djs.create_resources()
+            template = self.app.synth().get_stack_by_name(djs.stack_name).template
+
+        application = template["Resources"][djs.get_logical_id(task1.application)]
+        self.assertEqual(application["Type"], "AWS::EMRServerless::Application")
+        self.assertEqual(
+            application["Properties"]["InitialCapacity"],
+            [
+                {
+                    "Key": "Executor",
+                    "Value": {
+                        "WorkerConfiguration": {"Cpu": "4vCPU", "Memory": "16GB"},
+                        "WorkerCount": 10,
+                    },
+                }
+            ],
+        )
+
+        state = sfn.workflow.definition.to_dict()["States"][task1.unique_name]
+        self.assertEqual(
+            state["Resource"], "arn:aws:states:::emr-serverless:startJobRun.sync"
+        )
+        spark_submit = state["Parameters"]["JobDriver"]["SparkSubmit"]
+        self.assertEqual(
+            spark_submit["EntryPoint"],
+            f"s3://{djs.context.deployment_bucket_name}/{task1.unique_name}/task.py",
+        )
+        self.assertEqual(spark_submit["EntryPointArguments"], ["--a", "1"])
+        self.assertEqual(
+            spark_submit["SparkSubmitParameters"], "--conf spark.executor.cores=4"
+        )
+        # the id of the application is resolved when we synthesize the stack.
+        state_machine = template["Resources"][
+            djs.get_logical_id(djs.node.find_child(sfn.unique_name))
+        ]
+        self.assertIn(
+            djs.get_logical_id(task1.application),
+            json.dumps(state_machine["Properties"]["DefinitionString"]),
+        )
+
+    def test_create_emr_serverless_job_without_context(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        with self.assertRaises(EmrServerlessJobException):
+            EmrServerlessJob(djs, "task1", job_path="jobs/task.py")
+
+
+if __name__ == "__main__":
+    unittest.main()
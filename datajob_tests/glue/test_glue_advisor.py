@@ -0,0 +1,137 @@
+import datetime
+import json
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from typer.testing import CliRunner
+
+from datajob import datajob
+from datajob.glue import glue_advisor
+
+current_dir = pathlib.Path(__file__).absolute().parent
+HISTORY_PATH = str(current_dir / "resources" / "job_runs_history.json")
+
+
+class TestGlueAdvisor(unittest.TestCase):
+    def test_advise_offline(self):
+        history = glue_advisor.load_history(HISTORY_PATH)
+        recommendations = {
+            recommendation["job_name"]: recommendation
+            for recommendation in glue_advisor.advise(history)
+        }
+        # duration = 1000s + 1000s / workers, the serial part dominates.
+        aggregate = recommendations["data-pipeline-prd-aggregate"]
+        self.assertEqual(aggregate["current_workers"], 40)
+        self.assertEqual(aggregate["current_duration"], 1025)
+        self.assertEqual(aggregate["recommended_workers"], 8)
+        self.assertEqual(aggregate["projected_duration"], 1125)
+        self.assertAlmostEqual(aggregate["savings_per_run"], 3.9111, places=3)
+        # duration = 100s + 9000s / workers, the job scales well.
+        clean = recommendations["data-pipeline-prd-clean"]
+        self.assertEqual(clean["current_workers"], 20)
+        self.assertEqual(clean["recommended_workers"], 18)
+        # the auto-scaling job used at most 8 DPUs, that is 4 G.2X workers.
+        ingest = recommendations["data-pipeline-prd-ingest"]
+        self.assertEqual(ingest["recommended_workers"], 4)
+        self.assertAlmostEqual(ingest["savings_per_run"], 0.8800, places=3)
+        # a pythonshell job has no workers.
+        self.assertNotIn(
+            "recommended_workers", recommendations["data-pipeline-prd-notify"]
+        )
+
+    def test_fit_duration_curve(self):
+        job_runs = [
+            {"ExecutionTime": 100 + 9000 / workers, "NumberOfWorkers": workers}
+            for workers in [5, 10, 20]
+        ]
+        serial, parallel = glue_advisor.fit_duration_curve(job_runs)
+        self.assertAlmostEqual(serial, 100)
+        self.assertAlmostEqual(parallel, 9000)
+        self.assertIsNone(glue_advisor.fit_duration_curve(job_runs[:1]))
+
+    @patch("datajob.glue.glue_advisor._get_job_runs_pages")
+    @patch("datajob.glue.glue_advisor._describe_stack_resources")
+    def test_datajob_cli_advise_exports_history(
+        self, m_describe_stack_resources, m_get_job_runs_pages
+    ):
+        m_describe_stack_resources.return_value = {
+            "StackResources": [
+                {
+                    "PhysicalResourceId": "data-pipeline-prd-clean",
+                    "ResourceType": "AWS::Glue::Job",
+                },
+                {
+                    "PhysicalResourceId": "data-pipeline-prd-workflow",
+                    "ResourceType": "AWS::StepFunctions::StateMachine",
+                },
+            ]
+        }
+        m_get_job_runs_pages.return_value = [
+            {
+                "JobRuns": [
+                    {
+                        "Id": "jr_2",
+                        "JobRunState": "FAILED",
+                        "ExecutionTime": 10,
+                        "WorkerType": "G.1X",
+                        "NumberOfWorkers": 20,
+                    },
+                    {
+                        "Id": "jr_1",
+                        "JobRunState": "SUCCEEDED",
+                        "StartedOn": datetime.datetime(2024, 1, 1),
+                        "ExecutionTime": 550,
+                        "WorkerType": "G.1X",
+                        "NumberOfWorkers": 20,
+                        "Arguments": {"--some-argument": "a"},
+                    },
+                ]
+            }
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            export_path = str(pathlib.Path(tmp_dir, "history.json"))
+            result = CliRunner().invoke(
+                datajob.app,
+                [
+                    "advise",
+                    "--stack",
+                    "data-pipeline",
+                    "--stage",
+                    "prd",
+                    "--export",
+                    export_path,
+                ],
+            )
+            self.assertEqual(result.exit_code, 0, result.output)
+            with open(export_path) as f:
+                exported_history = json.load(f)
+        m_describe_stack_resources.assert_called_once_with(
+            stack_name="data-pipeline-prd"
+        )
+        self.assertEqual(
+            exported_history,
+            {
+                "data-pipeline-prd-clean": [
+                    {
+                        "Id": "jr_1",
+                        "JobRunState": "SUCCEEDED",
+                        "StartedOn": "2024-01-01 00:00:00",
+                        "ExecutionTime": 550,
+                        "WorkerType": "G.1X",
+                        "NumberOfWorkers": 20,
+                    }
+                ]
+            },
+        )
+
+    def test_datajob_cli_advise_offline(self):
+        result = CliRunner().invoke(datajob.app, ["advise", "--history", HISTORY_PATH])
+        self.assertEqual(result.exit_code, 0, result.output)
+        # the projected duration of the aggregate job.
+        self.assertIn("1125", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import pathlib
+import tempfile
+import unittest
+
+import boto3
+from aws_cdk import core
+from moto import mock_s3
+
+from datajob.datajob_stack import DataJobStack
+from datajob.glue import glue_capacity
+from datajob.glue import glue_capacity_handler
+from datajob.glue.glue_capacity import GlueCapacityException
+from datajob.glue.glue_job import GlueJob
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+
+CAPACITY_TABLE = [(None, "G.2X", 50), ("10GB", "G.1X", 2), ("500GB", "G.1X", 20)]
+
+
+class TestGlueCapacity(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = core.App()
+
+    def test_get_capacity_table(self):
+        self.assertEqual(
+            glue_capacity.get_capacity_table(CAPACITY_TABLE),
+            [
+                {
+                    "MaxSizeBytes": 10 * 1024**3,
+                    "WorkerType": "G.1X",
+                    "NumberOfWorkers": 2,
+                },
+                {
+                    "MaxSizeBytes": 500 * 1024**3,
+                    "WorkerType": "G.1X",
+                    "NumberOfWorkers": 20,
+                },
+                {"MaxSizeBytes": None, "WorkerType": "G.2X", "NumberOfWorkers": 50},
+            ],
+        )
+        with self.assertRaises(GlueCapacityException):
+            glue_capacity.get_capacity_table([("a lot", "G.1X", 2)])
+        with self.assertRaises(GlueCapacityException):
+            glue_capacity.get_capacity_table([("10GB", "G.1X", 1)])
+        with self.assertRaises(GlueCapacityException):
+            glue_capacity.get_capacity_table([(None, "G.1X", 2)])
+
+    @mock_s3
+    def test_capacity_handler_chooses_capacity_for_input_size(self):
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="some-bucket")
+        for i in range(3):
+            s3.put_object(
+                Bucket="some-bucket", Key=f"events/date=1/part-{i}", Body=b"a" * 100
+            )
+        s3.put_object(Bucket="some-bucket", Key="other/part-0", Body=b"a" * 5000)
+        part_size = s3.head_object(Bucket="some-bucket", Key="events/date=1/part-0")[
+            "ContentLength"
+        ]
+        event = {
+            "Bucket": "some-bucket",
+            "Prefix": "events/",
+            "CapacityTable": glue_capacity.get_capacity_table(
+                [
+                    (part_size, "G.1X", 2),
+                    (3 * part_size, "G.1X", 10),
+                    (None, "G.2X", 50),
+                ]
+            ),
+            "State": {"JobBookmarkOption": "job-bookmark-enable"},
+        }
+        self.assertEqual(
+            glue_capacity_handler.handler(event, None),
+            {
+                "JobBookmarkOption": "job-bookmark-enable",
+                "InputSizeBytes": 3 * part_size,
+                "WorkerType": "G.1X",
+                "NumberOfWorkers": 10,
+            },
+        )
+        event["Prefix"] = "events/date=1/part-0"
+        self.assertEqual(
+            glue_capacity_handler.handler(event, None)["NumberOfWorkers"], 2
+        )
+        event["Prefix"] = "other/"
+        self.assertEqual(
+            glue_capacity_handler.handler(event, None)["WorkerType"], "G.2X"
+        )
+
+    def test_glue_job_with_capacity_table(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "task.py").write_text("print('hello')")
+            djs = DataJobStack(
+                scope=self.app, id="some-stack", stage="stg", project_root=project_root
+            )
+            djs.init_datajob_context()
+            task1 = GlueJob(
+                djs,
+                "task1",
+                "task.py",
+                job_type="glueetl",
+                job_bookmark="enable",
+                capacity_input="raw/events/",
+                capacity_table=CAPACITY_TABLE,
+            )
+            task2 = GlueJob(
+                djs,
+                "task2",
+                "task.py",
+                job_type="glueetl",
+                capacity_input="$$.Execution.Input.prefix",
+                capacity_table=CAPACITY_TABLE,
+            )
+            with StepfunctionsWorkflow(djs, "some-workflow") as sfn:
+                task1 >> task2
+            djs.create_resources()
+            template = self.app.synth().get_stack_by_name(djs.stack_name).template
+
+        states = sfn.workflow.definition.to_dict()["States"]
+        # the bookmark option is set before we measure the input.
+        self.assertEqual(
+            states[f"{task1.unique_name}-bookmark-enable"]["Next"],
+            f"{task1.unique_name}-capacity",
+        )
+        capacity = states[f"{task1.unique_name}-capacity"]
+        self.assertEqual(capacity["Next"], task1.unique_name)
+        self.assertEqual(capacity["OutputPath"], "$.Payload")
+        payload = capacity["Parameters"]["Payload"]
+        self.assertEqual(payload["Bucket"], djs.context.data_bucket_name)
+        self.assertEqual(payload["Prefix"], "raw/events/")
+        self.assertEqual(payload["State.$"], "$")
+        self.assertEqual(
+            payload["CapacityTable"], glue_capacity.get_capacity_table(CAPACITY_TABLE)
+        )
+        self.assertEqual(
+            states[task1.unique_name]["Parameters"]["WorkerType.$"], "$.WorkerType"
+        )
+        self.assertEqual(
+            states[task1.unique_name]["Parameters"]["NumberOfWorkers.$"],
+            "$.NumberOfWorkers",
+        )
+        self.assertEqual(
+            states[f"{task2.unique_name}-capacity"]["Parameters"]["Payload"][
+                "Prefix.$"
+            ],
+            "$$.Execution.Input.prefix",
+        )
+        # one function measures the input of all the glue jobs of the stack.
+        functions = [
+            resource
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::Lambda::Function"
+            and resource["Properties"].get("FunctionName")
+            == f"{djs.unique_stack_name}-glue-capacity"
+        ]
+        self.assertEqual(len(functions), 1)
+
+    def test_invalid_capacity_arguments(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        with self.assertRaises(ValueError):
+            GlueJob(
+                djs,
+                "task1",
+                "some/path/task.py",
+                job_type="glueetl",
+                capacity_table=CAPACITY_TABLE,
+            )
+        with self.assertRaises(ValueError):
+            GlueJob(
+                djs,
+                "task2",
+                "some/path/task.py",
+                capacity_input="s3://some-bucket/events/",
+                capacity_table=CAPACITY_TABLE,
+            )
+        with self.assertRaises(GlueCapacityException):
+            GlueJob(
+                djs,
+                "task3",
+                "some/path/task.py",
+                job_type="glueetl",
+                capacity_input="events/",
+                capacity_table=CAPACITY_TABLE,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import pathlib
+import tempfile
+import unittest
+
+from aws_cdk import core
+
+from datajob.datajob_stack import DataJobStack
+from datajob.glue.glue_execution_profile import GlueExecutionProfile
+from datajob.glue.glue_execution_profile import GlueExecutionProfileException
+from datajob.glue.glue_job import GlueJob
+
+
+class TestGlueExecutionProfile(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = core.App()
+
+    def test_glue_job_with_execution_profile_per_stage(self):
+        stage_execution_profiles = {"dev": "flex", "prd": "auto-scaling"}
+        dev_stack = DataJobStack(scope=self.app, id="some-stack", stage="dev")
+        dev_job = GlueJob(
+            dev_stack,
+            "some-task",
+            "some/path/task.py",
+            job_type="glueetl",
+            execution_profile="standard",
+            stage_execution_profiles=stage_execution_profiles,
+        )
+        self.assertEqual(dev_job.glue_version, "4.0")
+        self.assertEqual(dev_job.execution_class, "FLEX")
+        self.assertEqual(dev_job.timeout, 120)
+
+        prd_stack = DataJobStack(scope=self.app, id="some-stack", stage="prd")
+        prd_job = GlueJob(
+            prd_stack,
+            "some-task",
+            "some/path/task.py",
+            job_type="glueetl",
+            execution_profile="standard",
+            stage_execution_profiles=stage_execution_profiles,
+            number_of_workers=100,
+        )
+        self.assertEqual(prd_job.execution_class, "STANDARD")
+        self.assertEqual(prd_job.worker_type, "G.2X")
+        # the arguments of the glue job win over the profile.
+        self.assertEqual(prd_job.number_of_workers, 100)
+        self.assertEqual(prd_job.arguments["--enable-auto-scaling"], "true")
+
+        stg_stack = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        stg_job = GlueJob(
+            stg_stack,
+            "some-task",
+            "some/path/task.py",
+            job_type="glueetl",
+            execution_profile=GlueExecutionProfile(
+                glue_version="3.0", number_of_workers=5
+            ),
+            stage_execution_profiles=stage_execution_profiles,
+        )
+        self.assertEqual(stg_job.glue_version, "3.0")
+        self.assertEqual(stg_job.number_of_workers, 5)
+        self.assertNotIn("--enable-auto-scaling", stg_job.arguments)
+
+    def test_glue_job_with_execution_profile_creates_job(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "task.py").write_text("print('hello')")
+            djs = DataJobStack(
+                scope=self.app, id="some-stack", stage="dev", project_root=project_root
+            )
+            djs.init_datajob_context()
+            GlueJob(
+                djs,
+                "some-task",
+                "task.py",
+                job_type="glueetl",
+                execution_profile="flex",
+            )
+            djs.create_resources()
+            template = self.app.synth().get_stack_by_name(djs.stack_name).template
+
+        glue_job_properties = [
+            resource["Properties"]
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::Glue::Job"
+        ][0]
+        self.assertEqual(glue_job_properties["GlueVersion"], "4.0")
+        self.assertEqual(glue_job_properties["WorkerType"], "G.1X")
+        self.assertEqual(glue_job_properties["ExecutionClass"], "FLEX")
+        self.assertEqual(glue_job_properties["Timeout"], 120)
+
+    def test_pythonshell_job_with_execution_profile(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="dev")
+        task = GlueJob(
+            djs, "some-task", "some/path/task.py", execution_profile="standard"
+        )
+        self.assertEqual(task.glue_version, "3.0")
+        self.assertEqual(task.python_version, "3.9")
+        self.assertEqual(task.timeout, 60)
+        self.assertIsNone(task.worker_type)
+        self.assertIsNone(task.number_of_workers)
+        self.assertNotIn("--enable-auto-scaling", task.arguments)
+
+        old_task = GlueJob(
+            djs,
+            "old-task",
+            "some/path/task.py",
+            execution_profile=GlueExecutionProfile(glue_version="2.0", timeout=10),
+        )
+        self.assertEqual(old_task.glue_version, "1.0")
+        self.assertEqual(old_task.python_version, "3")
+        self.assertEqual(old_task.timeout, 10)
+
+        default_task = GlueJob(djs, "default-task", "some/path/task.py")
+        self.assertEqual(default_task.glue_version, "1.0")
+        self.assertIsNone(default_task.timeout)
+
+    def test_invalid_execution_profiles(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="dev")
+        with self.assertRaises(GlueExecutionProfileException):
+            GlueJob(
+                djs,
+                "task1",
+                "some/path/task.py",
+                job_type="glueetl",
+                execution_profile="unknown",
+            )
+        with self.assertRaises(ValueError):
+            GlueJob(
+                djs,
+                "task2",
+                "some/path/task.py",
+                job_type="glueray",
+                execution_profile="standard",
+            )
+        with self.assertRaises(ValueError):
+            GlueJob(djs, "task4", "some/path/task.py", execution_profile="auto-scaling")
+        with self.assertRaises(ValueError):
+            GlueJob(djs, "task5", "some/path/task.py", execution_profile="flex")
+        with self.assertRaises(ValueError):
+            GlueJob(
+                djs,
+                "task3",
+                "some/path/task.py",
+                job_type="gluestreaming",
+                execution_profile="flex",
+            )
+        with self.assertRaises(GlueExecutionProfileException):
+            GlueExecutionProfile(glue_version="2.0", auto_scaling=True)
+        with self.assertRaises(GlueExecutionProfileException):
+            GlueExecutionProfile(execution_class="CHEAP")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,14 @@
+import pathlib
+import tempfile
 import unittest
 
 from aws_cdk import core
 
 from datajob.datajob_stack import DataJobStack
-from datajob.glue.glue_job import GlueJob, GlueJobType
+from datajob.glue.glue_job import GlueJob
+from datajob.glue.glue_job import GlueJobType
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflowException
 
 
 class TestGlueJob(unittest.TestCase):
@@ -18,6 +23,162 @@ class TestGlueJob(unittest.TestCase):
         self.assertEqual(glue_job.job_path, "some/path/task.py")
         self.assertEqual(glue_job.python_version, "3")
 
+    def test_create_glue_ray_job_successfully(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "dist").mkdir()
+            pathlib.Path(
+                project_root, "dist", "some_pkg-0.1.0-py3-none-any.whl"
+            ).write_bytes(b"")
+            pathlib.Path(project_root, "task.py").write_text("print('hello')")
+            djs = DataJobStack(
+                scope=self.app, id="some-stack", stage="stg", project_root=project_root
+            )
+            djs.init_datajob_context()
+            glue_job = GlueJob(
+                djs,
+                "some-task",
+                "task.py",
+                job_type=GlueJobType.GLUERAY.value,
+                number_of_workers=10,
+                min_workers=2,
+            )
+            djs.create_resources()
+            template = self.app.synth().get_stack_by_name(djs.stack_name).template
+
+        self.assertEqual(glue_job.glue_version, "4.0")
+        self.assertEqual(glue_job.python_version, "3.9")
+        self.assertEqual(glue_job.worker_type, "Z.2X")
+        glue_job_properties = [
+            resource["Properties"]
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::Glue::Job"
+        ][0]
+        self.assertEqual(glue_job_properties["Command"]["Name"], "glueray")
+        self.assertEqual(glue_job_properties["Command"]["Runtime"], "Ray2.4")
+        self.assertEqual(glue_job_properties["NumberOfWorkers"], 10)
+        # a ray job can import datajob.runtime too.
+        self.assertEqual(
+            glue_job_properties["DefaultArguments"]["--s3-py-modules"],
+            f"{djs.context.s3_url_wheel},s3://{djs.context.deployment_bucket_name}"
+            f"/some-stack-stg-runtime/datajob_runtime-1.0-py3-none-any.whl",
+        )
+        self.assertEqual(glue_job_properties["DefaultArguments"]["--min-workers"], "2")
+        self.assertNotIn("--extra-py-files", glue_job_properties["DefaultArguments"])
+
+    def test_create_glue_job_with_runtime(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "dist").mkdir()
+            pathlib.Path(
+                project_root, "dist", "some_pkg-0.1.0-py3-none-any.whl"
+            ).write_text("")
+            pathlib.Path(project_root, "task.py").write_text("print('hello')")
+            djs = DataJobStack(
+                scope=self.app, id="some-stack", stage="stg", project_root=project_root
+            )
+            djs.init_datajob_context()
+            GlueJob(djs, "some-task", "task.py")
+            djs.create_resources()
+            template = self.app.synth().get_stack_by_name(djs.stack_name).template
+
+        default_arguments = [
+            resource["Properties"]["DefaultArguments"]
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::Glue::Job"
+        ][0]
+        self.assertEqual(
+            default_arguments["--extra-py-files"],
+            f"{djs.context.s3_url_wheel},s3://{djs.context.deployment_bucket_name}"
+            f"/some-stack-stg-runtime/datajob_runtime-1.0-py3-none-any.whl",
+        )
+        self.assertEqual(
+            default_arguments["--datajob_data_bucket"], djs.context.data_bucket_name
+        )
+
+    def test_glue_job_in_workflow_gets_the_run_prefix(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "task.py").write_text("print('hello')")
+            djs = DataJobStack(
+                scope=self.app, id="some-stack", stage="stg", project_root=project_root
+            )
+            djs.init_datajob_context()
+            task1 = GlueJob(djs, "task1", "task.py")
+            task2 = GlueJob(djs, "task2", "task.py")
+            with StepfunctionsWorkflow(djs, "some-workflow") as sfn:
+                task1 >> task2
+            djs.create_resources()
+
+        states = sfn.workflow.definition.to_dict()["States"]
+        self.assertEqual(
+            states[task2.unique_name]["Parameters"],
+            {
+                "JobName": task2.unique_name,
+                "Arguments": {
+                    "--datajob_run_prefix_root": "stg/some-workflow",
+                    "--datajob_run_id.$": "$$.Execution.Name",
+                    "--datajob_execution_input.$": "States.JsonToString($$.Execution.Input)",
+                },
+            },
+        )
+
+    def test_create_glue_ray_job_with_invalid_worker_type(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        with self.assertRaises(ValueError):
+            GlueJob(
+                djs,
+                "some-task",
+                "some/path/task.py",
+                job_type=GlueJobType.GLUERAY.value,
+                worker_type="G.1X",
+            )
+
+    def test_create_glue_streaming_job_successfully(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "task.py").write_text("print('hello')")
+            djs = DataJobStack(
+                scope=self.app, id="some-stack", stage="stg", project_root=project_root
+            )
+            djs.init_datajob_context()
+            glue_job = GlueJob(
+                djs,
+                "some-task",
+                "task.py",
+                job_type=GlueJobType.GLUESTREAMING.value,
+                window_size="30 seconds",
+            )
+            djs.create_resources()
+            template = self.app.synth().get_stack_by_name(djs.stack_name).template
+
+        glue_job_properties = [
+            resource["Properties"]
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::Glue::Job"
+        ][0]
+        self.assertEqual(glue_job_properties["Command"]["Name"], "gluestreaming")
+        self.assertEqual(
+            glue_job_properties["DefaultArguments"]["--checkpoint_location"],
+            f"s3://{djs.context.data_bucket_name}/glue-streaming-checkpoints/{glue_job.unique_name}/",
+        )
+        self.assertEqual(
+            glue_job_properties["DefaultArguments"]["--window_size"], "30 seconds"
+        )
+        start_job_runs = [
+            resource
+            for resource in template["Resources"].values()
+            if resource["Type"] == "Custom::AWS"
+        ]
+        self.assertEqual(len(start_job_runs), 1)
+        self.assertIn("startJobRun", str(start_job_runs[0]["Properties"]["Create"]))
+
+    def test_glue_streaming_job_cannot_be_orchestrated(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        streaming_job = GlueJob(
+            djs, "some-task", "some/path/task.py", job_type="gluestreaming"
+        )
+        other_job = GlueJob(djs, "other-task", "some/path/task.py")
+        with self.assertRaises(StepfunctionsWorkflowException):
+            with StepfunctionsWorkflow(djs, "some-workflow"):
+                streaming_job >> other_job
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,141 @@
+import json
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aws_cdk import core
+from typer.testing import CliRunner
+
+from datajob import datajob
+from datajob.datajob_stack import DataJobStack
+from datajob.glue import glue_job_bookmark
+from datajob.glue.glue_job import GlueJob
+from datajob.glue.glue_job_bookmark import GlueJobBookmarkException
+from datajob.runtime import glue_bookmarks
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+
+
+class TestGlueJobBookmark(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = core.App()
+
+    def test_glue_job_with_job_bookmark(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "task.py").write_text("print('hello')")
+            djs = DataJobStack(
+                scope=self.app, id="some-stack", stage="stg", project_root=project_root
+            )
+            djs.init_datajob_context()
+            task1 = GlueJob(
+                djs, "task1", "task.py", job_type="glueetl", job_bookmark="enable"
+            )
+            task2 = GlueJob(djs, "task2", "task.py")
+            with StepfunctionsWorkflow(djs, "some-workflow") as sfn:
+                task1 >> task2
+            djs.create_resources()
+            template = self.app.synth().get_stack_by_name(djs.stack_name).template
+
+        states = sfn.workflow.definition.to_dict()["States"]
+        bookmark_path = (
+            f"$$.Execution.Input['DatajobJobBookmarks']['{task1.unique_name}']"
+        )
+        choice = states[f"{task1.unique_name}-bookmark"]
+        self.assertEqual(choice["Default"], f"{task1.unique_name}-bookmark-enable")
+        self.assertEqual(
+            [rule["And"][1] for rule in choice["Choices"]],
+            [
+                {"Variable": bookmark_path, "StringEquals": option}
+                for option in ["enable", "pause", "disable", "reset"]
+            ],
+        )
+        self.assertEqual(
+            states[f"{task1.unique_name}-bookmark-pause"]["Result"],
+            "job-bookmark-pause",
+        )
+        # the option is added to the state, so that the outputs of earlier tasks stay in the state.
+        self.assertEqual(
+            states[f"{task1.unique_name}-bookmark-pause"]["ResultPath"],
+            "$.JobBookmarkOption",
+        )
+        reset = states[f"{task1.unique_name}-bookmark-reset"]
+        self.assertEqual(
+            reset["Resource"], "arn:aws:states:::aws-sdk:glue:resetJobBookmark"
+        )
+        self.assertEqual(reset["Next"], f"{task1.unique_name}-bookmark-enable")
+        self.assertEqual(
+            states[task1.unique_name]["Parameters"]["Arguments"][
+                "--job-bookmark-option.$"
+            ],
+            "$.JobBookmarkOption",
+        )
+        self.assertNotIn(f"{task2.unique_name}-bookmark", states)
+
+        glue_jobs = {
+            resource["Properties"]["Name"]: resource["Properties"]
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::Glue::Job"
+        }
+        self.assertEqual(
+            glue_jobs[task1.unique_name]["DefaultArguments"]["--job-bookmark-option"],
+            "job-bookmark-enable",
+        )
+        self.assertEqual(
+            json.loads(template["Outputs"]["DatajobJobBookmarkJobs"]["Value"]),
+            [task1.job_name],
+        )
+
+    def test_invalid_job_bookmark(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        with self.assertRaises(GlueJobBookmarkException):
+            GlueJob(
+                djs,
+                "task1",
+                "some/path/task.py",
+                job_type="glueetl",
+                job_bookmark="reset",
+            )
+        with self.assertRaises(ValueError):
+            GlueJob(djs, "task2", "some/path/task.py", job_bookmark="enable")
+
+    @patch("datajob.glue.glue_job_bookmark.reset_job_bookmarks")
+    @patch("datajob.glue.glue_job_bookmark._describe_stacks")
+    def test_datajob_cli_reset_bookmarks(self, m_describe_stacks, m_reset):
+        m_describe_stacks.return_value = {
+            "Stacks": [
+                {
+                    "Outputs": [
+                        {
+                            "OutputKey": glue_job_bookmark.JOB_BOOKMARKS_OUTPUT,
+                            "OutputValue": '["some-stack-stg-task1", "some-stack-stg-task2"]',
+                        }
+                    ]
+                }
+            ]
+        }
+        m_reset.return_value = ["some-stack-stg-task1"]
+        result = CliRunner().invoke(
+            datajob.app,
+            ["reset-bookmarks", "--stack", "some-stack", "--stage", "stg"],
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        m_describe_stacks.assert_called_once_with(stack_name="some-stack-stg")
+        m_reset.assert_called_once_with(
+            job_names=["some-stack-stg-task1", "some-stack-stg-task2"]
+        )
+
+        result = CliRunner().invoke(
+            datajob.app,
+            ["reset-bookmarks", "--stack", "some-stack", "--job", "unknown"],
+        )
+        self.assertNotEqual(result.exit_code, 0)
+
+    def test_get_transformation_ctx(self):
+        self.assertEqual(
+            glue_bookmarks.get_transformation_ctx("s3://some-bucket/events/"),
+            "s3_some_bucket_events",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
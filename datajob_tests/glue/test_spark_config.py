@@ -0,0 +1,104 @@
+import pathlib
+import tempfile
+import unittest
+
+from aws_cdk import core
+
+from datajob.datajob_stack import DataJobStack
+from datajob.glue import spark_config
+from datajob.glue.glue_job import GlueJob
+from datajob.glue.spark_config import SparkConfig
+from datajob.glue.spark_config import SparkConfigException
+
+
+class TestSparkConfig(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = core.App()
+
+    def test_spark_config_arguments(self):
+        config = SparkConfig(
+            shuffle_partitions=400,
+            adaptive_query_execution=True,
+            broadcast_threshold="50MB",
+            s3_committer=True,
+            executor_memory_overhead="1g",
+            s3_shuffle=True,
+        )
+        self.assertEqual(
+            config.get_arguments(shuffle_location="s3://some-bucket/shuffle/"),
+            {
+                "--enable-s3-parquet-optimized-committer": "true",
+                "--write-shuffle-files-to-s3": "true",
+                "--write-shuffle-spills-to-s3": "true",
+                "--conf": "spark.sql.shuffle.partitions=400"
+                " --conf spark.sql.adaptive.enabled=true"
+                " --conf spark.sql.autoBroadcastJoinThreshold=50MB"
+                " --conf spark.executor.memoryOverhead=1g"
+                " --conf spark.shuffle.glue.s3ShuffleBucket=s3://some-bucket/shuffle/",
+            },
+        )
+
+    def test_merge_arguments_keeps_one_conf_argument(self):
+        merged_arguments = spark_config.merge_arguments(
+            arguments={"--conf": "spark.some.key=1", "--some-argument": "a"},
+            spark_arguments={"--conf": "spark.sql.shuffle.partitions=400"},
+        )
+        self.assertEqual(
+            merged_arguments,
+            {
+                "--conf": "spark.sql.shuffle.partitions=400 --conf spark.some.key=1",
+                "--some-argument": "a",
+            },
+        )
+
+    def test_invalid_spark_config(self):
+        with self.assertRaises(SparkConfigException):
+            SparkConfig(shuffle_partitions=0)
+        with self.assertRaises(SparkConfigException):
+            SparkConfig(broadcast_threshold="a lot")
+        with self.assertRaises(SparkConfigException):
+            SparkConfig(executor_memory_overhead="1 gigabyte")
+        with self.assertRaises(SparkConfigException):
+            SparkConfig(extra_conf={"sql.shuffle.partitions": "400"})
+        with self.assertRaises(SparkConfigException):
+            spark_config.get_spark_config("unknown-preset")
+
+    def test_glue_job_with_spark_config_preset(self):
+        with tempfile.TemporaryDirectory() as project_root:
+            pathlib.Path(project_root, "task.py").write_text("print('hello')")
+            djs = DataJobStack(
+                scope=self.app, id="some-stack", stage="stg", project_root=project_root
+            )
+            djs.init_datajob_context()
+            glue_job = GlueJob(
+                djs,
+                "some-task",
+                "task.py",
+                job_type="glueetl",
+                spark_config="skewed-aggregation",
+                arguments={"--conf": "spark.some.key=1"},
+            )
+            djs.create_resources()
+            template = self.app.synth().get_stack_by_name(djs.stack_name).template
+
+        default_arguments = [
+            resource["Properties"]["DefaultArguments"]
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::Glue::Job"
+        ][0]
+        self.assertEqual(default_arguments["--write-shuffle-files-to-s3"], "true")
+        self.assertIn(
+            f"spark.shuffle.glue.s3ShuffleBucket=s3://{djs.context.data_bucket_name}"
+            f"/glue-shuffle/{glue_job.unique_name}/",
+            default_arguments["--conf"],
+        )
+        self.assertTrue(default_arguments["--conf"].endswith("--conf spark.some.key=1"))
+
+    def test_pythonshell_job_with_spark_config(self):
+        djs = DataJobStack(scope=self.app, id="some-stack", stage="stg")
+        with self.assertRaises(ValueError):
+            GlueJob(djs, "some-task", "some/path/task.py", spark_config="large-join")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pyarrow.dataset
+
+from datajob.runtime import dataset as dataset_runtime
+from datajob.runtime.dataset import Dataset
+from datajob.runtime.dataset import DatasetException
+
+
+def _get_events():
+    return pyarrow.table(
+        {
+            "date": ["2024-01-01", "2024-01-01", "2024-01-02", "2024-01-03"],
+            "country": ["be", "nl", "be", "be"],
+            "user_id": [1, 2, 3, 4],
+            "amount": [10.0, 20.0, 30.0, 40.0],
+        }
+    )
+
+
+class TestDataset(unittest.TestCase):
+    def test_write_and_read_partitioned_parquet(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            location = str(pathlib.Path(tmp_dir, "events"))
+            Dataset("events", partition_cols=["date"], location=location).write(
+                _get_events()
+            )
+            self.assertTrue(
+                pathlib.Path(location, "date=2024-01-02", "part-0.parquet").exists()
+            )
+            schema_info = json.loads(
+                pathlib.Path(location, dataset_runtime.SCHEMA_FILE).read_text()
+            )
+            self.assertEqual(schema_info["partition_cols"], ["date"])
+            self.assertEqual(schema_info["columns"]["amount"], "double")
+
+            dataset = Dataset("events", location=location)
+            self.assertEqual(dataset.get_schema(), _get_events().schema)
+            table = dataset.read(
+                columns=["user_id", "amount"],
+                filters=[("date", ">=", "2024-01-02"), ("country", "=", "be")],
+            )
+            self.assertEqual(table.column_names, ["user_id", "amount"])
+            self.assertEqual(table.column("user_id").to_pylist(), [3, 4])
+            # an expression works too.
+            table = dataset.read(filters=pyarrow.dataset.field("user_id") == 2)
+            self.assertEqual(table.column("date").to_pylist(), ["2024-01-01"])
+
+    def test_write_replaces_partitions_in_arrow_format(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            location = str(pathlib.Path(tmp_dir, "events"))
+            dataset = Dataset(
+                "events", partition_cols=["date"], format="arrow", location=location
+            )
+            dataset.write(_get_events())
+            dataset.write(_get_events().slice(0, 1))
+            self.assertTrue(
+                pathlib.Path(location, "date=2024-01-01", "part-0.arrow").exists()
+            )
+            table = Dataset("events", location=location).read()
+            self.assertEqual(sorted(table.column("user_id").to_pylist()), [1, 3, 4])
+
+    def test_read_a_dataset_that_does_not_exist(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(DatasetException):
+                Dataset("events", location=str(pathlib.Path(tmp_dir, "events"))).read()
+
+    def test_get_dataset_location(self):
+        self.assertEqual(
+            dataset_runtime.get_dataset_location(
+                "events", prefix="stg/some-workflow/", bucket="some-bucket"
+            ),
+            "s3://some-bucket/stg/some-workflow/events",
+        )
+        self.assertEqual(
+            dataset_runtime.get_dataset_location(
+                "events", prefix="", bucket="some-bucket"
+            ),
+            "s3://some-bucket/events",
+        )
+        # the prefix of the run is the default.
+        with patch.dict(os.environ, {"DATAJOB_RUN_PREFIX": "stg/some-workflow/run"}):
+            self.assertEqual(
+                dataset_runtime.get_dataset_location("events", bucket="some-bucket"),
+                "s3://some-bucket/stg/some-workflow/run/events",
+            )
+        with self.assertRaises(DatasetException):
+            Dataset("events", format="csv", bucket="some-bucket")
+
+    def test_dataset_needs_a_recent_pyarrow(self):
+        # glue 3.0 ships a pyarrow without write_dataset(existing_data_behavior=...).
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dataset = Dataset("events", location=str(pathlib.Path(tmp_dir, "events")))
+            with patch.object(pyarrow, "__version__", "2.0.0"):
+                with self.assertRaisesRegex(DatasetException, "10.0 or later"):
+                    dataset.write(_get_events())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import json
+import os
+import pathlib
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+
+import boto3
+from botocore.config import Config
+from moto import mock_s3
+
+from datajob.package import runtime
+from datajob.runtime import s3 as s3_runtime
+from datajob.runtime.s3 import S3
+from datajob.runtime.s3 import S3Exception
+
+
+class TestS3(unittest.TestCase):
+    def _create_s3(self) -> None:
+        # moto does not understand the checksums recent botocore versions add to a request.
+        self.client = boto3.client(
+            "s3",
+            region_name="us-east-1",
+            config=Config(request_checksum_calculation="when_required"),
+        )
+        self.client.create_bucket(Bucket="some-bucket")
+        self.s3 = S3(bucket="some-bucket", max_workers=4, client=self.client)
+
+    @mock_s3
+    def test_read_and_write(self):
+        self._create_s3()
+        self.s3.write("some/key", b"0123456789")
+        self.assertEqual(self.s3.read("some/key"), b"0123456789")
+        self.assertEqual(self.s3.read("some/key", start=2, end=4), b"234")
+        self.assertEqual(self.s3.read("some/key", start=7), b"789")
+        self.assertEqual(
+            b"".join(self.s3.stream("some/key", chunk_size=3)), b"0123456789"
+        )
+
+    @mock_s3
+    def test_upload_and_download_files(self):
+        self._create_s3()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths_and_keys = {}
+            for i in range(5):
+                path = pathlib.Path(tmp_dir, f"file-{i}")
+                path.write_bytes(bytes([i]) * 100)
+                paths_and_keys[str(path)] = f"files/file-{i}"
+            self.s3.upload_files(paths_and_keys)
+            self.assertEqual(
+                self.s3.read_many(["files/file-0", "files/file-4"]),
+                {"files/file-0": bytes([0]) * 100, "files/file-4": bytes([4]) * 100},
+            )
+            download_path = str(pathlib.Path(tmp_dir, "download"))
+            self.s3.download_files({"files/file-3": download_path})
+            self.assertEqual(pathlib.Path(download_path).read_bytes(), bytes([3]) * 100)
+
+    @mock_s3
+    def test_list_and_delete(self):
+        self._create_s3()
+        for i in range(5):
+            self.s3.write(f"raw/part-{i}", b"a")
+        self.s3.write("other/part-0", b"a")
+        self.assertEqual(
+            list(self.s3.list("raw/")), [f"raw/part-{i}" for i in range(5)]
+        )
+        self.s3.delete(["raw/part-0", "raw/part-1"])
+        self.assertEqual(
+            list(self.s3.list("raw/")), [f"raw/part-{i}" for i in range(2, 5)]
+        )
+        self.s3.delete_prefix("raw/")
+        self.assertEqual(list(self.s3.list()), ["other/part-0"])
+
+
+class TestDataBucket(unittest.TestCase):
+    def test_get_data_bucket(self):
+        self.assertEqual(
+            s3_runtime.get_data_bucket(
+                ["script.py", "--datajob_data_bucket", "some-bucket"]
+            ),
+            "some-bucket",
+        )
+        self.assertEqual(
+            s3_runtime.get_data_bucket(["script.py", "--datajob_data_bucket=other"]),
+            "other",
+        )
+        with self.assertRaises(S3Exception):
+            s3_runtime.get_data_bucket(["script.py"])
+
+    def test_get_run_prefix(self):
+        argv = [
+            "script.py",
+            "--datajob_run_prefix_root",
+            "stg/some-workflow",
+            "--datajob_run_id",
+            "some-execution",
+            "--datajob_execution_input",
+            "{}",
+        ]
+        self.assertEqual(
+            s3_runtime.get_run_prefix(argv), "stg/some-workflow/some-execution"
+        )
+        # a resumed execution gets the run id of the execution it resumes.
+        argv[-1] = json.dumps({"DatajobRunId": "failed-execution"})
+        self.assertEqual(
+            s3_runtime.get_run_prefix(argv), "stg/some-workflow/failed-execution"
+        )
+        with patch.dict(os.environ, {"DATAJOB_RUN_PREFIX": "dev/local/"}):
+            self.assertEqual(s3_runtime.get_run_prefix(["script.py"]), "dev/local")
+        with patch.dict(os.environ, clear=True):
+            with self.assertRaises(S3Exception):
+                s3_runtime.get_run_prefix(["script.py"])
+
+    def test_get_partition_date(self):
+        argv = [
+            "script.py",
+            "--datajob_execution_input",
+            json.dumps({"DatajobPartitionDate": "2026-01-01"}),
+        ]
+        self.assertEqual(s3_runtime.get_partition_date(argv), "2026-01-01")
+        self.assertIsNone(s3_runtime.get_partition_date(["script.py"]))
+
+    def test_create_runtime_wheel(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            wheel_path = runtime.create_runtime_wheel(target_dir=tmp_dir)
+            with zipfile.ZipFile(wheel_path) as wheel:
+                names = wheel.namelist()
+                compress_types = {info.compress_type for info in wheel.infolist()}
+                record = wheel.read("datajob_runtime-1.0.dist-info/RECORD").decode()
+            with tempfile.TemporaryDirectory() as other_tmp_dir:
+                other_wheel_path = runtime.create_runtime_wheel(
+                    target_dir=other_tmp_dir
+                )
+                # the same code gives the same wheel, so that cdk does not redeploy it.
+                self.assertEqual(wheel_path.read_bytes(), other_wheel_path.read_bytes())
+        self.assertIn("datajob/__init__.py", names)
+        self.assertIn("datajob/runtime/s3.py", names)
+        self.assertIn("datajob_runtime-1.0.dist-info/WHEEL", names)
+        self.assertIn("datajob/runtime/s3.py,sha256=", record)
+        self.assertEqual(compress_types, {zipfile.ZIP_DEFLATED})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -128,6 +128,11 @@ class TestSagemaker(unittest.TestCase):
                 )
             },
         )
+        # a workflow only needs the execution input of its own tasks.
+        self.assertEqual(
+            sfn_workflow_parallel.get_execution_input_keys(),
+            ["some-stack-stg-processing-job", "some-stack-stg-training-job"],
+        )
 
     @mock.patch("sagemaker.session.Session.default_bucket")
     def test_sagemaker_transform_step_successfully(self, m_default_bucket):
@@ -0,0 +1,206 @@
+import json
+import pathlib
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError
+from botocore.exceptions import EndpointConnectionError
+
+from datajob.stepfunctions import stepfunctions_backfill
+from datajob.stepfunctions.stepfunctions_backfill import Backfill
+from datajob.stepfunctions.stepfunctions_backfill import BackfillException
+
+
+def get_throttling_error() -> ClientError:
+    return ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+        "StartExecution",
+    )
+
+
+def _raise(error: Exception):
+    raise error
+
+
+class TestStepfunctionsBackfill(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.progress_path = pathlib.Path(self.tmp_dir.name, "progress.json")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_get_partition_dates(self):
+        self.assertEqual(
+            stepfunctions_backfill.get_partition_dates(
+                start=datetime(2026, 1, 30),
+                end=datetime(2026, 2, 2),
+                step=stepfunctions_backfill.parse_step("1d"),
+            ),
+            ["2026-01-30", "2026-01-31", "2026-02-01", "2026-02-02"],
+        )
+        self.assertEqual(
+            stepfunctions_backfill.get_partition_dates(
+                start=datetime(2026, 1, 1),
+                end=datetime(2026, 1, 1, 12),
+                step=stepfunctions_backfill.parse_step("12h"),
+            ),
+            ["2026-01-01T00:00:00", "2026-01-01T12:00:00"],
+        )
+        self.assertEqual(stepfunctions_backfill.parse_step("1w"), timedelta(weeks=1))
+        with self.assertRaises(BackfillException):
+            stepfunctions_backfill.parse_step("1 day")
+        with self.assertRaises(BackfillException):
+            stepfunctions_backfill.get_partition_dates(
+                start=datetime(2026, 2, 1),
+                end=datetime(2026, 1, 1),
+                step=timedelta(days=1),
+            )
+
+    def test_backfill_retries_throttled_starts_and_records_the_progress(self):
+        client = MagicMock()
+        start_execution_responses = [
+            get_throttling_error(),
+            {"executionArn": "execution-1"},
+            {"executionArn": "execution-2"},
+        ]
+        client.start_execution.side_effect = start_execution_responses
+        client.describe_execution.side_effect = lambda executionArn: {
+            "status": "SUCCEEDED" if executionArn == "execution-1" else "FAILED"
+        }
+        sleep = MagicMock()
+        a_backfill = Backfill(
+            state_machine_arn="arn:aws:states:eu-west-1:123456789012:stateMachine:some-name",
+            partition_dates=["2026-01-01", "2026-01-02"],
+            concurrency=1,
+            progress_path=self.progress_path,
+            execution_input_keys=["some-job"],
+            client=client,
+            sleep=sleep,
+        )
+        a_backfill.started = datetime(2026, 10, 19, 12)
+
+        summary = a_backfill.run()
+
+        self.assertEqual(
+            summary,
+            {
+                "succeeded": ["2026-01-01"],
+                "failed": {"2026-01-02": "FAILED"},
+                "skipped": [],
+            },
+        )
+        # we waited before starting the execution again.
+        sleep.assert_any_call(1)
+        first_start = client.start_execution.call_args_list[1][1]
+        self.assertEqual(first_start["name"], "backfill-20260101-20261019T120000")
+        self.assertEqual(
+            json.loads(first_start["input"]),
+            {
+                "some-job": "some-job-20260101-20261019T120000",
+                "DatajobPartitionDate": "2026-01-01",
+            },
+        )
+        self.assertEqual(
+            json.loads(self.progress_path.read_text()),
+            {"succeeded": {"2026-01-01": "execution-1"}, "running": {}},
+        )
+
+        # the next backfill only runs the partition date that failed.
+        client.start_execution.side_effect = [{"executionArn": "execution-1"}]
+        summary = Backfill(
+            state_machine_arn="arn:aws:states:eu-west-1:123456789012:stateMachine:some-name",
+            partition_dates=["2026-01-01", "2026-01-02"],
+            progress_path=self.progress_path,
+            client=client,
+            sleep=sleep,
+        ).run()
+        self.assertEqual(
+            summary,
+            {"succeeded": ["2026-01-02"], "failed": {}, "skipped": ["2026-01-01"]},
+        )
+
+    def test_backfill_follows_the_running_executions(self):
+        self.progress_path.write_text(
+            json.dumps({"succeeded": {}, "running": {"2026-01-01": "execution-1"}})
+        )
+        client = MagicMock()
+        client.describe_execution.side_effect = [
+            {"status": "RUNNING"},
+            {"status": "SUCCEEDED"},
+        ]
+        summary = Backfill(
+            state_machine_arn="arn:aws:states:eu-west-1:123456789012:stateMachine:some-name",
+            partition_dates=["2026-01-01"],
+            progress_path=self.progress_path,
+            client=client,
+            sleep=MagicMock(),
+        ).run()
+        self.assertEqual(summary["succeeded"], ["2026-01-01"])
+        client.start_execution.assert_not_called()
+
+    def test_backfill_records_connection_errors_as_failed_dates(self):
+        client = MagicMock()
+        client.start_execution.side_effect = lambda **kwargs: {
+            "executionArn": kwargs["name"]
+        }
+        client.describe_execution.side_effect = lambda executionArn: (
+            {"status": "SUCCEEDED"}
+            if "20260101" in executionArn
+            else _raise(EndpointConnectionError(endpoint_url="https://states"))
+        )
+        summary = Backfill(
+            state_machine_arn="some-arn",
+            partition_dates=["2026-01-01", "2026-01-02"],
+            progress_path=self.progress_path,
+            client=client,
+            sleep=MagicMock(),
+        ).run()
+        self.assertEqual(summary["succeeded"], ["2026-01-01"])
+        self.assertEqual(summary["failed"], {"2026-01-02": "EndpointConnectionError"})
+
+    def test_backfill_keeps_a_bounded_number_of_executions_in_flight(self):
+        lock = threading.Lock()
+        in_flight = {"now": 0, "max": 0}
+
+        def start_execution(**kwargs):
+            with lock:
+                in_flight["now"] += 1
+                in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            return {"executionArn": kwargs["name"]}
+
+        def describe_execution(executionArn):
+            time.sleep(0.01)
+            with lock:
+                in_flight["now"] -= 1
+            return {"status": "SUCCEEDED"}
+
+        client = MagicMock()
+        client.start_execution.side_effect = start_execution
+        client.describe_execution.side_effect = describe_execution
+        with self.assertRaises(BackfillException):
+            Backfill(
+                state_machine_arn="some-arn",
+                partition_dates=[],
+                concurrency=0,
+                progress_path=self.progress_path,
+                client=client,
+            )
+        summary = Backfill(
+            state_machine_arn="some-arn",
+            partition_dates=[f"2026-01-{day:02d}" for day in range(1, 11)],
+            concurrency=3,
+            progress_path=self.progress_path,
+            client=client,
+        ).run()
+        self.assertEqual(len(summary["succeeded"]), 10)
+        self.assertLessEqual(in_flight["max"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
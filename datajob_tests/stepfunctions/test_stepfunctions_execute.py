@@ -1,5 +1,7 @@
+import json
 import unittest
 from datetime import datetime
+from unittest.mock import patch
 
 from datajob.stepfunctions import stepfunctions_execute
 
@@ -19,3 +21,248 @@ class TestStepfunctionsExecute(unittest.TestCase):
             name="a" * 1, unique_identifier=current_date
         )
         self.assertEqual(unique_name, "a-20210101T120001")
+
+    @patch("datajob.stepfunctions.stepfunctions_execute.get_execution_input")
+    @patch("datajob.stepfunctions.stepfunctions_execute._get_execution_history")
+    @patch("datajob.stepfunctions.stepfunctions_execute._describe_execution")
+    @patch("datajob.stepfunctions.stepfunctions_execute._describe_state_machine")
+    def test_get_resume_execution_input_successfully(
+        self,
+        m_describe_state_machine,
+        m_describe_execution,
+        m_get_execution_history,
+        m_get_execution_input,
+    ):
+        m_describe_state_machine.return_value = {
+            "name": "some-state-machine",
+            "definition": json.dumps({"DatajobSkipTasks": "..."}),
+        }
+        m_describe_execution.return_value = {
+            "input": json.dumps({"DatajobSkipTasks": {"task1": True}})
+        }
+        m_get_execution_history.return_value = [
+            {"type": "TaskStateEntered", "stateEnteredEventDetails": {"name": "task2"}},
+            {"type": "TaskStateExited", "stateExitedEventDetails": {"name": "task2"}},
+            {"type": "TaskStateEntered", "stateEnteredEventDetails": {"name": "task3"}},
+            {"type": "TaskFailed"},
+        ]
+        m_get_execution_input.return_value = {"some-job": "some-job-20210101T120001"}
+
+        execution_input = stepfunctions_execute.get_resume_execution_input(
+            execution_arn="some-execution-arn", state_machine_arn="some-arn"
+        )
+        self.assertEqual(
+            execution_input,
+            {
+                "some-job": "some-job-20210101T120001",
+                "DatajobSkipTasks": {"task1": True, "task2": True},
+            },
+        )
+
+    @patch("datajob.stepfunctions.stepfunctions_execute.get_execution_input")
+    @patch("datajob.stepfunctions.stepfunctions_execute._get_execution_history")
+    @patch("datajob.stepfunctions.stepfunctions_execute._describe_execution")
+    @patch("datajob.stepfunctions.stepfunctions_execute._describe_state_machine")
+    def test_get_resume_execution_input_reuses_the_run_id(
+        self,
+        m_describe_state_machine,
+        m_describe_execution,
+        m_get_execution_history,
+        m_get_execution_input,
+    ):
+        m_describe_state_machine.return_value = {
+            "name": "some-state-machine",
+            "definition": json.dumps({"DatajobSkipTasks": "..."}),
+        }
+        m_get_execution_history.return_value = [
+            {
+                "type": "TaskStateExited",
+                "stateExitedEventDetails": {
+                    "name": "task1",
+                    "output": json.dumps(
+                        {
+                            "Datajob": {
+                                "RunId": "first-run",
+                                "Outputs": {"task1": {"model": "s3://some/model"}},
+                            }
+                        }
+                    ),
+                },
+            }
+        ]
+        m_get_execution_input.return_value = None
+        m_describe_execution.return_value = {"name": "first-run", "input": "{}"}
+        execution_input = stepfunctions_execute.get_resume_execution_input(
+            execution_arn="some-execution-arn", state_machine_arn="some-arn"
+        )
+        self.assertEqual(execution_input["DatajobRunId"], "first-run")
+        # the tasks after the skipped task1 get its outputs.
+        self.assertEqual(
+            execution_input["DatajobOutputs"], {"task1": {"model": "s3://some/model"}}
+        )
+        # resuming a resumed execution keeps the run id of the first execution.
+        m_describe_execution.return_value = {
+            "name": "second-run",
+            "input": json.dumps({"DatajobRunId": "first-run"}),
+        }
+        execution_input = stepfunctions_execute.get_resume_execution_input(
+            execution_arn="some-execution-arn", state_machine_arn="some-arn"
+        )
+        self.assertEqual(execution_input["DatajobRunId"], "first-run")
+
+    def test_get_subgraph_state_ids_successfully(self):
+        definition = {
+            "StartAt": "parallel",
+            "States": {
+                "parallel": {
+                    "Type": "Parallel",
+                    "Branches": [
+                        {
+                            "StartAt": "stack-stg-extract-skip",
+                            "States": {
+                                "stack-stg-extract-skip": {
+                                    "Type": "Choice",
+                                    "Comment": '{"DatajobUpstreamTasks": []}',
+                                }
+                            },
+                        },
+                        {
+                            "StartAt": "stack-stg-clean-skip",
+                            "States": {
+                                "stack-stg-clean-skip": {
+                                    "Type": "Choice",
+                                    "Comment": '{"DatajobUpstreamTasks": []}',
+                                }
+                            },
+                        },
+                    ],
+                    "Next": "stack-stg-transform-skip",
+                },
+                "stack-stg-transform-skip": {
+                    "Type": "Choice",
+                    "Comment": '{"DatajobUpstreamTasks": ["stack-stg-clean", "stack-stg-extract"]}',
+                },
+                "stack-stg-load-skip": {
+                    "Type": "Choice",
+                    "Comment": '{"DatajobUpstreamTasks": ["stack-stg-transform"]}',
+                },
+                "some-other-choice": {"Type": "Choice", "Comment": "not json"},
+            },
+        }
+        graph = stepfunctions_execute.get_task_graph(definition)
+        self.assertEqual(
+            graph,
+            {
+                "stack-stg-extract": [],
+                "stack-stg-clean": [],
+                "stack-stg-transform": ["stack-stg-clean", "stack-stg-extract"],
+                "stack-stg-load": ["stack-stg-transform"],
+            },
+        )
+        self.assertEqual(
+            stepfunctions_execute.get_subgraph_state_ids(graph, only=["transform"]),
+            {"stack-stg-transform"},
+        )
+        self.assertEqual(
+            stepfunctions_execute.get_subgraph_state_ids(
+                graph, only=["extract"], downstream=True
+            ),
+            {"stack-stg-extract", "stack-stg-transform", "stack-stg-load"},
+        )
+        self.assertEqual(
+            stepfunctions_execute.get_subgraph_state_ids(
+                graph, only=["stack-stg-transform"], upstream=True
+            ),
+            {"stack-stg-extract", "stack-stg-clean", "stack-stg-transform"},
+        )
+        with self.assertRaises(stepfunctions_execute.StepfunctionsExecuteException):
+            stepfunctions_execute.get_subgraph_state_ids(graph, only=["unknown"])
+
+    @patch("datajob.stepfunctions.stepfunctions_execute.get_execution_input")
+    @patch("datajob.stepfunctions.stepfunctions_execute._describe_state_machine")
+    def test_get_only_execution_input_successfully(
+        self, m_describe_state_machine, m_get_execution_input
+    ):
+        m_describe_state_machine.return_value = {
+            "name": "some-state-machine",
+            "definition": json.dumps(
+                {
+                    "States": {
+                        "task1-skip": {
+                            "Type": "Choice",
+                            "Comment": '{"DatajobUpstreamTasks": []}',
+                            "Choices": [
+                                {
+                                    "Variable": "$$.Execution.Input['DatajobSkipTasks']['task1']"
+                                }
+                            ],
+                        },
+                        "task2-skip": {
+                            "Type": "Choice",
+                            "Comment": '{"DatajobUpstreamTasks": ["task1"]}',
+                        },
+                        "task3-skip": {
+                            "Type": "Choice",
+                            "Comment": '{"DatajobUpstreamTasks": ["task2"]}',
+                        },
+                    }
+                }
+            ),
+        }
+        m_get_execution_input.return_value = {"some-job": "some-job-20210101T120001"}
+
+        execution_input = stepfunctions_execute.get_only_execution_input(
+            state_machine_arn="some-arn", only=["task2"], downstream=True
+        )
+        self.assertEqual(
+            execution_input,
+            {
+                "some-job": "some-job-20210101T120001",
+                "DatajobSkipTasks": {"task1": True},
+            },
+        )
+
+    @patch("datajob.stepfunctions.stepfunctions_execute._describe_state_machine")
+    def test_get_resume_execution_input_not_skippable(self, m_describe_state_machine):
+        m_describe_state_machine.return_value = {
+            "name": "some-state-machine",
+            "definition": json.dumps({"StartAt": "task1"}),
+        }
+        with self.assertRaises(stepfunctions_execute.StepfunctionsExecuteException):
+            stepfunctions_execute.get_resume_execution_input(
+                execution_arn="some-execution-arn", state_machine_arn="some-arn"
+            )
+
+    @patch("datajob.stepfunctions.stepfunctions_execute._describe_state_machine")
+    @patch("datajob.stepfunctions.stepfunctions_execute.Workflow")
+    def test_execute_express_workflow_synchronously(
+        self, m_workflow, m_describe_state_machine
+    ):
+        m_describe_state_machine.return_value = {"type": "EXPRESS"}
+        m_client = m_workflow.attach.return_value.client
+        m_client.start_sync_execution.return_value = {
+            "status": "SUCCEEDED",
+            "output": "{}",
+        }
+
+        execution = stepfunctions_execute.execute(
+            "some-arn", execution_input={"some-job": "some-job-20210101T120001"}
+        )
+
+        self.assertEqual(stepfunctions_execute.get_status(execution), "SUCCEEDED")
+        m_client.start_sync_execution.assert_called_once_with(
+            stateMachineArn="some-arn",
+            input=json.dumps({"some-job": "some-job-20210101T120001"}),
+        )
+        m_workflow.attach.return_value.execute.assert_not_called()
+
+    @patch("datajob.stepfunctions.stepfunctions_execute._describe_state_machine")
+    @patch("datajob.stepfunctions.stepfunctions_execute.Workflow")
+    def test_execute_standard_workflow_asynchronously(
+        self, m_workflow, m_describe_state_machine
+    ):
+        m_describe_state_machine.return_value = {"type": "STANDARD"}
+
+        stepfunctions_execute.execute("some-arn", execution_input=None)
+
+        m_workflow.attach.return_value.execute.assert_called_once_with(inputs=None)
@@ -0,0 +1,231 @@
+import json
+import os
+import pathlib
+import random
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from aws_cdk import core
+from moto import mock_stepfunctions
+from stepfunctions.steps.states import Task
+
+from datajob.datajob_stack import DataJobStack
+from datajob.stepfunctions import stepfunctions_workflow
+from datajob.stepfunctions.stepfunctions_pipeline import create_workflow
+from datajob.stepfunctions.stepfunctions_pipeline import PipelineException
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+from datajob.stepfunctions.stepfunctions_workflow import (
+    StepfunctionsWorkflowException,
+)
+
+PIPELINE = """
+name: some-pipeline
+workflow:
+  skippable: true
+tasks:
+  prepare:
+    type: glue
+    job_path: task.py
+    outputs:
+      features: null
+  clean:
+    type: glue
+    job_path: task.py
+    arguments:
+      --some-argument: a
+  train:
+    type: sagemaker_training
+    depends_on: [prepare]
+    estimator:
+      class: sagemaker.estimator.Estimator
+      arguments:
+        image_uri: 123456789012.dkr.ecr.eu-west-1.amazonaws.com/train:latest
+        role: arn:aws:iam::123456789012:role/sagemaker
+        instance_count: 1
+        instance_type: ml.m5.xlarge
+        sagemaker_session:
+          class: sagemaker.LocalSession
+    data:
+      output: prepare.features
+edges:
+  - [clean, train]
+"""
+
+
+@stepfunctions_workflow.task
+class SomeMockedClass(object):
+    def __init__(self, unique_name):
+        self.unique_name = unique_name
+        self.sfn_task = Task(state_id=unique_name)
+
+
+class TestStepfunctionsPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-1")
+
+    def setUp(self) -> None:
+        self.app = core.App()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        pathlib.Path(self.tmp_dir.name, "task.py").write_text("print('hello')")
+        self.djs = DataJobStack(
+            scope=self.app,
+            id="some-stack",
+            stage="stg",
+            project_root=self.tmp_dir.name,
+        )
+        self.djs.init_datajob_context()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    @mock_stepfunctions
+    @mock.patch("sagemaker.session.Session.default_bucket")
+    def test_create_workflow_from_a_yaml_pipeline(self, m_default_bucket):
+        m_default_bucket.return_value = "sagemaker-bucket-name"
+        path = pathlib.Path(self.tmp_dir.name, "pipeline.yaml")
+        path.write_text(PIPELINE)
+        workflow = create_workflow(self.djs, path)
+
+        definition = workflow.workflow.definition.to_dict()
+        self.assertTrue(workflow.skippable)
+        # the workflow passes the output of prepare, it starts with the states of the run.
+        self.assertEqual(definition["StartAt"], "datajob-run")
+        # prepare and clean run in parallel, train runs after both.
+        parallel_state = definition["States"][
+            definition["States"]["datajob-run-from-execution"]["Next"]
+        ]
+        self.assertEqual(parallel_state["Type"], "Parallel")
+        self.assertEqual(
+            [branch["StartAt"] for branch in parallel_state["Branches"]],
+            ["some-stack-stg-clean-skip", "some-stack-stg-prepare-skip"],
+        )
+        train_state = definition["States"]["some-stack-stg-train"]
+        self.assertEqual(
+            train_state["Parameters"]["InputDataConfig"][0]["DataSource"][
+                "S3DataSource"
+            ]["S3Uri.$"],
+            f"States.Format('s3://{self.djs.context.data_bucket_name}/stg/some-pipeline/{{}}/prepare/features/', "
+            f"$.Datajob.RunId)",
+        )
+
+    @mock_stepfunctions
+    def test_create_workflow_from_a_json_pipeline(self):
+        path = pathlib.Path(self.tmp_dir.name, "pipeline.json")
+        path.write_text(
+            json.dumps(
+                {
+                    "name": "some-pipeline",
+                    "tasks": {"task1": {"type": "glue", "job_path": "task.py"}},
+                }
+            )
+        )
+        workflow = create_workflow(self.djs, path)
+        self.assertEqual(
+            workflow.workflow.definition.to_dict()["StartAt"], "some-stack-stg-task1"
+        )
+
+    def test_invalid_pipelines(self):
+        with self.assertRaises(PipelineException):
+            create_workflow(self.djs, {"name": "some-pipeline", "tasks": {}})
+        with self.assertRaises(PipelineException):
+            create_workflow(
+                self.djs,
+                {"name": "some-pipeline", "tasks": {"task1": {"job_path": "task.py"}}},
+            )
+        with self.assertRaises(PipelineException):
+            create_workflow(
+                self.djs,
+                {
+                    "name": "some-pipeline",
+                    "tasks": {"task1": {"type": "glue", "job_path": "task.py"}},
+                    "edges": [["task1", "unknown"]],
+                },
+            )
+        with self.assertRaises(PipelineException):
+            create_workflow(self.djs, "pipeline.txt")
+        # the type of a task is a datajob task class.
+        with self.assertRaisesRegex(PipelineException, "datajob task class"):
+            create_workflow(
+                self.djs,
+                {"name": "some-pipeline", "tasks": {"task1": {"type": "os:system"}}},
+            )
+        # a pipeline only creates the classes we allow.
+        some_pipeline = {
+            "name": "some-pipeline",
+            "tasks": {
+                "task1": {
+                    "type": "glue",
+                    "job_path": "task.py",
+                    "arguments": {
+                        "--some-argument": {
+                            "class": "os.system",
+                            "arguments": {"command": "echo hello"},
+                        }
+                    },
+                }
+            },
+        }
+        with self.assertRaisesRegex(PipelineException, "can only create"):
+            create_workflow(self.djs, some_pipeline)
+        with self.assertRaises(PipelineException):
+            create_workflow(
+                self.djs,
+                {
+                    "name": "some-pipeline",
+                    "tasks": {
+                        "task1": {
+                            "type": "glue",
+                            "job_path": "task.py",
+                            "arguments": {
+                                "--some-argument": {
+                                    "class": "collections.OrderedDict",
+                                    "arguments": {"a": "b"},
+                                }
+                            },
+                        }
+                    },
+                },
+            )
+
+    @mock_stepfunctions
+    def test_workflow_with_a_cycle(self):
+        task1 = SomeMockedClass("task1")
+        task2 = SomeMockedClass("task2")
+        task3 = SomeMockedClass("task3")
+        with self.assertRaisesRegex(
+            StepfunctionsWorkflowException, "task1 >> task2 >> task3 >> task1"
+        ):
+            StepfunctionsWorkflow.from_graph(
+                self.djs, "some-name", {task1: [task2], task2: [task3], task3: [task1]}
+            )
+
+    @mock_stepfunctions
+    def test_compile_a_large_graph(self):
+        random.seed(0)
+        tasks = [SomeMockedClass(f"task{i}") for i in range(1000)]
+        edges = set()
+        while len(edges) < 5000:
+            upstream, downstream = sorted(random.sample(range(len(tasks)), 2))
+            edges.add((tasks[upstream], tasks[downstream]))
+        workflow = StepfunctionsWorkflow(self.djs, "some-name")
+        workflow.add_edges(edges)
+        start = time.perf_counter()
+        levels = workflow._get_levels()
+        workflow._construct_toposorted_chain_of_tasks()
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(sum(len(level) for level in levels), 1000)
+        # the same graph gets the levels from the cache.
+        other_workflow = StepfunctionsWorkflow(self.djs, "other-name")
+        other_workflow.add_edges(edges)
+        hits = stepfunctions_workflow._toposort_names.cache_info().hits
+        self.assertEqual(other_workflow._get_levels(), levels)
+        self.assertEqual(
+            stepfunctions_workflow._toposort_names.cache_info().hits, hits + 1
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,359 @@
+import json
+import os
+import unittest
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import boto3
+from aws_cdk import core
+from moto import mock_dynamodb2
+from moto import mock_stepfunctions
+from sagemaker import LocalSession
+from sagemaker.sklearn import SKLearnProcessor
+from stepfunctions.steps.states import Task
+
+from datajob.datajob_stack import DataJobStack
+from datajob.sagemaker.sagemaker_job import ProcessingStep
+from datajob.stepfunctions import stepfunctions_trigger_handler
+from datajob.stepfunctions import stepfunctions_workflow
+from datajob.stepfunctions.stepfunctions_trigger import S3ObjectCreated
+from datajob.stepfunctions.stepfunctions_trigger import Schedule
+from datajob.stepfunctions.stepfunctions_trigger import TriggerException
+from datajob.stepfunctions.stepfunctions_trigger import WorkflowSucceeded
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+
+
+@stepfunctions_workflow.task
+class SomeMockedClass(object):
+    def __init__(self, unique_name):
+        self.unique_name = unique_name
+        self.sfn_task = Task(state_id=unique_name)
+
+
+def get_record(
+    key: str, time: str, message_id: str = "1", receive_count: int = 1
+) -> dict:
+    event = {
+        "time": time,
+        "detail": {"bucket": {"name": "some-bucket"}, "object": {"key": key}},
+    }
+    return {
+        "messageId": message_id,
+        "receiptHandle": f"handle-{message_id}",
+        "body": json.dumps(event),
+        "attributes": {"ApproximateReceiveCount": str(receive_count)},
+    }
+
+
+class TestStepfunctionsTrigger(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-1")
+
+    def setUp(self) -> None:
+        self.app = core.App()
+
+    @mock_stepfunctions
+    def test_create_workflow_with_triggers_successfully(self):
+        task1 = stepfunctions_workflow.task(SomeMockedClass("task1"))
+        task2 = stepfunctions_workflow.task(SomeMockedClass("task2"))
+
+        with DataJobStack(
+            scope=self.app,
+            id="a-unique-name",
+            stage="stage",
+            region="eu-west-1",
+            account="3098726354",
+        ) as djs:
+            with StepfunctionsWorkflow(djs, "upstream") as upstream:
+                task1 >> ...
+            with StepfunctionsWorkflow(
+                djs,
+                "some-name",
+                triggers=[
+                    Schedule("rate(1 hour)", input={"some": "input"}),
+                    S3ObjectCreated(
+                        prefix="raw/",
+                        suffix=".json",
+                        batch_size=500,
+                        debounce_seconds=120,
+                    ),
+                ],
+            ) as sfn:
+                task2 >> ...
+            sfn.add_trigger(WorkflowSucceeded(upstream))
+
+        template = self.app.synth().get_stack_by_name(djs.stack_name).template
+        resources_by_type = {}
+        for resource in template["Resources"].values():
+            resources_by_type.setdefault(resource["Type"], []).append(resource)
+        rules = {
+            rule["Properties"]["Name"]: rule["Properties"]
+            for rule in resources_by_type["AWS::Events::Rule"]
+        }
+        self.assertEqual(len(rules), 3)
+
+        schedule = rules[f"{sfn.unique_name}-schedule-0"]
+        self.assertEqual(schedule["ScheduleExpression"], "rate(1 hour)")
+        self.assertEqual(
+            schedule["Targets"][0]["InputTransformer"]["InputTemplate"],
+            '{"some": "input", "DatajobTrigger": {"Source": "schedule", "Time": "<Time>"}}',
+        )
+
+        s3_rule = rules[f"{sfn.unique_name}-s3-1"]
+        self.assertEqual(
+            s3_rule["EventPattern"]["detail"]["object"]["key"],
+            [{"wildcard": "raw/*.json"}],
+        )
+        self.assertIn("Fn::GetAtt", s3_rule["Targets"][0]["Arn"])
+        # the data bucket sends its events to eventbridge.
+        data_bucket = [
+            bucket
+            for bucket in resources_by_type["AWS::S3::Bucket"]
+            if bucket["Properties"]["BucketName"] == djs.context.data_bucket_name
+        ][0]
+        self.assertTrue(
+            data_bucket["Properties"]["NotificationConfiguration"][
+                "EventBridgeConfiguration"
+            ]["EventBridgeEnabled"]
+        )
+        queue = resources_by_type["AWS::SQS::Queue"][0]["Properties"]
+        self.assertEqual(queue["VisibilityTimeout"], 360)
+        event_source = resources_by_type["AWS::Lambda::EventSourceMapping"][0][
+            "Properties"
+        ]
+        self.assertEqual(event_source["BatchSize"], 500)
+        self.assertEqual(event_source["MaximumBatchingWindowInSeconds"], 60)
+        self.assertEqual(
+            event_source["FunctionResponseTypes"], ["ReportBatchItemFailures"]
+        )
+        trigger_function = [
+            function
+            for function in resources_by_type["AWS::Lambda::Function"]
+            if function["Properties"].get("FunctionName") == f"{sfn.unique_name}-s3-1"
+        ][0]
+        self.assertEqual(
+            trigger_function["Properties"]["Environment"]["Variables"][
+                "DEBOUNCE_SECONDS"
+            ],
+            "120",
+        )
+        self.assertEqual(
+            trigger_function["Properties"]["ReservedConcurrentExecutions"], 5
+        )
+        # one debounce marker per trigger.
+        self.assertEqual(
+            trigger_function["Properties"]["Environment"]["Variables"]["TRIGGER_NAME"],
+            f"{sfn.unique_name}-s3-1",
+        )
+        self.assertEqual(
+            [
+                table["Properties"]["TableName"]
+                for table in resources_by_type["AWS::DynamoDB::Table"]
+            ],
+            [f"{sfn.unique_name}-s3-1-debounce"],
+        )
+
+        after_upstream = rules[f"{sfn.unique_name}-after-workflow-2"]
+        self.assertEqual(
+            after_upstream["EventPattern"]["detail"]["status"], ["SUCCEEDED"]
+        )
+        self.assertIn(
+            f":stateMachine:{upstream.unique_name}",
+            json.dumps(after_upstream["EventPattern"]["detail"]["stateMachineArn"]),
+        )
+
+    def test_invalid_triggers(self):
+        with self.assertRaises(TriggerException):
+            Schedule("every hour")
+        with self.assertRaises(TriggerException):
+            Schedule("rate(1 hour)", input={"DatajobTrigger": {}})
+        with self.assertRaises(TriggerException):
+            S3ObjectCreated(prefix="raw/", batch_size=100, batching_window_seconds=0)
+        with self.assertRaises(TriggerException):
+            S3ObjectCreated(prefix="raw/", batching_window_seconds=600)
+        with self.assertRaises(TriggerException):
+            S3ObjectCreated(prefix="raw/", debounce_seconds=-1)
+        # every object the workflows write to the data bucket would trigger the workflow.
+        with self.assertRaises(TriggerException):
+            S3ObjectCreated()
+        S3ObjectCreated(bucket="some-bucket")
+
+    def test_s3_trigger_on_a_prefix_datajob_writes_to(self):
+        for prefix in ["stg/", "stg/some-name/", "datajob-task-cache/", "athena"]:
+            app = core.App()
+            with self.assertRaisesRegex(TriggerException, "overlaps"):
+                with DataJobStack(scope=app, id="some-stack", stage="stg") as djs:
+                    task1 = stepfunctions_workflow.task(SomeMockedClass("task1"))
+                    with StepfunctionsWorkflow(
+                        djs, "some-name", triggers=[S3ObjectCreated(prefix=prefix)]
+                    ):
+                        task1 >> ...
+        with DataJobStack(scope=core.App(), id="some-stack", stage="stg") as djs:
+            task1 = stepfunctions_workflow.task(SomeMockedClass("task1"))
+            with StepfunctionsWorkflow(
+                djs, "some-name", triggers=[S3ObjectCreated(prefix="raw/")]
+            ):
+                task1 >> ...
+
+    def test_schedule_of_a_workflow_that_needs_unique_names(self):
+        processor = SKLearnProcessor(
+            framework_version="0.23-1",
+            role="arn:aws:iam::111111111111:role/some-role",
+            instance_type="local",
+            instance_count=1,
+            sagemaker_session=LocalSession(),
+        )
+        # the stack creates its resources when we exit it.
+        with self.assertRaises(TriggerException):
+            with DataJobStack(scope=self.app, id="some-stack", stage="stg") as djs:
+                # the processing step gets its job name from the execution input.
+                task1 = ProcessingStep(djs, "processing-job", processor=processor)
+                with StepfunctionsWorkflow(
+                    djs, "some-name", triggers=[Schedule("rate(1 hour)")]
+                ) as sfn:
+                    task1 >> ...
+                self.assertEqual(
+                    sfn.get_execution_input_keys(), ["some-stack-stg-processing-job"]
+                )
+
+    @mock_dynamodb2
+    def test_trigger_handler_waits_for_the_objects_of_other_batches(self):
+        dynamodb_client = boto3.client("dynamodb", region_name="eu-west-1")
+        dynamodb_client.create_table(
+            TableName="some-table",
+            KeySchema=[{"AttributeName": "trigger", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "trigger", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        sqs_client = MagicMock()
+        sfn_client = MagicMock()
+        sfn_client.start_execution.return_value = {"executionArn": "some-execution"}
+        environment = {
+            "DEBOUNCE_SECONDS": "120",
+            "DEBOUNCE_TABLE": "some-table",
+            "TRIGGER_NAME": "some-trigger",
+            "QUEUE_URL": "some-queue-url",
+            "STATE_MACHINE_ARN": "some-arn",
+            "EXECUTION_INPUT_KEYS": json.dumps(["some-stack-stg-processing-job"]),
+        }
+        old_batch = [get_record("raw/a.json", "2024-01-01T00:00:00Z", "1")]
+        new_batch = [get_record("raw/b.json", "2024-01-01T00:01:30Z", "2")]
+        with patch.dict(os.environ, environment):
+            for batch, now in [
+                (new_batch, datetime(2024, 1, 1, 0, 2, tzinfo=timezone.utc)),
+                # the old batch is quiet by itself, but an object of the new batch landed 60 seconds ago.
+                (old_batch, datetime(2024, 1, 1, 0, 2, 30, tzinfo=timezone.utc)),
+            ]:
+                response = stepfunctions_trigger_handler.handler(
+                    {"Records": batch},
+                    None,
+                    sqs_client=sqs_client,
+                    sfn_client=sfn_client,
+                    dynamodb_client=dynamodb_client,
+                    now=now,
+                )
+                self.assertEqual(len(response["batchItemFailures"]), 1)
+            entries = sqs_client.change_message_visibility_batch.call_args[1]["Entries"]
+            self.assertEqual(entries[0]["VisibilityTimeout"], 60)
+            sfn_client.start_execution.assert_not_called()
+
+            # the batches come back once the burst is quiet, the first one starts the whole burst.
+            for batch in [old_batch, new_batch]:
+                response = stepfunctions_trigger_handler.handler(
+                    {
+                        "Records": [
+                            dict(record, attributes={"ApproximateReceiveCount": "2"})
+                            for record in batch
+                        ]
+                    },
+                    None,
+                    sqs_client=sqs_client,
+                    sfn_client=sfn_client,
+                    dynamodb_client=dynamodb_client,
+                    now=datetime(2024, 1, 1, 0, 3, 30, tzinfo=timezone.utc),
+                )
+                self.assertEqual(response["batchItemFailures"], [])
+        sfn_client.start_execution.assert_called_once()
+        execution_input = json.loads(sfn_client.start_execution.call_args[1]["input"])
+        # the trigger generates a unique name for the execution input of the workflow.
+        self.assertEqual(
+            execution_input["some-stack-stg-processing-job"],
+            "some-stack-stg-processing-job-20240101T000130000000",
+        )
+        self.assertEqual(execution_input["DatajobTrigger"]["ObjectCount"], 2)
+        self.assertEqual(
+            execution_input["DatajobTrigger"]["Objects"],
+            ["s3://some-bucket/raw/a.json", "s3://some-bucket/raw/b.json"],
+        )
+        self.assertTrue(
+            sfn_client.start_execution.call_args[1]["name"].startswith("some-trigger-")
+        )
+        item = dynamodb_client.get_item(
+            TableName="some-table", Key={"trigger": {"S": "some-trigger"}}
+        )["Item"]
+        # the next burst starts empty.
+        self.assertEqual(item["object_count"], {"N": "0"})
+        self.assertFalse(item.get("objects", {}).get("SS"))
+
+    def test_trigger_handler_waits_for_the_debounce_time(self):
+        records = [
+            get_record("raw/a.json", "2024-01-01T00:00:00Z", "1"),
+            get_record("raw/b.json", "2024-01-01T00:01:30Z", "2"),
+        ]
+        sqs_client = MagicMock()
+        sfn_client = MagicMock()
+        environment = {
+            "DEBOUNCE_SECONDS": "120",
+            "QUEUE_URL": "some-queue-url",
+            "STATE_MACHINE_ARN": "some-arn",
+            "EXECUTION_INPUT": json.dumps({"some": "input"}),
+        }
+        with patch.dict(os.environ, environment):
+            # the last object landed 30 seconds ago, we put the batch back for 90 seconds.
+            response = stepfunctions_trigger_handler.handler(
+                {"Records": records},
+                None,
+                sqs_client=sqs_client,
+                sfn_client=sfn_client,
+                now=datetime(2024, 1, 1, 0, 2, tzinfo=timezone.utc),
+            )
+            self.assertEqual(
+                response["batchItemFailures"],
+                [{"itemIdentifier": "1"}, {"itemIdentifier": "2"}],
+            )
+            entries = sqs_client.change_message_visibility_batch.call_args[1]["Entries"]
+            self.assertEqual({entry["VisibilityTimeout"] for entry in entries}, {90})
+            sfn_client.start_execution.assert_not_called()
+
+            # it's quiet for 2 minutes, we start one execution for the batch.
+            sfn_client.start_execution.return_value = {"executionArn": "some-execution"}
+            response = stepfunctions_trigger_handler.handler(
+                {"Records": records},
+                None,
+                sqs_client=sqs_client,
+                sfn_client=sfn_client,
+                now=datetime(2024, 1, 1, 0, 3, 30, tzinfo=timezone.utc),
+            )
+        self.assertEqual(response["batchItemFailures"], [])
+        execution_input = json.loads(sfn_client.start_execution.call_args[1]["input"])
+        self.assertEqual(
+            execution_input,
+            {
+                "some": "input",
+                "DatajobTrigger": {
+                    "Source": "s3",
+                    "ObjectCount": 2,
+                    "Objects": [
+                        "s3://some-bucket/raw/a.json",
+                        "s3://some-bucket/raw/b.json",
+                    ],
+                },
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,8 +10,12 @@ from stepfunctions.steps.states import Parallel
 from stepfunctions.steps.states import Task
 
 from datajob.datajob_stack import DataJobStack
+from datajob.glue.glue_job import GlueJob
 from datajob.stepfunctions import stepfunctions_workflow
 from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+from datajob.stepfunctions.stepfunctions_workflow import (
+    StepfunctionsWorkflowException,
+)
 
 
 @stepfunctions_workflow.task
@@ -205,3 +209,199 @@ class TestStepfunctionsWorkflow(unittest.TestCase):
             a_step_functions_workflow.workflow.definition.to_dict(),
             expected_workflow_definition,
         )
+
+    @mock_stepfunctions
+    def test_create_skippable_workflow_successfully(self):
+        task1 = stepfunctions_workflow.task(SomeMockedClass("task1"))
+        task2 = stepfunctions_workflow.task(SomeMockedClass("task2"))
+        task3 = stepfunctions_workflow.task(SomeMockedClass("task3"))
+
+        djs = DataJobStack(
+            scope=self.app,
+            id="a-unique-name-4",
+            stage="stage",
+            project_root="sampleproject/",
+            region="eu-west-1",
+            account="3098726354",
+        )
+        with StepfunctionsWorkflow(
+            djs, "some-name", skippable=True
+        ) as a_step_functions_workflow:
+            task1 >> task3
+            task2 >> task3
+
+        definition = a_step_functions_workflow.workflow.definition.to_dict()
+        parallel_branch = definition.get("States").get(definition.get("StartAt"))
+        self.assertEqual(parallel_branch.get("Type"), "Parallel")
+        self.assertEqual(parallel_branch.get("Next"), "task3-skip")
+        self.assertEqual(
+            {branch.get("StartAt") for branch in parallel_branch.get("Branches")},
+            {"task1-skip", "task2-skip"},
+        )
+
+        skip_choice = definition.get("States").get("task3-skip")
+        self.assertEqual(skip_choice.get("Type"), "Choice")
+        self.assertEqual(skip_choice.get("Default"), "task3")
+        self.assertEqual(skip_choice.get("Choices")[0].get("Next"), "task3-done")
+        self.assertEqual(
+            skip_choice.get("Choices")[0].get("And")[1].get("Variable"),
+            "$$.Execution.Input['DatajobSkipTasks']['task3']",
+        )
+        self.assertEqual(
+            definition.get("States").get("task3").get("Next"), "task3-done"
+        )
+        self.assertTrue(definition.get("States").get("task3-done").get("End"))
+        # the choice keeps the tasks that run before task3, for datajob execute --only.
+        self.assertEqual(
+            json.loads(skip_choice.get("Comment")),
+            {"DatajobUpstreamTasks": ["task1", "task2"]},
+        )
+
+    @mock_stepfunctions
+    def test_create_express_workflow_successfully(self):
+        task1 = stepfunctions_workflow.task(SomeMockedClass("task1"))
+        task2 = stepfunctions_workflow.task(SomeMockedClass("task2"))
+
+        with DataJobStack(
+            scope=self.app,
+            id="a-unique-name-5",
+            stage="stage",
+            region="eu-west-1",
+            account="3098726354",
+        ) as djs:
+            with StepfunctionsWorkflow(
+                djs, "some-name", workflow_type="EXPRESS"
+            ) as a_step_functions_workflow:
+                task1 >> task2
+
+        template = self.app.synth().get_stack_by_name(djs.stack_name).template
+        state_machine = template["Resources"][
+            djs.get_logical_id(
+                djs.node.find_child(a_step_functions_workflow.unique_name)
+            )
+        ]
+        self.assertEqual(state_machine["Properties"]["StateMachineType"], "EXPRESS")
+        self.assertEqual(
+            state_machine["Properties"]["LoggingConfiguration"]["Level"], "ERROR"
+        )
+        log_groups = [
+            resource
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::Logs::LogGroup"
+        ]
+        self.assertEqual(len(log_groups), 1)
+
+    @mock_stepfunctions
+    def test_express_workflow_rejects_tasks_that_wait_for_completion(self):
+        djs = DataJobStack(
+            scope=self.app,
+            id="a-unique-name-6",
+            stage="stage",
+            region="eu-west-1",
+            account="3098726354",
+        )
+        glue_job = GlueJob(djs, "some-task", "some/path/task.py")
+        with self.assertRaises(StepfunctionsWorkflowException):
+            with StepfunctionsWorkflow(djs, "some-name", workflow_type="EXPRESS"):
+                glue_job >> ...
+
+        glue_job_without_waiting = GlueJob(
+            djs, "other-task", "some/path/task.py", wait_for_completion=False
+        )
+        with StepfunctionsWorkflow(
+            djs, "other-name", workflow_type="EXPRESS"
+        ) as a_step_functions_workflow:
+            glue_job_without_waiting >> ...
+        self.assertIsNotNone(a_step_functions_workflow.workflow)
+
+    def test_unknown_workflow_type(self):
+        djs = DataJobStack(scope=self.app, id="a-unique-name-7", stage="stage")
+        with self.assertRaises(StepfunctionsWorkflowException):
+            StepfunctionsWorkflow(djs, "some-name", workflow_type="SOMETHING")
+
+    @mock_stepfunctions
+    def test_create_workflow_with_max_parallelism_successfully(self):
+        tasks = [
+            stepfunctions_workflow.task(SomeMockedClass(f"task{index}"))
+            for index in range(5)
+        ]
+        last_task = stepfunctions_workflow.task(SomeMockedClass("last-task"))
+        djs = DataJobStack(scope=self.app, id="a-unique-name-8", stage="stage")
+        with StepfunctionsWorkflow(
+            djs, "some-name", max_parallelism=2
+        ) as a_step_functions_workflow:
+            for a_task in tasks:
+                a_task >> last_task
+
+        parallel_branch = a_step_functions_workflow.chain_of_tasks.steps[0]
+        self.assertEqual(parallel_branch.state_type, "Parallel")
+        branches = parallel_branch.to_dict()["Branches"]
+        self.assertEqual(len(branches), 2)
+        self.assertEqual(sorted(len(branch["States"]) for branch in branches), [2, 3])
+        self.assertEqual(
+            a_step_functions_workflow.chain_of_tasks.steps[1].state_id, "last-task"
+        )
+
+    def test_split_in_lanes_balances_estimated_cost(self):
+        tasks = []
+        for name, cost in [("a", 5), ("b", 4), ("c", 3), ("d", 3), ("e", 1)]:
+            a_task = SomeMockedClass(name)
+            a_task.estimated_cost = cost
+            tasks.append(a_task)
+        lanes = StepfunctionsWorkflow._split_in_lanes(tasks, max_parallelism=2)
+        self.assertEqual(
+            [[a_task.unique_name for a_task in lane] for lane in lanes],
+            [["a", "d"], ["b", "c", "e"]],
+        )
+
+    def test_invalid_max_parallelism(self):
+        djs = DataJobStack(scope=self.app, id="a-unique-name-9", stage="stage")
+        with self.assertRaises(StepfunctionsWorkflowException):
+            StepfunctionsWorkflow(djs, "some-name", max_parallelism=0)
+
+    @mock_stepfunctions
+    def test_workflow_as_a_task_of_another_workflow(self):
+        task1 = stepfunctions_workflow.task(SomeMockedClass("task1"))
+        task2 = stepfunctions_workflow.task(SomeMockedClass("task2"))
+        task3 = stepfunctions_workflow.task(SomeMockedClass("task3"))
+        with DataJobStack(
+            scope=self.app,
+            id="a-unique-name-10",
+            stage="stage",
+            region="eu-west-1",
+            account="3098726354",
+        ) as djs:
+            with StepfunctionsWorkflow(djs, "main") as main:
+                # we define the sub workflow inside the main workflow.
+                with StepfunctionsWorkflow(djs, "sub") as sub:
+                    task1 >> task2
+                sub >> task3
+
+        definition = main.workflow.definition.to_dict()
+        self.assertEqual(definition["StartAt"], sub.unique_name)
+        sub_state = definition["States"][sub.unique_name]
+        self.assertEqual(
+            sub_state["Resource"], "arn:aws:states:::states:startExecution.sync:2"
+        )
+        self.assertEqual(
+            sub_state["Parameters"]["StateMachineArn"],
+            f"arn:aws:states:eu-west-1:3098726354:stateMachine:{sub.unique_name}",
+        )
+        # the sub workflow gets the execution input and the run id of the main workflow.
+        self.assertEqual(
+            sub_state["Parameters"]["Input.$"],
+            "States.JsonMerge(States.StringToJson(States.Format("
+            '\'\\{"DatajobRunId": "{}"\\}\', $$.Execution.Name)), '
+            "$$.Execution.Input, false)",
+        )
+        self.assertEqual(sub_state["Next"], "task3")
+        self.assertEqual(
+            list(sub.workflow.definition.to_dict()["States"]), ["task1", "task2"]
+        )
+        self.assertIsNone(stepfunctions_workflow._get_workflow())
+
+    def test_workflow_cannot_be_a_task_of_itself(self):
+        djs = DataJobStack(scope=self.app, id="a-unique-name-11", stage="stage")
+        with self.assertRaises(StepfunctionsWorkflowException):
+            with StepfunctionsWorkflow(djs, "some-name") as a_step_functions_workflow:
+                a_step_functions_workflow >> ...
@@ -2,8 +2,11 @@ import unittest
 
 from aws_cdk import core
 
+from datajob.batch.batch_job import BatchJob
+from datajob.datajob_context import DataBucketLifecycle
 from datajob.datajob_stack import DataJobContext
 from datajob.datajob_stack import DataJobStack
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
 
 
 class TestDataJobContext(unittest.TestCase):
@@ -37,3 +40,64 @@ class TestDataJobContext(unittest.TestCase):
         except Exception as e:
             exception_ = e
         self.assertIsNone(exception_)
+
+    def _get_lifecycle_rules(self, **kwargs) -> list:
+        app = core.App()
+        djs = DataJobStack(scope=app, id="some-stack", stage="stg", **kwargs)
+        djs.init_datajob_context()
+        task1 = BatchJob(djs, "task1", image="some-image")
+        with StepfunctionsWorkflow(djs, "some-workflow") as sfn:
+            task1 >> ...
+        djs.create_resources()
+        template = app.synth().get_stack_by_name(djs.stack_name).template
+        data_bucket = [
+            resource
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::S3::Bucket"
+            and resource["Properties"]["BucketName"] == djs.context.data_bucket_name
+        ][0]
+        return data_bucket["Properties"].get("LifecycleConfiguration", {}).get("Rules")
+
+    def test_data_bucket_has_no_lifecycle_by_default(self):
+        self.assertIsNone(self._get_lifecycle_rules())
+
+    def test_data_bucket_lifecycle(self):
+        rules = {
+            rule["Id"]: rule
+            for rule in self._get_lifecycle_rules(
+                data_bucket_lifecycle=DataBucketLifecycle()
+            )
+        }
+        # we only expire the runs of the workflows of the stack, not everything under the stage.
+        self.assertEqual(
+            rules["expire-runs-stg-some-workflow"]["Prefix"], "stg/some-workflow/"
+        )
+        self.assertEqual(rules["expire-runs-stg-some-workflow"]["ExpirationInDays"], 30)
+        self.assertEqual(
+            rules["tier-final-outputs"]["Transitions"],
+            [{"StorageClass": "INTELLIGENT_TIERING", "TransitionInDays": 0}],
+        )
+        self.assertEqual(
+            rules["abort-incomplete-multipart-uploads"][
+                "AbortIncompleteMultipartUpload"
+            ],
+            {"DaysAfterInitiation": 7},
+        )
+
+    def test_data_bucket_lifecycle_configured(self):
+        rules = self._get_lifecycle_rules(
+            data_bucket_lifecycle=DataBucketLifecycle(
+                intermediate_expiration_days=3, final_prefix=None
+            )
+        )
+        self.assertEqual(
+            [rule["Id"] for rule in rules],
+            [
+                "abort-incomplete-multipart-uploads",
+                "expire-task-cache",
+                "expire-runs-stg-some-workflow",
+            ],
+        )
+        # a cache hit should not point at the results of a run we already expired.
+        self.assertEqual(rules[1]["ExpirationInDays"], 2)
+        self.assertEqual(rules[2]["ExpirationInDays"], 3)
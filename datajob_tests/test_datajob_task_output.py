@@ -0,0 +1,305 @@
+import pathlib
+import tempfile
+import unittest
+
+from aws_cdk import core
+
+from datajob.awslambda.lambda_task import LambdaTask
+from datajob.datajob_stack import DataJobStack
+from datajob.datajob_task_output import TaskOutputException
+from datajob.glue.glue_job import GlueJob
+from datajob.runtime import s3 as s3_runtime
+from datajob.stepfunctions.stepfunctions_workflow import StepfunctionsWorkflow
+from datajob.stepfunctions.stepfunctions_workflow import (
+    StepfunctionsWorkflowException,
+)
+
+
+class TestDataJobTaskOutput(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = core.App()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.project_root = self.tmp_dir.name
+        pathlib.Path(self.project_root, "dist").mkdir()
+        pathlib.Path(
+            self.project_root, "dist", "some_pkg-0.1.0-py3-none-any.whl"
+        ).write_bytes(b"")
+        pathlib.Path(self.project_root, "task.py").write_text("print('hello')")
+        self.djs = DataJobStack(
+            scope=self.app,
+            id="some-stack",
+            stage="stg",
+            project_root=self.project_root,
+        )
+        self.djs.init_datajob_context()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_workflow_passes_task_outputs(self):
+        prepare = GlueJob(self.djs, "prepare", "task.py")
+        features = prepare.add_output("features")
+        validate = LambdaTask(
+            self.djs,
+            "validate",
+            handler="some_pkg.validate",
+            payload={"features": features},
+        )
+        validate.add_output("report", path="$.Payload.report")
+        train = GlueJob(self.djs, "train", "task.py")
+        train.add_output("run_id", path="$.Id")
+        evaluate = GlueJob(
+            self.djs,
+            "evaluate",
+            "task.py",
+            arguments={
+                "--features": prepare.output("features"),
+                "--report": validate.output("report"),
+                "--train-run-id": train.output("run_id"),
+                "--some-argument": "a",
+            },
+        )
+        with StepfunctionsWorkflow(self.djs, "some-workflow") as sfn:
+            prepare >> validate >> evaluate
+            prepare >> train >> evaluate
+        self.djs.create_resources()
+        definition = sfn.workflow.definition.to_dict()
+        states = definition["States"]
+
+        self.assertEqual(definition["StartAt"], "datajob-run")
+        self.assertEqual(states["datajob-run"]["Default"], "datajob-run-from-execution")
+        self.assertEqual(
+            states["datajob-run-from-execution"]["Parameters"],
+            {"RunId.$": "$$.Execution.Name", "Outputs": {}},
+        )
+        self.assertEqual(states["datajob-run-from-input"]["Next"], prepare.unique_name)
+        features_location = (
+            f"States.Format('s3://{self.djs.context.data_bucket_name}/stg/some-workflow/{{}}/prepare/features/', "
+            f"$.Datajob.RunId)"
+        )
+        # the glue job gets the location of its own output.
+        prepare_state = states[prepare.unique_name]
+        self.assertEqual(
+            prepare_state["Parameters"]["Arguments"]["--datajob_output_features.$"],
+            features_location,
+        )
+        self.assertIsNone(prepare_state["ResultPath"])
+        self.assertNotIn("ResultSelector", prepare_state)
+        # a task selects its outputs from its result and adds them to the state.
+        parallel_state = [
+            state for state in states.values() if state["Type"] == "Parallel"
+        ][0]
+        branch_states = {
+            state_id: state
+            for branch in parallel_state["Branches"]
+            for state_id, state in branch["States"].items()
+        }
+        validate_state = branch_states[validate.unique_name]
+        self.assertEqual(
+            validate_state["Parameters"]["Payload"], {"features.$": features_location}
+        )
+        self.assertEqual(
+            validate_state["ResultSelector"], {"report.$": "$.Payload.report"}
+        )
+        self.assertEqual(
+            validate_state["ResultPath"],
+            f"$.Datajob.Outputs['{validate.unique_name}']",
+        )
+        # the parallel state merges the outputs of its branches.
+        self.assertEqual(parallel_state["ResultPath"], "$.Datajob")
+        self.assertEqual(
+            parallel_state["ResultSelector"],
+            {
+                "RunId.$": "$[0].Datajob.RunId",
+                "Outputs.$": "States.JsonMerge($[0].Datajob.Outputs, $[1].Datajob.Outputs, false)",
+            },
+        )
+        evaluate_arguments = states[evaluate.unique_name]["Parameters"]["Arguments"]
+        self.assertEqual(evaluate_arguments["--features.$"], features_location)
+        self.assertEqual(
+            evaluate_arguments["--report.$"],
+            f"$.Datajob.Outputs['{validate.unique_name}']['report']",
+        )
+        self.assertEqual(
+            evaluate_arguments["--train-run-id.$"],
+            f"$.Datajob.Outputs['{train.unique_name}']['run_id']",
+        )
+        # only the outputs of other tasks are passed via the task, the rest are default arguments.
+        self.assertNotIn("--some-argument", evaluate_arguments)
+        template = self.app.synth().get_stack_by_name(self.djs.stack_name).template
+        evaluate_job = [
+            resource
+            for resource in template["Resources"].values()
+            if resource["Type"] == "AWS::Glue::Job"
+            and resource["Properties"]["Name"] == evaluate.unique_name
+        ][0]
+        self.assertEqual(
+            evaluate_job["Properties"]["DefaultArguments"]["--some-argument"], "a"
+        )
+        self.assertNotIn("--features", evaluate_job["Properties"]["DefaultArguments"])
+
+    def test_workflow_without_task_outputs_does_not_change(self):
+        task1 = GlueJob(self.djs, "task1", "task.py")
+        task2 = GlueJob(self.djs, "task2", "task.py")
+        with StepfunctionsWorkflow(self.djs, "some-workflow") as sfn:
+            task1 >> task2
+        definition = sfn.workflow.definition.to_dict()
+        self.assertEqual(definition["StartAt"], task1.unique_name)
+        self.assertNotIn("ResultPath", definition["States"][task1.unique_name])
+
+    def test_task_uses_output_of_a_task_that_does_not_run_before_it(self):
+        task1 = GlueJob(self.djs, "task1", "task.py")
+        task1.add_output("features")
+        task2 = GlueJob(
+            self.djs,
+            "task2",
+            "task.py",
+            arguments={"--features": task1.output("features")},
+        )
+        with self.assertRaises(StepfunctionsWorkflowException):
+            with StepfunctionsWorkflow(self.djs, "some-workflow"):
+                task2 >> task1
+
+    def test_cached_task_passes_the_folder_of_the_run_that_produced_it(self):
+        prepare = GlueJob(self.djs, "prepare", "task.py", cache=True)
+        prepare.add_output("features")
+        train = GlueJob(
+            self.djs,
+            "train",
+            "task.py",
+            arguments={"--features": prepare.output("features")},
+        )
+        with StepfunctionsWorkflow(self.djs, "some-workflow") as sfn:
+            prepare >> train
+        states = sfn.workflow.definition.to_dict()["States"]
+        outputs_path = f"$.Datajob.Outputs['{prepare.unique_name}']"
+        features_location = (
+            f"States.Format('s3://{self.djs.context.data_bucket_name}/{{}}/prepare/features/', "
+            f"{outputs_path}['RunPrefix'])"
+        )
+        self.assertEqual(
+            states[train.unique_name]["Parameters"]["Arguments"]["--features.$"],
+            features_location,
+        )
+        # the cache states run in a branch, we keep the outputs of the branch.
+        keep_state = states[f"{prepare.unique_name}-keep-state"]
+        self.assertEqual(keep_state["ResultPath"], "$.Datajob")
+        self.assertEqual(
+            keep_state["ResultSelector"],
+            {"RunId.$": "$[0].Datajob.RunId", "Outputs.$": "$[0].Datajob.Outputs"},
+        )
+        cache_states = keep_state["Branches"][0]["States"]
+        # on a hit, the run prefix is the one the ledger recorded.
+        self.assertEqual(
+            cache_states[f"{prepare.unique_name}-cache-hit"]["Choices"][0]["Next"],
+            f"{prepare.unique_name}-cache-read",
+        )
+        self.assertEqual(
+            cache_states[f"{prepare.unique_name}-cache-read"]["ResultSelector"],
+            {"RunPrefix.$": "$.Body"},
+        )
+        self.assertEqual(
+            cache_states[f"{prepare.unique_name}-cache-read"]["ResultPath"],
+            outputs_path,
+        )
+        # on a miss, the glue job writes under the run prefix of this run.
+        self.assertEqual(
+            cache_states[f"{prepare.unique_name}-cache-hit"]["Default"],
+            f"{prepare.unique_name}-cache-run-prefix",
+        )
+        self.assertEqual(
+            cache_states[f"{prepare.unique_name}-cache-run-prefix"]["Parameters"],
+            {"RunPrefix.$": "$.DatajobCache.run_prefix"},
+        )
+        prepare_state = cache_states[f"{prepare.unique_name}-cache-run"]["Branches"][0][
+            "States"
+        ][prepare.unique_name]
+        self.assertEqual(
+            prepare_state["Parameters"]["Arguments"]["--datajob_output_features.$"],
+            features_location,
+        )
+
+    def test_cached_task_cannot_use_results(self):
+        task1 = GlueJob(self.djs, "task1", "task.py", cache=True)
+        task1.add_output("run_id", path="$.Id")
+        with self.assertRaises(StepfunctionsWorkflowException):
+            with StepfunctionsWorkflow(self.djs, "some-workflow"):
+                task1 >> ...
+        task2 = GlueJob(self.djs, "task2", "task.py")
+        task2.add_output("features")
+        task3 = GlueJob(
+            self.djs,
+            "task3",
+            "task.py",
+            cache=True,
+            arguments={"--features": task2.output("features")},
+        )
+        with self.assertRaises(StepfunctionsWorkflowException):
+            with StepfunctionsWorkflow(self.djs, "other-workflow"):
+                task2 >> task3
+
+    def test_task_outputs_are_typed(self):
+        task1 = LambdaTask(self.djs, "task1", handler="some_pkg.handler")
+        task1.add_output("config", path="$.Payload", type=dict)
+        with self.assertRaises(ValueError):
+            GlueJob(
+                self.djs,
+                "task2",
+                "task.py",
+                arguments={"--config": task1.output("config")},
+            )
+        with self.assertRaises(TaskOutputException):
+            task1.add_output("folder", type=dict)
+        with self.assertRaises(TaskOutputException):
+            task1.add_output("config", path="$.Payload")
+        with self.assertRaises(TaskOutputException):
+            task1.output("unknown")
+
+    def test_wide_parallel_state_merges_outputs_in_a_balanced_tree(self):
+        tasks = []
+        for i in range(16):
+            a_task = LambdaTask(self.djs, f"task{i}", handler="some_pkg.handler")
+            a_task.add_output("result", path="$.Payload")
+            tasks.append(a_task)
+        evaluate = GlueJob(
+            self.djs,
+            "evaluate",
+            "task.py",
+            arguments={
+                f"--{i}": a_task.output("result") for i, a_task in enumerate(tasks)
+            },
+        )
+        with StepfunctionsWorkflow(self.djs, "some-workflow") as sfn:
+            for a_task in tasks:
+                a_task >> evaluate
+        self.djs.create_resources()
+        states = sfn.workflow.definition.to_dict()["States"]
+        parallel_state = [
+            state for state in states.values() if state["Type"] == "Parallel"
+        ][0]
+        self.assertEqual(len(parallel_state["Branches"]), 16)
+        merged_outputs = parallel_state["ResultSelector"]["Outputs.$"]
+        for i in range(16):
+            self.assertIn(f"$[{i}].Datajob.Outputs", merged_outputs)
+        # 16 branches are merged 4 levels deep.
+        depth = max_depth = 0
+        for character in merged_outputs:
+            depth += {"(": 1, ")": -1}.get(character, 0)
+            max_depth = max(max_depth, depth)
+        self.assertEqual(merged_outputs.count("States.JsonMerge("), 15)
+        self.assertEqual(max_depth, 4)
+
+    def test_get_output_location(self):
+        self.assertEqual(
+            s3_runtime.get_output_location(
+                "features",
+                argv=["script.py", "--datajob_output_features", "s3://bucket/folder/"],
+            ),
+            "s3://bucket/folder/",
+        )
+        with self.assertRaises(s3_runtime.S3Exception):
+            s3_runtime.get_output_location("features", argv=["script.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()